@@ -2,27 +2,20 @@ import os
 import streamlit as st
 from dotenv import load_dotenv
 from json_processor import LessonPlanProcessor
-import requests
-from PIL import Image
-from io import BytesIO
 
 # Create the games directory if it doesn't exist
 os.makedirs("games", exist_ok=True)
 
-# Import game modules
-from games.ordinal_race import OrdinalRaceGame
-from games.multiverse_explorer import MultiverseExplorerGame
-from games.indus_valley import IndusValleyAdventureGame
-from games.dna_detective import DNADetectiveGame
+# Game modules are imported on demand through the registry
+from games.registry import get_game_instance, requires_llm
+from games.media import display_image
+from games import tracing
+from games.progress_store import STUDENT_KEY
+from games.leaderboard import ALL_STUDENTS, CLASS_KEY, LEADERBOARD_REFRESH, get_leaderboard
 
 # Load environment variables
 load_dotenv()
 
-# Check if API key is set
-if not os.getenv("OPENAI_API_KEY"):
-    st.error("OpenAI API key not found. Please set it in the .env file.")
-    st.stop()
-
 # Set page configuration
 st.set_page_config(
     page_title="Educational Gamification Apps",
@@ -30,19 +23,115 @@ st.set_page_config(
     layout="wide"
 )
 
-def display_image(url, width=None):
-    """Display an image from a URL with optional width"""
-    try:
-        response = requests.get(url)
-        img = Image.open(BytesIO(response.content))
-        if width:
-            st.image(img, width=width)
-        else:
-            st.image(img)
-        return True
-    except Exception as e:
-        st.error(f"Could not load image: {e}")
-        return False
+@st.cache_resource(show_spinner=False)
+def load_catalog(json_path: str, modified: float):
+    """
+    Process the lesson plan once per process instead of on every rerun.
+    
+    Args:
+        json_path: Path to the lesson plan JSON file
+        modified: Modification time of the file, so edits are picked up
+        
+    Returns:
+        Tuple of the LessonPlanProcessor and its extracted game info
+    """
+    processor = LessonPlanProcessor(json_path)
+    return processor, processor.extract_game_info()
+
+def sign_in():
+    """
+    Student ID callback: keep the ID in the page URL, so a refresh signs the
+    student back in, and drop the loaded game states so the student's own
+    saved progress is loaded on the next render.
+    """
+    student_id = st.session_state[STUDENT_KEY]
+    if student_id:
+        st.query_params["student"] = student_id
+    else:
+        st.query_params.pop("student", None)
+    for game in st.session_state.get("_game_instances", {}).values():
+        st.session_state.pop(game.state_key, None)
+
+def join_class():
+    """Class code callback: keep the code in the page URL, like the student ID"""
+    class_id = st.session_state[CLASS_KEY]
+    if class_id:
+        st.query_params["class"] = class_id
+    else:
+        st.query_params.pop("class", None)
+
+def select_game(game_name):
+    """Play button callback: make a game the selected one"""
+    st.session_state.selected_game = game_name
+
+@st.fragment(key="game_selection")
+def render_game_selection(games_by_type, game_types):
+    """
+    Render the game cards, grouped in a tab per game type.
+    
+    Runs as a fragment inside the sidebar; picking a game changes the main
+    area, so the Play buttons rerun the whole app.
+    """
+    with tracing.trace_run("game_selection"):
+        _render_game_cards(games_by_type, game_types)
+
+def _render_game_cards(games_by_type, game_types):
+    """Draw a card with a Play button for every game"""
+    game_type_tabs = st.tabs([game_types.get(t, t) for t in games_by_type.keys()])
+    
+    # For each tab, show the games of that type
+    for i, (game_type, games) in enumerate(games_by_type.items()):
+        with game_type_tabs[i]:
+            for game in games:
+                # Create a card-like display for each game
+                st.markdown(f"### {game['name']}")
+                # Show game image
+                if 'image_url' in game and game['image_url']:
+                    display_image(game['image_url'], width=200)
+                
+                st.markdown(f"**Topic:** {game['title']}")
+                st.markdown(game['description'][:100] + "...")
+                
+                if st.button(f"Play {game['name']}", key=f"play_{game['name']}",
+                             on_click=select_game, args=(game["name"],)):
+                    st.rerun(scope="app")
+
+@st.fragment(key="game")
+def render_game(game):
+    """
+    Render the active game.
+    
+    Runs as a fragment, so answering a question or clicking through the
+    game reruns only this function rather than the whole app.
+    """
+    game.render()
+
+@st.fragment(run_every=LEADERBOARD_REFRESH)
+def render_leaderboard(leaderboard_key):
+    """
+    Render a game's leaderboard (see BaseGame.leaderboard_key) for the student's class.
+    
+    Runs as a fragment that redraws itself every LEADERBOARD_REFRESH
+    seconds, so other students' scores show up without rerunning the page.
+    """
+    student_id = st.session_state.get(STUDENT_KEY) or None
+    class_id = st.session_state.get(CLASS_KEY) or ALL_STUDENTS
+    standings = get_leaderboard().standings(leaderboard_key, class_id, student_id)
+    
+    st.markdown("### 🏆 Leaderboard" + (f" · Class {class_id}" if class_id else ""))
+    if not standings["top"]:
+        st.caption("No scores yet. Enter a Student ID in the sidebar to join the leaderboard.")
+        return
+    
+    st.dataframe(
+        [{"Rank": s.rank, "Student": s.student_id, "Score": s.score} for s in standings["top"]],
+        hide_index=True,
+        width="stretch",
+    )
+    if standings["rank"] is not None:
+        st.markdown(f"**You:** #{standings['rank']} of {standings['students']} with {standings['score']} points")
+    elif not student_id:
+        st.caption("Enter a Student ID in the sidebar to join the leaderboard.")
 
 def main():
     """Main application entry point"""
@@ -52,12 +141,25 @@ def main():
     st.subheader("Interactive Learning Games")
     
     # Process the lesson plan JSON data
-    processor = LessonPlanProcessor("idea.json")
-    games_info = processor.extract_game_info()
+    json_path = "idea.json"
+    modified = os.path.getmtime(json_path) if os.path.exists(json_path) else 0.0
+    with tracing.span("load_catalog", "app"):
+        processor, games_info = load_catalog(json_path, modified)
     
     # Create a sidebar for game selection with improved visuals
     st.sidebar.title("🎲 Game Selection")
     
+    # Signed-in students get their progress saved and resumed, and a place
+    # on their class's leaderboards
+    if STUDENT_KEY not in st.session_state:
+        st.session_state[STUDENT_KEY] = st.query_params.get("student", "")
+    if CLASS_KEY not in st.session_state:
+        st.session_state[CLASS_KEY] = st.query_params.get("class", "")
+    st.sidebar.text_input("Student ID", key=STUDENT_KEY, on_change=sign_in,
+                          help="Enter your ID to save your progress and pick up where you left off")
+    st.sidebar.text_input("Class code", key=CLASS_KEY, on_change=join_class,
+                          help="Students with the same class code share leaderboards")
+    
     # Group games by type for better organization
     game_types = {
         "racing_game": "🏁 Racing Games",
@@ -75,36 +177,18 @@ def main():
             games_by_type[game_type] = []
         games_by_type[game_type].append(game)
     
-    # Create a more visual game selector with images
-    selected_game_info = None
-    
     # Show a tab for each game type that has games
     if games_by_type:
-        game_type_tabs = st.sidebar.tabs([game_types.get(t, t) for t in games_by_type.keys()])
-        
-        # For each tab, show the games of that type
-        for i, (game_type, games) in enumerate(games_by_type.items()):
-            with game_type_tabs[i]:
-                for game in games:
-                    # Create a card-like display for each game
-                    st.sidebar.markdown(f"### {game['name']}")
-                    # Show game image
-                    if 'image_url' in game and game['image_url']:
-                        display_image(game['image_url'], width=200)
-                    
-                    st.sidebar.markdown(f"**Topic:** {game['title']}")
-                    st.sidebar.markdown(game['description'][:100] + "...")
-                    
-                    if st.sidebar.button(f"Play {game['name']}", key=f"play_{game['name']}"):
-                        selected_game_info = game
+        with st.sidebar:
+            render_game_selection(games_by_type, game_types)
     
-    # If no game is selected via buttons, use the previously selected game or select the first one
-    if not selected_game_info:
-        if "selected_game" in st.session_state:
-            selected_game_name = st.session_state.selected_game
-            selected_game_info = next((g for g in games_info if g["name"] == selected_game_name), games_info[0] if games_info else None)
-        else:
-            selected_game_info = games_info[0] if games_info else None
+    # Use the previously selected game or select the first one
+    selected_game_info = None
+    if "selected_game" in st.session_state:
+        selected_game_name = st.session_state.selected_game
+        selected_game_info = next((g for g in games_info if g["name"] == selected_game_name), games_info[0] if games_info else None)
+    else:
+        selected_game_info = games_info[0] if games_info else None
             
     if selected_game_info:
         # Store the selected game name in session state
@@ -143,23 +227,32 @@ def main():
         
         # Start button
         if st.button("🔄 Start Game", type="primary", key="start_game"):
-            # Initialize and launch the appropriate game
-            if game_type == "racing_game":
-                game = OrdinalRaceGame(selected_game_info)
-            elif game_type == "creative_writing":
-                game = MultiverseExplorerGame(selected_game_info)
-            elif game_type == "exploration_game":
-                game = IndusValleyAdventureGame(selected_game_info)
-            elif game_type == "detective_game":
-                game = DNADetectiveGame(selected_game_info)
-            else:
+            st.session_state.active_game = selected_game_info["name"]
+        
+        # Keep rendering the started game on later reruns (answers, navigation)
+        if st.session_state.get("active_game") == selected_game_info["name"]:
+            # Only games that talk to the LLM need an API key
+            if requires_llm(game_type) and not os.getenv("OPENAI_API_KEY"):
+                st.error("OpenAI API key not found. Please set it in the .env file.")
+                return
+            
+            # Reuse this session's game instance instead of rebuilding it
+            game_instances = st.session_state.setdefault("_game_instances", {})
+            game = get_game_instance(selected_game_info, processor.catalog_version, game_instances)
+            if game is None:
                 st.error("Unknown game type. Please select another game.")
                 return
                 
             # Render the game
-            game.render()
+            render_game(game)
+            
+            st.markdown("---")
+            render_leaderboard(game.leaderboard_key)
     else:
         st.warning("No games found in the lesson plan. Please check your JSON data.")
 
 if __name__ == "__main__":
-    main()
+    # Tracing is off unless LP_TRACE_FILE or LP_TRACE_OVERLAY is set, or the
+    # page is opened with ?trace=1 (see games/tracing.py)
+    with tracing.trace_run("app.main"):
+        main()
@@ -0,0 +1,191 @@
+"""
+Run the benchmark suite and write machine-readable results.
+
+Runs every benchmark module and writes one JSON document with the git
+commit, time and Python version next to each suite's results, so runs
+from different commits can be compared with --compare:
+
+    python -m benchmarks --output before.json
+    (check out another commit)
+    python -m benchmarks --output after.json --compare before.json
+
+The load test takes a while and is only run when asked for with --only.
+
+Usage:
+    python -m benchmarks [--quick] [--only suite,...] [--output FILE] [--compare FILE]
+"""
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+from typing import Dict, Any, Iterator, Tuple
+
+from . import (
+    analytics,
+    catalog,
+    content_build,
+    draft_feedback,
+    evaluation_cache,
+    event_log,
+    forensics,
+    headless_sessions,
+    image_cache,
+    import_time,
+    interactions,
+    leaderboard,
+    load_test,
+    phase_render,
+    phase_transitions,
+    progress_persistence,
+    puzzles,
+    quiz_game,
+    race_sim,
+    report_screen,
+    session_memory,
+    session_scale_out,
+    statement_pool,
+    tracing_overhead,
+)
+
+# Suite name -> (run function, full-size arguments, --quick arguments)
+SUITES = {
+    "import_time": (import_time.run, {"repeat": 5}, {"repeat": 2}),
+    "analytics": (analytics.run, {}, {"events": (100000,)}),
+    "catalog": (catalog.run, {}, {"sizes": (10, 1000), "repeat": 3}),
+    "event_log": (event_log.run, {"sessions": 50}, {"sessions": 10, "events": 5000}),
+    "leaderboard": (leaderboard.run, {}, {"students": (1000, 10000), "queries": 2000}),
+    "phase_render": (phase_render.run, {"sessions": 100}, {"sessions": 20}),
+    "phase_transitions": (phase_transitions.run, {"playthroughs": 10000}, {"playthroughs": 1000}),
+    "puzzles": (puzzles.run, {"draws": 5000}, {"draws": 1000}),
+    "race_sim": (race_sim.run, {"races": 2000}, {"races": 300}),
+    "forensics": (forensics.run, {}, {"profiles": (100000,), "cases": 5}),
+    "statement_pool": (statement_pool.run, {}, {"latency": 0.05, "rounds": 50, "rate": 20.0}),
+    "content_build": (content_build.run, {}, {"latency": 0.05, "copies": 1}),
+    "quiz_game": (quiz_game.run, {}, {"lessons": 1000, "sessions": 20}),
+    "report_screen": (report_screen.run, {}, {"reports": 1000, "sizes": (1000,), "queries": 50}),
+    "evaluation_cache": (evaluation_cache.run, {}, {"students": 30, "latency": 0.01}),
+    "draft_feedback": (draft_feedback.run, {}, {"students": 10}),
+    "image_cache": (image_cache.run, {"repeat": 20}, {"repeat": 5}),
+    "headless_sessions": (headless_sessions.run, {"sessions": 200}, {"sessions": 20}),
+    "progress_persistence": (progress_persistence.run, {"saves": 2000}, {"saves": 500}),
+    "session_memory": (session_memory.run, {"sessions": 1000}, {"sessions": 100}),
+    "session_scale_out": (session_scale_out.run, {"sessions": 20}, {"sessions": 3}),
+    "tracing_overhead": (tracing_overhead.run, {"sessions": 50}, {"sessions": 10}),
+    "interactions": (interactions.run, {}, {}),
+    "load_test": (load_test.run, {}, {"students": (1, 10), "duration": 3.0}),
+}
+
+# Suites left out unless named in --only
+OPT_IN = {"load_test"}
+
+# Result keys holding a cost, where a bigger number is worse
+_COST_SUFFIXES = ("_ms", "_us", "_ns", "_us_per_render", "us_per_lesson", "_bytes", "bytes_per_session")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(suites, quick: bool = False) -> Dict[str, Any]:
+    """
+    Run benchmark suites.
+
+    Args:
+        suites: Names of the suites to run
+        quick: Use the smaller --quick arguments
+
+    Returns:
+        Dict with run metadata under "meta" and each suite's results under "results"
+    """
+    results = {}
+    for name in suites:
+        function, full, small = SUITES[name]
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            results[name] = function(**(small if quick else full))
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def _costs(data: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted path, value) for every cost figure in a results tree"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from _costs(value, f"{path}.{key}" if path else str(key))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool) and path.endswith(_COST_SUFFIXES):
+        yield path, float(data)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare the cost figures of two runs.
+
+    Args:
+        baseline: Output of an earlier run()
+        current: Output of run()
+
+    Returns:
+        Dict mapping each cost figure found in both runs to its old value,
+        new value and relative change (positive means slower or bigger)
+    """
+    before = dict(_costs(baseline["results"]))
+    changes = {}
+    for path, after in _costs(current["results"]):
+        if path in before:
+            old = before[path]
+            changes[path] = {
+                "before": old,
+                "after": after,
+                "change": round((after - old) / old, 4) if old else None,
+            }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="smaller, faster runs")
+    parser.add_argument("--only", help=f"comma-separated suites: {', '.join(SUITES)}")
+    parser.add_argument("--output", help="write the results JSON to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.only:
+        suites = [name for name in args.only.split(",") if name]
+        unknown = set(suites) - set(SUITES)
+        if unknown:
+            parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+    else:
+        suites = [name for name in SUITES if name not in OPT_IN]
+
+    results = run(suites, args.quick)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            print(json.dumps(compare(json.load(file), results), indent=2))
+    elif not args.output:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Learning analytics benchmark.
+
+Writes N synthetic gameplay events (students answering questions of
+every game, with retries on the racing game's level one) to event log
+segments, loads them into a games.analytics.EventTable and times each
+dashboard query, against the same aggregate computed with a Python loop
+over the event dicts.
+
+Usage:
+    python -m benchmarks.analytics [--events N,...] [--seed S]
+"""
+import argparse
+import json
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, Any, List, Sequence
+
+from games.analytics import load_events
+from games.event_log import EventLog
+
+_QUESTIONS = {
+    "racing_game": ["race_position", "ot-1", "ot-2", "ot-3", "parking_spot"],
+    "exploration_game": ["iv-1", "iv-2", "iv-3", "iv-4", "iv-5"],
+    "detective_game": ["dna-1", "dna-2", "dna-3", "dna-4", "dna-5"],
+    "creative_writing": ["ff-1", "ff-2", "ff-3", "ff-4", "ff-5", "ff-6", "theory-1"],
+}
+
+
+def _events(count: int, seed: int) -> List[Dict[str, Any]]:
+    """Answer events of 1000 students in 40 classes, about 20 per session"""
+    rng = random.Random(seed)
+    games = list(_QUESTIONS)
+    events = []
+    session = 0
+    while len(events) < count:
+        session += 1
+        student = rng.randrange(1000)
+        game = rng.choice(games)
+        skill = 0.5 + (student % 10) / 20
+        for question in _QUESTIONS[game]:
+            attempt = 1
+            while True:
+                correct = rng.random() < skill
+                events.append({
+                    "ts": time.time(), "session": f"session-{session}", "student": f"student-{student}",
+                    "class": f"class-{student % 40}", "game": game, "phase": "quiz", "event": "answer",
+                    "question": question, "answer": rng.randrange(4), "correct": correct,
+                    "attempt": attempt, "elapsed_ms": int(rng.lognormvariate(8.5, 0.7)),
+                })
+                # Only the race position question can be retried
+                if correct or question != "race_position" or attempt == 5:
+                    break
+                attempt += 1
+    return events[:count]
+
+
+def _loop_question_stats(events: List[Dict[str, Any]]):
+    answered = defaultdict(int)
+    correct = defaultdict(int)
+    times = defaultdict(list)
+    for event in events:
+        if event["event"] == "answer" and event["correct"] is not None:
+            key = (event["game"], event["question"])
+            answered[key] += 1
+            correct[key] += event["correct"]
+            times[key].append(event["elapsed_ms"])
+    return sorted((correct[key] / answered[key], key, statistics.median(times[key])) for key in answered)
+
+
+def _loop_mastery(events: List[Dict[str, Any]]):
+    answered = defaultdict(int)
+    correct = defaultdict(int)
+    for event in events:
+        if event["event"] == "answer" and event["student"]:
+            answered[event["student"]] += 1
+            correct[event["student"]] += event["correct"]
+    return sorted(((correct[s] + 1) / (answered[s] + 2), s) for s in answered)
+
+
+def _time(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 2)
+
+
+def measure(count: int, seed: int, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Load `count` events from segments and time the analytics queries.
+
+    Args:
+        count: Events to generate
+        seed: Seed for the events
+        repeat: Runs of each query; the fastest is reported
+
+    Returns:
+        Dict of load time and milliseconds per query, vectorized and looped
+    """
+    events = _events(count, seed)
+    directory = tempfile.mkdtemp()
+    try:
+        log = EventLog(directory, capacity=count, flush_interval=3600)
+        for event in events:
+            log.emit(event)
+        log.close()
+
+        start = time.perf_counter()
+        table = load_events(directory)
+        load = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "load_s": round(load, 2),
+        "question_stats_ms": _time(table.question_stats, repeat),
+        "question_stats_class_ms": _time(lambda: table.question_stats(class_id="class-7"), repeat),
+        "time_to_answer_ms": _time(lambda: table.time_to_answer("racing_game"), repeat),
+        "student_mastery_ms": _time(table.student_mastery, repeat),
+        "attempts_to_correct_ms": _time(table.attempts_to_correct, repeat),
+        "loop_question_stats_ms": _time(lambda: _loop_question_stats(events), 1),
+        "loop_student_mastery_ms": _time(lambda: _loop_mastery(events), 1),
+    }
+
+
+def run(events: Sequence[int] = (100000, 1000000), seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for each event count.
+
+    Args:
+        events: Event counts
+        seed: Seed for the events
+
+    Returns:
+        Dict mapping event count to its timings
+    """
+    return {str(count): measure(count, seed) for count in events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure learning analytics queries over the event log")
+    parser.add_argument("--events", default="100000,1000000", help="comma-separated event counts")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the events")
+    args = parser.parse_args()
+    counts = [int(count) for count in args.events.split(",")]
+    print(json.dumps(run(counts, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Catalog processing benchmark.
+
+Builds synthetic lesson catalogs of several sizes by repeating the lessons
+in idea.json (with unique lesson codes), then times LessonPlanProcessor
+loading the file and extract_game_info() turning it into game metadata.
+
+Usage:
+    python -m benchmarks.catalog [--sizes 10,1000,100000] [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import Dict, Any, List, Sequence
+
+from json_processor import LessonPlanProcessor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_CATALOG = os.path.join(REPO_ROOT, "idea.json")
+
+DEFAULT_SIZES = (10, 1000, 100000)
+
+
+def write_catalog(path: str, lessons: int):
+    """
+    Write a catalog of `lessons` lessons, cycling through the ones in idea.json.
+
+    Args:
+        path: File to write
+        lessons: Number of lessons
+    """
+    with open(SOURCE_CATALOG, "r", encoding="utf-8") as file:
+        source = json.load(file)["lesson_gamification"]
+
+    catalog = []
+    for index in range(lessons):
+        lesson = dict(source[index % len(source)])
+        lesson["lesson_code"] = f"{lesson.get('lesson_code', 'L')}_{index}"
+        catalog.append(lesson)
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"lesson_gamification": catalog}, file)
+
+
+def _timings(values: List[float]) -> Dict[str, float]:
+    return {
+        "median_ms": round(statistics.median(values) * 1000, 3),
+        "min_ms": round(min(values) * 1000, 3),
+    }
+
+
+def measure(path: str, lessons: int, repeat: int) -> Dict[str, Any]:
+    """
+    Time loading and processing one catalog file.
+
+    Args:
+        path: Catalog file
+        lessons: Number of lessons in it
+        repeat: Number of timed runs
+
+    Returns:
+        Dict with load and extract timings and the cost per lesson
+    """
+    load: List[float] = []
+    extract: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processor = LessonPlanProcessor(path)
+        load.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        games = processor.extract_game_info()
+        extract.append(time.perf_counter() - start)
+
+    total = statistics.median(a + b for a, b in zip(load, extract))
+    return {
+        "file_bytes": os.path.getsize(path),
+        "games": len(games),
+        "load": _timings(load),
+        "extract_game_info": _timings(extract),
+        "us_per_lesson": round(total / lessons * 1e6, 3),
+    }
+
+
+def run(sizes: Sequence[int] = DEFAULT_SIZES, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Run the benchmark for each catalog size.
+
+    Args:
+        sizes: Lesson counts
+        repeat: Timed runs per size; catalogs over 10k lessons are timed once
+
+    Returns:
+        Dict mapping lesson count to its measurements
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for lessons in sizes:
+            path = os.path.join(directory, f"catalog_{lessons}.json")
+            write_catalog(path, lessons)
+            results[str(lessons)] = measure(path, lessons, repeat if lessons <= 10000 else 1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure lesson catalog processing")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated lesson counts")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per size")
+    args = parser.parse_args()
+    print(json.dumps(run([int(size) for size in args.sizes.split(",")], args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
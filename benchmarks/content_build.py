@@ -0,0 +1,136 @@
+"""
+Content pack build benchmark.
+
+Builds games.content_build packs for the lessons in idea.json, repeated
+`copies` times under new lesson codes, from a stand-in LLM that takes
+`latency` seconds per call. Times the build one call at a time and with
+several workers, with and without a rate limit, then stops a build part way (the
+stand-in starts failing) and counts the calls the resumed build makes.
+Also counts the calls of a rebuild with nothing changed, and times
+loading the packs, which makes no LLM calls.
+
+Usage:
+    python -m benchmarks.content_build [--latency S] [--copies N] [--workers N]
+"""
+import argparse
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List
+
+from games.content_pack import ContentPack, pack_path, read_pack
+from games.content_build import build, lesson_tasks
+
+_LETTERS = "ABCD"
+
+
+class _StandInLLM:
+    """Answers build prompts in their format after `latency` seconds; fails every call after `fail_after`"""
+
+    def __init__(self, latency: float, fail_after: float = float("inf")):
+        self.latency = latency
+        self.fail_after = fail_after
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        time.sleep(self.latency)
+        if number > self.fail_after:
+            raise ConnectionError("stand-in LLM is down")
+        if prompt.lstrip().startswith("You are writing quiz"):
+            return "\n\n".join(
+                f"Q: Which answer is right for question {number}-{index} of this lesson?\n"
+                + "\n".join(f"{letter}) Option {letter.lower()} of {number}-{index}" for letter in _LETTERS)
+                + f"\nANSWER: {_LETTERS[index % 4]}\nWHY: Because option {index} is the one the lesson teaches."
+                for index in range(5)
+            )
+        themes = prompt.split("exploring: ", 1)[1].split("\n", 1)[0].split(", ")
+        return "\n\n".join(f"## {theme}: All about {theme}\n" + " ".join(["Students explore this idea."] * 12)
+                           for theme in themes)
+
+
+def _lessons(copies: int) -> List[Dict[str, Any]]:
+    with open("idea.json", "r", encoding="utf-8") as file:
+        lessons = json.load(file)["lesson_gamification"]
+    return [{**lesson, "lesson_code": f"{lesson['lesson_code']}_{copy}"}
+            for copy in range(copies) for lesson in lessons]
+
+
+def _timed_build(lessons, llm, directory, **kwargs) -> Dict[str, Any]:
+    start = time.perf_counter()
+    report = build(lessons, llm, directory, backoff=0.0, **kwargs)
+    return {
+        "s": round(time.perf_counter() - start, 2),
+        "llm_calls": llm.calls,
+        "built": sum(entry["status"] == "built" for entry in report.values()),
+        "failed": sum(entry["status"] == "failed" for entry in report.values()),
+    }
+
+
+def run(latency: float = 0.2, copies: int = 3, workers: int = 8, per_minute: float = 600.0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        latency: Seconds per stand-in LLM call
+        copies: Copies of idea.json's lessons to build
+        workers: Workers of the concurrent builds
+        per_minute: Rate limit of the rate-limited build
+
+    Returns:
+        Dict of sequential, concurrent and rate-limited build times and calls, the calls
+        before and after resuming a stopped build, the calls of an
+        unchanged rebuild and pack load time
+    """
+    lessons = _lessons(copies)
+    calls = sum(len(lesson_tasks(lesson)) for lesson in lessons)
+    logging.getLogger("games.content_build").setLevel(logging.CRITICAL)
+    results: Dict[str, Any] = {"lessons": len(lessons), "calls_per_build": calls}
+    directory = tempfile.mkdtemp()
+    try:
+        results["sequential"] = _timed_build(lessons, _StandInLLM(latency), directory + "/sequential",
+                                             workers=1, per_minute=0)
+        results["concurrent"] = _timed_build(lessons, _StandInLLM(latency), directory + "/concurrent",
+                                             workers=workers, per_minute=0)
+        limited = _timed_build(lessons, _StandInLLM(latency), directory + "/limited",
+                               workers=workers, per_minute=per_minute)
+        results["rate_limited"] = limited
+        limited["calls_per_minute"] = round(calls / limited["s"] * 60) if limited["s"] else None
+
+        stopped = _StandInLLM(latency, fail_after=calls // 2)
+        results["stopped_halfway"] = _timed_build(lessons, stopped, directory + "/resume",
+                                                  workers=workers, per_minute=0, retries=0)
+        results["resumed"] = _timed_build(lessons, _StandInLLM(latency), directory + "/resume",
+                                          workers=workers, per_minute=0)
+        results["unchanged_rebuild"] = _timed_build(lessons, _StandInLLM(latency), directory + "/resume",
+                                                    workers=workers, per_minute=0)
+
+        start = time.perf_counter()
+        packs = [ContentPack.from_dict(read_pack(pack_path(lesson["lesson_code"], directory + "/resume")))
+                 for lesson in lessons]
+        load = time.perf_counter() - start
+        results["load_all_packs_ms"] = round(load * 1000, 2)
+        results["questions_per_pack"] = round(sum(len(pack.bank) for pack in packs) / len(packs), 1)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the content pack build")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stand-in LLM call")
+    parser.add_argument("--copies", type=int, default=3, help="copies of idea.json's lessons to build")
+    parser.add_argument("--workers", type=int, default=8, help="workers of the concurrent builds")
+    parser.add_argument("--per-minute", type=float, default=600.0, help="rate limit of the rate-limited build")
+    args = parser.parse_args()
+    print(json.dumps(run(args.latency, args.copies, args.workers, args.per_minute), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Draft feedback benchmark.
+
+`students` students type NEWS reports of about 200 words. Their drafts
+reach the server every `words_per_update` words, `seconds_per_word` apart
+per word, as a student whose text area sends its value each time it
+loses focus or Ctrl+Enter is pressed (Streamlit doesn't send it while
+typing). Each
+draft is checked with games.draft_feedback.DraftChecker, which only
+analyzes changed sentences, and with games.report_screen.check_rubric plus
+concept_coverage over the whole text; the two must agree. Counts sentences
+analyzed and times both, also for a one-word edit in the middle of a
+finished report, and counts LLM tips with DraftFeedback's limit against
+one per draft.
+
+Usage:
+    python -m benchmarks.draft_feedback [--students N] [--words-per-update N] [--seed S]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, List
+
+from games.draft_feedback import DraftChecker, DraftFeedback
+from games.multiverse_explorer import MultiverseExplorerGame
+from games.report_screen import check_rubric, concept_coverage, words
+
+_PEOPLE = ("A porter", "A tourist", "My aunt", "The driver", "A schoolgirl", "An old man", "A busker", "A guard")
+_VERBS = ("pushed", "dropped", "grabbed", "chased", "carried", "followed", "noticed", "dragged", "passed", "spotted")
+_THINGS = ("a shiny owl", "an old trolley", "a purple cloak", "a muddy trunk", "a creaky broom", "a striped scarf",
+           "a foggy lamp", "a tiny ticket", "a noisy clock", "an enormous suitcase")
+
+
+def _report(rng: random.Random) -> str:
+    body = [f"{rng.choice(_PEOPLE)} {rng.choice(_VERBS)} {rng.choice(_THINGS)} near platform "
+            f"{rng.randint(1, 12)} while {rng.choice(_PEOPLE).lower()} {rng.choice(_VERBS)} {rng.choice(_THINGS)}."
+            for _ in range(14)]
+    body.insert(5, "Experts say a wormhole in spacetime opened behind the bricks.")
+    body.insert(9, f"\"I saw {rng.choice(_THINGS)} go straight through,\" said {rng.choice(_PEOPLE).lower()}.")
+    return ("WALL MYSTERY AT KING'S CROSS!\n" + " ".join(body)
+            + "\nScientists will study what this means for the future of travel.")
+
+
+def _drafts(report: str, words_per_update: int) -> List[str]:
+    """The report as it reaches the server while being typed"""
+    tokens = report.replace("\n", "\n ").split(" ")
+    drafts = [" ".join(tokens[:end]).replace("\n ", "\n") for end in range(words_per_update, len(tokens),
+                                                                            words_per_update)]
+    return drafts + [report]
+
+
+def run(students: int = 50, words_per_update: int = 3, seconds_per_word: float = 0.6,
+        review_interval: float = 30.0, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        students: Students typing a report
+        words_per_update: Words typed between drafts reaching the server
+        seconds_per_word: Typing time per word
+        review_interval: Seconds between LLM tips per session
+        seed: Seed for the reports
+
+    Returns:
+        Dict of drafts checked, sentences analyzed and microseconds per
+        draft incrementally and in full, the same for a one-word edit, and
+        LLM tips with and without the limit
+    """
+    rng = random.Random(seed)
+    concepts = MultiverseExplorerGame.report_concepts
+    keyword_concepts = DraftChecker(concepts).concepts
+    reports = [_report(rng) for _ in range(students)]
+
+    incremental = full = 0.0
+    drafts = analyzed = total = tips = mismatches = 0
+    for report in reports:
+        feedback = DraftFeedback(concepts, review_interval)
+        now = 0.0
+        for draft in _drafts(report, words_per_update):
+            now += words_per_update * seconds_per_word
+            start = time.perf_counter()
+            check = feedback.check(draft)
+            incremental += time.perf_counter() - start
+
+            start = time.perf_counter()
+            draft_words = words(draft)
+            rubric = check_rubric(draft, len(draft_words))
+            found = frozenset(concept_coverage(draft_words, keyword_concepts))
+            full += time.perf_counter() - start
+
+            mismatches += (check.rubric, check.concepts) != (rubric, found)
+            if feedback.review_due(draft, check, now):
+                feedback.reviewed(draft, "Tip", now)
+            drafts += 1
+        analyzed += feedback.checker.sentences_checked
+        total += feedback.checker.sentences_checked + feedback.checker.sentences_reused
+        tips += feedback.reviews
+
+    checkers, edits = [], []
+    for report in reports:
+        checker = DraftChecker(concepts)
+        checker.check(report)
+        tokens = report.split(" ")
+        tokens[len(tokens) // 2] = "wormhole"
+        checkers.append(checker)
+        edits.append(" ".join(tokens))
+    start = time.perf_counter()
+    edit_analyzed = 0
+    for checker, edit in zip(checkers, edits):
+        edit_analyzed += checker.check(edit).sentences_checked
+    edit_incremental = time.perf_counter() - start
+    start = time.perf_counter()
+    for edit in edits:
+        edit_words = words(edit)
+        check_rubric(edit, len(edit_words))
+        concept_coverage(edit_words, keyword_concepts)
+    edit_full = time.perf_counter() - start
+
+    return {
+        "drafts": drafts,
+        "mismatches": mismatches,
+        "typing": {
+            "sentences_analyzed": analyzed,
+            "sentences_in_drafts": total,
+            "incremental_us_per_draft": round(incremental / drafts * 1e6, 1),
+            "full_us_per_draft": round(full / drafts * 1e6, 1),
+        },
+        "one_word_edit": {
+            "sentences_analyzed": round(edit_analyzed / len(edits), 2),
+            "incremental_us": round(edit_incremental / len(edits) * 1e6, 1),
+            "full_us": round(edit_full / len(edits) * 1e6, 1),
+        },
+        "llm_tips": {"limited": tips, "one_per_draft": drafts, "per_student": round(tips / students, 1)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the live draft feedback")
+    parser.add_argument("--students", type=int, default=50, help="students typing a report")
+    parser.add_argument("--words-per-update", type=int, default=3, help="words typed between drafts")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the reports")
+    args = parser.parse_args()
+    print(json.dumps(run(args.students, args.words_per_update, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
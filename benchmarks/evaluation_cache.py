@@ -0,0 +1,158 @@
+"""
+Report evaluation cache benchmark.
+
+`students` students submit NEWS reports to a stand-in evaluator that takes
+`latency` seconds per call. Each submits a few times: the same report
+again, the report with only spacing changed, or a revised report. Counts
+the evaluator calls and the time spent waiting with and without a
+games.evaluation_cache.EvaluationCache, times a cached lookup, reopens
+the cache file to check evaluations survive a restart, changes the
+prompt version to check earlier evaluations stop being used, and fills
+a small cache past its capacity to check eviction keeps it bounded.
+
+Usage:
+    python -m benchmarks.evaluation_cache [--students N] [--latency S] [--seed S]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, Any, List, Optional
+
+from games.evaluation_cache import EvaluationCache, evaluation_key, prompt_version
+
+_INSTRUCTION = "Write a NEWS report about witnessing someone walk through a wall."
+_WORDS = ("wall", "platform", "wormhole", "witness", "train", "owl", "trolley", "universe", "brick", "station",
+          "crowd", "scientist", "portal", "ticket", "guard", "shimmer", "vanished", "parallel", "tunnel", "clock")
+
+
+class _StandInEvaluator:
+    """Grades a report after `latency` seconds"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def __call__(self, report: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"Score: {len(report) % 10 + 1}\nFeedback: A report of {len(report.split())} words."
+
+
+def _report(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, 120))) + "."
+
+
+def _submissions(students: int, seed: int) -> List[str]:
+    """Every student's submissions in order: a report, then resubmissions, spacing changes and revisions"""
+    rng = random.Random(seed)
+    submissions = []
+    for _ in range(students):
+        report = _report(rng)
+        submissions.append(report)
+        for _ in range(rng.randint(1, 4)):
+            kind = rng.random()
+            if kind < 0.5:
+                pass
+            elif kind < 0.75:
+                report = report.replace(" ", "  ", 3) + "\n"
+            else:
+                report = report + " " + rng.choice(_WORDS) + "."
+            submissions.append(report)
+    return submissions
+
+
+def _evaluate_all(submissions: List[str], evaluator: _StandInEvaluator, cache: Optional[EvaluationCache],
+                  version: str) -> float:
+    start = time.perf_counter()
+    for report in submissions:
+        key = evaluation_key(report, _INSTRUCTION, version)
+        if cache is not None and cache.get(key) is not None:
+            continue
+        evaluation = evaluator(report)
+        if cache is not None:
+            cache.put(key, version, evaluation)
+    return time.perf_counter() - start
+
+
+def run(students: int = 100, latency: float = 0.05, capacity: int = 1000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        students: Students submitting reports
+        latency: Seconds per stand-in evaluator call
+        capacity: Capacity of the cache filled past it
+        seed: Seed for the reports
+
+    Returns:
+        Dict of evaluator calls and seconds with and without the cache,
+        cached lookup time, hits after a restart and after a prompt
+        change, and the size of an overfilled cache
+    """
+    submissions = _submissions(students, seed)
+    version = prompt_version("Evaluate the report. {student_text}")
+    results: Dict[str, Any] = {"students": students, "submissions": len(submissions)}
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "evaluations.db")
+    try:
+        evaluator = _StandInEvaluator(latency)
+        elapsed = _evaluate_all(submissions, evaluator, None, version)
+        results["uncached"] = {"evaluator_calls": evaluator.calls, "s": round(elapsed, 2)}
+
+        cache = EvaluationCache(path)
+        evaluator = _StandInEvaluator(latency)
+        elapsed = _evaluate_all(submissions, evaluator, cache, version)
+        results["cached"] = {"evaluator_calls": evaluator.calls, "s": round(elapsed, 2), **cache.stats()}
+
+        keys = [evaluation_key(report, _INSTRUCTION, version) for report in submissions[:1000]]
+        start = time.perf_counter()
+        for key in keys:
+            cache.get(key)
+        results["hit_us"] = round((time.perf_counter() - start) / len(keys) * 1e6, 1)
+        cache.close()
+
+        reopened = EvaluationCache(path)
+        evaluator = _StandInEvaluator(latency)
+        _evaluate_all(submissions, evaluator, reopened, version)
+        results["after_restart"] = {"evaluator_calls": evaluator.calls, "hit_rate": reopened.stats()["hit_rate"]}
+
+        changed = prompt_version("Evaluate the report kindly. {student_text}")
+        hits = reopened.hits
+        for report in submissions[:students]:
+            reopened.get(evaluation_key(report, _INSTRUCTION, changed))
+        results["after_prompt_change"] = {"hits": reopened.hits - hits, "lookups": students}
+        reopened.close()
+
+        small = EvaluationCache(":memory:", capacity=capacity)
+        start = time.perf_counter()
+        for number in range(capacity * 5):
+            small.put(f"key-{number}", version, "Score: 5\nFeedback: fine.")
+        put = time.perf_counter() - start
+        results["overfilled"] = {
+            "puts": capacity * 5,
+            "size": len(small),
+            "evicted": small.evicted,
+            "put_us": round(put / (capacity * 5) * 1e6, 1),
+            "newest_kept": small.get(f"key-{capacity * 5 - 1}") is not None,
+        }
+        small.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the report evaluation cache")
+    parser.add_argument("--students", type=int, default=100, help="students submitting reports")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per stand-in evaluator call")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the reports")
+    args = parser.parse_args()
+    print(json.dumps(run(args.students, args.latency, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
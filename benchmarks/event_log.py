@@ -0,0 +1,160 @@
+"""
+Event log benchmark.
+
+Plays full sessions of every game (games.headless with the scripted
+students from games.play_scripts) with the gameplay event log
+(games.event_log) writing to a temporary directory, and reports:
+
+- events_per_session: events a play-through logs
+- emit_us: what the render path pays per event, against writing and
+  flushing each event to a plain JSON-lines file on the spot
+- us_per_render: render cost with logging off and on
+- flush_ms / bytes_per_event: writing out everything queued, and the
+  compressed size on disk
+- replay_events_per_s: reading the segments back with read_events()
+
+Usage:
+    python -m benchmarks.event_log [--sessions N] [--events N] [--seed S]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, Any, Optional
+
+from games.event_log import EventLog, get_event_log, read_events, segment_paths, set_event_log
+from games.headless import HeadlessSession
+from games.play_scripts import PLAY_SCRIPTS
+from games.progress_store import PROGRESS_DB_ENV
+
+
+def _play(sessions: int, seed: int) -> Dict[str, Any]:
+    """Play every game `sessions` times; returns renders and seconds spent"""
+    rng = random.Random(seed)
+    renders = 0
+    elapsed = 0.0
+    for _ in range(sessions):
+        for game_type, play in PLAY_SCRIPTS.items():
+            session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+            start = time.perf_counter()
+            play(session, rng)
+            elapsed += time.perf_counter() - start
+            renders += session.renders
+    return {"renders": renders, "elapsed": elapsed}
+
+
+def _sample_event(number: int) -> Dict[str, Any]:
+    return {
+        "ts": time.time(), "session": "0123456789abcdef", "student": f"student-{number % 100}",
+        "class": "7B", "game": "racing_game", "phase": "level_one", "event": "answer",
+        "question": "race_position", "answer": "3rd", "correct": number % 3 != 0,
+        "attempt": 1 + number % 2, "elapsed_ms": 1500 + number % 700,
+    }
+
+
+def measure_emit(events: int, directory: str) -> Dict[str, Any]:
+    """
+    Time emitting events against writing each one to a file on the spot.
+
+    Args:
+        events: Events to time
+        directory: Scratch directory
+
+    Returns:
+        Dict of microseconds per event for each approach
+    """
+    batch = [_sample_event(number) for number in range(events)]
+
+    path = os.path.join(directory, "sync.jsonl")
+    start = time.perf_counter()
+    with open(path, "a", encoding="utf-8") as file:
+        for event in batch:
+            file.write(json.dumps(event) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+    synchronous = (time.perf_counter() - start) / events
+
+    log = EventLog(os.path.join(directory, "emit"), capacity=events)
+    start = time.perf_counter()
+    for event in batch:
+        log.emit(event)
+    emitted = (time.perf_counter() - start) / events
+    log.close()
+    return {
+        "emit_us": round(emitted * 1e6, 2),
+        "synchronous_write_us": round(synchronous * 1e6, 2),
+    }
+
+
+def run(sessions: int = 50, events: int = 20000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Measure the event log on played sessions and on a stream of sample events.
+
+    Args:
+        sessions: Play-throughs of each game
+        events: Sample events for the emit timing
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict of per-event, per-render, flush and replay costs
+    """
+    previous_log: Optional[EventLog] = get_event_log()
+    previous_db = os.environ.get(PROGRESS_DB_ENV)
+    os.environ[PROGRESS_DB_ENV] = ""
+    directory = tempfile.mkdtemp()
+    try:
+        set_event_log(None)
+        off = _play(sessions, seed)
+
+        # A long interval, so everything is still queued when flush() is timed
+        log = EventLog(os.path.join(directory, "play"), flush_interval=3600, batch_size=10 ** 9)
+        set_event_log(log)
+        on = _play(sessions, seed)
+        queued = len(log._buffer)
+
+        start = time.perf_counter()
+        log.flush()
+        flush = time.perf_counter() - start
+        log.close()
+
+        paths = segment_paths(log.directory)
+        size = sum(os.path.getsize(path) for path in paths)
+        start = time.perf_counter()
+        replayed = sum(1 for _ in read_events(log.directory))
+        replay = time.perf_counter() - start
+
+        results = {
+            "events_per_session": round(replayed / (sessions * len(PLAY_SCRIPTS)), 1),
+            "us_per_render_off": round(off["elapsed"] / off["renders"] * 1e6, 1),
+            "us_per_render_on": round(on["elapsed"] / on["renders"] * 1e6, 1),
+            "flush_ms": round(flush * 1000, 2),
+            "flushed_events": queued,
+            "bytes_per_event": round(size / max(replayed, 1), 1),
+            "replay_events_per_s": round(replayed / replay) if replay else None,
+            "dropped": log.dropped,
+        }
+        results.update(measure_emit(events, directory))
+        return results
+    finally:
+        set_event_log(previous_log)
+        shutil.rmtree(directory, ignore_errors=True)
+        if previous_db is None:
+            del os.environ[PROGRESS_DB_ENV]
+        else:
+            os.environ[PROGRESS_DB_ENV] = previous_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the gameplay event log")
+    parser.add_argument("--sessions", type=int, default=50, help="play-throughs of each game")
+    parser.add_argument("--events", type=int, default=20000, help="sample events for the emit timing")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students' choices")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.events, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
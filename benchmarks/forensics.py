@@ -0,0 +1,153 @@
+"""
+DNA profile matching benchmark.
+
+Times generating a games.forensics.ProfileDatabase and searching it for
+evidence samples of DNA Detective's kinds (full saliva profiles down to
+partial touch DNA), against comparing each profile with a Python loop.
+Reports how many unrelated profiles match a sample by chance at each
+kind, the database's memory, and the time a whole lab job takes. Also
+times what the lab costs the script thread on DNA Detective's page: the
+run after the Analyze click, and each progress redraw while the job runs.
+
+Usage:
+    python -m benchmarks.forensics [--profiles N,...] [--cases N] [--seed S]
+"""
+import argparse
+import json
+import time
+from typing import Dict, Any, List, Sequence
+
+import numpy as np
+
+from games.dna_detective import DNADetectiveGame
+from games.forensics import MISSING, Case, LabJob, ProfileDatabase, get_database, match_scores
+from games.headless import HeadlessSession
+
+_LOOP_PROFILES = 20000
+
+
+def _loop_matches(rows: List[List[int]], sample: np.ndarray) -> int:
+    """Matching profiles, checking one profile and locus at a time"""
+    typed = [(locus, int(code)) for locus, code in enumerate(sample) if code != MISSING]
+    return sum(all(row[locus] == code for locus, code in typed) for row in rows)
+
+
+def _best(function, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(profiles: int, cases: int, seed: int) -> Dict[str, Any]:
+    """
+    Search a database of `profiles` profiles for the samples of `cases` cases.
+
+    Args:
+        profiles: Database size
+        cases: Cases to take samples from
+        seed: Seed for the database and cases
+
+    Returns:
+        Dict of generation time, memory, search times per sample kind
+        (vectorized, and looped per profile), chance matches and lab job time
+    """
+    start = time.perf_counter()
+    database = ProfileDatabase.generate(profiles, seed)
+    generate = time.perf_counter() - start
+
+    # Profiles as lists of genotype codes, for the looped search
+    rows = database.genotypes[:, :_LOOP_PROFILES].T.tolist()
+    kinds = {}
+    for name, sample_type in DNADetectiveGame.evidence_samples.items():
+        if sample_type.dropout is None:
+            continue
+        samples = [Case(seed + number, 4).sample(0, sample_type) for number in range(cases)]
+        search = _best(lambda: [match_scores(database.genotypes, sample) for sample in samples], 1) / cases
+        loop = _best(lambda: _loop_matches(rows, samples[0]), 1) * profiles / _LOOP_PROFILES
+        kinds[name] = {
+            "loci": round(float(np.mean([np.count_nonzero(sample != MISSING) for sample in samples])), 1),
+            "search_ms": round(search * 1000, 2),
+            "loop_search_ms": round(loop * 1000, 1),
+            "chance_matches": round(sum(database.count_matches(sample) for sample in samples) / cases, 3),
+        }
+
+    spots = DNADetectiveGame.evidence_spots
+    samples = [(spot, DNADetectiveGame.evidence_samples[name]) for spot, name in enumerate(spots)]
+    lab = _best(lambda: LabJob(Case(seed, 4), samples, database).run())
+    return {
+        "generate_s": round(generate, 3),
+        "mb": round(database.genotypes.nbytes / 1e6, 1),
+        "samples": kinds,
+        "lab_job_all_spots_ms": round(lab * 1000, 1),
+    }
+
+
+def measure_page(sample_seconds: float) -> Dict[str, Any]:
+    """
+    Time DNA Detective's script runs while the lab works on four samples.
+
+    Args:
+        sample_seconds: Seconds the lab spends on each DNA sample
+
+    Returns:
+        Dict of milliseconds for the run after the Analyze click and per
+        progress redraw, the number of redraws and the lab's wall time
+    """
+    get_database()
+    session = HeadlessSession.for_game_type("detective_game", analysis_delay=sample_seconds)
+    with session.active():
+        state = session.game.state
+        state.phase = "crime_scene"
+        for spot in range(4):
+            state.collect_evidence(spot)
+    session.render()
+
+    start = time.perf_counter()
+    session.click("🔬 Analyze Evidence in the Lab")
+    click = time.perf_counter() - start
+    redraws = []
+    while session.state.phase == "lab":
+        time.sleep(0.05)
+        redraw_start = time.perf_counter()
+        session.render()
+        redraws.append(time.perf_counter() - redraw_start)
+    return {
+        "click_run_ms": round(click * 1000, 2),
+        "redraw_ms": round(sum(redraws) / len(redraws) * 1000, 2),
+        "redraws": len(redraws),
+        "lab_s": round(time.perf_counter() - start, 2),
+    }
+
+
+def run(profiles: Sequence[int] = (100000, 1000000), cases: int = 20, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for each database size.
+
+    Args:
+        profiles: Database sizes
+        cases: Cases per sample kind
+        seed: Seed for the databases and cases
+
+    Returns:
+        Dict mapping database size to its timings, and the page timings
+    """
+    results: Dict[str, Any] = {str(size): measure(size, cases, seed) for size in profiles}
+    results["page"] = {f"{seconds}_s_per_sample": measure_page(seconds) for seconds in (0.0, 0.5)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure DNA profile matching")
+    parser.add_argument("--profiles", default="100000,1000000", help="comma-separated database sizes")
+    parser.add_argument("--cases", type=int, default=20, help="cases per sample kind")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the databases and cases")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.profiles.split(",")]
+    print(json.dumps(run(sizes, args.cases, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Headless play-through benchmark and regression check.
+
+Plays full sessions of every game with the scripted students from
+games.play_scripts against the headless UI (no browser, no network, no
+LLM) and reports sessions per second and CPU time per render.
+
+With --baseline, the results are compared to an earlier run's JSON and
+the command exits with status 1 if any game's CPU time per render grew
+by more than --tolerance, so it can gate CI-style runs:
+
+    python -m benchmarks.headless_sessions > baseline.json
+    python -m benchmarks.headless_sessions --baseline baseline.json
+
+Usage:
+    python -m benchmarks.headless_sessions [--sessions N] [--seed S]
+        [--baseline FILE] [--tolerance FRACTION]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, Any, List
+
+from games.headless import HeadlessSession
+from games.play_scripts import PLAY_SCRIPTS
+
+
+def measure(game_type: str, sessions: int, seed: int) -> Dict[str, Any]:
+    """
+    Play `sessions` full sessions of a game.
+
+    Args:
+        game_type: Game type with a play script
+        sessions: Number of sessions
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict with sessions per second, renders per session and CPU time per render
+    """
+    rng = random.Random(seed)
+    play = PLAY_SCRIPTS[game_type]
+    renders = 0
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(sessions):
+        session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+        play(session, rng)
+        renders += session.renders
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "sessions_per_second": round(sessions / wall, 1),
+        "renders_per_session": round(renders / sessions, 2),
+        "cpu_us_per_render": round(cpu / renders * 1e6, 1),
+    }
+
+
+def run(sessions: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for every game with a play script.
+
+    Args:
+        sessions: Sessions per game
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict mapping game type to its measurements
+    """
+    return {game_type: measure(game_type, sessions, seed) for game_type in PLAY_SCRIPTS}
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare CPU time per render against a baseline run.
+
+    Args:
+        results: Output of run()
+        baseline: Output of an earlier run()
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        A message for each game that got slower than allowed
+    """
+    messages = []
+    for game_type, result in results.items():
+        if game_type not in baseline:
+            continue
+        before = baseline[game_type]["cpu_us_per_render"]
+        after = result["cpu_us_per_render"]
+        if after > before * (1 + tolerance):
+            messages.append(f"{game_type}: {before}us -> {after}us per render")
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play headless game sessions")
+    parser.add_argument("--sessions", type=int, default=200, help="sessions per game")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students' choices")
+    parser.add_argument("--baseline", help="JSON output of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown per render")
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.seed)
+    print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            found = regressions(results, json.load(file), args.tolerance)
+        for message in found:
+            print(f"Regression: {message}", file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
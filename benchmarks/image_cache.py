@@ -0,0 +1,103 @@
+"""
+Image helper benchmark.
+
+Serves a test image from a local HTTP server (optionally with an added
+delay, to stand in for a remote image host) and times games.media:
+fetch_image() with a cold cache, fetch_image() with a warm cache, and
+display_image() end to end with a warm cache. A plain requests.get() per
+call, which is what the helpers did before images were cached, is timed
+for comparison.
+
+Usage:
+    python -m benchmarks.image_cache [--repeat N] [--image-kb KB] [--delay SECONDS]
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Any, List
+
+import requests
+
+from games import media
+from games.headless import PLACEHOLDER_IMAGE
+
+
+def _serve(body: bytes, delay: float) -> ThreadingHTTPServer:
+    """Start a local server answering every GET with `body` after `delay` seconds"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if delay:
+                time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time(call: Callable[[], Any], repeat: int, before: Callable[[], Any] = None) -> Dict[str, float]:
+    timings: List[float] = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return {
+        "median_ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def run(repeat: int = 20, image_kb: int = 200, delay: float = 0.0) -> Dict[str, Any]:
+    """
+    Time the image helpers against a local image host.
+
+    Args:
+        repeat: Timed calls per measurement
+        image_kb: Size of the served image in kilobytes
+        delay: Seconds the local host waits before answering
+
+    Returns:
+        Dict of timings per measurement
+    """
+    body = PLACEHOLDER_IMAGE + b"\0" * max(0, image_kb * 1024 - len(PLACEHOLDER_IMAGE))
+    server = _serve(body, delay)
+    url = f"http://127.0.0.1:{server.server_address[1]}/image.png"
+    try:
+        results = {
+            "uncached_requests_get": _time(lambda: requests.get(url).content, repeat),
+            "fetch_image_cold": _time(lambda: media.fetch_image(url), repeat, before=media.fetch_image.clear),
+        }
+        media.fetch_image(url)
+        results["fetch_image_warm"] = _time(lambda: media.fetch_image(url), repeat)
+        results["display_image_warm"] = _time(lambda: media.display_image(url), repeat)
+    finally:
+        server.shutdown()
+        media.fetch_image.clear()
+
+    results["settings"] = {"image_kb": image_kb, "delay_s": delay}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure image helper cost with cold and warm caches")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per measurement")
+    parser.add_argument("--image-kb", type=int, default=200, help="size of the served image")
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds the image host waits")
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat, args.image_kb, args.delay), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Cold-start import benchmark.
+
+Each scenario is timed in a fresh interpreter so module caches from one run
+can't leak into the next. The imports app.py always needs (Streamlit,
+dotenv, the JSON processor) happen before the timer starts, so the numbers
+isolate the cost of loading the games.
+
+Usage:
+    python -m benchmarks.import_time [--repeat N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, Any, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules app.py imports regardless of how games are loaded
+SETUP = "import streamlit, dotenv, json_processor"
+
+SCENARIOS = {
+    # What app.py used to do at startup, when base_game imported LangChain
+    # and app.py imported PIL/requests at module level
+    "legacy_startup": (
+        "import langchain_openai, langchain.prompts, langchain.chains, PIL.Image, requests; "
+        "import games.ordinal_race, games.multiverse_explorer, "
+        "games.indus_valley, games.dna_detective"
+    ),
+    # Importing every game module up front, now that LangChain is lazy
+    "eager_all_games": (
+        "import games.ordinal_race, games.multiverse_explorer, "
+        "games.indus_valley, games.dna_detective"
+    ),
+    # What app.py does now at startup
+    "lazy_registry": "import games.registry",
+    # Starting a game that needs no LLM should not load LangChain
+    "lazy_start_racing_game": (
+        "import games.registry; games.registry.get_game_class('racing_game')"
+    ),
+    # The app module itself (page config and helpers; main() is not run)
+    "app_module": "import app",
+    # Each game module on its own
+    "game_ordinal_race": "import games.ordinal_race",
+    "game_multiverse_explorer": "import games.multiverse_explorer",
+    "game_indus_valley": "import games.indus_valley",
+    "game_dna_detective": "import games.dna_detective",
+}
+
+# Heavy dependencies we want to keep off the cold-start path
+HEAVY_MODULES = ["langchain", "langchain_openai", "PIL", "requests"]
+
+_PROBE = """
+import sys, time, json
+{setup}
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "loaded": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def time_scenario(statement: str, repeat: int) -> Dict[str, Any]:
+    """
+    Time an import statement in `repeat` fresh interpreters.
+
+    Args:
+        statement: Python statement to time
+        repeat: Number of interpreter launches
+
+    Returns:
+        Dict with the median/min time in milliseconds and the heavy modules loaded
+    """
+    code = _PROBE.format(setup=SETUP, statement=statement, heavy=HEAVY_MODULES)
+    timings: List[float] = []
+    loaded: List[str] = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()
+            return {"error": error[-1] if error else "import failed"}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"] * 1000)
+        loaded = result["loaded"]
+
+    return {
+        "median_ms": round(statistics.median(timings), 2),
+        "min_ms": round(min(timings), 2),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def run(repeat: int = 5) -> Dict[str, Any]:
+    """
+    Run every import scenario.
+
+    Args:
+        repeat: Number of interpreter launches per scenario
+
+    Returns:
+        Dict mapping scenario name to its timing result
+    """
+    return {name: time_scenario(statement, repeat) for name, statement in SCENARIOS.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure game import cost at cold start")
+    parser.add_argument("--repeat", type=int, default=5, help="interpreter launches per scenario")
+    args = parser.parse_args()
+    print(json.dumps(run(args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
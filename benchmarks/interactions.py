@@ -0,0 +1,208 @@
+"""
+Script executions and network calls per interaction.
+
+Plays the Race Track Ordinals game through the real app with Streamlit's
+AppTest harness and records, for each interaction, how many times the
+app script ran in full, how many fragment-only reruns there were, and
+how many HTTP requests were made.
+
+AppTest always reruns the whole script, while a browser reruns only the
+fragment a widget belongs to. Interactions are therefore sent with the
+fragment ID the browser would send ("game" for widgets in the game area,
+"game_selection" for the sidebar cards), so the counts match what a real
+session does.
+
+By default image requests are answered with a 1x1 PNG instead of going
+out to the image hosts, so the benchmark runs offline; pass --online to
+make the real requests.
+
+Usage:
+    python -m benchmarks.interactions [--online]
+"""
+import argparse
+import base64
+import json
+import os
+from contextlib import contextmanager
+from functools import partial
+from typing import Dict, Any, List, Optional
+from unittest.mock import patch
+
+import requests
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import app_test, local_script_runner
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.runtime.scriptrunner.script_runner import ScriptRunnerEvent
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+GAME_NAME = "Race Track Ordinals"
+STATE_KEY = "racing_game_state"
+
+_PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+
+class _Recorder:
+    """Collects script runners and HTTP requests made during one interaction"""
+
+    def __init__(self, online: bool):
+        self.online = online
+        self.runners: List[local_script_runner.LocalScriptRunner] = []
+        self.requests: List[str] = []
+
+    def take(self) -> Dict[str, int]:
+        """Counts since the last call, then reset"""
+        app_runs = fragment_runs = 0
+        for runner in self.runners:
+            for event, data in zip(runner.events, runner.event_data):
+                if event == ScriptRunnerEvent.SCRIPT_STARTED:
+                    if data.get("fragment_ids_this_run"):
+                        fragment_runs += 1
+                    else:
+                        app_runs += 1
+        counts = {
+            "app_runs": app_runs,
+            "fragment_runs": fragment_runs,
+            "network_calls": len(self.requests),
+        }
+        self.runners = []
+        self.requests = []
+        return counts
+
+
+@contextmanager
+def _recording(recorder: _Recorder):
+    """Record every script runner AppTest creates and every HTTP request"""
+    original_request = requests.Session.request
+
+    class RecordingRunner(local_script_runner.LocalScriptRunner):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            recorder.runners.append(self)
+
+    def request(session, method, url, *args, **kwargs):
+        recorder.requests.append(url)
+        if recorder.online:
+            return original_request(session, method, url, *args, **kwargs)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = _PIXEL_PNG
+        return response
+
+    with patch.object(app_test, "LocalScriptRunner", RecordingRunner), \
+            patch.object(requests.Session, "request", request):
+        yield
+
+
+def _run(at: AppTest, fragment: Optional[str] = None):
+    """
+    Run the pending interaction, scoped to a fragment like a browser would.
+
+    Args:
+        at: The app under test, with widget values already set
+        fragment: Key of the fragment the widget belongs to, or None for the app
+    """
+    fragment_ids = list(at._fragment_storage._ids_by_target_key.get(fragment, ())) if fragment else []
+    with patch.object(local_script_runner, "RerunData", partial(RerunData, fragment_id_queue=fragment_ids)):
+        at.run()
+
+
+def _button(at: AppTest, label: str):
+    """Find a button by its label"""
+    return next(button for button in at.button if button.label == label)
+
+
+def play_session(recorder: _Recorder) -> Dict[str, Dict[str, int]]:
+    """
+    Play one session of the racing game, from page load to the quiz.
+
+    Args:
+        recorder: Recorder installed with _recording()
+
+    Returns:
+        Dict mapping interaction name to its counts
+    """
+    results = {}
+    at = AppTest.from_file(APP_PATH, default_timeout=30)
+
+    at.run()
+    results["load"] = recorder.take()
+
+    at.button(key=f"play_{GAME_NAME}").click()
+    _run(at, "game_selection")
+    results["select_game"] = recorder.take()
+
+    at.button(key="start_game").click()
+    _run(at)
+    results["start_game"] = recorder.take()
+
+    # Level 1: answer the race question
+    from games.ordinal_race import OrdinalRaceGame
+    from games.puzzles import get_challenge
+    state = at.session_state[STATE_KEY]
+    challenge = get_challenge(state.seed, state.grade)
+    answer = challenge.race.question.correct_option
+    next(radio for radio in at.radio if radio.label == "Select the correct answer:").set_value(answer)
+    _button(at, "Submit Answer").click()
+    _run(at, "game")
+    results["answer_position"] = recorder.take()
+
+    # Level 2: add one car, then the rest, in the order the clues give
+    order = challenge.ordering.order
+    at.selectbox(key="ordinal_car_choice").set_value(OrdinalRaceGame.racers[order[0]])
+    _button(at, "Add Car").click()
+    _run(at, "game")
+    results["add_car"] = recorder.take()
+
+    for car in order[1:]:
+        at.selectbox(key="ordinal_car_choice").set_value(OrdinalRaceGame.racers[car])
+        _button(at, "Add Car").click()
+        _run(at, "game")
+    recorder.take()
+
+    _button(at, "Finish Race").click()
+    _run(at, "game")
+    results["finish_race"] = recorder.take()
+
+    # Level 3: answer one quiz question
+    state = at.session_state[STATE_KEY]
+    question = challenge.question(state.quiz_question_ids[state.current_question])
+    at.radio(key=f"ordinal_quiz_{question.id}").set_value(question.correct_option)
+    _button(at, "Submit Answer").click()
+    _run(at, "game")
+    results["answer_quiz_question"] = recorder.take()
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return results
+
+
+def run(online: bool = False) -> Dict[str, Any]:
+    """
+    Play two sessions in one process, so the second shows warm caches.
+
+    Args:
+        online: Make real image requests instead of answering them locally
+
+    Returns:
+        Dict with the per-interaction counts of each session
+    """
+    recorder = _Recorder(online)
+    with _recording(recorder):
+        return {
+            "first_session": play_session(recorder),
+            "second_session": play_session(recorder),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count script runs and network calls per interaction")
+    parser.add_argument("--online", action="store_true", help="make real image requests")
+    args = parser.parse_args()
+    print(json.dumps(run(args.online), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Local stand-in for a Redis server.
+
+Speaks enough of the Redis protocol (RESP) for
+games.session_store.RedisSessionStore: hashes, EXPIRE, DEL and
+optimistic transactions with WATCH/MULTI/EXEC. Data lives in memory and
+is lost when the server stops. It only speaks RESP2, so clients that
+default to RESP3 need ?protocol=2 in the URL. Used by the session store
+benchmark, and handy for trying LP_SESSION_STORE=redis://... without
+installing Redis:
+
+    python -m benchmarks.kv_standin --port 6390
+    LP_SESSION_STORE="redis://127.0.0.1:6390/0?protocol=2" streamlit run app.py --server.port 8501
+    LP_SESSION_STORE="redis://127.0.0.1:6390/0?protocol=2" streamlit run app.py --server.port 8502
+
+Usage:
+    python -m benchmarks.kv_standin [--host HOST] [--port PORT]
+"""
+import argparse
+import socket
+import socketserver
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class _Data:
+    """The key space: hashes with optional expiry, and a revision per key for WATCH"""
+
+    def __init__(self):
+        self.hashes: Dict[bytes, Dict[bytes, bytes]] = {}
+        self.expires: Dict[bytes, float] = {}
+        self.revisions: Dict[bytes, int] = {}
+        self.lock = threading.Lock()
+
+    def touch(self, key: bytes):
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def hash(self, key: bytes) -> Optional[Dict[bytes, bytes]]:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            del self.expires[key]
+            self.hashes.pop(key, None)
+            self.touch(key)
+        return self.hashes.get(key)
+
+
+def _encode(reply: Any) -> bytes:
+    if isinstance(reply, _Error):
+        return f"-{reply}\r\n".encode()
+    if isinstance(reply, Exception):
+        return f"-ERR {reply}\r\n".encode()
+    if reply is True:
+        return b"+OK\r\n"
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, _NullArray):
+        return b"*-1\r\n"
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class _NullArray:
+    """EXEC's reply when a watched key changed"""
+
+
+class _Error(Exception):
+    """An error reply with its own error code"""
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    data: _Data
+
+    def setup(self):
+        super().setup()
+        # Replies are written one by one; don't let Nagle hold them back
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.watched: Dict[bytes, int] = {}
+        self.queued: Optional[List[List[bytes]]] = None
+
+    def read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        parts = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            parts.append(self.rfile.read(length + 2)[:-2])
+        return parts
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            if not command:
+                continue
+            name = command[0].upper().decode()
+            if self.queued is not None and name not in ("EXEC", "DISCARD", "MULTI", "WATCH"):
+                self.queued.append(command)
+                reply: Any = "QUEUED"
+            else:
+                with self.data.lock:
+                    reply = self.run(name, command[1:])
+            self.wfile.write(_encode(reply))
+
+    def run(self, name: str, args: List[bytes]) -> Any:
+        data = self.data
+        if name == "MULTI":
+            self.queued = []
+            return True
+        if name == "DISCARD":
+            self.queued = None
+            self.watched = {}
+            return True
+        if name == "EXEC":
+            queued, self.queued = self.queued or [], None
+            changed = any(data.revisions.get(key, 0) != revision for key, revision in self.watched.items())
+            self.watched = {}
+            if changed:
+                return _NullArray()
+            return [self.run(command[0].upper().decode(), command[1:]) for command in queued]
+        if name == "WATCH":
+            for key in args:
+                data.hash(key)
+                self.watched[key] = data.revisions.get(key, 0)
+            return True
+        if name == "UNWATCH":
+            self.watched = {}
+            return True
+        if name == "PING":
+            return args[0] if args else "PONG"
+        if name == "HELLO":
+            return _Error("NOPROTO this server only speaks RESP2")
+        if name in ("CLIENT", "SELECT"):
+            return True
+        if name == "HGET":
+            return (data.hash(args[0]) or {}).get(args[1])
+        if name == "HMGET":
+            values = data.hash(args[0]) or {}
+            return [values.get(field) for field in args[1:]]
+        if name == "HGETALL":
+            values = data.hash(args[0]) or {}
+            return [item for pair in values.items() for item in pair]
+        if name == "HSET":
+            values = data.hash(args[0])
+            if values is None:
+                values = data.hashes[args[0]] = {}
+            added = sum(field not in values for field in args[1::2])
+            values.update(zip(args[1::2], args[2::2]))
+            data.touch(args[0])
+            return added
+        if name == "EXPIRE":
+            if data.hash(args[0]) is None:
+                return 0
+            data.expires[args[0]] = time.time() + int(args[1])
+            data.touch(args[0])
+            return 1
+        if name == "DEL":
+            removed = 0
+            for key in args:
+                if data.hash(key) is not None:
+                    del data.hashes[key]
+                    data.expires.pop(key, None)
+                    data.touch(key)
+                    removed += 1
+            return removed
+        if name == "FLUSHDB":
+            for key in list(data.hashes):
+                data.touch(key)
+            data.hashes.clear()
+            data.expires.clear()
+            return True
+        return ValueError(f"unknown command '{name}'")
+
+
+def serve(host: str = "127.0.0.1", port: int = 0) -> Tuple[socketserver.ThreadingTCPServer, str]:
+    """
+    Start a stand-in server in a background thread.
+
+    Args:
+        host: Interface to listen on
+        port: Port to listen on, 0 for any free port
+
+    Returns:
+        Tuple of the server (call shutdown() to stop it) and its redis:// URL
+    """
+    handler = type("Handler", (_Handler,), {"data": _Data()})
+    server = socketserver.ThreadingTCPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://{host}:{server.server_address[1]}/0?protocol=2"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for a Redis server")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on")
+    parser.add_argument("--port", type=int, default=6390, help="port to listen on")
+    args = parser.parse_args()
+    server, url = serve(args.host, args.port)
+    print(f"Listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
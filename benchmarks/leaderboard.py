@@ -0,0 +1,116 @@
+"""
+Leaderboard benchmark.
+
+Fills one board with N students' scores, then times score updates
+(applied in batches, as the app does every refresh), top-10 reads and
+rank-of-student reads on games.leaderboard, against sorting every score
+on each read.
+
+Usage:
+    python -m benchmarks.leaderboard [--students N,...] [--queries N] [--seed S]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, Sequence
+
+from games.leaderboard import Leaderboard
+
+
+def _naive_top(scores: Dict[str, int], k: int):
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+
+def _naive_rank(scores: Dict[str, int], student_id: str) -> int:
+    score = scores[student_id]
+    return 1 + sum(1 for other in scores.values() if other > score)
+
+
+def measure(students: int, queries: int, seed: int) -> Dict[str, Any]:
+    """
+    Time leaderboard updates and reads on a board of `students` students.
+
+    Args:
+        students: Students on the board
+        queries: Updates and reads to time
+        seed: Seed for the scores
+
+    Returns:
+        Dict of microseconds per update, top-10 read and rank read, with
+        the naive sort-per-read timings next to them
+    """
+    rng = random.Random(seed)
+    board = Leaderboard(refresh=0)
+    scores = {}
+    for number in range(students):
+        scores[f"student-{number}"] = rng.randrange(1000)
+        board.record("racing_game", "", f"student-{number}", scores[f"student-{number}"])
+    board.apply(force=True)
+    ids = list(scores)
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        student_id = rng.choice(ids)
+        scores[student_id] += rng.randrange(1, 20)
+        board.record("racing_game", "", student_id, scores[student_id])
+    board.apply(force=True)
+    update = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        board.standings("racing_game", "", k=10)
+    top = (time.perf_counter() - start) / queries
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        board.standings("racing_game", "", rng.choice(ids), k=0)
+    rank = (time.perf_counter() - start) / queries
+
+    naive_queries = max(1, min(queries, 2_000_000 // students))
+    start = time.perf_counter()
+    for _ in range(naive_queries):
+        _naive_top(scores, 10)
+    naive_top = (time.perf_counter() - start) / naive_queries
+
+    start = time.perf_counter()
+    for _ in range(naive_queries):
+        _naive_rank(scores, rng.choice(ids))
+    naive_rank = (time.perf_counter() - start) / naive_queries
+
+    return {
+        "update_us": round(update * 1e6, 2),
+        "top10_us": round(top * 1e6, 2),
+        "rank_us": round(rank * 1e6, 2),
+        "naive_top10_us": round(naive_top * 1e6, 2),
+        "naive_rank_us": round(naive_rank * 1e6, 2),
+    }
+
+
+def run(students: Sequence[int] = (1000, 100000), queries: int = 10000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for each board size.
+
+    Args:
+        students: Board sizes
+        queries: Updates and reads to time per size
+        seed: Seed for the scores
+
+    Returns:
+        Dict mapping board size to its timings
+    """
+    return {str(size): measure(size, queries, seed) for size in students}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure leaderboard updates and reads")
+    parser.add_argument("--students", default="1000,100000", help="comma-separated board sizes")
+    parser.add_argument("--queries", type=int, default=10000, help="updates and reads per size")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the scores")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.students.split(",")]
+    print(json.dumps(run(sizes, args.queries, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Concurrent-classroom load test.
+
+Simulates N students playing at the same time in one process, the way a
+Streamlit server runs each session's script in its own thread. Each
+student is a thread that keeps playing full sessions with the scripted
+students from games.play_scripts, pausing for a random think time between
+clicks, until the test duration is over.
+
+Everything runs offline against the headless UI (games.headless): LLM
+chains are answered by OfflineChain after --llm-latency seconds, and
+images are served from a local stand-in that waits --image-latency
+seconds on first fetch and is cached afterwards, like games.media.
+
+Reports, per student count: p50/p95/p99 interaction latency (time from
+click to the end of the rerun, think time excluded), overall and per game;
+interaction and session throughput; error rate by exception type; and
+memory per session (tracemalloc over a separate pass) plus peak RSS.
+
+Usage:
+    python -m benchmarks.load_test [--students 1,10,50] [--duration SECONDS]
+        [--think-time SECONDS] [--llm-latency SECONDS] [--image-latency SECONDS]
+        [--games racing_game,detective_game] [--seed S]
+"""
+import argparse
+import json
+import random
+import resource
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Dict, Any, List, Sequence
+
+from games.headless import HeadlessSession, OFFLINE_REPLIES, PLACEHOLDER_IMAGE
+from games.play_scripts import PLAY_SCRIPTS
+
+
+class _OfflineServices:
+    """Local stand-ins for the LLM and the image hosts, with configurable latency"""
+
+    def __init__(self, llm_latency: float, image_latency: float):
+        self.llm_latency = llm_latency
+        self.image_latency = image_latency
+        self._images: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def replies(self) -> Dict[str, Any]:
+        """Replies for HeadlessSession that take llm_latency seconds each"""
+        def slow(text: str):
+            def reply(inputs: Dict[str, Any]) -> str:
+                time.sleep(self.llm_latency)
+                return text
+            return reply
+        return {output_key: slow(text) for output_key, text in OFFLINE_REPLIES.items()}
+
+    def fetch_image(self, url: str) -> bytes:
+        """Serve an image, waiting on the first fetch of each URL only"""
+        with self._lock:
+            cached = self._images.get(url)
+        if cached is None:
+            time.sleep(self.image_latency)
+            with self._lock:
+                cached = self._images.setdefault(url, PLACEHOLDER_IMAGE)
+        return cached
+
+
+class _TimedSession(HeadlessSession):
+    """A session that thinks before each click and times the rerun that follows"""
+
+    def __init__(self, *args, latencies: List[float], think_time: float, rng: random.Random, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = latencies
+        self.think_time = think_time
+        self.rng = rng
+
+    def click(self, label_or_key: str):
+        if self.think_time:
+            time.sleep(self.rng.expovariate(1 / self.think_time))
+        start = time.perf_counter()
+        outputs = super().click(label_or_key)
+        self.latencies.append(time.perf_counter() - start)
+        return outputs
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Sorted values
+        p: Percentile, 0-100
+
+    Returns:
+        The percentile, or 0.0 for no values
+    """
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[rank]
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+def memory_per_session(game_types: Sequence[str], services: _OfflineServices, sessions: int = 20) -> int:
+    """
+    Measure the memory a finished session holds, averaged over the games.
+
+    Args:
+        game_types: Games to play
+        services: Offline stand-ins
+        sessions: Sessions to keep alive per game
+
+    Returns:
+        Bytes per session
+    """
+    rng = random.Random(0)
+    # Warm up imports, question banks and caches outside the measurement
+    for game_type in game_types:
+        PLAY_SCRIPTS[game_type](HeadlessSession.for_game_type(
+            game_type, fetch_image=services.fetch_image, analysis_delay=0), rng)
+
+    fast = _OfflineServices(0, 0)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = []
+    for game_type in game_types:
+        for _ in range(sessions):
+            session = HeadlessSession.for_game_type(game_type, fetch_image=fast.fetch_image, analysis_delay=0)
+            PLAY_SCRIPTS[game_type](session, rng)
+            held.append(session)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return int(allocated / len(held))
+
+
+def run_level(students: int, duration: float, think_time: float, game_types: Sequence[str],
+              services: _OfflineServices, seed: int) -> Dict[str, Any]:
+    """
+    Run the load test with a fixed number of simultaneous students.
+
+    Args:
+        students: Number of student threads
+        duration: Seconds to keep starting new sessions for
+        think_time: Mean seconds between clicks
+        game_types: Games the students pick from, round robin
+        services: Offline stand-ins
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict of latency, throughput and error statistics
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    completed: Counter = Counter()
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def student(index: int):
+        rng = random.Random(seed * 100003 + index)
+        played = 0
+        while time.perf_counter() < deadline:
+            game_type = game_types[(index + played) % len(game_types)]
+            played += 1
+            timings: List[float] = []
+            try:
+                session = _TimedSession.for_game_type(
+                    game_type,
+                    latencies=timings,
+                    think_time=think_time,
+                    rng=rng,
+                    replies=services.replies(),
+                    fetch_image=services.fetch_image,
+                )
+                PLAY_SCRIPTS[game_type](session, rng)
+                outcome = None
+            except Exception as e:
+                outcome = type(e).__name__
+            with lock:
+                latencies[game_type].extend(timings)
+                if outcome is None:
+                    completed[game_type] += 1
+                else:
+                    errors[outcome] += 1
+
+    threads = [threading.Thread(target=student, args=(index,), daemon=True) for index in range(students)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    sessions = sum(completed.values()) + sum(errors.values())
+    return {
+        "students": students,
+        "elapsed_s": round(elapsed, 2),
+        "interactions": len(all_latencies),
+        "interactions_per_s": round(len(all_latencies) / elapsed, 1),
+        "sessions_completed": sum(completed.values()),
+        "sessions_per_s": round(sum(completed.values()) / elapsed, 2),
+        "latency": _latency_summary(all_latencies),
+        "latency_by_game": {game_type: _latency_summary(values) for game_type, values in latencies.items()},
+        "errors": {
+            "count": sum(errors.values()),
+            "rate": round(sum(errors.values()) / sessions, 4) if sessions else 0.0,
+            "by_type": dict(errors),
+        },
+    }
+
+
+def run(students: Sequence[int] = (1, 10, 50), duration: float = 10.0, think_time: float = 0.5,
+        llm_latency: float = 0.8, image_latency: float = 0.2,
+        game_types: Sequence[str] = tuple(PLAY_SCRIPTS), seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the load test at each student count.
+
+    Args:
+        students: Student counts to test, e.g. (1, 10, 50)
+        duration: Seconds per student count
+        think_time: Mean seconds a student waits between clicks
+        llm_latency: Seconds the LLM stand-in takes per call
+        image_latency: Seconds the image stand-in takes per first fetch
+        game_types: Games to play
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict with the settings, memory figures and one result per student count
+    """
+    services = _OfflineServices(llm_latency, image_latency)
+    levels = [
+        run_level(count, duration, think_time, game_types, services, seed)
+        for count in students
+    ]
+    return {
+        "settings": {
+            "duration_s": duration,
+            "think_time_s": think_time,
+            "llm_latency_s": llm_latency,
+            "image_latency_s": image_latency,
+            "games": list(game_types),
+        },
+        "memory": {
+            "bytes_per_session": memory_per_session(game_types, services),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test with simulated students")
+    parser.add_argument("--students", default="1,10,50", help="comma-separated student counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per student count")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean seconds between clicks")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds per LLM call")
+    parser.add_argument("--image-latency", type=float, default=0.2, help="seconds per first image fetch")
+    parser.add_argument("--games", default=",".join(PLAY_SCRIPTS), help="comma-separated game types")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students' choices")
+    args = parser.parse_args()
+
+    game_types = [name for name in args.games.split(",") if name]
+    unknown = set(game_types) - set(PLAY_SCRIPTS)
+    if unknown:
+        parser.error(f"no play script for: {', '.join(sorted(unknown))}")
+
+    results = run(
+        students=[int(count) for count in args.students.split(",")],
+        duration=args.duration,
+        think_time=args.think_time,
+        llm_latency=args.llm_latency,
+        image_latency=args.image_latency,
+        game_types=game_types,
+        seed=args.seed,
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
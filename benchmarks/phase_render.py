@@ -0,0 +1,92 @@
+"""
+Per-phase render cost benchmark.
+
+Plays full sessions of every game headless (games.headless, with the
+scripted students from games.play_scripts) and times each call of each
+phase method, e.g. OrdinalRaceGame._render_level_one or
+DNADetectiveGame._render_crime_scene. Timings include the game's own work
+and the stubbed UI calls, but no browser, network or LLM.
+
+Usage:
+    python -m benchmarks.phase_render [--sessions N] [--seed S]
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, Any, List
+
+from games.headless import HeadlessSession
+from games.play_scripts import PLAY_SCRIPTS
+
+
+def _timed(method, timings: List[float]):
+    """Wrap a phase method to record how long each call takes"""
+    def call():
+        start = time.perf_counter()
+        try:
+            return method()
+        finally:
+            timings.append(time.perf_counter() - start)
+    return call
+
+
+def measure(game_type: str, sessions: int, seed: int) -> Dict[str, Any]:
+    """
+    Time every phase method of a game over `sessions` play-throughs.
+
+    Args:
+        game_type: Game type with a play script
+        sessions: Number of sessions
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict mapping phase method name to call count and mean/p95 microseconds
+    """
+    rng = random.Random(seed)
+    timings: Dict[str, List[float]] = defaultdict(list)
+
+    for _ in range(sessions):
+        session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+        game = session.game
+        for method_name in game.machine.phases.values():
+            setattr(game, method_name, _timed(getattr(game, method_name), timings[method_name]))
+        PLAY_SCRIPTS[game_type](session, rng)
+
+    results = {}
+    for method_name, values in timings.items():
+        ordered = sorted(values)
+        results[method_name] = {
+            "calls": len(ordered),
+            "mean_us": round(statistics.mean(ordered) * 1e6, 1),
+            "p95_us": round(ordered[int(0.95 * (len(ordered) - 1))] * 1e6, 1),
+        }
+    return results
+
+
+def run(sessions: int = 100, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for every game with a play script.
+
+    Args:
+        sessions: Sessions per game
+        seed: Seed for the students' choices
+
+    Returns:
+        Dict mapping game type to its per-phase timings
+    """
+    return {game_type: measure(game_type, sessions, seed) for game_type in PLAY_SCRIPTS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-phase render cost")
+    parser.add_argument("--sessions", type=int, default=100, help="sessions per game")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students' choices")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Phase transition benchmark.
+
+Drives each game's PhaseMachine headless through one full playthrough
+(first phase to completion and back through the reset transition) and
+measures the cost of a transition. Guards are stubbed to pass so only the
+machine itself is timed; the games and their LLM chains are never built.
+
+It also reports the number of script runs a playthrough costs: before the
+state machine every transition was followed by st.experimental_rerun(),
+so each click ran the script twice; now the next phase is rendered in the
+same run.
+
+Usage:
+    python -m benchmarks.phase_transitions [--playthroughs N]
+"""
+import argparse
+import json
+import time
+from typing import Dict, Any, List, Tuple
+
+from games.registry import GAME_REGISTRY, get_game_class
+
+
+class _PassingContext:
+    """Stands in for a game: every guard passes and every computed reward is 1"""
+
+    def __getattr__(self, name: str):
+        return lambda state: 1
+
+
+def playthrough(machine) -> List[str]:
+    """
+    Get the events of one playthrough, taking each phase's first event.
+
+    Args:
+        machine: PhaseMachine of a game
+
+    Returns:
+        Event names, ending with the transition back to the initial phase
+    """
+    events = []
+    phase = machine.initial
+    for _ in range(len(machine.phases)):
+        event = machine.events(phase)[0]
+        transition = machine._table[(phase, event)][0]
+        events.append(event)
+        phase = transition.target
+        if phase == machine.initial:
+            break
+    return events
+
+
+def measure(game_type: str, playthroughs: int) -> Dict[str, Any]:
+    """
+    Time `playthroughs` playthroughs of a game.
+
+    Args:
+        game_type: Game type from the registry
+        playthroughs: Number of playthroughs
+
+    Returns:
+        Dict with transitions per playthrough, time per transition and
+        script runs per playthrough before and after the state machine
+    """
+    game_class = get_game_class(game_type)
+    machine = game_class.machine
+    events = playthrough(machine)
+    state = game_class.state_class()
+    context = _PassingContext()
+
+    start = time.perf_counter()
+    for _ in range(playthroughs):
+        for event in events:
+            machine.fire(state, event, context)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "transitions_per_playthrough": len(events),
+        "us_per_transition": round(elapsed / (playthroughs * len(events)) * 1e6, 3),
+        "script_runs_per_playthrough": {
+            "rerun_per_transition": 2 * len(events),
+            "same_run": len(events),
+        },
+    }
+
+
+def run(playthroughs: int = 10000) -> Dict[str, Any]:
+    """
+    Run the benchmark for every built-in game.
+
+    Args:
+        playthroughs: Number of playthroughs per game
+
+    Returns:
+        Dict mapping game type to its measurements
+    """
+    return {game_type: measure(game_type, playthroughs) for game_type in GAME_REGISTRY}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure phase transition cost")
+    parser.add_argument("--playthroughs", type=int, default=10000, help="playthroughs per game")
+    args = parser.parse_args()
+    print(json.dumps(run(args.playthroughs), indent=2))
+
+
+if __name__ == "__main__":
+    main()
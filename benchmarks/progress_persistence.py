@@ -0,0 +1,116 @@
+"""
+Progress store benchmark.
+
+Saves game states for many simulated students into a temporary SQLite
+file and times what the render path pays per save with the write-behind
+games.progress_store.ProgressStore, against committing every save to
+SQLite on the spot. Also times a full flush and a resume (load) from disk.
+
+Usage:
+    python -m benchmarks.progress_persistence [--students N] [--saves N]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from typing import Dict, Any, List
+
+from games.progress_store import ProgressStore, _SCHEMA, _UPSERT
+from games.state import DNADetectiveState
+
+
+def _states(students: int, saves: int, seed: int) -> List[tuple]:
+    """(student ID, state dict) for every save, each one a small change to the last"""
+    rng = random.Random(seed)
+    state = DNADetectiveState()
+    saved = []
+    for number in range(saves):
+        state.investigator_points += rng.randint(1, 10)
+        state.current_dna_question = number % 5
+        saved.append((f"student-{rng.randrange(students)}", state.to_dict()))
+    return saved
+
+
+def _percentiles(timings: List[float]) -> Dict[str, float]:
+    ordered = sorted(timings)
+    return {
+        "p50_us": round(ordered[len(ordered) // 2] * 1e6, 1),
+        "p99_us": round(ordered[int(0.99 * (len(ordered) - 1))] * 1e6, 1),
+        "max_us": round(ordered[-1] * 1e6, 1),
+    }
+
+
+def run(students: int = 100, saves: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Time saving game states with and without write-behind.
+
+    Args:
+        students: Distinct student IDs
+        saves: Total saves, spread over the students at random
+        seed: Seed for the students and states
+
+    Returns:
+        Dict of save latency percentiles for each approach, flush time and load time
+    """
+    saved = _states(students, saves, seed)
+    directory = tempfile.mkdtemp()
+
+    # Commit every save on the spot, as a naive persistence layer would
+    path = os.path.join(directory, "sync.db")
+    connection = sqlite3.connect(path, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(_SCHEMA)
+    timings = []
+    for student_id, data in saved:
+        start = time.perf_counter()
+        connection.execute(_UPSERT, (student_id, "detective_game_state", json.dumps(data), time.time()))
+        timings.append(time.perf_counter() - start)
+    connection.close()
+    results = {"synchronous_save": _percentiles(timings)}
+
+    path = os.path.join(directory, "write_behind.db")
+    store = ProgressStore(path)
+    timings = []
+    for student_id, data in saved:
+        start = time.perf_counter()
+        store.save(student_id, "detective_game_state", data)
+        timings.append(time.perf_counter() - start)
+    results["write_behind_save"] = _percentiles(timings)
+
+    start = time.perf_counter()
+    store.flush()
+    results["flush_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    store.close()
+
+    # Resume from disk in a fresh store, as after a restart
+    store = ProgressStore(path)
+    timings = []
+    for number in range(min(students, 1000)):
+        start = time.perf_counter()
+        store.load(f"student-{number}", "detective_game_state")
+        timings.append(time.perf_counter() - start)
+    store.close()
+    results["resume_load"] = _percentiles(timings)
+
+    for name in os.listdir(directory):
+        os.remove(os.path.join(directory, name))
+    os.rmdir(directory)
+    results["settings"] = {"students": students, "saves": saves}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure progress store save and resume cost")
+    parser.add_argument("--students", type=int, default=100, help="distinct student IDs")
+    parser.add_argument("--saves", type=int, default=2000, help="total saves")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students and states")
+    args = parser.parse_args()
+    print(json.dumps(run(args.students, args.saves, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
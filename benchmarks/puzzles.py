@@ -0,0 +1,90 @@
+"""
+Puzzle generator benchmark.
+
+Times making Race Track Ordinals challenges with games.puzzles at each
+grade, and handing them out to new play-throughs from a pre-generated
+games.puzzles.PuzzlePool against generating one per play-through. Also
+checks that challenges rebuilt from their seed are identical, and counts
+how many distinct races, orderings and garages a run of draws gives.
+
+Usage:
+    python -m benchmarks.puzzles [--draws N] [--seed S]
+"""
+import argparse
+import json
+import time
+from typing import Dict, Any
+
+from games.puzzles import GRADES, PuzzlePool, generate_challenge, get_challenge
+
+
+def measure(grade: int, draws: int, seed: int) -> Dict[str, Any]:
+    """
+    Time generating and drawing `draws` challenges of one grade.
+
+    Args:
+        grade: Difficulty
+        draws: Challenges to make
+        seed: Seed for the pool
+
+    Returns:
+        Dict of microseconds per generated challenge and per pool draw
+        (from a filled pool, and back to back from an empty one),
+        reproducibility and variety counts
+    """
+    start = time.perf_counter()
+    generated = [generate_challenge(seed + number, grade) for number in range(draws)]
+    generate = (time.perf_counter() - start) / draws
+
+    # Draws back to back, faster than any server would make them, so they
+    # outrun the background refills and often wait for a batch
+    get_challenge.cache_clear()
+    pool = PuzzlePool(batch_size=256, seed=seed)
+    start = time.perf_counter()
+    drawn = [pool.draw(grade) for _ in range(draws)]
+    back_to_back = (time.perf_counter() - start) / draws
+
+    # The steady state of a warmed-up server: every draw served from the stack
+    pool = PuzzlePool(batch_size=draws, seed=seed)
+    pool.fill(grade)
+    start = time.perf_counter()
+    for _ in range(draws):
+        pool.draw(grade)
+    prefilled = (time.perf_counter() - start) / draws
+
+    return {
+        "generate_us": round(generate * 1e6, 1),
+        "draw_us": round(prefilled * 1e6, 2),
+        "draw_back_to_back_us": round(back_to_back * 1e6, 1),
+        "reproducible": all(generate_challenge(challenge.seed, grade) == challenge for challenge in drawn[:200])
+        and generated[0] == generate_challenge(seed, grade),
+        "distinct_races": len({(challenge.race.order, challenge.race.question) for challenge in drawn}),
+        "distinct_orderings": len({challenge.ordering for challenge in drawn}),
+        "distinct_garages": len({challenge.parking for challenge in drawn}),
+    }
+
+
+def run(draws: int = 5000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run the benchmark for every grade.
+
+    Args:
+        draws: Challenges per grade
+        seed: Seed for the pools
+
+    Returns:
+        Dict mapping grade to its timings
+    """
+    return {f"grade_{grade}": measure(grade, draws, seed) for grade in range(1, len(GRADES) + 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure puzzle generation and pool draws")
+    parser.add_argument("--draws", type=int, default=5000, help="challenges per grade")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the pools")
+    args = parser.parse_args()
+    print(json.dumps(run(args.draws, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
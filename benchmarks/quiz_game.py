@@ -0,0 +1,197 @@
+"""
+Generic quiz engine benchmark.
+
+Makes `lessons` synthetic lessons of 25 questions each, loaded the way
+content packs are, and measures what serving them all from one process
+costs: load time and memory per lesson bank, and the game instance and
+session state each student adds. Times grading an answer with the bank's
+answer key against looking the option up in the question, and plays
+`sessions` quizzes through to the end with the headless driver, spread
+over the lessons.
+
+Usage:
+    python -m benchmarks.quiz_game [--lessons N] [--sessions N] [--seed S]
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from typing import Dict, Any, List
+
+from games.content_pack import ContentPack
+from games.headless import HeadlessSession
+from games.play_scripts import play_quiz_game
+from games.quiz_game import QuizContent, QuizGame
+
+_QUESTIONS = 25
+
+
+def _pack_data(number: int, rng: random.Random) -> Dict[str, Any]:
+    """A lesson pack's JSON structure with made-up questions"""
+    code = f"L{number:06d}"
+    questions = [
+        {
+            "id": f"{code.lower()}-{index:02d}",
+            "question": f"Which statement about topic {index} of lesson {number} is right?",
+            "options": [f"Answer {option} about topic {index} of lesson {number}" for option in range(4)],
+            "correct": rng.randrange(4),
+        }
+        for index in range(_QUESTIONS)
+    ]
+    return {
+        "lesson_code": code, "title": f"Lesson {number}", "themes": ["Science"], "version": "0", "built_at": 0,
+        "bank": {"bank": f"pack_{code}", "questions": questions},
+        "explanations": {item["id"]: f"Because of fact {item['id']}." for item in questions},
+        "sections": [],
+    }
+
+
+def _game_info(pack: ContentPack) -> Dict[str, Any]:
+    return {
+        "name": f"{pack.title} Quiz Challenge", "title": pack.title, "description": "", "learning_outcomes": [],
+        "content_structure": [], "type": "quiz_game", "lesson_code": pack.lesson_code,
+    }
+
+
+def _best(function, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_lessons(lessons: int, seed: int) -> Dict[str, Any]:
+    """
+    Load `lessons` lesson packs and measure the memory they hold.
+
+    Args:
+        lessons: Number of lessons
+        seed: Seed for the correct answers
+
+    Returns:
+        Dict of load time and kilobytes per lesson, and the packs
+    """
+    rng = random.Random(seed)
+    data = [_pack_data(number, rng) for number in range(lessons)]
+    start = time.perf_counter()
+    packs = [ContentPack.from_dict(item) for item in data]
+    elapsed = time.perf_counter() - start
+
+    del packs
+    tracemalloc.start()
+    packs = [ContentPack.from_dict(item) for item in data]
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {
+        "load_us_per_lesson": round(elapsed / lessons * 1e6, 1),
+        "kb_per_lesson": round(held / lessons / 1024, 1),
+        "packs": packs,
+    }
+
+
+def measure_grading(packs: List[ContentPack], answers: int, seed: int) -> Dict[str, Any]:
+    """
+    Time grading answers with the answer key and by looking up the option.
+
+    Args:
+        packs: Lesson packs to take questions from
+        answers: Answers to grade
+        seed: Seed for the answers
+
+    Returns:
+        Dict of nanoseconds per answer each way, best of 5
+    """
+    rng = random.Random(seed)
+    given = []
+    for _ in range(answers):
+        bank = rng.choice(packs).bank
+        question = bank[rng.choice(bank.ids)]
+        given.append((bank, question.id, rng.choice(question.options)))
+
+    def answer_key():
+        for bank, question_id, option in given:
+            bank.answer_key.grade(question_id, option)
+
+    def option_lookup():
+        for bank, question_id, option in given:
+            question = bank[question_id]
+            question.option_index(option) == question.correct
+
+    key, lookup = _best(answer_key), _best(option_lookup)
+    return {
+        "answer_key_ns": round(key / answers * 1e9, 1),
+        "option_lookup_ns": round(lookup / answers * 1e9, 1),
+    }
+
+
+def measure_sessions(packs: List[ContentPack], sessions: int, seed: int) -> Dict[str, Any]:
+    """
+    Play `sessions` quizzes through, each on a random lesson.
+
+    Args:
+        packs: Lesson packs to play
+        sessions: Quizzes to play
+        seed: Seed for the lessons and the students' answers
+
+    Returns:
+        Dict of milliseconds per quiz, script runs per quiz and the bytes
+        a game instance and its packed state add per session
+    """
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    renders = 0
+    for _ in range(sessions):
+        pack = rng.choice(packs)
+        session = HeadlessSession(QuizGame, _game_info(pack), content=QuizContent(pack.bank, pack.explanations))
+        play_quiz_game(session, rng)
+        renders += session.renders
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    games = [QuizGame(_game_info(pack)) for pack in packs[:100]]
+    instance = (tracemalloc.get_traced_memory()[0] - before) / len(games)
+    tracemalloc.stop()
+    return {
+        "quiz_ms": round(elapsed / sessions * 1000, 2),
+        "runs_per_quiz": round(renders / sessions, 1),
+        "game_instance_bytes": round(instance),
+        "packed_state_bytes": len(session.state.pack()),
+    }
+
+
+def run(lessons: int = 10000, sessions: int = 200, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        lessons: Lessons to load
+        sessions: Quizzes to play
+        seed: Seed for the lessons and answers
+
+    Returns:
+        Dict of per-lesson, grading and per-session results
+    """
+    loaded = measure_lessons(lessons, seed)
+    packs = loaded.pop("packs")
+    return {
+        "lessons": {"count": lessons, **loaded},
+        "grading": measure_grading(packs, 100000, seed),
+        "sessions": measure_sessions(packs, sessions, seed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the generic quiz engine")
+    parser.add_argument("--lessons", type=int, default=10000, help="lessons to load")
+    parser.add_argument("--sessions", type=int, default=200, help="quizzes to play")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the lessons and answers")
+    args = parser.parse_args()
+    print(json.dumps(run(args.lessons, args.sessions, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
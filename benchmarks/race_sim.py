@@ -0,0 +1,158 @@
+"""
+Race simulation benchmark.
+
+Times games.race_sim on single races of the sizes the game uses and on
+large batches of cars, against stepping each car with a Python loop, and
+reports how often races end in a dead heat or a photo finish. Also counts
+the elements Race Track Ordinals draws per render of the race (level 1)
+and the garage (level 4), which are now one table each.
+
+Usage:
+    python -m benchmarks.race_sim [--races N] [--seed S]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Dict, Any, List
+
+import numpy as np
+
+from games.headless import HeadlessSession
+from games.puzzles import get_challenge
+from games.race_sim import TIME_STEP, TRACK_LENGTH, finishing_times, rank, simulate_race, simulate_trajectories
+
+
+def _loop_race(rng: random.Random, cars: int) -> List[float]:
+    """Finishing times of one race, stepping every car in Python"""
+    times = []
+    for _ in range(cars):
+        pace = rng.gauss(50.0, 1.5)
+        drift = position = elapsed = 0.0
+        while True:
+            drift += rng.gauss(0.0, 0.4)
+            speed = max(pace + drift, 0.5 * pace)
+            if position + speed * TIME_STEP >= TRACK_LENGTH:
+                times.append(elapsed + (TRACK_LENGTH - position) / speed)
+                break
+            position += speed * TIME_STEP
+            elapsed += TIME_STEP
+    return times
+
+
+def measure_single(cars: int, races: int, seed: int) -> Dict[str, Any]:
+    """
+    Time whole races one at a time, as challenges are generated.
+
+    Args:
+        cars: Cars per race
+        races: Races to simulate
+        seed: First race seed
+
+    Returns:
+        Dict of microseconds per race, vectorized and looped, and the share
+        of races with a dead heat or a photo finish
+    """
+    start = time.perf_counter()
+    results = [simulate_race(seed + number, cars) for number in range(races)]
+    vectorized = (time.perf_counter() - start) / races
+
+    rng = random.Random(seed)
+    loop_races = max(1, races // 10)
+    start = time.perf_counter()
+    for _ in range(loop_races):
+        _loop_race(rng, cars)
+    looped = (time.perf_counter() - start) / loop_races
+
+    return {
+        "race_us": round(vectorized * 1e6, 1),
+        "loop_race_us": round(looped * 1e6, 1),
+        "dead_heat_share": round(sum(len(set(r.places)) < cars for r in results) / races, 3),
+        "photo_finish_share": round(sum(any(r.photo_finish) for r in results) / races, 3),
+    }
+
+
+def measure_batch(races: int, cars: int, seed: int) -> Dict[str, Any]:
+    """
+    Time one batch of many races simulated together.
+
+    Args:
+        races: Races in the batch
+        cars: Cars per race
+        seed: Seed for the batch
+
+    Returns:
+        Dict of total milliseconds and nanoseconds per car-step
+    """
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    positions = simulate_trajectories(rng, races, cars)
+    times = finishing_times(positions)
+    for race in times:
+        rank(race)
+    elapsed = time.perf_counter() - start
+    return {
+        "cars": races * cars,
+        "steps": positions.shape[-1],
+        "ms": round(elapsed * 1000, 1),
+        "ns_per_car_step": round(elapsed / positions.size * 1e9, 2),
+    }
+
+
+def count_elements(seed: int) -> Dict[str, int]:
+    """
+    Count what Race Track Ordinals draws on level 1 and level 4.
+
+    Args:
+        seed: Seed for the student's choices
+
+    Returns:
+        Dict of elements per render of each level at grade 1
+    """
+    session = HeadlessSession.for_game_type("racing_game", analysis_delay=0)
+    counts = {"level_one": len(session.render())}
+    state = session.state
+    challenge = get_challenge(state.seed, state.grade)
+    session.set_value("Select the correct answer:", challenge.race.question.correct_option)
+    session.click("Submit Answer")
+    for car in challenge.ordering.order:
+        session.set_value("ordinal_car_choice", session.game.racers[car])
+        session.click("Add Car")
+    session.click("Finish Race")
+    for question_id in session.state.quiz_question_ids:
+        question = challenge.question(question_id)
+        session.set_value(f"ordinal_quiz_{question.id}", question.correct_option)
+        session.click("Submit Answer")
+    counts["level_four"] = len(session.click("Continue to Next Level"))
+    return counts
+
+
+def run(races: int = 2000, seed: int = 0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        races: Races per single-race measurement, and per batch
+        seed: Seed for the races
+
+    Returns:
+        Dict of single-race timings per size, the batch timing and element counts
+    """
+    return {
+        "10_cars": measure_single(10, races, seed),
+        "20_cars": measure_single(20, races, seed),
+        "batch": measure_batch(races, 50, seed),
+        "elements_per_render": count_elements(seed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the race simulation")
+    parser.add_argument("--races", type=int, default=2000, help="races per measurement")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the races")
+    args = parser.parse_args()
+    print(json.dumps(run(args.races, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
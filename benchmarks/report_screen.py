@@ -0,0 +1,207 @@
+"""
+Report pre-screen benchmark.
+
+Screens `reports` made-up NEWS report submissions with games.report_screen,
+set up as in Multiverse Explorer. Most submissions are worth evaluating; the
+rest are too short, off topic, the task pasted back, the same words
+repeated, or another student's report with a few words changed. Counts how
+many of each kind the screen sends back, so the hit rate is the share of
+LLM evaluations saved, and times screening a report. Also times finding
+near-duplicates in the MinHash index against comparing every earlier
+report's shingles, at `sizes` earlier reports.
+
+Usage:
+    python -m benchmarks.report_screen [--reports N] [--latency S] [--seed S]
+"""
+import argparse
+import json
+import random
+import time
+from collections import Counter
+from typing import Dict, Any, List, Sequence, Tuple
+
+from games.multiverse_explorer import MultiverseExplorerGame
+from games.report_screen import NearDuplicateIndex, ReportScreen, minhash, words
+
+# Share of submissions of each kind
+_MIX = (("good", 0.6), ("duplicate", 0.12), ("too_short", 0.1), ("off_topic", 0.08),
+        ("copied_task", 0.05), ("repetitive", 0.05))
+
+_NOUNS = ("owl", "trolley", "cloak", "trunk", "broom", "ticket", "guard", "clock", "bench", "suitcase",
+          "pigeon", "lamp", "poster", "scarf", "sandwich", "umbrella", "train", "whistle", "map", "crowd")
+_VERBS = ("pushed", "dropped", "grabbed", "chased", "carried", "followed", "noticed", "dragged", "passed", "spotted")
+_ADJECTIVES = ("shiny", "ancient", "muddy", "purple", "enormous", "tiny", "creaky", "foggy", "noisy", "striped")
+_PEOPLE = ("a porter", "a tourist", "my aunt", "the driver", "a schoolgirl", "an old man", "a busker", "a cleaner")
+_THEORIES = ("a wormhole", "a parallel universe", "a tunnel through spacetime", "another dimension",
+             "a shortcut in space-time", "an alternate universe")
+_OFF_TOPIC = ("football", "holiday", "beach", "birthday", "cake", "homework", "garden", "puppy", "pizza", "bicycle")
+
+
+def _sentence(rng: random.Random) -> str:
+    return (f"{rng.choice(_PEOPLE).capitalize()} {rng.choice(_VERBS)} a {rng.choice(_ADJECTIVES)} "
+            f"{rng.choice(_NOUNS)} near the {rng.choice(_ADJECTIVES)} {rng.choice(_NOUNS)}.")
+
+
+def _good(rng: random.Random) -> str:
+    body = [_sentence(rng) for _ in range(rng.randint(3, 8))]
+    body.insert(rng.randrange(len(body)), f"Experts think {rng.choice(_THEORIES)} opened behind the wall.")
+    return (f"{rng.choice(_ADJECTIVES).upper()} {rng.choice(_NOUNS).upper()} MYSTERY AT KING'S CROSS!\n"
+            + " ".join(body)
+            + f" \"I saw the {rng.choice(_NOUNS)} go straight through,\" said {rng.choice(_PEOPLE)}."
+            + f" Scientists will study what this means for the future of {rng.choice(_NOUNS)} travel.")
+
+
+def _submission(kind: str, rng: random.Random, earlier: List[str]) -> str:
+    if kind == "duplicate" and earlier:
+        copy = rng.choice(earlier).split(" ")
+        for _ in range(2):
+            copy[rng.randrange(len(copy))] = rng.choice(_NOUNS)
+        return " ".join(copy)
+    if kind == "too_short":
+        return f"I saw {rng.choice(_PEOPLE)} walk into the wall. It was {rng.choice(_THEORIES)}."
+    if kind == "off_topic":
+        return " ".join(f"My {rng.choice(_ADJECTIVES)} {rng.choice(_OFF_TOPIC)} was {rng.choice(_ADJECTIVES)} "
+                        f"and {rng.choice(_PEOPLE)} {rng.choice(_VERBS)} it." for _ in range(6))
+    if kind == "copied_task":
+        return MultiverseExplorerGame.report_task + " " + _sentence(rng)
+    if kind == "repetitive":
+        return " ".join([f"wormhole {rng.choice(_NOUNS)}"] * rng.randint(20, 40))
+    return _good(rng)
+
+
+def _submissions(reports: int, seed: int) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    kinds, weights = zip(*_MIX)
+    good: List[str] = []
+    submissions = []
+    for _ in range(reports):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "duplicate" and not good:
+            kind = "good"
+        text = _submission(kind, rng, good)
+        if kind == "good":
+            good.append(text)
+        submissions.append((kind, text))
+    return submissions
+
+
+def measure_screen(reports: int, latency: float, seed: int) -> Dict[str, Any]:
+    """
+    Screen a mix of submissions, each from its own student.
+
+    Args:
+        reports: Submissions to screen
+        latency: Seconds per LLM evaluation, to count the time saved
+        seed: Seed for the submissions
+
+    Returns:
+        Dict of the share of each kind sent back, the hit rate, LLM calls
+        and seconds saved, and microseconds per report screened
+    """
+    submissions = _submissions(reports, seed)
+    screen = ReportScreen(MultiverseExplorerGame.report_task, MultiverseExplorerGame.report_concepts)
+    sent_back: Counter = Counter()
+    kinds: Counter = Counter()
+    times = []
+    for number, (kind, text) in enumerate(submissions):
+        start = time.perf_counter()
+        result = screen.screen(text, owner=str(number))
+        times.append(time.perf_counter() - start)
+        kinds[kind] += 1
+        sent_back[kind] += not result.passed
+    times.sort()
+    stats = screen.stats()
+    saved = stats["screened"] - stats["passed"]
+    return {
+        "sent_back": {kind: round(sent_back[kind] / kinds[kind], 3) for kind, _ in _MIX if kinds[kind]},
+        "rejected": stats["rejected"],
+        "hit_rate": stats["hit_rate"],
+        "llm_calls": {"without_screen": reports, "with_screen": stats["passed"]},
+        "llm_s_saved": round(saved * latency, 1),
+        "screen_us_p50": round(times[len(times) // 2] * 1e6, 1),
+        "screen_us_p99": round(times[int(len(times) * 0.99)] * 1e6, 1),
+    }
+
+
+def _shingles(text_words: Sequence[str]) -> frozenset:
+    return frozenset(" ".join(text_words[i:i + 5]) for i in range(max(1, len(text_words) - 4)))
+
+
+def measure_lookup(sizes: Sequence[int], queries: int, seed: int) -> Dict[str, Any]:
+    """
+    Time finding near-duplicates among earlier reports.
+
+    Args:
+        sizes: Numbers of earlier reports
+        queries: Lookups to time at each size, half of them edited copies
+        seed: Seed for the reports
+
+    Returns:
+        Dict by size of microseconds per lookup in the MinHash index and
+        by comparing shingle sets with every earlier report, and how many
+        of the copies the index found
+    """
+    rng = random.Random(seed)
+    results = {}
+    for size in sizes:
+        reports = [_good(rng) for _ in range(size)]
+        index = NearDuplicateIndex(capacity=size)
+        shingles = []
+        for number, text in enumerate(reports):
+            text_words = words(text)
+            index.add(str(number), minhash(text_words))
+            shingles.append(_shingles(text_words))
+        lookups = [_submission("duplicate" if number % 2 else "good", rng, reports) for number in range(queries)]
+        signatures = [minhash(words(text)) for text in lookups]
+        lookup_shingles = [_shingles(words(text)) for text in lookups]
+
+        start = time.perf_counter()
+        found = sum(index.query(signature, 0.7) is not None for signature in signatures[1::2])
+        for signature in signatures[::2]:
+            index.query(signature, 0.7)
+        minhash_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for query in lookup_shingles:
+            max(len(query & earlier) / len(query | earlier) for earlier in shingles)
+        exact_time = time.perf_counter() - start
+        results[size] = {
+            "minhash_index_us": round(minhash_time / queries * 1e6, 1),
+            "exact_scan_us": round(exact_time / queries * 1e6, 1),
+            "copies_found": f"{found}/{len(signatures[1::2])}",
+        }
+    return results
+
+
+def run(reports: int = 5000, latency: float = 2.0, sizes: Sequence[int] = (1000, 10000), queries: int = 100,
+        seed: int = 0) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        reports: Submissions to screen
+        latency: Seconds per LLM evaluation
+        sizes: Numbers of earlier reports for the lookup timings
+        queries: Lookups per size
+        seed: Seed for the reports
+
+    Returns:
+        Dict of screen and lookup results
+    """
+    return {
+        "screen": measure_screen(reports, latency, seed),
+        "lookup": measure_lookup(sizes, queries, seed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the report pre-screen")
+    parser.add_argument("--reports", type=int, default=5000, help="submissions to screen")
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds per LLM evaluation")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the reports")
+    args = parser.parse_args()
+    print(json.dumps(run(args.reports, args.latency, seed=args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
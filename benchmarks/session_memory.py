@@ -0,0 +1,116 @@
+"""
+Per-session memory benchmark for quiz state.
+
+Builds N sessions for each quiz and measures the memory they hold, once
+the way sessions used to keep quizzes (a private copy of every question
+dict) and once the way they do now (question IDs and answer indexes into
+the shared question banks). Memory is measured with tracemalloc, and the
+pickled size of one session is reported as a proxy for serialization cost.
+
+Usage:
+    python -m benchmarks.session_memory [--sessions N]
+"""
+import argparse
+import json
+import pickle
+import tracemalloc
+from typing import Callable, Dict, Any, List
+
+from games.question_bank import get_bank
+
+# (bank name, state fields holding the IDs and the answers)
+QUIZZES = {
+    "ordinal_traffic": ("quiz_question_ids", "quiz_answers"),
+    "indus_valley_quiz": ("quiz_question_ids", "quiz_answers"),
+    "multiverse_fact_fiction": ("fact_fiction_ids", "fact_fiction_answers"),
+    "dna_basics": ("dna_question_ids", "dna_answers"),
+}
+
+
+def copied_session(bank_name: str) -> Dict[str, Any]:
+    """
+    A session holding its own copy of the questions, as before question banks.
+    
+    Like the old dict literals, the copies share the string objects and only
+    duplicate the containers.
+    """
+    return {
+        "questions": [
+            {
+                "question": question.question,
+                "options": list(question.options),
+                "correct": question.correct_option,
+            }
+            for question in get_bank(bank_name)
+        ],
+        "current_question": 0,
+        "quiz_score": 0,
+    }
+
+
+def by_id_session(bank_name: str) -> Dict[str, Any]:
+    """A session holding question IDs and answer indexes only"""
+    ids_field, answers_field = QUIZZES[bank_name]
+    bank = get_bank(bank_name)
+    return {
+        ids_field: list(bank.ids),
+        answers_field: [question.correct for question in bank],
+        "current_question": len(bank),
+        "quiz_score": len(bank),
+    }
+
+
+def measure(factory: Callable[[str], Dict[str, Any]], bank_name: str, sessions: int) -> Dict[str, Any]:
+    """
+    Measure the memory held by `sessions` sessions built by `factory`.
+
+    Args:
+        factory: Function building one session's quiz state
+        bank_name: Question bank to build sessions for
+        sessions: Number of sessions
+
+    Returns:
+        Dict with bytes per session (tracemalloc) and pickled bytes per session
+    """
+    get_bank(bank_name)  # The shared bank is loaded once, outside the measurement
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held: List[Dict[str, Any]] = [factory(bank_name) for _ in range(sessions)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {
+        "bytes_per_session": round(allocated / sessions, 1),
+        "pickled_bytes_per_session": len(pickle.dumps(held[0])),
+    }
+
+
+def run(sessions: int = 1000) -> Dict[str, Any]:
+    """
+    Run the benchmark for every quiz.
+
+    Args:
+        sessions: Number of sessions per quiz and layout
+
+    Returns:
+        Dict mapping quiz bank to its "copied" and "by_id" measurements
+    """
+    return {
+        bank_name: {
+            "copied": measure(copied_session, bank_name, sessions),
+            "by_id": measure(by_id_session, bank_name, sessions),
+        }
+        for bank_name in QUIZZES
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-session quiz memory")
+    parser.add_argument("--sessions", type=int, default=1000, help="sessions per quiz")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions), indent=2))
+
+
+if __name__ == "__main__":
+    main()
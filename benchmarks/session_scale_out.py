@@ -0,0 +1,256 @@
+"""
+Session store scale-out benchmark.
+
+Plays full sessions of every game (games.headless with the scripted
+students from games.play_scripts) as if behind a load balancer with no
+sticky sessions: each interaction goes to one of --workers app workers at
+random. Every worker has its own session state, so a student only keeps
+their progress when it moves between workers through the session store
+(games.session_store). Runs once with no store, once with the in-memory
+store and once with RedisSessionStore against the local stand-in server
+from benchmarks.kv_standin, and reports:
+
+- finished: play-throughs that reached the end (without a shared store a
+  student who lands on a new worker starts over, so few finish)
+- us_per_render: wall time per render, including store round trips
+- conflicts: writes rejected because another worker wrote first
+- packed_bytes / dict_json_bytes: stored state size, compact vs to_dict()
+
+Usage:
+    python -m benchmarks.session_scale_out [--sessions N] [--workers N] [--seed S]
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, Any, Optional
+
+from benchmarks.kv_standin import serve
+from games.headless import HeadlessSession
+from games.play_scripts import PLAY_SCRIPTS
+from games.progress_store import PROGRESS_DB_ENV, STUDENT_KEY
+from games.puzzles import get_challenge
+from games.session_store import (
+    MemorySessionStore,
+    RedisSessionStore,
+    SessionStore,
+    VersionConflict,
+    get_session_store,
+    set_session_store,
+)
+
+
+class _Unfinished(Exception):
+    """A student landed on a worker that doesn't know their game"""
+
+
+# Phases a game leaves without any input, and the phase it goes to
+# (DNA Detective's lab moves on when the analysis is done)
+_MOVES_ON = {"lab": "completion"}
+
+
+class _CountingStore(SessionStore):
+    """Wraps a store to count rejected writes and remember stored sizes"""
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+        self.conflicts = 0
+        self.sizes: Dict[str, int] = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def put(self, key, value, version):
+        try:
+            new_version = self.store.put(key, value, version)
+        except VersionConflict:
+            self.conflicts += 1
+            raise
+        self.sizes[key] = len(value)
+        return new_version
+
+    def delete(self, key):
+        self.store.delete(key)
+
+
+class _RoutedStudent:
+    """
+    Looks like one HeadlessSession to a play script, but sends each
+    interaction (widget changes plus the click) to a random worker. A
+    worker the student hasn't just used renders the game first, as a
+    browser reconnecting to it would.
+    """
+
+    def __init__(self, game_type: str, student_id: str, workers: int, rng: random.Random):
+        self.workers = []
+        for _ in range(workers):
+            session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+            session.ui.session_state[STUDENT_KEY] = student_id
+            self.workers.append(session)
+        self.current = self.workers[0]
+        self.rng = rng
+        self.routed = False
+        self.switches = 0
+
+    @property
+    def game(self):
+        return self.current.game
+
+    @property
+    def state(self):
+        return self.current.state
+
+    @property
+    def renders(self) -> int:
+        return sum(session.renders for session in self.workers)
+
+    def _route(self):
+        if self.routed:
+            return
+        self.routed = True
+        worker = self.rng.choice(self.workers)
+        if worker is not self.current:
+            self.switches += 1
+            phase = self.current.state.phase
+            self.current = worker
+            worker.render()
+            if worker.state.phase not in (phase, _MOVES_ON.get(phase)):
+                raise _Unfinished(f"{phase} became {worker.state.phase} on another worker")
+
+    def render(self):
+        self._route()
+        self.routed = False
+        return self.current.render()
+
+    def set_value(self, label_or_key: str, value):
+        self._route()
+        self.current.set_value(label_or_key, value)
+        return self
+
+    def click(self, label_or_key: str):
+        self._route()
+        self.routed = False
+        return self.current.click(label_or_key)
+
+
+def measure(store: Optional[SessionStore], sessions: int, workers: int, seed: int) -> Dict[str, Any]:
+    """
+    Play `sessions` sessions of every game across `workers` workers.
+
+    Args:
+        store: Session store shared by the workers, or None for none
+        sessions: Sessions per game
+        workers: Number of workers
+        seed: Seed for the routing and the students' choices
+
+    Returns:
+        Dict of finished play-throughs, worker switches, time per render,
+        rejected writes and stored state sizes
+    """
+    counting = _CountingStore(store) if store is not None else None
+    set_session_store(counting)
+    rng = random.Random(seed)
+    finished = played = renders = switches = 0
+    elapsed = 0.0
+    dict_bytes = []
+    for number in range(sessions):
+        for game_type, play in PLAY_SCRIPTS.items():
+            student = _RoutedStudent(game_type, f"student-{number}", workers, rng)
+            played += 1
+            start = time.perf_counter()
+            try:
+                play(student, rng)
+                finished += 1
+            except _Unfinished:
+                pass
+            elapsed += time.perf_counter() - start
+            renders += student.renders
+            switches += student.switches
+            dict_bytes.append(len(json.dumps(student.state.to_dict(), separators=(",", ":"))))
+
+    results = {
+        "finished": f"{finished}/{played}",
+        "worker_switches": switches,
+        "us_per_render": round(elapsed / renders * 1e6, 1),
+    }
+    if counting is not None:
+        results["conflicts"] = counting.conflicts
+        results["packed_bytes"] = round(sum(counting.sizes.values()) / len(counting.sizes), 1)
+        results["dict_json_bytes"] = round(sum(dict_bytes) / len(dict_bytes), 1)
+    return results
+
+
+def measure_conflict() -> Dict[str, Any]:
+    """
+    Click in two browser tabs of the same student, both showing the same version.
+
+    Returns:
+        Dict with the rejected writes, whether the second tab was told its
+        move was dropped, and whether both tabs end up with the same state
+    """
+    counting = _CountingStore(MemorySessionStore())
+    set_session_store(counting)
+    tabs = [HeadlessSession.for_game_type("racing_game") for _ in range(2)]
+    for tab in tabs:
+        tab.ui.session_state[STUDENT_KEY] = "student-conflict"
+        tab.render()
+
+    # Both tabs answer the level 1 question; the second tab's answer was
+    # made on a version the first tab has already replaced, so it is dropped
+    for tab in tabs:
+        state = tab.state
+        question = get_challenge(state.seed, state.grade).race.question
+        tab.set_value("Select the correct answer:", question.correct_option)
+        outputs = tab.click("Submit Answer")
+    return {
+        "conflicts": counting.conflicts,
+        "stale_tab_notified": any("another window" in str(output.body) for output in outputs),
+        "same_state": tabs[0].state.to_dict() == tabs[1].state.to_dict(),
+    }
+
+
+def run(sessions: int = 20, workers: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """
+    Compare no session store, the in-memory store and the networked store.
+
+    Args:
+        sessions: Sessions per game for each store
+        workers: Number of workers the students are spread over
+        seed: Seed for the routing and the students' choices
+
+    Returns:
+        Dict of measure() results per store, and the two-tab conflict check
+    """
+    previous_store = get_session_store()
+    previous_db = os.environ.get(PROGRESS_DB_ENV)
+    # Signed-in students would otherwise also be saved to progress.db
+    os.environ[PROGRESS_DB_ENV] = ""
+    server, url = serve()
+    try:
+        return {
+            "no_store": measure(None, sessions, workers, seed),
+            "memory": measure(MemorySessionStore(), sessions, workers, seed),
+            "redis_standin": measure(RedisSessionStore(url), sessions, workers, seed),
+            "two_tab_conflict": measure_conflict(),
+        }
+    finally:
+        server.shutdown()
+        set_session_store(previous_store)
+        if previous_db is None:
+            del os.environ[PROGRESS_DB_ENV]
+        else:
+            os.environ[PROGRESS_DB_ENV] = previous_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure sessions spread over workers through the session store")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per game for each store")
+    parser.add_argument("--workers", type=int, default=3, help="number of app workers")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the routing and the students' choices")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.workers, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
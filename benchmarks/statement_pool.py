@@ -0,0 +1,153 @@
+"""
+Fact/fiction statement pool benchmark.
+
+Fills a games.statement_pool.StatementPool from a stand-in LLM that takes
+`latency` seconds per call and repeats some earlier statements, then
+times drawing rounds from the pool against generating each round's
+statements on demand. Also counts how many rounds a full pool serves
+back to back before one comes up short, and how many come up short when
+rounds start steadily at `rate` per second, checks that duplicates are
+rejected, and reopens the pool file to check it survives a restart.
+
+Usage:
+    python -m benchmarks.statement_pool [--latency S] [--rounds N] [--rate R] [--seed S]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, Any
+
+from games.statement_pool import StatementPool, parse_statements
+
+_SUBJECTS = ["A comet", "The Moon", "A black hole", "Jupiter", "A wormhole", "A dragon", "A talking cat",
+             "An astronaut", "A star", "A unicorn", "Saturn", "A robot", "A galaxy", "A wizard"]
+_VERBS = ["circles", "swallows", "glows near", "races past", "sings to", "hides behind", "pulls on", "visits"]
+_OBJECTS = ["the Sun", "a distant planet", "the Milky Way", "a parallel universe", "an ice giant",
+            "a school bus", "a chocolate river", "the rings of Saturn", "a pirate ship", "a nebula"]
+
+
+class _StandInLLM:
+    """Writes `count` statements per call after `latency` seconds; some repeat earlier ones"""
+
+    def __init__(self, latency: float, repeat_share: float, seed: int):
+        self.latency = latency
+        self.repeat_share = repeat_share
+        self.rng = random.Random(seed)
+        self.written = []
+        self.calls = 0
+
+    def __call__(self, count: int) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        lines = []
+        for _ in range(count):
+            if self.written and self.rng.random() < self.repeat_share:
+                lines.append(self.rng.choice(self.written).upper())
+                continue
+            label = self.rng.choice(["FACT", "FICTION"])
+            line = (f"{label} | {self.rng.choice(_SUBJECTS)} {self.rng.choice(_VERBS)} "
+                    f"{self.rng.choice(_OBJECTS)} number {self.rng.randrange(10 ** 6)}.")
+            self.written.append(line)
+            lines.append(line)
+        lines.append("Here are your statements!")
+        return "\n".join(lines)
+
+
+def _wait_for(pool: StatementPool, available: int, timeout: float = 60.0) -> float:
+    start = time.perf_counter()
+    while pool.available < available and time.perf_counter() - start < timeout:
+        time.sleep(0.005)
+    return time.perf_counter() - start
+
+
+def run(latency: float = 0.2, rounds: int = 200, rate: float = 5.0, seed: int = 0,
+        per_round: int = 6) -> Dict[str, Any]:
+    """
+    Run every measurement.
+
+    Args:
+        latency: Seconds per stand-in LLM call
+        rounds: Rounds to draw at a steady rate
+        rate: Rounds started per second
+        seed: Seed for the stand-in LLM
+        per_round: Statements per round
+
+    Returns:
+        Dict of fill time, per-round latency from the pool and on demand,
+        rounds served back to back, short rounds at the steady rate,
+        duplicate rejections and the restart check
+    """
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "statements.db")
+    try:
+        llm = _StandInLLM(latency, 0.2, seed)
+        pool = StatementPool(path, target=200, refill_below=50, batch_size=10)
+        pool.start(llm)
+        fill = _wait_for(pool, pool.target)
+
+        draws = []
+        while True:
+            start = time.perf_counter()
+            drawn = pool.draw(per_round)
+            draws.append(time.perf_counter() - start)
+            if len(drawn) < per_round:
+                break
+        draws.sort()
+
+        _wait_for(pool, pool.target)
+        short = 0
+        started = time.perf_counter()
+        for number in range(rounds):
+            time.sleep(max(0.0, started + number / rate - time.perf_counter()))
+            short += len(pool.draw(per_round)) < per_round
+
+        on_demand_llm = _StandInLLM(latency, 0.0, seed)
+        start = time.perf_counter()
+        for _ in range(5):
+            parse_statements(on_demand_llm(per_round))
+        on_demand = (time.perf_counter() - start) / 5
+
+        _wait_for(pool, pool.target)
+        available = pool.available
+        generated, rejected, calls = pool.generated, pool.rejected, llm.calls
+        pool.close()
+        reopened = StatementPool(path)
+        restart = {"available_before": available, "available_after": reopened.available}
+        reopened.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return {
+        "fill_to_target_s": round(fill, 2),
+        "round_from_pool_us": {
+            "p50": round(draws[len(draws) // 2] * 1e6, 1),
+            "p99": round(draws[int(0.99 * (len(draws) - 1))] * 1e6, 1),
+        },
+        "round_on_demand_ms": round(on_demand * 1000, 1),
+        "back_to_back_rounds": len(draws) - 1,
+        "steady_rounds": rounds,
+        "steady_rounds_per_s": rate,
+        "steady_short_rounds": short,
+        "llm_calls": calls,
+        "statements_generated": generated,
+        "duplicates_rejected": rejected,
+        "restart": restart,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the fact/fiction statement pool")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per stand-in LLM call")
+    parser.add_argument("--rounds", type=int, default=200, help="rounds to draw at a steady rate")
+    parser.add_argument("--rate", type=float, default=5.0, help="rounds started per second")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the stand-in LLM")
+    args = parser.parse_args()
+    print(json.dumps(run(args.latency, args.rounds, args.rate, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Tracing overhead benchmark.
+
+Plays the same headless sessions (games.headless, with the scripted
+students from games.play_scripts) three times: with tracing off, with
+every render traced and serialized to os.devnull, and with every render
+traced and appended to a trace file. Also times a bare span() call with
+tracing off, the cost every instrumented section pays in production.
+
+Usage:
+    python -m benchmarks.tracing_overhead [--sessions N] [--seed S] [--keep-trace FILE]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Any, Optional
+
+from games import tracing
+from games.headless import HeadlessSession
+from games.play_scripts import PLAY_SCRIPTS
+
+
+def _play(sessions: int, seed: int, traced: bool) -> Dict[str, float]:
+    """Play `sessions` sessions of every game, tracing each render when asked"""
+    rng = random.Random(seed)
+    renders = spans = 0
+    elapsed = 0.0
+    for _ in range(sessions):
+        for game_type, play in PLAY_SCRIPTS.items():
+            session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+            if traced:
+                render = session.render
+
+                def traced_render(render=render):
+                    nonlocal spans
+                    with tracing.trace_run("render") as collected:
+                        outputs = render()
+                    spans += len(collected or ())
+                    return outputs
+                session.render = traced_render
+            start = time.perf_counter()
+            play(session, rng)
+            elapsed += time.perf_counter() - start
+            renders += session.renders
+    return {
+        "renders": renders,
+        "spans_per_render": round(spans / renders, 1) if renders else 0.0,
+        "us_per_render": round(elapsed / renders * 1e6, 1) if renders else 0.0,
+    }
+
+
+def _disabled_span_ns(calls: int = 200000) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+        with tracing.span("section"):
+            pass
+    return (time.perf_counter_ns() - start) / calls
+
+
+def run(sessions: int = 50, seed: int = 0, keep_trace: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare headless render cost with tracing off and on.
+
+    Args:
+        sessions: Sessions per game for each mode
+        seed: Seed for the students' choices
+        keep_trace: Write the trace file here instead of a temporary file
+
+    Returns:
+        Dict of per-render cost for each mode, and the cost of a disabled span
+    """
+    trace_path = keep_trace or os.path.join(tempfile.mkdtemp(), "trace.json")
+    try:
+        tracing.configure()
+        results = {
+            "disabled_span_ns": round(_disabled_span_ns(), 1),
+            "off": _play(sessions, seed, traced=False),
+        }
+        # Spans are collected and serialized, but the writes go nowhere
+        tracing.configure(trace_file=os.devnull)
+        results["to_devnull"] = _play(sessions, seed, traced=True)
+        tracing.configure(trace_file=trace_path)
+        results["to_file"] = _play(sessions, seed, traced=True)
+        results["trace_file_bytes"] = os.path.getsize(trace_path)
+    finally:
+        tracing.configure()
+        if not keep_trace and os.path.exists(trace_path):
+            os.remove(trace_path)
+
+    off = results["off"]["us_per_render"]
+    for mode in ("to_devnull", "to_file"):
+        if off:
+            results[mode]["overhead"] = round(results[mode]["us_per_render"] / off - 1, 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cost of tracing renders")
+    parser.add_argument("--sessions", type=int, default=50, help="sessions per game for each mode")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the students' choices")
+    parser.add_argument("--keep-trace", help="keep the trace file at this path")
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.seed, args.keep_trace), indent=2))
+
+
+if __name__ == "__main__":
+    main()
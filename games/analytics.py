@@ -0,0 +1,356 @@
+import gzip
+import json
+import os
+from typing import Dict, Any, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .event_log import EVENT_FIELDS, segment_paths
+
+# Columns stored as integer codes into a per-column list of distinct values
+CATEGORICAL = ("session", "student", "class", "game", "phase", "event", "question", "answer")
+
+# Bin edges (milliseconds) of time_to_answer() histograms
+TIME_BINS_MS = (0, 2000, 5000, 10000, 20000, 30000, 60000, 120000, 300000)
+
+
+class QuestionStats(NamedTuple):
+    """How a question was answered. Times are per answer, since the student's previous action."""
+    game: str
+    question: str
+    answered: int
+    correct: int
+    accuracy: float
+    median_ms: float
+    p90_ms: float
+
+
+class Mastery(NamedTuple):
+    """
+    How well a student answers. `mastery` is the share of right answers
+    pulled towards one half by two made-up answers, one right and one
+    wrong, so a student with one lucky answer doesn't rank as a master.
+    """
+    student: str
+    answered: int
+    correct: int
+    accuracy: float
+    mastery: float
+
+
+class _Categories:
+    """Dictionary encoding of one string column"""
+
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def encode(self, value: Any) -> int:
+        value = "" if value is None else str(value)
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class EventTable:
+    """
+    Gameplay events from the event log, held as NumPy columns.
+
+    String fields are dictionary-encoded (an int32 code per event, plus the
+    list of distinct values), missing numbers are NaN, 0 or -1 (see
+    `columns`), and every query is a handful of vectorized masks and
+    np.bincount group-bys, so dashboards stay fast at millions of events.
+    Segments are never changed once written, so refresh() only reads the
+    ones it hasn't seen yet.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory: Event log directory to load, if any
+        """
+        self.directory = directory
+        self.categories = {name: _Categories() for name in CATEGORICAL}
+        # ts and elapsed_ms are float64 (elapsed_ms NaN when unknown),
+        # correct is int8 (1, 0, or -1 when not graded), attempt is int32
+        # (0 when unknown) and the categorical columns are int32 codes
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, np.int32) for name in CATEGORICAL}
+        self.columns.update(
+            ts=np.empty(0, np.float64),
+            correct=np.empty(0, np.int8),
+            attempt=np.empty(0, np.int32),
+            elapsed_ms=np.empty(0, np.float64),
+        )
+        self._loaded = set()
+        if directory:
+            self.refresh()
+
+    def __len__(self) -> int:
+        return len(self.columns["ts"])
+
+    def refresh(self) -> int:
+        """
+        Load segments written since the last call.
+
+        Returns:
+            Number of events added
+        """
+        paths = [path for path in segment_paths(self.directory) if os.path.basename(path) not in self._loaded]
+        # One append for all new segments, so the columns are only copied once
+        added = self.append(event for path in paths for event in _read_segment(path))
+        self._loaded.update(os.path.basename(path) for path in paths)
+        return added
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add events to the table.
+
+        Args:
+            events: Events with some or all of EVENT_FIELDS
+
+        Returns:
+            Number of events added
+        """
+        encoders = [(name, self.categories[name].encode) for name in CATEGORICAL]
+        values: Dict[str, list] = {name: [] for name in EVENT_FIELDS}
+        for event in events:
+            for name, encode in encoders:
+                values[name].append(encode(event.get(name)))
+            values["ts"].append(event.get("ts") or 0.0)
+            correct = event.get("correct")
+            values["correct"].append(-1 if correct is None else int(correct))
+            values["attempt"].append(event.get("attempt") or 0)
+            elapsed = event.get("elapsed_ms")
+            values["elapsed_ms"].append(np.nan if elapsed is None else elapsed)
+
+        count = len(values["ts"])
+        if count:
+            for name, column in self.columns.items():
+                self.columns[name] = np.concatenate((column, np.asarray(values[name], column.dtype)))
+        return count
+
+    def code(self, column: str, value: str) -> int:
+        """
+        Get the code of a value in a categorical column.
+
+        Args:
+            column: Column name, e.g. "game"
+            value: Value to look up
+
+        Returns:
+            The code, or -1 if no event has that value
+        """
+        return self.categories[column].codes.get(value, -1)
+
+    def mask(self, event: Optional[str] = None, game: Optional[str] = None,
+             question: Optional[str] = None, class_id: Optional[str] = None,
+             student: Optional[str] = None) -> np.ndarray:
+        """
+        Select events by their fields. Filters left as None match everything.
+
+        Args:
+            event: Event kind, e.g. "answer"
+            game: Game type
+            question: Question ID
+            class_id: Class code
+            student: Student ID
+
+        Returns:
+            Boolean array with one entry per event
+        """
+        selected = np.ones(len(self), dtype=bool)
+        for column, value in (("event", event), ("game", game), ("question", question),
+                              ("class", class_id), ("student", student)):
+            if value is not None:
+                selected &= self.columns[column] == self.code(column, value)
+        return selected
+
+    def question_stats(self, game: Optional[str] = None, class_id: Optional[str] = None) -> List[QuestionStats]:
+        """
+        Accuracy and answer times of every graded question, hardest first.
+
+        Args:
+            game: Only this game's questions
+            class_id: Only answers from this class
+
+        Returns:
+            One QuestionStats per question, by accuracy from lowest to highest
+        """
+        selected = self.mask("answer", game, class_id=class_id) & (self.columns["correct"] >= 0)
+        questions = len(self.categories["question"].values)
+        groups = (self.columns["game"][selected].astype(np.int64) * questions
+                  + self.columns["question"][selected])
+        size = len(self.categories["game"].values) * questions
+        answered = np.bincount(groups, minlength=size)
+        correct = np.bincount(groups, weights=self.columns["correct"][selected], minlength=size)
+        elapsed = self.columns["elapsed_ms"][selected]
+        median, p90 = _group_percentiles(groups, elapsed, size, (0.5, 0.9))
+
+        present = np.flatnonzero(answered)
+        accuracy = correct[present] / answered[present]
+        order = present[np.argsort(accuracy, kind="stable")]
+        games = self.categories["game"].values
+        names = self.categories["question"].values
+        return [
+            QuestionStats(games[group // questions], names[group % questions], int(answered[group]),
+                          int(correct[group]), float(correct[group] / answered[group]),
+                          float(median[group]), float(p90[group]))
+            for group in order
+        ]
+
+    def time_to_answer(self, game: Optional[str] = None, question: Optional[str] = None,
+                       bins=TIME_BINS_MS) -> Dict[str, Any]:
+        """
+        Distribution of answer times.
+
+        Args:
+            game: Only this game's answers
+            question: Only answers to this question
+            bins: Histogram bin edges in milliseconds; slower answers go in the last bin
+
+        Returns:
+            Dict with "edges_ms", "counts" (one per bin) and the "p50_ms",
+            "p90_ms" and "p99_ms" percentiles (NaN when there are no answers)
+        """
+        selected = self.mask("answer", game, question)
+        elapsed = self.columns["elapsed_ms"][selected]
+        elapsed = elapsed[~np.isnan(elapsed)]
+        edges = np.asarray(bins, dtype=np.float64)
+        counts = np.bincount(np.searchsorted(edges, elapsed, side="right") - 1, minlength=len(edges))
+        if len(elapsed):
+            percentiles = np.percentile(elapsed, (50, 90, 99))
+        else:
+            percentiles = np.full(3, np.nan)
+        return {
+            "edges_ms": edges.tolist(),
+            "counts": counts[:len(edges)].tolist(),
+            "p50_ms": float(percentiles[0]),
+            "p90_ms": float(percentiles[1]),
+            "p99_ms": float(percentiles[2]),
+        }
+
+    def student_mastery(self, game: Optional[str] = None, class_id: Optional[str] = None) -> List[Mastery]:
+        """
+        Graded answers of every signed-in student, best first.
+
+        Args:
+            game: Only answers in this game
+            class_id: Only students of this class
+
+        Returns:
+            One Mastery per student who answered, by mastery from highest to lowest
+        """
+        selected = self.mask("answer", game, class_id=class_id) & (self.columns["correct"] >= 0)
+        selected &= self.columns["student"] != self.code("student", "")
+        students = self.columns["student"][selected]
+        size = len(self.categories["student"].values)
+        answered = np.bincount(students, minlength=size)
+        correct = np.bincount(students, weights=self.columns["correct"][selected], minlength=size)
+
+        present = np.flatnonzero(answered)
+        mastery = (correct[present] + 1) / (answered[present] + 2)
+        order = np.argsort(-mastery, kind="stable")
+        names = self.categories["student"].values
+        return [
+            Mastery(names[present[i]], int(answered[present[i]]), int(correct[present[i]]),
+                    float(correct[present[i]] / answered[present[i]]), float(mastery[i]))
+            for i in order
+        ]
+
+    def attempts_to_correct(self, game: str = "racing_game", question: str = "race_position") -> Dict[str, Any]:
+        """
+        How many tries each session needed to get a question right.
+
+        Made for questions students can retry, like the level one race
+        position in the racing game, which logs the attempt number.
+
+        Args:
+            game: Game type
+            question: Question ID
+
+        Returns:
+            Dict with "attempts" (attempts -> sessions that first got it
+            right on that attempt), "unsolved" (sessions that tried but
+            never got it right) and "mean" (mean attempts of solved sessions)
+        """
+        selected = self.mask("answer", game, question)
+        sessions = self.columns["session"][selected]
+        attempts = self.columns["attempt"][selected]
+        correct = self.columns["correct"][selected] == 1
+
+        size = len(self.categories["session"].values)
+        tried = np.bincount(sessions, minlength=size) > 0
+        # Earliest right attempt per session; sessions that never got it stay at the sentinel
+        first = np.full(size, np.iinfo(np.int32).max, dtype=np.int32)
+        np.minimum.at(first, sessions[correct], attempts[correct])
+        solved = first[tried & (first != np.iinfo(np.int32).max)]
+        counts = np.bincount(solved)
+        return {
+            "attempts": {int(n): int(counts[n]) for n in np.flatnonzero(counts)},
+            "unsolved": int(tried.sum() - len(solved)),
+            "mean": float(solved.mean()) if len(solved) else float("nan"),
+        }
+
+
+def _read_segment(path: str) -> Iterable[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        lines = file.read().rstrip("\n")
+    # One JSON array per segment parses faster than a json.loads per line
+    if lines:
+        yield from json.loads("[" + lines.replace("\n", ",") + "]")
+
+
+def _group_percentiles(groups: np.ndarray, values: np.ndarray, size: int,
+                       quantiles: Sequence[float]) -> List[np.ndarray]:
+    """
+    Percentiles of the values in each group, ignoring NaN.
+
+    Args:
+        groups: Group number of each value, 0 to size - 1
+        values: Whole numbers from 0 to 2**32 - 1, e.g. milliseconds, or NaN
+        size: Number of groups
+        quantiles: Percentiles as fractions, e.g. 0.5 for the median
+
+    Returns:
+        One array of `size` results per quantile, NaN for groups without values
+    """
+    known = ~np.isnan(values)
+    groups = groups[known]
+    values = values[known]
+    # Pack group and value into one int64 and sort that, which is several
+    # times faster than a two-key sort; each group becomes a sorted run
+    keys = (groups.astype(np.int64) << 32) | np.clip(values, 0, 0xFFFFFFFF).astype(np.int64)
+    keys.sort()
+    values = (keys & 0xFFFFFFFF).astype(np.float64)
+    counts = np.bincount(groups, minlength=size)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    present = counts > 0
+    start = starts[present]
+    results = []
+    for quantile in quantiles:
+        position = (counts[present] - 1) * quantile
+        lower = np.floor(position).astype(np.int64)
+        upper = np.ceil(position).astype(np.int64)
+        fraction = position - lower
+        result = np.full(size, np.nan)
+        result[present] = values[start + lower] * (1 - fraction) + values[start + upper] * fraction
+        results.append(result)
+    return results
+
+
+def load_events(directory: str) -> EventTable:
+    """
+    Load an event log directory for analysis.
+
+    Args:
+        directory: Event log directory, e.g. the value of LP_EVENT_LOG_DIR
+
+    Returns:
+        An EventTable; call refresh() on it to pick up newer segments
+    """
+    return EventTable(directory)
@@ -1,16 +1,56 @@
+import time
+import uuid
+
 import streamlit as st
-from typing import Dict, Any
-from abc import ABC, abstractmethod
-from langchain_openai import ChatOpenAI
-from langchain.prompts import ChatPromptTemplate
-from langchain.chains import LLMChain
+from typing import Dict, Any, Optional, Tuple
+from abc import ABC
+from .state import GameState
+from .state_machine import PhaseMachine, Transition
+from . import tracing
+from .content_pack import get_pack
+from .event_log import get_event_log
+from .leaderboard import ALL_STUDENTS, CLASS_KEY, get_leaderboard
+from .progress_store import STUDENT_KEY, get_progress_store
+from .session_store import SYNCED_KEY, VersionConflict, get_session_store
+
+
+class PhaseChanged(Exception):
+    """Raised by BaseGame.fire to stop rendering a phase that has just been left"""
 
 class BaseGame(ABC):
     """
     Abstract base class for all educational gamification applications.
     Provides common functionality for game implementation.
+    
+    A game instance holds immutable configuration only and is reused across
+    reruns of one session; everything a student changes while playing lives
+    in a single state_class object stored in st.session_state.
+    
+    A game's flow is declared as data: `phases` maps each phase to its render
+    method and `transitions` lists the allowed moves between phases, with
+    their guards and rewards. Phase methods call fire() to move on, and the
+    next phase is rendered in the same script run.
     """
     
+    # GameState subclass holding this game's per-session state
+    state_class = GameState
+    
+    # Phase name -> render method name, and the transitions between phases
+    phases: Dict[str, str] = {}
+    transitions: Tuple[Transition, ...] = ()
+    
+    # Built from phases/transitions for each subclass
+    machine: Optional[PhaseMachine] = None
+    
+    # Process-wide LLM and chains, shared by every session and game instance
+    _shared_llm = None
+    _shared_chains: Dict[tuple, Any] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "phases" in cls.__dict__:
+            cls.machine = PhaseMachine(cls.phases, cls.transitions, cls.state_class().phase)
+    
     def __init__(self, game_info: Dict[str, Any]):
         """
         Initialize the game with the provided game information.
@@ -23,39 +63,413 @@ class BaseGame(ABC):
         self.learning_outcomes = game_info["learning_outcomes"]
         self.content_structure = game_info["content_structure"]
         self.game_type = game_info["type"]
+        self.lesson_code = game_info.get("lesson_code", "")
         
-        # Initialize the language model
-        self.llm = ChatOpenAI(
-            temperature=0.7,
-            model="gpt-3.5-turbo"
-        )
+        # Set while a phase method is running, see fire()
+        self._rendering = False
+        # Feedback to show at the top of the next phase
+        self._notice = None
+        # When this session last logged an event for this game
+        self._last_event_at: Optional[float] = None
+    
+    @property
+    def llm(self):
+        """
+        The chat model used by this game's LLM chains.
+        
+        LangChain is imported here rather than at module level so that games
+        which never create a chain don't pay for loading it. The model is
+        stateless, so one instance is shared by all sessions.
+        """
+        if BaseGame._shared_llm is None:
+            from langchain_openai import ChatOpenAI
+            BaseGame._shared_llm = ChatOpenAI(
+                temperature=0.7,
+                model="gpt-3.5-turbo"
+            )
+        return BaseGame._shared_llm
+    
+    @property
+    def state_key(self) -> str:
+        """The st.session_state key holding this game's state object"""
+        return f"{self.game_type}_state"
+    
+    @property
+    def leaderboard_key(self) -> str:
+        """The leaderboard this game's scores go on"""
+        return self.game_type
+    
+    @property
+    def state(self) -> GameState:
+        """This session's state object for the game"""
+        state = st.session_state.get(self.state_key)
+        if state is None:
+            state = self.init_session_state()
+        return state
+    
+    def init_session_state(self) -> GameState:
+        """
+        Set up the per-session state this game needs, if it isn't there yet.
+        
+        A signed-in student resumes from their last saved state.
+        
+        Returns:
+            The session's state object
+        """
+        if self.state_key not in st.session_state:
+            st.session_state[self.state_key] = self.load_progress() or self.state_class()
+        return st.session_state[self.state_key]
+    
+    def load_progress(self) -> Optional[GameState]:
+        """
+        Load the signed-in student's saved state for this game.
+        
+        Returns:
+            The saved state, or None if no student is signed in, persistence
+            is off or nothing was saved yet
+        """
+        student_id = st.session_state.get(STUDENT_KEY)
+        store = get_progress_store() if student_id else None
+        if store is None:
+            return None
+        data = store.load(student_id, self.state_key)
+        return self.state_class.from_dict(data) if data is not None else None
+    
+    def save_progress(self, state: GameState):
+        """
+        Queue the signed-in student's state to be saved, if it changed.
+        
+        The write happens in the progress store's background thread, so
+        this never waits on the disk.
+        
+        Args:
+            state: This session's state object
+        """
+        student_id = st.session_state.get(STUDENT_KEY)
+        store = get_progress_store() if student_id else None
+        if store is not None:
+            store.save(student_id, self.state_key, state.to_dict())
+    
+    @property
+    def session_key(self) -> Optional[str]:
+        """Key of the signed-in student's state in the session store, if signed in"""
+        student_id = st.session_state.get(STUDENT_KEY)
+        return f"{student_id}/{self.state_key}" if student_id else None
+    
+    @property
+    def session_id(self) -> str:
+        """Random ID of this browser session, made on first use"""
+        session = st.session_state
+        if "_session_id" not in session:
+            session["_session_id"] = uuid.uuid4().hex[:16]
+        return session["_session_id"]
+    
+    @property
+    def player_id(self) -> str:
+        """
+        Who is playing: the signed-in student, or this browser session for
+        anonymous players. Unlike session_id, a student keeps it across
+        refreshes and reconnects.
+        """
+        student_id = st.session_state.get(STUDENT_KEY)
+        return f"student:{student_id}" if student_id else f"session:{self.session_id}"
+    
+    def pull_state(self) -> GameState:
+        """
+        Get this session's state, first catching up with the session store.
+        
+        If another worker or browser tab has saved a newer version of the
+        signed-in student's game, it replaces this session's copy, along
+        with any changes made to it since (e.g. by a widget callback).
+        
+        Returns:
+            The session's state object
+        """
+        store = get_session_store()
+        key = self.session_key if store is not None else None
+        if key is None:
+            return self.init_session_state()
+        
+        synced = st.session_state.setdefault(SYNCED_KEY, {})
+        seen = synced.get(key)
+        packed, version = store.get(key)
+        if seen is not None and seen[0] == version and self.state_key in st.session_state:
+            return st.session_state[self.state_key]
+        
+        remote = self.state_class.unpack(packed) if packed is not None else None
+        if remote is None:
+            # Nothing shared yet, or shared by a version of the game with other fields
+            synced[key] = (version, None)
+            return self.init_session_state()
+        
+        if seen is not None:
+            self._notice = ("Your game was updated in another window, so it now shows the latest progress.", None)
+        synced[key] = (version, packed)
+        st.session_state[self.state_key] = remote
+        return remote
+    
+    def push_state(self, state: GameState):
+        """
+        Write this session's state to the session store, if it changed.
+        
+        If another worker wrote first, nothing is written and the next
+        pull_state() takes the other version instead.
+        
+        Args:
+            state: This session's state object
+        """
+        store = get_session_store()
+        key = self.session_key if store is not None else None
+        if key is None:
+            return
+        
+        synced = st.session_state.setdefault(SYNCED_KEY, {})
+        version, last_packed = synced.get(key, (0, None))
+        packed = state.pack()
+        if packed == last_packed:
+            return
+        try:
+            synced[key] = (store.put(key, packed, version), packed)
+        except VersionConflict:
+            synced.pop(key, None)
+            self._notice = ("Your game was updated in another window, so this move wasn't saved.", False)
+    
+    def record_score(self, state: GameState):
+        """
+        Send the signed-in student's score to the leaderboard of their class.
+        
+        The leaderboard applies scores in batches, so this is only a note.
+        
+        Args:
+            state: This session's state object
+        """
+        student_id = st.session_state.get(STUDENT_KEY)
+        if student_id:
+            class_id = st.session_state.get(CLASS_KEY) or ALL_STUDENTS
+            get_leaderboard().record(self.leaderboard_key, class_id, student_id, state.score)
+    
+    def log_event(self, event: str, question: Optional[str] = None, answer: Any = None,
+                  correct: Optional[bool] = None, attempt: Optional[int] = None,
+                  phase: Optional[str] = None):
+        """
+        Record a gameplay event in the event log, if logging is on.
+        
+        The event is only queued; the log writes it from its own thread.
+        Transitions are logged by fire(), so games log what students do:
+        answers, explored areas, found artifacts and collected evidence.
+        
+        Args:
+            event: Kind of event, e.g. "answer", "explore", "artifact", "evidence"
+            question: Question ID, area, artifact or spot the event is about
+            answer: The student's answer
+            correct: Whether the answer was right
+            attempt: Attempt number at this question, from 1
+            phase: Phase the event happened in, if not the current one
+        """
+        log = get_event_log()
+        if log is None:
+            return
+        now = time.time()
+        elapsed = round((now - self._last_event_at) * 1000) if self._last_event_at is not None else None
+        self._last_event_at = now
+        session = st.session_state
+        log.emit({
+            "ts": now,
+            "session": self.session_id,
+            "student": session.get(STUDENT_KEY) or "",
+            "class": session.get(CLASS_KEY) or "",
+            "game": self.game_type,
+            "phase": phase or self.state.phase,
+            "event": event,
+            "question": question,
+            "answer": answer,
+            "correct": correct,
+            "attempt": attempt,
+            "elapsed_ms": elapsed,
+        })
+    
+    def reset_state(self):
+        """Reset the game by replacing its state with a fresh one"""
+        st.session_state[self.state_key] = self.state_class()
+        self.on_reset()
+    
+    def on_reset(self):
+        """
+        Called whenever the game state starts over (reset_state() or a reset
+        transition). Games that keep anything else in session state, e.g.
+        widget values, clear it here.
+        """
     
-    @abstractmethod
     def render(self):
         """
         Render the game UI using Streamlit.
-        This method must be implemented by all derived classes.
+        
+        Renders the header, then the current phase into a placeholder. If the
+        phase fires a transition, the placeholder is cleared and the next
+        phase is rendered straight away instead of waiting for a rerun.
+        Stats are drawn last, into a slot above the phase, so they show the
+        final score. Finally a signed-in student's state is written to the
+        session store, if there is one, queued to be saved, and their score
+        noted for the leaderboard.
+        
+        The app runs this inside a fragment, so everything is drawn in the
+        game area (fragments can't write to the sidebar) and widget clicks
+        only rerun the game. In-phase updates such as answering a question
+        happen in widget callbacks, which run before the rerun.
         """
+        with tracing.span("render", "game", {"game": self.game_type}):
+            state = self.pull_state()
+            
+            self.render_header()
+            
+            stats_slot = st.empty()
+            phase_slot = st.empty()
+            
+            # A chain of transitions can visit each phase at most once per run
+            for _ in range(len(self.machine.phases)):
+                phase = state.phase
+                with phase_slot.container():
+                    self.render_phase(phase)
+                if state.phase == phase:
+                    break
+                phase_slot.empty()
+            
+            with stats_slot.container(), tracing.span("render_stats", "game"):
+                self.render_stats(state)
+            
+            self.push_state(state)
+            self.save_progress(state)
+            self.record_score(state)
+    
+    def render_phase(self, phase: str):
+        """
+        Render a single phase, stopping early if it fires a transition.
+        
+        Args:
+            phase: Name of the phase to render
+        """
+        if self._notice:
+            self.display_feedback(*self._notice)
+            self._notice = None
+        
+        self.render_phase_header(phase)
+        
+        method_name = self.machine.render_method(phase)
+        self._rendering = True
+        try:
+            with tracing.span(method_name, "phase", {"phase": phase}):
+                getattr(self, method_name)()
+        except PhaseChanged:
+            pass
+        finally:
+            self._rendering = False
+    
+    def render_header(self):
+        """Render content shown above every phase. Override in games that need it."""
         pass
     
+    def render_phase_header(self, phase: str):
+        """
+        Render content shown at the top of a phase. Override in games that need it.
+        
+        Args:
+            phase: Name of the phase being rendered
+        """
+        pass
+    
+    def render_stats(self, state: GameState):
+        """
+        Render the game's stats above the current phase. Override in games that need it.
+        
+        Args:
+            state: This session's state object
+        """
+        pass
+    
+    def render_lesson_sections(self):
+        """
+        Show the exploration text of the lesson's content pack, one expander
+        per theme, if the lesson has a pack (see games.content_build).
+        """
+        pack = get_pack(self.lesson_code) if self.lesson_code else None
+        if pack is None or not pack.sections:
+            return
+        st.markdown("### 📖 Learn More")
+        for section in pack.sections:
+            with st.expander(f"{section.theme}: {section.title}"):
+                st.markdown(section.text)
+    
+    def notify(self, feedback: str, is_correct: Optional[bool] = None):
+        """
+        Show feedback at the top of the phase on the next render.
+        
+        Widget callbacks run before the script reruns, so they can't draw
+        anything themselves; they use this instead.
+        
+        Args:
+            feedback: Feedback text to display
+            is_correct: If the feedback is for a correct or incorrect answer
+        """
+        self._notice = (feedback, is_correct)
+    
+    def fire(self, event: str, notice: Optional[Tuple[str, Optional[bool]]] = None) -> bool:
+        """
+        Move to the next phase through one of the declared transitions.
+        
+        When called while a phase is rendering, the rest of that phase is
+        skipped and render() continues with the new phase.
+        
+        Args:
+            event: Event name, matched against the current phase's transitions
+            notice: Optional (feedback, is_correct) to show at the top of the next phase
+            
+        Returns:
+            False if no transition matched (unknown event or failed guard)
+        """
+        transition = self.machine.fire(self.state, event, self)
+        if transition is None:
+            return False
+        if transition.reset:
+            self.on_reset()
+        
+        self.log_event("transition", question=event, answer=transition.target, phase=transition.source)
+        self._notice = notice
+        if self._rendering:
+            raise PhaseChanged(transition.target)
+        return True
+    
     def create_llm_chain(self, template: str, output_key: str = "result"):
         """
         Create a LangChain LLM chain with the specified prompt template.
         
+        Chains are cached process-wide by template and output key, so
+        building the same chain again (from another session or game
+        instance) returns the existing one.
+        
         Args:
             template: String template for the prompt
             output_key: The key to use for the output in the chain
             
         Returns:
-            An initialized LLMChain object
+            An initialized LLMChain object, wrapped so its calls show up in traces
         """
+        cache_key = (template, output_key)
+        if cache_key in BaseGame._shared_chains:
+            return BaseGame._shared_chains[cache_key]
+        
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.chains import LLMChain
+        
         prompt = ChatPromptTemplate.from_template(template)
-        return LLMChain(
+        chain = LLMChain(
             llm=self.llm,
             prompt=prompt,
             output_key=output_key,
             verbose=False
         )
+        chain = tracing.TracedChain(chain, f"llm.{output_key}")
+        BaseGame._shared_chains[cache_key] = chain
+        return chain
     
     def display_progress(self, progress: float):
         """
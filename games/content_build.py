@@ -0,0 +1,465 @@
+"""
+Offline build of lesson content packs.
+
+Reads the lessons in idea.json and asks the LLM for each lesson's content:
+multiple-choice questions with explanations for every game description,
+and a piece of exploration text for every theme. Calls run concurrently
+under a rate limit, each finished call is checkpointed, so an interrupted
+build picks up where it stopped, and each lesson is written to
+content/packs/<lesson_code>.json, which games load with games.content_pack
+without calling the LLM. Lessons whose pack is already up to date are
+skipped.
+
+Usage:
+    python -m games.content_build [--idea FILE] [--lesson CODE ...] [--workers N] [--per-minute N] [--force]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterable, List, NamedTuple, Optional
+
+from .content_pack import PACK_DIR, PACK_FORMAT, pack_path, read_pack
+from .text import normalize
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompts or parsers change, so every pack is rebuilt
+PROMPT_VERSION = 1
+
+QUESTION_PROMPT = """
+You are writing quiz questions for students in the lesson "{title}" (themes: {themes}).
+The questions are for this classroom activity: {game} - {description}
+
+Write {count} multiple-choice questions about the lesson's facts, each with four options and one correct answer.
+Use exactly this format for every question, with a blank line between questions:
+Q: <question>
+A) <option>
+B) <option>
+C) <option>
+D) <option>
+ANSWER: <letter of the correct option>
+WHY: <one or two sentences explaining the answer to a student>
+"""
+
+SECTION_PROMPT = """
+You are writing an explorer's guide for students in the lesson "{title}".
+For each of these themes, write a short section of 60 to 150 words a student can read while exploring: {themes}
+
+Start every section with a line "## <theme>: <section heading>", using the theme's name exactly as given,
+then write the section as plain paragraphs.
+"""
+
+_QUESTION = re.compile(r"^\W*Q\d*\s*[:.)]\s*(.+)$", re.IGNORECASE)
+_OPTION = re.compile(r"^\W*([A-D])\s*[).:]\s*(.+)$")
+_ANSWER = re.compile(r"^\W*ANSWER\s*[:\-]\s*\(?([A-D])\b", re.IGNORECASE)
+_WHY = re.compile(r"^\W*WHY\s*[:\-]\s*(.+)$", re.IGNORECASE)
+_HEADING = re.compile(r"^#+\s*(.+?)\s*:\s*(.+?)\s*$")
+
+
+class Task(NamedTuple):
+    """One LLM call of a lesson's build"""
+    id: str
+    lesson_code: str
+    kind: str
+    prompt: str
+
+
+def _fingerprint(*parts: Any) -> str:
+    return hashlib.sha1(json.dumps([PROMPT_VERSION, *parts], sort_keys=True).encode()).hexdigest()[:12]
+
+
+def lesson_tasks(lesson: Dict[str, Any], questions_per_game: int = 5) -> List[Task]:
+    """
+    Get the LLM calls that build a lesson's pack.
+
+    Task IDs are fingerprints of the prompts, so a checkpointed result is
+    only reused for exactly the same call.
+
+    Args:
+        lesson: Lesson from idea.json
+        questions_per_game: Questions asked for per game description
+
+    Returns:
+        A "questions" task per game with a description, and one "sections" task
+    """
+    code, title = lesson["lesson_code"], lesson.get("title", "")
+    themes = ", ".join(lesson.get("theme", []))
+    tasks = []
+    for game in lesson.get("games", []):
+        if not game.get("description"):
+            continue
+        prompt = QUESTION_PROMPT.format(title=title, themes=themes, game=game.get("name", ""),
+                                        description=game["description"], count=questions_per_game)
+        tasks.append(Task(_fingerprint(prompt), code, "questions", prompt))
+    if themes:
+        prompt = SECTION_PROMPT.format(title=title, themes=themes)
+        tasks.append(Task(_fingerprint(prompt), code, "sections", prompt))
+    return tasks
+
+
+def pack_version(lesson: Dict[str, Any], questions_per_game: int = 5) -> str:
+    """
+    Fingerprint the lesson fields and prompts a pack is built from.
+
+    Args:
+        lesson: Lesson from idea.json
+        questions_per_game: Questions asked for per game description
+
+    Returns:
+        12 hex digits; changes when the lesson, the prompts or the question count do
+    """
+    return _fingerprint([task.id for task in lesson_tasks(lesson, questions_per_game)])
+
+
+def parse_questions(reply: str, lesson_code: str) -> List[Dict[str, Any]]:
+    """
+    Read multiple-choice questions from an LLM reply, keeping only usable ones.
+
+    A question is kept if it has at least four words, four different
+    options, an answer letter and an explanation. Options are shuffled,
+    seeded by the question, so correct answers aren't all in the same place.
+
+    Args:
+        reply: Reply in the QUESTION_PROMPT format
+        lesson_code: Lesson code, used in the question IDs
+
+    Returns:
+        Questions in question bank form, each with an "explanation"
+    """
+    questions = []
+    # Markdown bold around the labels is common; drop it
+    reply = reply.replace("*", "")
+    for block in re.split(r"\n(?=\W*Q\d*\s*[:.)])", "\n" + reply):
+        question, options, answer, why = None, {}, None, None
+        for line in block.splitlines():
+            if question is None and _QUESTION.match(line):
+                question = _QUESTION.match(line).group(1).strip()
+            elif _ANSWER.match(line):
+                answer = _ANSWER.match(line).group(1).upper()
+            elif _WHY.match(line):
+                why = _WHY.match(line).group(1).strip()
+            elif _OPTION.match(line):
+                letter, text = _OPTION.match(line).groups()
+                options.setdefault(letter, text.strip())
+        if question is None or len(normalize(question).split()) < 4 or not why:
+            continue
+        if sorted(options) != ["A", "B", "C", "D"] or answer not in options:
+            continue
+        texts = [options[letter] for letter in "ABCD"]
+        if len({normalize(text) for text in texts}) < 4:
+            continue
+
+        question_id = f"{lesson_code.lower()}-" + hashlib.sha1(normalize(question).encode()).hexdigest()[:8]
+        order = list(range(4))
+        random.Random(question_id).shuffle(order)
+        questions.append({
+            "id": question_id,
+            "question": question,
+            "options": [texts[index] for index in order],
+            "correct": order.index("ABCD".index(answer)),
+            "explanation": why,
+        })
+    return questions
+
+
+def parse_sections(reply: str, themes: Iterable[str]) -> List[Dict[str, str]]:
+    """
+    Read exploration sections from an LLM reply, keeping only usable ones.
+
+    A section is kept if its heading names one of the themes and it has
+    30 to 250 words; only the first section per theme is kept.
+
+    Args:
+        reply: Reply in the SECTION_PROMPT format
+        themes: The lesson's themes
+
+    Returns:
+        Sections as {"theme", "title", "text"} dicts, in theme order
+    """
+    by_name = {normalize(theme): theme for theme in themes}
+    found: Dict[str, Dict[str, str]] = {}
+    theme, title, lines = None, None, []
+
+    def close():
+        text = "\n".join(lines).strip()
+        if theme is not None and theme not in found and 30 <= len(normalize(text).split()) <= 250:
+            found[theme] = {"theme": theme, "title": title, "text": text}
+
+    for line in reply.splitlines():
+        heading = _HEADING.match(line.replace("*", ""))
+        if heading is not None:
+            close()
+            theme, title, lines = by_name.get(normalize(heading.group(1))), heading.group(2), []
+        else:
+            lines.append(line)
+    close()
+    return [found[theme] for theme in by_name.values() if theme in found]
+
+
+class RateLimiter:
+    """Spaces out calls from any number of threads to at most `per_minute` a minute"""
+
+    def __init__(self, per_minute: float):
+        """
+        Args:
+            per_minute: Calls allowed per minute; 0 for no limit
+        """
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the calling thread may make its call"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Checkpoint:
+    """
+    Results of a lesson's finished calls, appended to a JSON lines file
+    as they come in, so a build that stops can resume without redoing them.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a checkpoint, reading the results already in it.
+
+        Args:
+            path: Checkpoint file; created on the first result
+        """
+        self.path = path
+        self.results: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # The last line of a build that was killed mid-write
+                        continue
+                    self.results[entry["task"]] = entry["result"]
+        except FileNotFoundError:
+            pass
+
+    def add(self, task_id: str, result: Any):
+        """
+        Record a finished call.
+
+        Args:
+            task_id: Task.id of the call
+            result: Its parsed result
+        """
+        line = json.dumps({"task": task_id, "result": result}) + "\n"
+        with self._lock:
+            self.results[task_id] = result
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(line)
+
+    def remove(self):
+        """Delete the checkpoint file, once the pack is written"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpoint_path(lesson_code: str, directory: str = PACK_DIR) -> str:
+    """
+    Get the checkpoint file of a lesson's build.
+
+    Args:
+        lesson_code: Lesson code from idea.json
+        directory: Pack directory
+
+    Returns:
+        Path of <directory>/<lesson_code>.partial.jsonl
+    """
+    return os.path.join(directory, f"{lesson_code}.partial.jsonl")
+
+
+def llm_generate(model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> Callable[[str], str]:
+    """
+    Get a function sending a prompt to the chat model and returning its reply.
+
+    Args:
+        model: OpenAI chat model, as used by the games
+        temperature: Sampling temperature
+
+    Returns:
+        Function taking a prompt and returning the reply text
+    """
+    from langchain_openai import ChatOpenAI
+
+    llm = ChatOpenAI(temperature=temperature, model=model)
+    return lambda prompt: llm.invoke(prompt).content
+
+
+def _run_task(task: Task, lesson: Dict[str, Any], generate: Callable[[str], str], limiter: RateLimiter,
+              retries: int, backoff: float) -> Optional[list]:
+    """Call the LLM for a task until its reply parses, or `retries` more times fail"""
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        limiter.wait()
+        try:
+            reply = generate(task.prompt)
+        except Exception as e:
+            logger.warning("%s %s call failed (attempt %d): %s", task.lesson_code, task.kind, attempt + 1, e)
+            continue
+        if task.kind == "questions":
+            result = parse_questions(reply, task.lesson_code)
+        else:
+            result = parse_sections(reply, lesson.get("theme", []))
+        if result:
+            return result
+        logger.warning("%s %s reply had nothing usable (attempt %d)", task.lesson_code, task.kind, attempt + 1)
+    return None
+
+
+def _write_pack(lesson: Dict[str, Any], version: str, tasks: List[Task], results: Dict[str, list],
+                directory: str) -> Dict[str, Any]:
+    """Assemble a lesson's pack from its task results and write it"""
+    questions, explanations, sections = {}, {}, []
+    for task in tasks:
+        if task.kind == "sections":
+            sections.extend(results[task.id])
+            continue
+        for item in results[task.id]:
+            if item["id"] not in questions:
+                questions[item["id"]] = {key: item[key] for key in ("id", "question", "options", "correct")}
+                explanations[item["id"]] = item["explanation"]
+
+    code, title = lesson["lesson_code"], lesson.get("title", "")
+    pack = {
+        "format": PACK_FORMAT,
+        "version": version,
+        "lesson_code": code,
+        "title": title,
+        "themes": list(lesson.get("theme", [])),
+        "built_at": time.time(),
+        "bank": {
+            "bank": f"pack_{code}",
+            "description": f"Generated questions for {title}",
+            "questions": list(questions.values()),
+        },
+        "explanations": explanations,
+        "sections": sections,
+    }
+    path = pack_path(code, directory)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(pack, file, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return pack
+
+
+def build(lessons: Iterable[Dict[str, Any]], generate: Callable[[str], str], directory: str = PACK_DIR,
+          workers: int = 4, per_minute: float = 60.0, retries: int = 3, backoff: float = 2.0,
+          questions_per_game: int = 5, force: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the content packs of several lessons.
+
+    The calls of every lesson that needs building share one pool of
+    `workers` threads and one rate limit. A lesson's pack is written once
+    all its calls have succeeded; if some fail, the others stay in its
+    checkpoint for the next build.
+
+    Args:
+        lessons: Lessons from idea.json
+        generate: Function taking a prompt and returning the LLM's reply
+        directory: Pack directory
+        workers: Calls in flight at once
+        per_minute: Calls started per minute, at most; 0 for no limit
+        retries: Extra attempts per call when it fails or its reply is unusable
+        backoff: Seconds before the first retry, doubling after that
+        questions_per_game: Questions asked for per game description
+        force: Rebuild packs that are up to date, reusing no checkpoints
+
+    Returns:
+        Dict mapping lesson code to its "status" ("up to date", "built" or
+        "failed"), version, calls made and reused, and question and section counts
+    """
+    os.makedirs(directory, exist_ok=True)
+    limiter = RateLimiter(per_minute)
+    report: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for lesson in lessons:
+        code = lesson["lesson_code"]
+        version = pack_version(lesson, questions_per_game)
+        existing = read_pack(pack_path(code, directory))
+        if not force and existing is not None and existing["version"] == version:
+            report[code] = {"status": "up to date", "version": version, "calls": 0, "reused": 0}
+            continue
+        checkpoint = Checkpoint(checkpoint_path(code, directory))
+        if force:
+            checkpoint.remove()
+            checkpoint.results.clear()
+        tasks = lesson_tasks(lesson, questions_per_game)
+        todo = [task for task in tasks if task.id not in checkpoint.results]
+        report[code] = {"status": "failed", "version": version, "calls": len(todo),
+                        "reused": len(tasks) - len(todo)}
+        pending.append((lesson, version, tasks, todo, checkpoint))
+
+    def run(task: Task, lesson: Dict[str, Any], checkpoint: Checkpoint) -> bool:
+        result = _run_task(task, lesson, generate, limiter, retries, backoff)
+        if result is not None:
+            checkpoint.add(task.id, result)
+        return result is not None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="content-build") as executor:
+        submitted = [[executor.submit(run, task, lesson, checkpoint) for task in todo]
+                     for lesson, version, tasks, todo, checkpoint in pending]
+        for (lesson, version, tasks, todo, checkpoint), futures in zip(pending, submitted):
+            code = lesson["lesson_code"]
+            failed = sum(not future.result() for future in futures)
+            if failed:
+                report[code]["failed_calls"] = failed
+                logger.error("%s: %d of %d calls failed; run the build again to retry them",
+                             code, failed, len(tasks))
+                continue
+            pack = _write_pack(lesson, version, tasks, checkpoint.results, directory)
+            checkpoint.remove()
+            report[code].update(status="built", questions=len(pack["bank"]["questions"]),
+                                sections=len(pack["sections"]))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build lesson content packs with the LLM")
+    parser.add_argument("--idea", default="idea.json", help="lesson plan file")
+    parser.add_argument("--out", default=PACK_DIR, help="pack directory")
+    parser.add_argument("--lesson", action="append", help="lesson code to build (repeatable); default all")
+    parser.add_argument("--workers", type=int, default=4, help="LLM calls in flight at once")
+    parser.add_argument("--per-minute", type=float, default=60.0, help="LLM calls started per minute, at most")
+    parser.add_argument("--questions", type=int, default=5, help="questions per game description")
+    parser.add_argument("--force", action="store_true", help="rebuild packs that are up to date")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    with open(args.idea, "r", encoding="utf-8") as file:
+        lessons = json.load(file).get("lesson_gamification", [])
+    if args.lesson:
+        lessons = [lesson for lesson in lessons if lesson.get("lesson_code") in args.lesson]
+    report = build(lessons, llm_generate(), args.out, workers=args.workers, per_minute=args.per_minute,
+                   questions_per_game=args.questions, force=args.force)
+    print(json.dumps(report, indent=2))
+    if any(entry["status"] == "failed" for entry in report.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
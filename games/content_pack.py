@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+from types import MappingProxyType
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+from .question_bank import CONTENT_DIR, QuestionBank
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the built packs (content/packs/<lesson_code>.json)
+PACK_DIR = os.path.join(CONTENT_DIR, "packs")
+
+# Version of the pack file layout; packs in another layout are ignored
+# until they are rebuilt with `python -m games.content_build`
+PACK_FORMAT = 1
+
+
+class Section(NamedTuple):
+    """A piece of exploration text about one of a lesson's themes"""
+    theme: str
+    title: str
+    text: str
+
+
+class ContentPack:
+    """
+    Generated content for one lesson: multiple-choice questions with an
+    explanation of each answer, and exploration text per theme.
+
+    Packs are built offline by games.content_build and only read here, so
+    loading one never calls the LLM. Like question banks, a pack is shared
+    by every session in the process (see get_pack).
+    """
+
+    __slots__ = ("lesson_code", "title", "themes", "version", "built_at", "bank", "explanations", "sections")
+
+    def __init__(self, lesson_code: str, title: str, themes: Tuple[str, ...], version: str, built_at: float,
+                 bank: QuestionBank, explanations: Dict[str, str], sections: Tuple[Section, ...]):
+        """
+        Initialize the pack.
+
+        Args:
+            lesson_code: Lesson code from idea.json
+            title: Lesson title
+            themes: Lesson themes
+            version: Fingerprint of the lesson and prompts the pack was built from
+            built_at: Unix time of the build
+            bank: The pack's questions
+            explanations: Explanation of each question's answer, by question ID
+            sections: Exploration text, in theme order
+        """
+        self.lesson_code = lesson_code
+        self.title = title
+        self.themes = themes
+        self.version = version
+        self.built_at = built_at
+        self.bank = bank
+        self.explanations = MappingProxyType(dict(explanations))
+        self.sections = sections
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ContentPack":
+        """
+        Build a pack from the JSON structure written by games.content_build.
+
+        Args:
+            data: Dict with "lesson_code", "title", "themes", "version",
+                "built_at", a "bank" in question bank form, "explanations"
+                and a "sections" list
+
+        Returns:
+            A new ContentPack
+        """
+        return cls(
+            lesson_code=data["lesson_code"],
+            title=data["title"],
+            themes=tuple(data["themes"]),
+            version=data["version"],
+            built_at=float(data["built_at"]),
+            bank=QuestionBank.from_dict(data["bank"]),
+            explanations=data.get("explanations", {}),
+            sections=tuple(Section(item["theme"], item["title"], item["text"]) for item in data.get("sections", [])),
+        )
+
+    def explanation(self, question_id: str) -> str:
+        """
+        Get the explanation of a question's answer.
+
+        Args:
+            question_id: ID of a question in the pack's bank
+
+        Returns:
+            The explanation, or an empty string if the pack has none
+        """
+        return self.explanations.get(question_id, "")
+
+
+def pack_path(lesson_code: str, directory: str = PACK_DIR) -> str:
+    """
+    Get the file a lesson's pack is kept in.
+
+    Args:
+        lesson_code: Lesson code from idea.json
+        directory: Pack directory
+
+    Returns:
+        Path of <directory>/<lesson_code>.json
+    """
+    return os.path.join(directory, f"{lesson_code}.json")
+
+
+def read_pack(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a pack file without building the pack.
+
+    Args:
+        path: Pack file
+
+    Returns:
+        The pack's JSON structure, or None if the file is missing, unreadable
+        or in another PACK_FORMAT
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Could not read content pack %s: %s", path, e)
+        return None
+    if data.get("format") != PACK_FORMAT:
+        logger.warning("Ignoring content pack %s in format %s; rebuild it", path, data.get("format"))
+        return None
+    return data
+
+
+# Loaded packs by lesson code, with the modification time of their file;
+# None for a file that couldn't be used, until it changes
+_packs: Dict[str, Tuple[int, Optional[ContentPack]]] = {}
+
+
+def get_pack(lesson_code: str) -> Optional[ContentPack]:
+    """
+    Get a lesson's content pack, loading it from disk on first use.
+
+    The pack is loaded again when its file changes, and a lesson without
+    a pack is looked for again on every call, so packs built while the
+    app is running are picked up.
+
+    Args:
+        lesson_code: Lesson code from idea.json
+
+    Returns:
+        The shared ContentPack, or None if the lesson has no usable pack
+    """
+    path = pack_path(lesson_code)
+    try:
+        modified = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _packs.get(lesson_code)
+    if cached is not None and cached[0] == modified:
+        return cached[1]
+    data = read_pack(path)
+    pack = None
+    if data is not None:
+        try:
+            pack = ContentPack.from_dict(data)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning("Ignoring malformed content pack %s: %r; rebuild it", path, e)
+    _packs[lesson_code] = (modified, pack)
+    return pack
+
+
+def available_packs(directory: str = PACK_DIR) -> List[str]:
+    """
+    List the lessons that have a pack file.
+
+    Args:
+        directory: Pack directory
+
+    Returns:
+        Lesson codes, sorted
+    """
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-len(".json")] for name in names if name.endswith(".json"))
@@ -1,11 +1,14 @@
+import os
 import streamlit as st
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import random
-import base64
-from PIL import Image
-import requests
-from io import BytesIO
 from .base_game import BaseGame
+from .state import DNADetectiveState
+from .state_machine import Transition
+from .question_bank import get_bank
+from .media import display_image
+from .forensics import (LAB_SECONDS_ENV, LOCI, Case, SampleReport, SampleType, LabJob, discard_lab_job,
+                        format_odds, get_case, get_database, lab_job, verdict)
 
 class DNADetectiveGame(BaseGame):
     """
@@ -13,35 +16,90 @@ class DNADetectiveGame(BaseGame):
     investigation through interactive detective scenarios.
     """
     
+    state_class = DNADetectiveState
+    
+    # Game visuals, shared by every session
+    game_images = {
+        "intro": "https://img.freepik.com/free-vector/detective-equipments-composition-flat-style_1284-60574.jpg",
+        "dna_basics": "https://img.freepik.com/free-vector/dna-structure-design-biochemistry-concept_23-2148499811.jpg",
+        "crime_scene": "https://img.freepik.com/free-vector/crime-scene-concept-illustration_114360-1214.jpg",
+        "evidence": "https://img.freepik.com/free-vector/flat-design-fingerprint-detection-background_23-2148179688.jpg",
+        "complete": "https://img.freepik.com/free-vector/detective-concept-illustration_114360-1687.jpg"
+    }
+    
+    game_gifs = {
+        "dna": "https://media.giphy.com/media/3o7TKSjRrfIPjeiVyM/giphy.gif",
+        "microscope": "https://media.giphy.com/media/xUPGcpMkMDcIQQbTa0/giphy.gif",
+        "magnify": "https://media.giphy.com/media/fSvqyvXn1M3btN8sDh/giphy.gif"
+    }
+    
+    # Crime scene spots, in the order their buttons are shown; evidence is
+    # recorded in the session state by index into this tuple
+    evidence_spots = (
+        "Display Case", 
+        "Door Handle",
+        "Broken Glass",
+        "Security Camera",
+        "Visitor Log",
+        "Coffee Cup"
+    )
+    
+    evidence_descriptions = {
+        "Display Case": "You found fingerprints on the glass! This could contain DNA from the suspect.",
+        "Door Handle": "You collected DNA samples from the door handle. The thief likely touched this!",
+        "Broken Glass": "You found a small piece of cloth caught on the broken glass. It might have the thief's DNA!",
+        "Security Camera": "You found security camera footage showing someone suspicious!",
+        "Visitor Log": "You found the museum visitor log with names of everyone who visited today.",
+        "Coffee Cup": "You found a discarded coffee cup with possible saliva DNA evidence!"
+    }
+    
+    # What the lab gets from each spot. The thief left DNA on every spot that
+    # can hold it, but touched surfaces only give partial profiles.
+    evidence_samples = {
+        "Display Case": SampleType("Touch DNA from fingerprints", 0.5),
+        "Door Handle": SampleType("Touch DNA", 0.35),
+        "Broken Glass": SampleType("Skin cells on cloth", 0.1),
+        "Security Camera": SampleType("Video footage", None),
+        "Visitor Log": SampleType("Visitor log", None),
+        "Coffee Cup": SampleType("Saliva", 0.0),
+    }
+    
+    # People whose DNA the samples are compared with; one of them did it
+    suspects = ("Professor Plum", "Colonel Mustard", "Miss Scarlet", "Dr. Green")
+    
+    # Question bank for the DNA facts check
+    dna_quiz_bank = "dna_basics"
+    
+    # Evidence samples needed before the lab analysis
+    required_evidence = 3
+    
+    # Seconds between redraws of the lab's progress
+    lab_poll_interval = 0.5
+    
+    phases = {
+        "intro": "_render_intro",
+        "dna_basics": "_render_dna_basics",
+        "crime_scene": "_render_crime_scene",
+        "lab": "_render_lab",
+        "completion": "_render_completion",
+    }
+    
+    transitions = (
+        Transition("intro", "begin", "dna_basics"),
+        Transition("dna_basics", "go_to_crime_scene", "crime_scene", guard="_quiz_finished"),
+        Transition("crime_scene", "analyze", "lab", guard="_enough_evidence"),
+        Transition("lab", "lab_done", "completion", guard="_lab_finished"),
+        Transition("completion", "play_again", "intro", reset=True),
+    )
+    
     def __init__(self, game_info: Dict[str, Any]):
         """Initialize the DNA Detective Game"""
         super().__init__(game_info)
         
-        # Game-specific state
-        if "game_phase" not in st.session_state:
-            st.session_state.game_phase = "intro"
-            
-        if "investigator_points" not in st.session_state:
-            st.session_state.investigator_points = 0
-            
-        if "evidence_collected" not in st.session_state:
-            st.session_state.evidence_collected = []
-        
-        # Game visuals
-        self.game_images = {
-            "intro": "https://img.freepik.com/free-vector/detective-equipments-composition-flat-style_1284-60574.jpg",
-            "dna_basics": "https://img.freepik.com/free-vector/dna-structure-design-biochemistry-concept_23-2148499811.jpg",
-            "crime_scene": "https://img.freepik.com/free-vector/crime-scene-concept-illustration_114360-1214.jpg",
-            "evidence": "https://img.freepik.com/free-vector/flat-design-fingerprint-detection-background_23-2148179688.jpg",
-            "complete": "https://img.freepik.com/free-vector/detective-concept-illustration_114360-1687.jpg"
-        }
-        
-        self.game_gifs = {
-            "dna": "https://media.giphy.com/media/3o7TKSjRrfIPjeiVyM/giphy.gif",
-            "microscope": "https://media.giphy.com/media/xUPGcpMkMDcIQQbTa0/giphy.gif",
-            "magnify": "https://media.giphy.com/media/fSvqyvXn1M3btN8sDh/giphy.gif"
-        }
-            
+        # Seconds the lab spends on each DNA sample, so students can watch them
+        # being tested one by one; set LP_LAB_SECONDS=0 for tests and benchmarks
+        self.analysis_delay = float(os.getenv(LAB_SECONDS_ENV, "0.5"))
+        
         # DNA analysis helper using LLM
         self.dna_analyzer = self.create_llm_chain(
             """You are a DNA analysis expert explaining forensic concepts to students.
@@ -55,37 +113,56 @@ class DNADetectiveGame(BaseGame):
             "explanation"
         )
     
-    def render(self):
-        """Render the game UI"""
-        # Display header and sidebar info
-        st.sidebar.markdown(f"### Detective Stats")
-        st.sidebar.markdown(f"Investigator Points: {st.session_state.investigator_points}")
-        st.sidebar.markdown(f"Evidence Collected: {len(st.session_state.evidence_collected)}/5")
-        
-        # Game phases
-        if st.session_state.game_phase == "intro":
-            self._render_intro()
-        elif st.session_state.game_phase == "dna_basics":
-            self._render_dna_basics()
-        elif st.session_state.game_phase == "crime_scene":
-            self._render_crime_scene()
-        elif st.session_state.game_phase == "completion":
-            self._render_completion()
+    @property
+    def case(self) -> Case:
+        """
+        The crime of this play-through, made up on first use.
+        
+        Returns:
+            The shared Case for the state's case seed
+        """
+        state = self.state
+        if state.case_seed is None:
+            state.case_seed = random.getrandbits(32)
+        return get_case(state.case_seed, len(self.suspects))
+    
+    def _lab_samples(self, state: DNADetectiveState) -> List[Tuple[int, SampleType]]:
+        """(spot index, sample type) of each piece of evidence, in collection order"""
+        return [(spot, self.evidence_samples[self.evidence_spots[spot]]) for spot in state.evidence_order]
+    
+    def _lab_reports(self, state: DNADetectiveState) -> List[SampleReport]:
+        """The lab's results, analyzing the evidence here if the state has none"""
+        if state.lab_reports is None:
+            reports = LabJob(self.case, self._lab_samples(state)).run()
+            state.lab_reports = [list(report) for report in reports]
+        return [SampleReport(*report) for report in state.lab_reports]
+    
+    def render_stats(self, state: DNADetectiveState):
+        """Display detective stats"""
+        st.markdown(f"### Detective Stats")
+        st.markdown(f"Investigator Points: {state.investigator_points}")
+        st.markdown(f"Evidence Collected: {state.evidence_count}/5")
+    
+    def _quiz_finished(self, state: DNADetectiveState) -> bool:
+        """Whether every DNA facts question has been answered"""
+        return state.dna_question_ids is not None and state.current_dna_question >= len(state.dna_question_ids)
+    
+    def _enough_evidence(self, state: DNADetectiveState) -> bool:
+        """Whether enough evidence has been collected for the lab"""
+        return state.evidence_count >= self.required_evidence
+    
+    def _lab_finished(self, state: DNADetectiveState) -> bool:
+        """Whether the lab's results are in"""
+        return state.lab_reports is not None
     
     def display_image(self, url, width=None):
         """Display an image from a URL with optional width"""
-        try:
-            response = requests.get(url)
-            img = Image.open(BytesIO(response.content))
-            if width:
-                st.image(img, width=width)
-            else:
-                st.image(img)
-        except Exception as e:
-            st.error(f"Could not load image: {e}")
+        display_image(url, width)
     
     def _render_intro(self):
         """Introduction to DNA Detective Game"""
+        state = self.state
+        
         st.markdown("## 🔍 DNA Detective: The Missing Museum Artifact")
         
         # Display game logo/intro image
@@ -109,22 +186,23 @@ class DNADetectiveGame(BaseGame):
             detective_name = st.text_input("Enter your detective name:", value="Detective")
             
             if st.button("Begin Investigation") and detective_name:
-                st.session_state.detective_name = detective_name
-                st.session_state.game_phase = "dna_basics"
-                st.experimental_rerun()
+                state.detective_name = detective_name
+                self.fire("begin")
                 
         with col2:
             self.display_image(self.game_images["intro"])
     
     def _render_dna_basics(self):
         """Learn about DNA basics"""
+        state = self.state
+        
         st.markdown("## 🧬 DNA: The Blueprint of Life")
         
         col1, col2 = st.columns([3, 2])
         
         with col1:
             st.markdown(f"""
-            Hello, {st.session_state.detective_name}! Before we head to the crime scene,
+            Hello, {state.detective_name}! Before we head to the crime scene,
             let's learn some basics about DNA and why it's so important for solving crimes.
             """)
             
@@ -141,6 +219,9 @@ class DNADetectiveGame(BaseGame):
             skin cells, hair, saliva, or blood. These samples contain DNA that can be analyzed
             to identify who was at a scene. It's like having a signature that can't be faked!
             """)
+            
+            # Generated reading on the lesson's themes
+            self.render_lesson_sections()
         
         with col2:
             self.display_image(self.game_gifs["dna"])
@@ -149,68 +230,37 @@ class DNADetectiveGame(BaseGame):
         # DNA fact check quiz - add more questions to enhance the game
         st.markdown("### 📝 Quick DNA Facts Check")
         
-        if "dna_questions" not in st.session_state:
-            st.session_state.dna_questions = [
-                {
-                    "question": "What does DNA stand for?",
-                    "options": ["Digital Network Analysis", "Deoxyribonucleic Acid", "Detective Nature Assessment", "Dynamic Natural Algorithm"],
-                    "correct": "Deoxyribonucleic Acid"
-                },
-                {
-                    "question": "Which of these can contain DNA evidence?",
-                    "options": ["A rock", "A plastic toy", "A strand of hair", "A shadow"],
-                    "correct": "A strand of hair"
-                },
-                {
-                    "question": "Why is DNA unique to each person?",
-                    "options": ["Because everyone eats different food", "Because of genetic variations from our parents", "Because we all use different shampoo", "Because of our different names"],
-                    "correct": "Because of genetic variations from our parents"
-                },
-                {
-                    "question": "Which of these is NOT a common source of DNA evidence?",
-                    "options": ["Blood", "Saliva", "Metal", "Skin cells"],
-                    "correct": "Metal"
-                },
-                {
-                    "question": "What tool do forensic scientists use to see DNA better?",
-                    "options": ["Telescope", "Microwave", "Microscope", "X-ray machine"],
-                    "correct": "Microscope"
-                }
-            ]
-            st.session_state.current_dna_question = 0
-            st.session_state.dna_score = 0
+        bank = get_bank(self.dna_quiz_bank)
+        
+        if state.dna_question_ids is None:
+            state.dna_question_ids = list(bank.ids)
+            state.dna_answers = []
+            state.current_dna_question = 0
+            state.dna_score = 0
         
         # Display the current question with a progress bar
-        if st.session_state.current_dna_question < len(st.session_state.dna_questions):
-            total_questions = len(st.session_state.dna_questions)
-            progress = (st.session_state.current_dna_question / total_questions)
+        if state.current_dna_question < len(state.dna_question_ids):
+            total_questions = len(state.dna_question_ids)
+            progress = (state.current_dna_question / total_questions)
             st.progress(progress)
-            st.caption(f"Question {st.session_state.current_dna_question + 1} of {total_questions}")
+            st.caption(f"Question {state.current_dna_question + 1} of {total_questions}")
             
-            question = st.session_state.dna_questions[st.session_state.current_dna_question]
-            st.markdown(f"**Question {st.session_state.current_dna_question + 1}:** {question['question']}")
+            question = bank[state.dna_question_ids[state.current_dna_question]]
+            st.markdown(f"**Question {state.current_dna_question + 1}:** {question.question}")
             
-            answer = st.radio("Select your answer:", question["options"], index=None)
+            answer_key = f"dna_quiz_{question.id}"
+            st.radio("Select your answer:", question.options, index=None, key=answer_key)
             
             col1, col2 = st.columns([1, 3])
             with col1:
-                if st.button("Check Answer"):
-                    if answer == question["correct"]:
-                        self.display_feedback("That's correct! Great job! +5 points", True)
-                        st.session_state.dna_score += 1
-                        st.session_state.investigator_points += 5
-                    else:
-                        self.display_feedback(f"Not quite. The correct answer is: {question['correct']}", False)
-                    
-                    st.session_state.current_dna_question += 1
-                    st.experimental_rerun()
+                st.button("Check Answer", on_click=self._check_dna_answer, args=(question.id, answer_key))
         else:
             # DNA basics complete with animated progress
             st.success(f"### 🎉 Basic Training Complete!")
-            st.markdown(f"You answered {st.session_state.dna_score}/{len(st.session_state.dna_questions)} questions correctly.")
+            st.markdown(f"You answered {state.dna_score}/{len(state.dna_question_ids)} questions correctly.")
             
             # Add score meter
-            score_percentage = (st.session_state.dna_score / len(st.session_state.dna_questions)) * 100
+            score_percentage = (state.dna_score / len(state.dna_question_ids)) * 100
             st.progress(score_percentage / 100)
             
             # Display reward image based on score
@@ -227,14 +277,58 @@ class DNADetectiveGame(BaseGame):
                     st.info(f"**Expert:** {expert_answer}")
                 
                 if st.button("👉 Go to Crime Scene"):
-                    st.session_state.game_phase = "crime_scene"
-                    st.experimental_rerun()
+                    self.fire("go_to_crime_scene")
             
             with col2:
                 self.display_image(self.game_images["dna_basics"])
     
+    def _check_dna_answer(self, question_id: str, answer_key: str):
+        """
+        Check Answer callback for the DNA facts check.
+        
+        Args:
+            question_id: ID of the question the answer is for
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.dna_question_ids[state.current_dna_question:state.current_dna_question + 1] != [question_id]:
+            # Already answered, e.g. a double click
+            return
+        
+        question = get_bank(self.dna_quiz_bank)[question_id]
+        answer_index = question.option_index(st.session_state.get(answer_key))
+        state.dna_answers.append(answer_index)
+        self.log_event("answer", question=question_id, answer=answer_index,
+                       correct=answer_index == question.correct, attempt=1)
+        if answer_index == question.correct:
+            self.notify("That's correct! Great job! +5 points", True)
+            state.dna_score += 1
+            state.investigator_points += 5
+        else:
+            self.notify(f"Not quite. The correct answer is: {question.correct_option}", False)
+        
+        state.current_dna_question += 1
+    
+    def _collect_evidence(self, spot: int):
+        """
+        Evidence spot callback: collect the evidence and award points.
+        
+        Args:
+            spot: Index of the evidence spot
+        """
+        state = self.state
+        if not state.collect_evidence(spot):
+            return
+        
+        points = random.randint(5, 15)  # Variable points for more excitement
+        state.investigator_points += points
+        self.log_event("evidence", question=self.evidence_spots[spot], answer=points)
+        self.notify(f"{self.evidence_descriptions[self.evidence_spots[spot]]} **+{points} points!**", True)
+    
     def _render_crime_scene(self):
         """Crime scene investigation"""
+        state = self.state
+        
         st.markdown("## 🕵️ The Museum Crime Scene")
         
         # Create two columns for layout
@@ -242,7 +336,7 @@ class DNADetectiveGame(BaseGame):
         
         with col1:
             st.markdown(f"""
-            Welcome to the museum, {st.session_state.detective_name}! The valuable DNA artifact was stolen last night.
+            Welcome to the museum, {state.detective_name}! The valuable DNA artifact was stolen last night.
             We need to collect evidence from the scene to find out who did it.
             """)
             
@@ -259,24 +353,6 @@ class DNADetectiveGame(BaseGame):
         st.markdown("### 🔍 Collect Evidence")
         st.markdown("Look around the museum and click on areas where you might find DNA evidence.")
         
-        evidence_spots = [
-            "Display Case", 
-            "Door Handle",
-            "Broken Glass",
-            "Security Camera",
-            "Visitor Log",
-            "Coffee Cup"
-        ]
-        
-        evidence_descriptions = {
-            "Display Case": "You found fingerprints on the glass! This could contain DNA from the suspect.",
-            "Door Handle": "You collected DNA samples from the door handle. The thief likely touched this!",
-            "Broken Glass": "You found a small piece of cloth caught on the broken glass. It might have the thief's DNA!",
-            "Security Camera": "You found security camera footage showing someone suspicious!",
-            "Visitor Log": "You found the museum visitor log with names of everyone who visited today.",
-            "Coffee Cup": "You found a discarded coffee cup with possible saliva DNA evidence!"
-        }
-        
         # Create a visual representation of the evidence spots
         # Use a 3x2 grid for better visualization
         col1, col2, col3 = st.columns(3)
@@ -284,27 +360,22 @@ class DNADetectiveGame(BaseGame):
         
         # Display spots where evidence might be found with icons
         cols = [col1, col2, col3]  # Create a list of column objects
-        for i, spot in enumerate(evidence_spots):
+        for i, spot in enumerate(self.evidence_spots):
             with cols[i % 3]:
-                spot_collected = spot in st.session_state.evidence_collected
+                spot_collected = state.has_evidence(i)
                 button_label = f"{evidence_icons[i]} {spot}" + (" ✓" if spot_collected else "")
-                button_type = "success" if spot_collected else "primary" 
+                button_type = "secondary" if spot_collected else "primary" 
                 
-                if st.button(button_label, key=f"spot_{i}", type=button_type) and not spot_collected:
-                    st.session_state.evidence_collected.append(spot)
-                    st.success(evidence_descriptions[spot])
-                    points = random.randint(5, 15)  # Variable points for more excitement
-                    st.session_state.investigator_points += points
-                    st.markdown(f"**+{points} points!**")
-                    st.experimental_rerun()
+                st.button(button_label, key=f"spot_{i}", type=button_type,
+                          on_click=self._collect_evidence, args=(i,))
         
         # Display collected evidence with nice formatting
-        if st.session_state.evidence_collected:
+        if state.evidence_count:
             st.markdown("### 🧪 Evidence Collected")
             
             # Show progress towards goal
-            evidence_count = len(st.session_state.evidence_collected)
-            required_evidence = 3
+            evidence_count = state.evidence_count
+            required_evidence = self.required_evidence
             
             # Progress bar for evidence collection
             progress = min(1.0, evidence_count / required_evidence)
@@ -313,11 +384,12 @@ class DNADetectiveGame(BaseGame):
             
             # Display evidence in a nice grid with images
             cols = st.columns(min(3, evidence_count))
-            for i, evidence in enumerate(st.session_state.evidence_collected):
+            for i, spot_index in enumerate(state.evidence_order):
+                evidence = self.evidence_spots[spot_index]
                 with cols[i % min(3, evidence_count)]:
                     st.markdown(f"**Sample #{i+1}:**")
                     st.markdown(f"**Source:** {evidence}")
-                    st.markdown(f"**Type:** DNA trace evidence")
+                    st.markdown(f"**Type:** {self.evidence_samples[evidence].kind}")
                     # Show a small microscope image for each evidence
                     self.display_image(self.game_gifs["microscope"], width=100)
                 
@@ -325,39 +397,120 @@ class DNADetectiveGame(BaseGame):
             if evidence_count >= required_evidence:
                 st.success("### You've collected enough evidence!")
                 
-                # Add a spinner and fancier button
                 if st.button("🔬 Analyze Evidence in the Lab", type="primary"):
-                    with st.spinner("Processing evidence samples..."):
-                        # Simulate processing time
-                        import time
-                        time.sleep(1)
-                    st.session_state.game_phase = "completion"
-                    st.experimental_rerun()
+                    self.fire("analyze")
+    
+    def _render_lab(self):
+        """The lab analyzing the evidence in the background"""
+        state = self.state
+        job = lab_job(self.case, self._lab_samples(state), sample_seconds=self.analysis_delay)
+        if job.done:
+            self._finish_lab(job)
+        
+        st.markdown("## 🔬 The Forensics Lab")
+        
+        col1, col2 = st.columns([3, 2])
+        
+        with col1:
+            st.markdown("""
+            The lab is testing your samples one at a time. Each DNA sample is compared with
+            the suspects' DNA and searched for in the DNA database, to see whether anyone
+            else could have left it.
+            """)
+            # Redraws itself until the job is done, without holding up the script
+            st.fragment(self._render_lab_progress, run_every=self.lab_poll_interval)()
+        
+        with col2:
+            self.display_image(self.game_gifs["microscope"])
+    
+    def _render_lab_progress(self):
+        """Progress of the lab job, sample by sample, polled as a fragment"""
+        state = self.state
+        samples = self._lab_samples(state)
+        job = lab_job(self.case, samples, sample_seconds=self.analysis_delay)
+        if job.done and not self._rendering:
+            # The fragment reran on its own; run the game again to show the results
+            st.rerun(scope="app")
+        
+        reports = list(job.reports)
+        testing = min(len(reports) + 1, len(samples))
+        st.progress(job.progress, text=f"Testing sample {testing} of {len(samples)}...")
+        for i, (spot, sample_type) in enumerate(samples):
+            if i < len(reports):
+                result = f"✅ {reports[i].loci} of {len(LOCI)} markers read" if reports[i].loci else "✅ No DNA"
+            else:
+                result = "🧪 Testing..." if i == len(reports) else "⏳ Waiting"
+            st.markdown(f"**Sample #{i+1}:** {self.evidence_spots[spot]} ({sample_type.kind}) - {result}")
+    
+    def _finish_lab(self, job: LabJob):
+        """
+        Keep the results of a finished lab job and show them.
+        
+        Args:
+            job: The finished job
+        """
+        discard_lab_job(job)
+        if job.error is not None:
+            st.error(f"The lab could not analyze the evidence ({job.error}). It will try again.")
+            return
+        self.state.lab_reports = [list(report) for report in job.reports]
+        self.fire("lab_done")
+    
+    def _describe_report(self, report: SampleReport, database_size: int) -> str:
+        """
+        Explain one lab result to the student.
+        
+        Args:
+            report: The lab result
+            database_size: Profiles in the DNA database
+            
+        Returns:
+            Markdown lines for the result
+        """
+        evidence = self.evidence_spots[report.spot]
+        if not report.loci:
+            return f"**DNA Analysis:** No DNA in the {self.evidence_samples[evidence].kind.lower()}"
+        if report.suspect is None:
+            return f"**DNA Analysis:** {report.loci} of {len(LOCI)} markers read; no suspect matches"
+        
+        if report.database_matches:
+            search = f"{report.database_matches:,} of {database_size:,} other profiles match"
+        else:
+            search = f"No match among {database_size:,} other profiles"
+        return (
+            f"**DNA Analysis:** Matches {self.suspects[report.suspect]} "
+            f"at all {report.loci} of {len(LOCI)} markers read\n\n"
+            f"**Chance of a stranger matching:** {format_odds(report.log10_lr)}\n\n"
+            f"**Database Search:** {search}"
+        )
     
     def _render_completion(self):
         """Game completion"""
+        state = self.state
+        
         st.markdown("## 🏆 Case Solved!")
         
         col1, col2 = st.columns([3, 2])
         
         with col1:
             st.success(f"""
-            Congratulations, **{st.session_state.detective_name}**! You've successfully solved the case of the missing museum artifact.
+            Congratulations, **{state.detective_name}**! You've successfully solved the case of the missing museum artifact.
             
             By analyzing the DNA evidence and other clues you collected, you identified the culprit!
             The stolen artifact has been recovered and returned to the museum.
             """)
             
-            # Generate a more detailed summary of the investigation
-            culprits = ["Professor Plum", "Colonel Mustard", "Miss Scarlet", "Dr. Green"]
-            culprit = random.choice(culprits)
+            # The suspect the DNA points to
+            reports = self._lab_reports(state)
+            culprit = verdict(reports, len(self.suspects))
+            dna_samples = sum(1 for report in reports if report.loci)
             
             st.markdown("### 📋 Case Summary")
             st.info(f"""
             **Case:** The Missing Museum Artifact
-            **Lead Investigator:** {st.session_state.detective_name}
-            **Evidence Analyzed:** {len(st.session_state.evidence_collected)} samples
-            **Perpetrator:** {culprit}
+            **Lead Investigator:** {state.detective_name}
+            **Evidence Analyzed:** {state.evidence_count} samples ({dna_samples} with DNA)
+            **Perpetrator:** {self.suspects[culprit] if culprit is not None else "Unidentified"}
             **Recovery:** Complete - Artifact returned to museum
             **Case Status:** Closed successfully
             """)
@@ -370,16 +523,16 @@ class DNADetectiveGame(BaseGame):
         score_col, badge_col = st.columns([3, 1])
         
         with score_col:
-            st.markdown(f"**Final Score:** {st.session_state.investigator_points} points")
+            st.markdown(f"**Final Score:** {state.investigator_points} points")
             
             # Determine rank based on points
-            if st.session_state.investigator_points >= 50:
+            if state.investigator_points >= 50:
                 rank = "Master Detective"
                 emoji = "🔍🏆"
-            elif st.session_state.investigator_points >= 35:
+            elif state.investigator_points >= 35:
                 rank = "Senior Investigator"
                 emoji = "🕵️‍♀️⭐"
-            elif st.session_state.investigator_points >= 20:
+            elif state.investigator_points >= 20:
                 rank = "Junior Detective"
                 emoji = "🔎✅"
             else:
@@ -390,18 +543,20 @@ class DNADetectiveGame(BaseGame):
             
             # Create a score meter
             max_possible = 60  # Maximum possible score
-            score_percentage = min(1.0, st.session_state.investigator_points / max_possible)
+            score_percentage = min(1.0, state.investigator_points / max_possible)
             st.progress(score_percentage)
-            st.caption(f"Score: {st.session_state.investigator_points}/{max_possible} possible points")
+            st.caption(f"Score: {state.investigator_points}/{max_possible} possible points")
         
         # Display evidence collected in a nice format
         st.markdown("### 🧪 Evidence Collected")
-        evidence_cols = st.columns(min(3, len(st.session_state.evidence_collected)))
+        evidence_cols = st.columns(min(3, state.evidence_count))
         
-        for i, evidence in enumerate(st.session_state.evidence_collected):
+        database_size = get_database().size
+        for i, report in enumerate(reports):
+            evidence = self.evidence_spots[report.spot]
             with evidence_cols[i % len(evidence_cols)]:
                 st.markdown(f"**Evidence #{i+1}:** {evidence}")
-                st.markdown("**DNA Analysis:** Positive match")
+                st.markdown(self._describe_report(report, database_size))
                 self.display_image(self.game_gifs["magnify"], width=100)
         
         # What you learned section
@@ -418,16 +573,7 @@ class DNADetectiveGame(BaseGame):
         # Play again button
         if st.button("🔄 Play Again", type="primary"):
             # Reset game state
-            st.session_state.game_phase = "intro"
-            st.session_state.investigator_points = 0
-            st.session_state.evidence_collected = []
-            if "dna_questions" in st.session_state:
-                del st.session_state["dna_questions"]
-            if "current_dna_question" in st.session_state:
-                del st.session_state["current_dna_question"]
-            if "dna_score" in st.session_state:
-                del st.session_state["dna_score"]
-            st.experimental_rerun()
+            self.fire("play_again")
         st.markdown("### What You Learned:")
         for outcome in self.learning_outcomes:
             st.markdown(f"- {outcome}")
@@ -435,16 +581,4 @@ class DNADetectiveGame(BaseGame):
         # Play again button
         if st.button("Start New Investigation"):
             # Reset game state
-            st.session_state.game_phase = "intro"
-            st.session_state.investigator_points = 0
-            st.session_state.evidence_collected = []
-            
-            # Reset quiz state
-            if "dna_questions" in st.session_state:
-                del st.session_state.dna_questions
-            if "current_dna_question" in st.session_state:
-                del st.session_state.current_dna_question
-            if "dna_score" in st.session_state:
-                del st.session_state.dna_score
-            
-            st.experimental_rerun()
+            self.fire("play_again")
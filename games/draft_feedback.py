@@ -0,0 +1,236 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from .report_screen import Rubric, concept_coverage, has_quote, is_conclusion, is_headline_sentence, sentences, words
+
+logger = logging.getLogger(__name__)
+
+
+class SentenceFacts(NamedTuple):
+    """What the rubric needs to know about one sentence of a draft"""
+    words: int
+    # Whether the sentence would do as the headline of a draft of one line
+    headline: bool
+    quote: bool
+    # Whether the sentence would do as the draft's last
+    conclusion: bool
+    # Concepts the sentence mentions
+    concepts: FrozenSet[str]
+
+
+class DraftCheck(NamedTuple):
+    """Outcome of checking a draft"""
+    rubric: Rubric
+    # Concepts the draft mentions
+    concepts: FrozenSet[str]
+    # Sentences analyzed for this check; the rest were unchanged
+    sentences_checked: int
+
+
+def _draft_sentences(text: str) -> List[List[str]]:
+    """The sentences of each non-empty line of a draft"""
+    return [sentences(line.strip()) for line in text.strip().splitlines() if line.strip()]
+
+
+class DraftChecker:
+    """
+    Rubric checks of a draft report (see games.report_screen.check_rubric)
+    that only analyze the sentences that changed since earlier checks.
+
+    Facts about each sentence are kept by its text, so checking a draft
+    with one sentence edited analyzes that sentence and sums the rest.
+    Sentences are split within lines, so a sentence or quote broken over
+    two lines may be judged differently once the report is submitted.
+    """
+
+    def __init__(self, concepts: Mapping[str, Sequence[str]], max_sentences: int = 512):
+        """
+        Initialize the checker.
+
+        Args:
+            concepts: Keywords of each concept, as for ReportScreen
+            max_sentences: Most sentence texts to keep facts about
+        """
+        self.concepts = {concept: tuple(" ".join(words(keyword)) for keyword in keywords)
+                         for concept, keywords in concepts.items()}
+        self.max_sentences = max_sentences
+        self._facts: "OrderedDict[str, SentenceFacts]" = OrderedDict()
+        self._last_text: Optional[str] = None
+        self._last_check: Optional[DraftCheck] = None
+        self.sentences_checked = self.sentences_reused = 0
+
+    def _analyze(self, sentence: str) -> SentenceFacts:
+        sentence_words = words(sentence)
+        return SentenceFacts(
+            words=len(sentence_words),
+            headline=is_headline_sentence(sentence),
+            quote=has_quote(sentence),
+            conclusion=is_conclusion(sentence),
+            concepts=frozenset(concept_coverage(sentence_words, self.concepts)),
+        )
+
+    def _sentence_facts(self, sentence: str) -> Tuple[SentenceFacts, bool]:
+        """Facts about a sentence, and whether they were worked out now"""
+        facts = self._facts.get(sentence)
+        if facts is not None:
+            self._facts.move_to_end(sentence)
+            return facts, False
+        facts = self._facts[sentence] = self._analyze(sentence)
+        if len(self._facts) > self.max_sentences:
+            self._facts.popitem(last=False)
+        return facts, True
+
+    def check(self, text: str) -> DraftCheck:
+        """
+        Check a draft.
+
+        Args:
+            text: The draft as it is now
+
+        Returns:
+            The draft's DraftCheck
+        """
+        if text == self._last_text:
+            return self._last_check._replace(sentences_checked=0)
+        lines = _draft_sentences(text)
+        facts: List[List[SentenceFacts]] = []
+        checked = 0
+        for line in lines:
+            line_facts = []
+            for sentence in line:
+                sentence_facts, analyzed = self._sentence_facts(sentence)
+                line_facts.append(sentence_facts)
+                checked += analyzed
+            facts.append(line_facts)
+        every = [sentence for line in facts for sentence in line]
+        self.sentences_checked += checked
+        self.sentences_reused += len(every) - checked
+
+        headline = False
+        if len(lines) > 1:
+            first_line = " ".join(lines[0])
+            headline = 1 <= sum(sentence.words for sentence in facts[0]) <= 15 and not first_line.endswith(".")
+        elif every:
+            headline = every[0].headline
+        rubric = Rubric(
+            words=sum(sentence.words for sentence in every),
+            headline=headline,
+            quote=any(sentence.quote for sentence in every),
+            conclusion=len(every) >= 3 and every[-1].conclusion,
+        )
+        concepts = frozenset().union(*(sentence.concepts for sentence in every))
+        self._last_text = text
+        self._last_check = DraftCheck(rubric, concepts, checked)
+        return self._last_check
+
+
+class DraftFeedback:
+    """
+    A session's live feedback on its draft: a DraftChecker for the local
+    checks, and when the draft last had an LLM review.
+
+    A review is due when the draft is long enough, at least `review_words`
+    words are in sentences that weren't there at the last review, and
+    `review_interval` seconds have passed since it, so each session makes
+    at most one review call per interval however often it edits. Reviews
+    run on a background thread (see start_review), so the page never
+    waits for the LLM, and a submitted draft isn't reviewed.
+    """
+
+    def __init__(self, concepts: Mapping[str, Sequence[str]], review_interval: float = 30.0,
+                 review_words: int = 20, min_words: int = 30):
+        """
+        Initialize the feedback.
+
+        Args:
+            concepts: Keywords of each concept, as for ReportScreen
+            review_interval: Fewest seconds between reviews
+            review_words: Fewest words in new or changed sentences for another review
+            min_words: Fewest words of a draft worth reviewing
+        """
+        self.checker = DraftChecker(concepts)
+        self.review_interval = review_interval
+        self.review_words = review_words
+        self.min_words = min_words
+        self.review: Optional[str] = None
+        self.reviewed_at: Optional[float] = None
+        self.reviews = 0
+        # Whether a review is running on its thread
+        self.reviewing = False
+        # The draft last submitted for evaluation
+        self.submitted: Optional[str] = None
+        self._reviewed_sentences: FrozenSet[str] = frozenset()
+
+    def check(self, text: str) -> DraftCheck:
+        """Check a draft locally; see DraftChecker.check"""
+        return self.checker.check(text)
+
+    def _new_words(self, text: str) -> int:
+        """Words in sentences of the draft that weren't in the last reviewed draft"""
+        return sum(len(words(sentence)) for line in _draft_sentences(text) for sentence in line
+                   if sentence not in self._reviewed_sentences)
+
+    def seconds_to_review(self, now: Optional[float] = None) -> float:
+        """Seconds until another review may be made, 0 if it may be made now"""
+        if self.reviewed_at is None:
+            return 0.0
+        return max(0.0, self.reviewed_at + self.review_interval - (now if now is not None else time.time()))
+
+    def review_due(self, text: str, check: DraftCheck, now: Optional[float] = None) -> bool:
+        """
+        Decide whether the draft should get an LLM review now.
+
+        Args:
+            text: The draft as it is now
+            check: The draft's DraftCheck
+            now: Current Unix time, if already known
+
+        Returns:
+            True if a review is due
+        """
+        return (not self.reviewing and text != self.submitted and check.rubric.words >= self.min_words
+                and self.seconds_to_review(now) == 0 and self._new_words(text) >= self.review_words)
+
+    def start_review(self, text: str, review: Callable[[str], str], now: Optional[float] = None):
+        """
+        Review the draft on a daemon thread.
+
+        The review interval starts now, so a failed review is tried again
+        an interval later. `reviewing` is True until the thread finishes,
+        and the review is kept with reviewed() once it arrives.
+
+        Args:
+            text: The draft to review
+            review: Function getting the LLM's review of a draft
+            now: Current Unix time, if already known
+        """
+        now = now if now is not None else time.time()
+        self.reviewed_at = now
+        self.reviewing = True
+        threading.Thread(target=self._review, args=(text, review, now), name="draft-review", daemon=True).start()
+
+    def _review(self, text: str, review: Callable[[str], str], now: float):
+        try:
+            self.reviewed(text, review(text), now)
+        except Exception:
+            # A tip isn't worth breaking anything for; try again next interval
+            logger.exception("Could not review the draft")
+        finally:
+            self.reviewing = False
+
+    def reviewed(self, text: str, review: str, now: Optional[float] = None):
+        """
+        Keep a review of the draft.
+
+        Args:
+            text: The draft that was reviewed
+            review: The LLM's review
+            now: Current Unix time, if already known
+        """
+        self.review = review
+        self.reviewed_at = now if now is not None else time.time()
+        self.reviews += 1
+        self._reviewed_sentences = frozenset(sentence for line in _draft_sentences(text) for sentence in line)
@@ -0,0 +1,216 @@
+import atexit
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# SQLite file keeping LLM evaluations of students' writing across restarts;
+# set to an empty string to turn the cache off
+EVALUATION_CACHE_ENV = "LP_EVALUATION_CACHE"
+DEFAULT_EVALUATION_CACHE = "evaluation_cache.db"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS evaluations (
+        key TEXT PRIMARY KEY,
+        prompt_version TEXT NOT NULL,
+        evaluation TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        used_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS evaluations_used_at ON evaluations (used_at)",
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a student's text for caching, so resubmissions that only
+    differ in spacing or Unicode forms count as the same text. Case and
+    punctuation are kept, since the evaluation grades language use.
+
+    Args:
+        text: Student's text
+
+    Returns:
+        The text in NFKC form with runs of whitespace made single spaces
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def prompt_version(template: str) -> str:
+    """
+    Get the version of an evaluator prompt: a fingerprint of its template,
+    so editing the prompt makes new cache keys and earlier evaluations
+    are no longer used.
+
+    Args:
+        template: The evaluator chain's prompt template
+
+    Returns:
+        12 hex digits
+    """
+    return hashlib.sha1(template.encode()).hexdigest()[:12]
+
+
+def evaluation_key(text: str, instruction: str, version: str) -> str:
+    """
+    Get the cache key of an evaluation.
+
+    Args:
+        text: Student's text
+        instruction: Task the student was given
+        version: Evaluator prompt version, from prompt_version()
+
+    Returns:
+        SHA-256 hex digest of the version, instruction and normalized text
+    """
+    data = "\0".join((version, normalize_text(instruction), normalize_text(text)))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class EvaluationCache:
+    """
+    LLM evaluations of students' writing, by evaluation_key(), in SQLite.
+
+    Shared by every session and kept across restarts, so a text that was
+    evaluated before is answered without an LLM call. Holds at most
+    `capacity` evaluations; when it is full, the least recently used are
+    removed, a tenth of the capacity at a time.
+    """
+
+    def __init__(self, path: str, capacity: int = 20000):
+        """
+        Open (or create) a cache.
+
+        Args:
+            path: SQLite file, or ":memory:" for a throwaway cache
+            capacity: Most evaluations to keep
+        """
+        self.path = path
+        self.capacity = capacity
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few evaluations in a power cut only costs LLM calls
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        self._lock = threading.Lock()
+        self._size = self._connection.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+        self.hits = self.misses = self.evicted = 0
+        self._closed = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up an evaluation, marking it used.
+
+        Args:
+            key: Key from evaluation_key()
+
+        Returns:
+            The evaluation, or None if it isn't cached
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT evaluation FROM evaluations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._connection.execute("UPDATE evaluations SET used_at = ?, hits = hits + 1 WHERE key = ?",
+                                     (time.time(), key))
+        return row[0]
+
+    def put(self, key: str, version: str, evaluation: str):
+        """
+        Keep an evaluation, evicting the least recently used if the cache is full.
+
+        Args:
+            key: Key from evaluation_key()
+            version: Evaluator prompt version the key was made with
+            evaluation: The LLM's evaluation
+        """
+        now = time.time()
+        with self._lock:
+            added = self._connection.execute(
+                "INSERT OR IGNORE INTO evaluations (key, prompt_version, evaluation, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, version, evaluation, now, now),
+            ).rowcount
+            if not added:
+                self._connection.execute("UPDATE evaluations SET evaluation = ?, used_at = ? WHERE key = ?",
+                                         (evaluation, now, key))
+                return
+            self._size += 1
+            if self._size > self.capacity:
+                self._evict(self._size - self.capacity + self.capacity // 10)
+
+    def _evict(self, count: int):
+        removed = self._connection.execute(
+            "DELETE FROM evaluations WHERE key IN (SELECT key FROM evaluations ORDER BY used_at LIMIT ?)", (count,)
+        ).rowcount
+        self._size -= removed
+        self.evicted += removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the cache's counts since it was opened.
+
+        Returns:
+            Dict of evaluations held, hits, misses, hit rate and evictions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evicted": self.evicted,
+        }
+
+    def close(self):
+        """Close the database. Safe to call twice."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._connection.close()
+        atexit.unregister(self.close)
+
+
+_cache: Optional[EvaluationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache() -> Optional[EvaluationCache]:
+    """
+    Get the process-wide evaluation cache, opening it on first use.
+
+    Returns:
+        The cache, or None if it is turned off with LP_EVALUATION_CACHE=""
+        or can't be opened
+    """
+    global _cache
+    if _cache is None:
+        path = os.getenv(EVALUATION_CACHE_ENV, DEFAULT_EVALUATION_CACHE)
+        if not path:
+            return None
+        with _cache_lock:
+            if _cache is None:
+                try:
+                    _cache = EvaluationCache(path)
+                except sqlite3.Error as e:
+                    logger.warning("Could not open the evaluation cache %s: %s", path, e)
+                    return None
+                atexit.register(_cache.close)
+    return _cache
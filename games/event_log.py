@@ -0,0 +1,222 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directory gameplay events are written to; logging is off unless it's set
+EVENT_LOG_DIR_ENV = "LP_EVENT_LOG_DIR"
+
+# Fields of every event, in order; fields a game doesn't give are None
+EVENT_FIELDS = (
+    "ts",          # Unix time of the event
+    "session",     # Browser session the event came from
+    "student",     # Signed-in student ID, or ""
+    "class",       # Student's class code, or ""
+    "game",        # Game type
+    "phase",       # Phase the event happened in
+    "event",       # "answer", "explore", "artifact", "evidence", "transition", ...
+    "question",    # Question, area, artifact or evidence spot; for transitions, the event fired
+    "answer",      # The student's answer; for transitions, the phase moved to
+    "correct",     # Whether the answer was right
+    "attempt",     # Attempt number at this question, from 1
+    "elapsed_ms",  # Time since the previous event in this game and session
+)
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+
+class EventLog:
+    """
+    Append-only log of gameplay events, written in compressed segments.
+
+    emit() appends to an in-memory ring buffer and returns. A writer thread
+    drains the buffer every `flush_interval` seconds, or as soon as
+    `batch_size` events are waiting, and writes each batch to a new gzip'd
+    JSON-lines segment file. If the writer falls behind by more than
+    `capacity` events the oldest are dropped (and counted in `dropped`)
+    rather than slowing the games down.
+
+    Segments are named so that sorting their names sorts them by time, and
+    appear atomically, so read_events() can replay a directory while it is
+    being written.
+    """
+
+    def __init__(self, directory: str, capacity: int = 100000, batch_size: int = 5000,
+                 flush_interval: float = 2.0):
+        """
+        Start an event log writing to a directory.
+
+        Args:
+            directory: Directory for segment files, created if missing
+            capacity: Events the ring buffer holds before dropping the oldest
+            batch_size: Waiting events that trigger a flush before the interval is up
+            flush_interval: Seconds between flushes
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+
+        self._buffer: deque = deque(maxlen=capacity)
+        self._segments = 0
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="event-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, event: Dict[str, Any]):
+        """
+        Queue an event. Never touches the disk.
+
+        Args:
+            event: Event with some or all of EVENT_FIELDS
+        """
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(event)
+        if len(buffer) >= self.batch_size:
+            self._wake.set()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every queued event and wait until it is on disk.
+
+        Args:
+            timeout: Seconds to wait at most, or None to wait as long as it takes
+
+        Returns:
+            True if the buffer was emptied in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._buffer or not self._idle.is_set():
+            self._idle.clear()
+            self._wake.set()
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._idle.wait(remaining)
+        return True
+
+    def close(self):
+        """Write queued events and stop the writer. Safe to call twice."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            # Events popped from the buffer are only on disk once idle is set again
+            self._idle.clear()
+            closing = self._closed
+            while self._buffer:
+                batch = []
+                try:
+                    while len(batch) < self.batch_size:
+                        batch.append(self._buffer.popleft())
+                except IndexError:
+                    pass
+                self._write(batch)
+            self._idle.set()
+            if closing:
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        self._segments += 1
+        name = f"{time.time_ns():020d}-{os.getpid()}-{self._segments:06d}{SEGMENT_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        lines = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in batch)
+        try:
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8", compresslevel=6) as file:
+                file.write(lines)
+            os.replace(path + ".tmp", path)
+            self.written += len(batch)
+        except OSError:
+            logger.exception("Could not write %d gameplay events", len(batch))
+
+
+def segment_paths(directory: str) -> List[str]:
+    """
+    List a directory's finished segment files, oldest first.
+
+    Args:
+        directory: Event log directory
+
+    Returns:
+        Paths of the segment files
+    """
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+    return [os.path.join(directory, name) for name in names]
+
+
+def read_events(directory: str) -> Iterator[Dict[str, Any]]:
+    """
+    Replay every logged event in a directory, oldest segment first.
+
+    Args:
+        directory: Event log directory
+
+    Yields:
+        Events as written, with every field of EVENT_FIELDS present
+    """
+    for path in segment_paths(directory):
+        with gzip.open(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                event = dict.fromkeys(EVENT_FIELDS)
+                event.update(json.loads(line))
+                yield event
+
+
+_log: Optional[EventLog] = None
+_configured = False
+_log_lock = threading.Lock()
+
+
+def get_event_log() -> Optional[EventLog]:
+    """
+    Get the process-wide event log, starting it on first use.
+
+    Returns:
+        The log, or None if LP_EVENT_LOG_DIR isn't set
+    """
+    global _log, _configured
+    if not _configured:
+        with _log_lock:
+            if not _configured:
+                directory = os.getenv(EVENT_LOG_DIR_ENV)
+                _log = EventLog(directory) if directory else None
+                _configured = True
+    return _log
+
+
+def set_event_log(log: Optional[EventLog]):
+    """
+    Use an event log instead of the one configured by LP_EVENT_LOG_DIR.
+
+    Args:
+        log: The log, or None to turn logging off
+    """
+    global _log, _configured
+    with _log_lock:
+        _log = log
+        _configured = True
@@ -0,0 +1,497 @@
+"""
+Simulated forensic DNA profiling for DNA Detective.
+
+Profiles are typed at the 13 CODIS core STR loci. Each locus has a made-up
+population of alleles (repeat counts) with fixed frequencies. A person's
+genotype at a locus, an unordered pair of alleles, is stored as one byte,
+so a profile is 13 bytes and a database of profiles is one uint8 array of
+shape (loci, profiles): a column of genotype codes per locus. Matching an
+evidence sample compares one code per typed locus against a whole column
+at once.
+"""
+import functools
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Core STR loci: name, shortest repeat count and number of alleles
+LOCI = (
+    ("CSF1PO", 6, 10), ("D3S1358", 11, 10), ("D5S818", 7, 10), ("D7S820", 6, 10),
+    ("D8S1179", 8, 11), ("D13S317", 8, 8), ("D16S539", 5, 11), ("D18S51", 9, 16),
+    ("D21S11", 24, 14), ("FGA", 17, 15), ("TH01", 5, 7), ("TPOX", 6, 8), ("vWA", 11, 11),
+)
+
+# Alleles per locus are numbered 0 to MAX_ALLELES - 1; a genotype's code is
+# low * MAX_ALLELES + high, which fits in a byte
+MAX_ALLELES = 16
+
+# Genotype code of a locus that failed to type in an evidence sample
+MISSING = -1
+
+# Chance a locus is typed wrongly; a mismatched locus scores log10 of this
+# instead of ruling the profile out
+TYPING_ERROR = 1e-3
+
+# Fewest loci a DNA sample ever types at
+MIN_LOCI = 3
+
+# Profiles scored per step of a database search
+CHUNK_SIZE = 1 << 17
+
+# Environment variable with the number of profiles in the DNA database
+DATABASE_SIZE_ENV = "LP_DNA_DATABASE_SIZE"
+
+# Environment variable with the seconds the lab spends on each DNA sample
+LAB_SECONDS_ENV = "LP_LAB_SECONDS"
+
+DEFAULT_DATABASE_SIZE = 1_000_000
+
+# Seconds a finished lab job is kept for its session to collect, after
+# which it is dropped, e.g. when the tab that started it was closed
+FINISHED_JOB_TTL = 600.0
+
+# Seed of the allele frequencies and of the database
+POPULATION_SEED = 1953
+
+
+def _allele_frequencies(seed: int) -> np.ndarray:
+    """Frequencies of each locus' alleles, peaked around the middle repeat counts"""
+    rng = np.random.default_rng(seed)
+    frequencies = np.zeros((len(LOCI), MAX_ALLELES))
+    for locus, (_, _, alleles) in enumerate(LOCI):
+        middle = np.exp(-0.5 * ((np.arange(alleles) - (alleles - 1) / 2) / (alleles / 4)) ** 2)
+        weights = middle * rng.gamma(2.0, 1.0, alleles) + 0.01
+        frequencies[locus, :alleles] = weights / weights.sum()
+    return frequencies
+
+
+FREQUENCIES = _allele_frequencies(POPULATION_SEED)
+
+# Cumulative frequencies, for drawing alleles by inverse transform
+_CUMULATIVE = np.cumsum(FREQUENCIES, axis=1)
+
+# Hardy-Weinberg frequency of every genotype code: p^2 for a homozygote,
+# 2pq for a heterozygote (codes with low > high never occur and are 0)
+_GENOTYPE_FREQUENCIES = np.triu(
+    FREQUENCIES[:, :, None] * FREQUENCIES[:, None, :] * (2 - np.eye(MAX_ALLELES))
+).reshape(len(LOCI), -1)
+
+with np.errstate(divide="ignore"):
+    # log10 likelihood ratio of a matching genotype, 1 / its frequency
+    MATCH_WEIGHTS = -np.log10(_GENOTYPE_FREQUENCIES)
+
+
+class SampleType(NamedTuple):
+    """What the lab gets from one kind of evidence"""
+    kind: str                 # Shown to the student, e.g. "Saliva"
+    dropout: Optional[float]  # Chance each locus fails to type; None if there is no DNA
+
+
+class SampleReport(NamedTuple):
+    """Lab result for one piece of evidence"""
+    spot: int                       # Evidence spot the sample came from
+    loci: int                       # Loci typed; 0 if the evidence had no DNA
+    suspect: Optional[int]          # Best-matching suspect with no mismatched loci, if any
+    log10_lr: float                 # log10 likelihood ratio of that suspect being the source
+    mismatches: Tuple[int, ...]     # Mismatched loci of each suspect
+    database_matches: int           # Database profiles with no mismatched loci
+
+
+def random_profiles(rng: np.random.Generator, count: int) -> np.ndarray:
+    """
+    Draw profiles of unrelated people from the population.
+
+    Args:
+        rng: NumPy random generator
+        count: Profiles to draw
+
+    Returns:
+        Array of shape (loci, count) of uint8 genotype codes
+    """
+    genotypes = np.empty((len(LOCI), count), dtype=np.uint8)
+    for locus in range(len(LOCI)):
+        alleles = np.searchsorted(_CUMULATIVE[locus], rng.random((2, count)), side="right")
+        np.minimum(alleles, LOCI[locus][2] - 1, out=alleles)
+        genotypes[locus] = np.minimum(alleles[0], alleles[1]) * MAX_ALLELES + np.maximum(alleles[0], alleles[1])
+    return genotypes
+
+
+def match_scores(genotypes: np.ndarray, sample: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Score every profile as the source of an evidence sample.
+
+    Args:
+        genotypes: Array of shape (loci, profiles) of genotype codes
+        sample: Genotype code of the sample at each locus, MISSING where it did not type
+
+    Returns:
+        (log10 likelihood ratio, mismatched loci) per profile. Each matching
+        locus adds log10 of one over its genotype frequency, each mismatched
+        one log10(TYPING_ERROR).
+    """
+    scores = np.zeros(genotypes.shape[1], dtype=np.float32)
+    matched = np.zeros(genotypes.shape[1], dtype=np.uint8)
+    typed = np.flatnonzero(sample != MISSING)
+    for locus in typed:
+        match = genotypes[locus] == sample[locus]
+        np.add(scores, MATCH_WEIGHTS[locus, sample[locus]], out=scores, where=match)
+        matched += match
+    mismatches = len(typed) - matched
+    scores += mismatches * np.float32(np.log10(TYPING_ERROR))
+    return scores, mismatches
+
+
+def random_match_probability(sample: np.ndarray) -> float:
+    """
+    Chance an unrelated person's profile matches a sample at every typed locus.
+
+    Args:
+        sample: Genotype codes of the sample, MISSING where it did not type
+
+    Returns:
+        The product of the typed genotypes' frequencies
+    """
+    typed = np.flatnonzero(sample != MISSING)
+    return float(np.prod(_GENOTYPE_FREQUENCIES[typed, sample[typed]]))
+
+
+def format_odds(log10_lr: float) -> str:
+    """
+    Write a likelihood ratio as odds a student can read, e.g. "1 in 3.2 billion".
+
+    Args:
+        log10_lr: log10 of the ratio
+
+    Returns:
+        The odds
+    """
+    if log10_lr >= 18:
+        return f"1 in 10^{log10_lr:.0f}"
+    value = 10 ** log10_lr
+    for size, word in ((1e15, "quadrillion"), (1e12, "trillion"), (1e9, "billion"), (1e6, "million")):
+        if value >= size:
+            return f"1 in {value / size:.1f} {word}"
+    return f"1 in {value:,.0f}"
+
+
+class ProfileDatabase:
+    """A DNA database of synthetic profiles of unrelated people"""
+
+    def __init__(self, genotypes: np.ndarray):
+        """
+        Initialize the database.
+
+        Args:
+            genotypes: Array of shape (loci, profiles) of uint8 genotype codes
+        """
+        self.genotypes = genotypes
+
+    @classmethod
+    def generate(cls, size: int, seed: int = POPULATION_SEED) -> "ProfileDatabase":
+        """
+        Generate a database.
+
+        Args:
+            size: Number of profiles
+            seed: Seed for the profiles; the same seed always gives the same database
+
+        Returns:
+            The database
+        """
+        rng = np.random.default_rng(seed)
+        genotypes = np.empty((len(LOCI), size), dtype=np.uint8)
+        for start in range(0, size, CHUNK_SIZE):
+            genotypes[:, start:start + CHUNK_SIZE] = random_profiles(rng, min(CHUNK_SIZE, size - start))
+        return cls(genotypes)
+
+    @property
+    def size(self) -> int:
+        """Number of profiles"""
+        return self.genotypes.shape[1]
+
+    def chunks(self) -> range:
+        """Start index of each chunk of profiles searched in one step"""
+        return range(0, self.size, CHUNK_SIZE)
+
+    def count_matches(self, sample: np.ndarray, start: int = 0, stop: Optional[int] = None) -> int:
+        """
+        Count profiles with no mismatched loci against a sample.
+
+        Args:
+            sample: Genotype codes of the sample
+            start: First profile to search
+            stop: Profile to stop before; defaults to the end
+
+        Returns:
+            Number of matching profiles
+        """
+        _, mismatches = match_scores(self.genotypes[:, start:stop], sample)
+        return int(np.count_nonzero(mismatches == 0))
+
+
+_database: Optional[ProfileDatabase] = None
+_database_lock = threading.Lock()
+
+
+def get_database() -> ProfileDatabase:
+    """
+    Get the process-wide DNA database, generating it on first use.
+
+    Returns:
+        A database of LP_DNA_DATABASE_SIZE profiles (a million by default)
+    """
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                size = os.getenv(DATABASE_SIZE_ENV)
+                _database = ProfileDatabase.generate(int(size) if size else DEFAULT_DATABASE_SIZE)
+    return _database
+
+
+class Case:
+    """
+    One crime: the suspects' profiles, which of them is the culprit and the
+    DNA they left at each evidence spot.
+    """
+
+    def __init__(self, seed: int, suspects: int):
+        """
+        Initialize the case.
+
+        Args:
+            seed: Seed for the case; the same seed always gives the same case
+            suspects: Number of suspects
+        """
+        self.seed = seed
+        rng = np.random.default_rng([seed, 0])
+        self.genotypes = random_profiles(rng, suspects)
+        self.culprit = int(rng.integers(suspects))
+
+    def sample(self, spot: int, sample_type: SampleType) -> Optional[np.ndarray]:
+        """
+        Type the culprit's DNA left at an evidence spot.
+
+        Args:
+            spot: Index of the evidence spot
+            sample_type: What the spot holds
+
+        Returns:
+            Genotype code at each locus (MISSING where it dropped out), or
+            None if the evidence has no DNA
+        """
+        if sample_type.dropout is None:
+            return None
+        rng = np.random.default_rng([self.seed, 1, spot])
+        typed = rng.random(len(LOCI)) >= sample_type.dropout
+        if typed.sum() < MIN_LOCI:
+            typed[rng.choice(len(LOCI), MIN_LOCI, replace=False)] = True
+        return np.where(typed, self.genotypes[:, self.culprit].astype(np.int16), MISSING)
+
+
+@functools.lru_cache(maxsize=1024)
+def get_case(seed: int, suspects: int) -> Case:
+    """
+    Get the case for a seed, shared by every session playing it.
+
+    Args:
+        seed: Case seed
+        suspects: Number of suspects
+
+    Returns:
+        The case
+    """
+    return Case(seed, suspects)
+
+
+def verdict(reports: Sequence[SampleReport], suspects: int) -> Optional[int]:
+    """
+    Pick the suspect the DNA evidence points to.
+
+    Args:
+        reports: Lab results of the samples
+        suspects: Number of suspects
+
+    Returns:
+        The suspect with the largest total log10 likelihood ratio over the
+        samples they match, or None if no sample matches anyone
+    """
+    totals = [0.0] * suspects
+    for report in reports:
+        if report.suspect is not None:
+            totals[report.suspect] += report.log10_lr
+    best = max(range(suspects), key=totals.__getitem__)
+    return best if totals[best] > 0 else None
+
+
+class LabJob:
+    """
+    Lab analysis of a case's evidence, run on a background thread.
+
+    Samples are analyzed one at a time, in the order given, and each one's
+    report is appended to `reports` as soon as it is ready, so a page
+    polling the job can show results while the rest are still running.
+    A DNA sample is scored against the suspects, then searched for in the
+    DNA database a chunk at a time; `progress` counts those steps.
+    """
+
+    def __init__(self, case: Case, samples: Sequence[Tuple[int, SampleType]],
+                 database: Optional[ProfileDatabase] = None, sample_seconds: float = 0.0):
+        """
+        Initialize the job; start() runs it.
+
+        Args:
+            case: The case the evidence is from
+            samples: (spot index, sample type) of each piece of evidence
+            database: DNA database to search; defaults to get_database()
+            sample_seconds: Shortest time each DNA sample takes, spread
+                evenly over its steps; 0 runs at full speed
+        """
+        self.case = case
+        self.samples = list(samples)
+        self.database = database
+        self.sample_seconds = sample_seconds
+        self.reports: List[SampleReport] = []
+        self.error: Optional[BaseException] = None
+        # time.monotonic() when the job finished
+        self.finished_at: Optional[float] = None
+        self._steps = 1
+        self._done_steps = 0
+        self._finished = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        """Share of the analysis done, from 0 to 1"""
+        return 1.0 if self._finished.is_set() else self._done_steps / self._steps
+
+    @property
+    def done(self) -> bool:
+        """Whether the job has finished, successfully or not"""
+        return self._finished.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the job to finish.
+
+        Args:
+            timeout: Seconds to wait at most; None waits until it finishes
+
+        Returns:
+            Whether the job has finished
+        """
+        return self._finished.wait(timeout)
+
+    def start(self) -> "LabJob":
+        """Start the job on a daemon thread"""
+        threading.Thread(target=self._run, name="lab-job", daemon=True).start()
+        return self
+
+    def _run(self):
+        try:
+            self.run()
+        except BaseException as error:
+            self.error = error
+        finally:
+            self.finished_at = time.monotonic()
+            self._finished.set()
+
+    def run(self) -> List[SampleReport]:
+        """
+        Run the analysis on the calling thread.
+
+        Returns:
+            A report per sample, in the order given
+        """
+        database = self.database or get_database()
+        typed = [(spot, self.case.sample(spot, sample_type)) for spot, sample_type in self.samples]
+        steps_per_sample = 1 + len(database.chunks())
+        self._steps = max(1, steps_per_sample * sum(sample is not None for _, sample in typed))
+
+        for spot, sample in typed:
+            if sample is None:
+                self.reports.append(SampleReport(spot, 0, None, 0.0, (), 0))
+                continue
+
+            started = time.perf_counter()
+            scores, mismatches = match_scores(self.case.genotypes, sample)
+            self._step(started, 1 / steps_per_sample)
+            matches = 0
+            for number, start in enumerate(database.chunks(), 2):
+                matches += database.count_matches(sample, start, start + CHUNK_SIZE)
+                self._step(started, number / steps_per_sample)
+
+            consistent = np.flatnonzero(mismatches == 0)
+            suspect = int(consistent[np.argmax(scores[consistent])]) if len(consistent) else None
+            self.reports.append(SampleReport(
+                spot,
+                int(np.count_nonzero(sample != MISSING)),
+                suspect,
+                round(float(scores[suspect]), 3) if suspect is not None else 0.0,
+                tuple(mismatches.tolist()),
+                matches,
+            ))
+        return self.reports
+
+    def _step(self, started: float, share: float):
+        """Count a finished step, then wait until `share` of the sample's time has passed"""
+        self._done_steps += 1
+        remaining = started + self.sample_seconds * share - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+_jobs: Dict[Tuple, LabJob] = {}
+_jobs_lock = threading.Lock()
+_jobs_swept_at = 0.0
+
+
+def _drop_expired_jobs(now: float, ttl: float):
+    """Drop jobs that finished over `ttl` seconds ago; call with _jobs_lock held"""
+    global _jobs_swept_at
+    if now - _jobs_swept_at < ttl / 10:
+        return
+    _jobs_swept_at = now
+    for key in [key for key, job in _jobs.items() if job.finished_at is not None and now - job.finished_at > ttl]:
+        del _jobs[key]
+
+
+def lab_job(case: Case, samples: Sequence[Tuple[int, SampleType]], sample_seconds: float = 0.0) -> LabJob:
+    """
+    Get the lab job for some evidence, starting one if there is none.
+
+    Asking again for the same case and evidence, e.g. from the next poll
+    of the page, returns the same job. Finished jobs are kept until their
+    session collects them with discard_lab_job(), or for FINISHED_JOB_TTL
+    seconds if it never does.
+
+    Args:
+        case: The case the evidence is from
+        samples: (spot index, sample type) of each piece of evidence
+        sample_seconds: Shortest time each DNA sample of a new job takes
+
+    Returns:
+        The job
+    """
+    key = (case.seed, tuple(spot for spot, _ in samples))
+    with _jobs_lock:
+        _drop_expired_jobs(time.monotonic(), FINISHED_JOB_TTL)
+        job = _jobs.get(key)
+        if job is None:
+            job = _jobs[key] = LabJob(case, samples, sample_seconds=sample_seconds).start()
+        return job
+
+
+def discard_lab_job(job: LabJob):
+    """
+    Forget a finished job once its reports have been read.
+
+    Args:
+        job: Job returned by lab_job()
+    """
+    with _jobs_lock:
+        for key, running in list(_jobs.items()):
+            if running is job:
+                del _jobs[key]
@@ -0,0 +1,551 @@
+import base64
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+import streamlit
+from streamlit.errors import DuplicateWidgetID
+
+from .evaluation_cache import EVALUATION_CACHE_ENV
+from .tracing import TracedChain
+
+# 1x1 transparent PNG served for every image in headless sessions
+PLACEHOLDER_IMAGE = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+# Canned LLM replies, by chain output key
+OFFLINE_REPLIES = {
+    "evaluation": "Score: 7\nA vivid, well-structured report. Try adding a quote from an expert.",
+    "answer": "The Indus cities were carefully planned, with streets in a grid and covered drains.",
+    "explanation": "DNA is like an instruction book inside every cell, and everyone's book is a little different.",
+    "statements": "FACT | Saturn's rings are made of ice and rock.\n"
+                  "FICTION | A wizard sailed a paper boat through a wormhole to Mars.",
+    "review": "Great start! Add what an expert thinks caused it.",
+}
+
+# The HeadlessUI drawing for the current thread, if any
+_current = threading.local()
+_install_lock = threading.Lock()
+_streamlit_fetch_image = None
+
+
+class Output(NamedTuple):
+    """An element drawn by a game: the st function that drew it and its main argument"""
+    kind: str
+    body: Any
+
+
+class Widget(NamedTuple):
+    """An input widget drawn during the last run"""
+    kind: str
+    label: str
+    key: Optional[str]
+    options: Optional[Tuple[Any, ...]]
+    on_click: Optional[Callable]
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+
+    @property
+    def id(self) -> str:
+        """Widget identity: its key, or its kind and label if it has none"""
+        return self.key if self.key is not None else f"{self.kind}:{self.label}"
+
+
+class SessionState(dict):
+    """A dict with attribute access, like st.session_state"""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name: str, value: Any):
+        self[name] = value
+
+    def __delattr__(self, name: str):
+        try:
+            del self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class _Block:
+    """A layout container (column, tab, expander, sidebar, ...). Drawing into it draws into the UI."""
+
+    def __init__(self, ui: "HeadlessUI"):
+        self._ui = ui
+
+    def __enter__(self) -> "_Block":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ui, name)
+
+    def container(self) -> "_Block":
+        return self
+
+
+class _Slot(_Block):
+    """st.empty(): the content drawn into it can be cleared again"""
+
+    def __init__(self, ui: "HeadlessUI"):
+        super().__init__(ui)
+        self._start = self._end = None
+
+    def __enter__(self) -> "_Slot":
+        self._start = len(self._ui.outputs)
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self._end = len(self._ui.outputs)
+        return False
+
+    def empty(self):
+        if self._start is not None:
+            del self._ui.outputs[self._start:self._end]
+            self._start = self._end = None
+
+
+def _element(kind: str) -> Callable:
+    """Build a HeadlessUI method recording an output element"""
+    def draw(self, body: Any = None, *args, **kwargs):
+        self.outputs.append(Output(kind, body))
+    draw.__name__ = kind
+    return draw
+
+
+class HeadlessUI:
+    """
+    Stand-in for the streamlit module that records what a game draws and
+    serves scripted widget values.
+
+    Implements the subset of the Streamlit API the games use. Widgets are
+    identified by key, or by kind and label when they have no key, and
+    drawing two widgets with the same identity raises DuplicateWidgetID as
+    it does in Streamlit. Keyed widget values live in session_state, and
+    button callbacks run at the start of the next run, before the game
+    renders.
+    """
+
+    def __init__(self, fetch_image: Optional[Callable[[str], bytes]] = None):
+        """
+        Initialize the UI.
+
+        Args:
+            fetch_image: Function returning the bytes of an image URL;
+                defaults to serving PLACEHOLDER_IMAGE without any network access
+        """
+        self.session_state = SessionState()
+        self.outputs: List[Output] = []
+        self.widgets: Dict[str, Widget] = {}
+        self.fetch_image = fetch_image or (lambda url: PLACEHOLDER_IMAGE)
+        self.sidebar = _Block(self)
+        self._values: Dict[str, Any] = {}
+        self._pending_clicks: List[str] = []
+        self._clicked = frozenset()
+
+    # Scripting
+
+    def find(self, label_or_key: str, kind: Optional[str] = None) -> Widget:
+        """
+        Find a widget drawn during the last run.
+
+        Args:
+            label_or_key: Widget key, or its label
+            kind: Optional widget kind to match, e.g. "button"
+
+        Returns:
+            The widget
+
+        Raises:
+            LookupError: If no widget, or more than one, matches
+        """
+        widget = self.widgets.get(label_or_key)
+        if widget is not None and widget.key == label_or_key and kind in (None, widget.kind):
+            return widget
+
+        matches = [
+            widget for widget in self.widgets.values()
+            if widget.label == label_or_key and kind in (None, widget.kind)
+        ]
+        if len(matches) != 1:
+            raise LookupError(f"{len(matches)} widgets match {label_or_key!r}; drawn: {list(self.widgets)}")
+        return matches[0]
+
+    def set_value(self, label_or_key: str, value: Any):
+        """
+        Set the value a widget returns from the next run on.
+
+        Args:
+            label_or_key: Widget key, or its label
+            value: New value; for radios and selectboxes, one of the options
+
+        Raises:
+            ValueError: If the value is not one of the widget's options
+        """
+        widget = self.find(label_or_key)
+        if widget.options is not None and value not in widget.options:
+            raise ValueError(f"{value!r} is not an option of {widget.label!r}: {widget.options}")
+        if widget.key is not None:
+            self.session_state[widget.key] = value
+        else:
+            self._values[widget.id] = value
+
+    def click(self, label_or_key: str):
+        """
+        Click a button; it returns True on the next run.
+
+        Args:
+            label_or_key: Button key, or its label
+        """
+        self._pending_clicks.append(self.find(label_or_key, "button").id)
+
+    def start_run(self):
+        """Begin a script run: clear the output, then run the callbacks of clicked buttons"""
+        clicks, self._pending_clicks = self._pending_clicks, []
+        drawn = self.widgets
+        self.outputs = []
+        self.widgets = {}
+        self._clicked = frozenset(clicks)
+        for widget_id in clicks:
+            widget = drawn[widget_id]
+            if widget.on_click is not None:
+                widget.on_click(*widget.args, **widget.kwargs)
+
+    def texts(self) -> List[str]:
+        """The text of every text element drawn during the last run"""
+        return [str(output.body) for output in self.outputs if isinstance(output.body, str)]
+
+    # Output elements
+
+    markdown = _element("markdown")
+    write = _element("write")
+    title = _element("title")
+    header = _element("header")
+    subheader = _element("subheader")
+    caption = _element("caption")
+    text = _element("text")
+    success = _element("success")
+    info = _element("info")
+    warning = _element("warning")
+    error = _element("error")
+    image = _element("image")
+    progress = _element("progress")
+    dataframe = _element("dataframe")
+    table = _element("table")
+    balloons = _element("balloons")
+
+    def metric(self, label: str, value: Any, *args, **kwargs):
+        self.outputs.append(Output("metric", (label, value)))
+
+    # Layout
+
+    def columns(self, spec, **kwargs) -> List[_Block]:
+        count = spec if isinstance(spec, int) else len(spec)
+        return [_Block(self) for _ in range(count)]
+
+    def tabs(self, labels) -> List[_Block]:
+        return [_Block(self) for _ in labels]
+
+    def expander(self, label: str, expanded: bool = False, **kwargs) -> _Block:
+        return _Block(self)
+
+    def container(self, **kwargs) -> _Block:
+        return _Block(self)
+
+    def spinner(self, text: str = "", **kwargs) -> _Block:
+        return _Block(self)
+
+    def fragment(self, func: Optional[Callable] = None, **kwargs) -> Callable:
+        # A fragment runs inline with the rest of the script; there are no timed reruns
+        return func if func is not None else (lambda func: func)
+
+    def empty(self) -> _Slot:
+        return _Slot(self)
+
+    # Input widgets
+
+    def _register(self, kind: str, label: str, key: Optional[str], options: Optional[Tuple[Any, ...]] = None,
+                  on_click: Optional[Callable] = None, args=None, kwargs=None) -> Widget:
+        widget = Widget(kind, label, key, options, on_click, tuple(args or ()), dict(kwargs or {}))
+        if widget.id in self.widgets:
+            raise DuplicateWidgetID(f"There are multiple {kind} widgets with the same ID {widget.id!r}")
+        self.widgets[widget.id] = widget
+        return widget
+
+    def _value(self, widget: Widget, default: Any) -> Any:
+        if widget.key is not None:
+            value = self.session_state.get(widget.key, default)
+        else:
+            value = self._values.get(widget.id, default)
+        if widget.options is not None and value is not None and value not in widget.options:
+            value = default
+        if widget.key is not None:
+            self.session_state[widget.key] = value
+        return value
+
+    def button(self, label: str, key: Optional[str] = None, help: Optional[str] = None,
+               on_click: Optional[Callable] = None, args=None, kwargs=None, **options) -> bool:
+        widget = self._register("button", label, key, None, on_click, args, kwargs)
+        return widget.id in self._clicked
+
+    def radio(self, label: str, options, index: Optional[int] = 0, key: Optional[str] = None, **kwargs) -> Any:
+        options = tuple(options)
+        widget = self._register("radio", label, key, options)
+        return self._value(widget, options[index] if index is not None and options else None)
+
+    def selectbox(self, label: str, options, index: Optional[int] = 0, key: Optional[str] = None, **kwargs) -> Any:
+        options = tuple(options)
+        widget = self._register("selectbox", label, key, options)
+        return self._value(widget, options[index] if index is not None and options else None)
+
+    def text_input(self, label: str, value: str = "", key: Optional[str] = None, **kwargs) -> str:
+        return self._value(self._register("text_input", label, key), value)
+
+    def text_area(self, label: str, value: str = "", height: Optional[int] = None,
+                  key: Optional[str] = None, **kwargs) -> str:
+        return self._value(self._register("text_area", label, key), value)
+
+    def number_input(self, label: str, min_value=None, max_value=None, value=None, step=None,
+                     key: Optional[str] = None, **kwargs):
+        if value is None:
+            value = min_value if min_value is not None else 0
+        return self._value(self._register("number_input", label, key), value)
+
+
+class _UIProxy:
+    """
+    Replaces the `st` module in game modules once headless sessions are used.
+
+    Calls go to the HeadlessUI of the session active on the current thread,
+    or to Streamlit itself when there is none, so the app keeps working.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        ui = getattr(_current, "ui", None)
+        return getattr(streamlit if ui is None else ui, name)
+
+
+_PROXY = _UIProxy()
+
+
+def _fetch_image(url: str) -> bytes:
+    """games.media.fetch_image, served by the active HeadlessUI if there is one"""
+    ui = getattr(_current, "ui", None)
+    return _streamlit_fetch_image(url) if ui is None else ui.fetch_image(url)
+
+
+def install(game_class: Type):
+    """
+    Route the Streamlit calls of a game's modules through the headless proxy.
+
+    Also turns the evaluation cache off for the process: headless sessions
+    get canned LLM replies, which must never be served to students as
+    real grades.
+
+    Args:
+        game_class: BaseGame subclass; the modules of it and its base classes are patched
+    """
+    global _streamlit_fetch_image
+    from . import media
+
+    with _install_lock:
+        os.environ[EVALUATION_CACHE_ENV] = ""
+        modules = {sys.modules[klass.__module__] for klass in game_class.__mro__} | {media}
+        for module in modules:
+            if getattr(module, "st", None) is streamlit:
+                module.st = _PROXY
+        if _streamlit_fetch_image is None:
+            _streamlit_fetch_image = media.fetch_image
+            # Keep fetch_image.clear() working for callers outside sessions
+            _fetch_image.clear = _streamlit_fetch_image.clear
+            media.fetch_image = _fetch_image
+
+
+class OfflineChain:
+    """Stand-in for an LLM chain that answers with a canned reply, without network access"""
+
+    def __init__(self, output_key: str, reply=None):
+        """
+        Initialize the chain.
+
+        Args:
+            output_key: Key of the chain's output, as in BaseGame.create_llm_chain
+            reply: Reply text, or a function taking the inputs and returning it;
+                defaults to the OFFLINE_REPLIES entry for the output key
+        """
+        self.output_key = output_key
+        self.reply = reply if reply is not None else OFFLINE_REPLIES.get(output_key, "OK")
+        self.calls = 0
+
+    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Answer a call like a LangChain chain would.
+
+        Args:
+            inputs: Template variables
+
+        Returns:
+            Dict with the reply under the output key
+        """
+        self.calls += 1
+        reply = self.reply(inputs) if callable(self.reply) else self.reply
+        return {self.output_key: reply}
+
+
+def default_game_info(game_class: Type) -> Dict[str, Any]:
+    """
+    Minimal game metadata for a game class, for sessions without a catalog.
+
+    Args:
+        game_class: BaseGame subclass
+
+    Returns:
+        Game info dict with the game type looked up in the registry
+    """
+    from .registry import GAME_REGISTRY
+
+    entry_point = f"{game_class.__module__}:{game_class.__name__}"
+    game_type = next(
+        (name for name, spec in GAME_REGISTRY.items() if spec["entry_point"] == entry_point),
+        game_class.__name__,
+    )
+    return {
+        "name": game_class.__name__,
+        "title": "",
+        "description": "",
+        "learning_outcomes": [],
+        "content_structure": {},
+        "type": game_type,
+    }
+
+
+class HeadlessSession:
+    """
+    One simulated student playing a game without a browser.
+
+    The game is built and rendered against a HeadlessUI, with OfflineChain
+    in place of its LLM chains. Script inputs with set_value() and click();
+    like in Streamlit, each click is followed by a run of the game. Several
+    sessions can run at once on different threads.
+    """
+
+    def __init__(self, game_class: Type, game_info: Optional[Dict[str, Any]] = None,
+                 replies: Optional[Dict[str, Any]] = None,
+                 fetch_image: Optional[Callable[[str], bytes]] = None,
+                 max_interactions: int = 10000, **attributes):
+        """
+        Build the game for a new session.
+
+        Args:
+            game_class: BaseGame subclass to play
+            game_info: Game metadata; defaults to default_game_info(game_class)
+            replies: LLM replies by chain output key, overriding OFFLINE_REPLIES
+            fetch_image: Function returning image bytes; defaults to a placeholder
+            max_interactions: Clicks after which the session fails, so a
+                script that can't finish doesn't loop forever
+            **attributes: Game attributes to override, e.g. analysis_delay=0
+        """
+        install(game_class)
+        self.ui = HeadlessUI(fetch_image)
+        self.chains: Dict[str, OfflineChain] = {}
+        self.renders = 0
+        self.interactions = 0
+        self.max_interactions = max_interactions
+        replies = {**OFFLINE_REPLIES, **(replies or {})}
+
+        def create_llm_chain(template: str, output_key: str) -> TracedChain:
+            chain = self.chains[output_key] = OfflineChain(output_key, replies.get(output_key))
+            return TracedChain(chain, f"llm.{output_key}")
+
+        with self.active():
+            game = game_class.__new__(game_class)
+            game.create_llm_chain = create_llm_chain
+            game.__init__(game_info or default_game_info(game_class))
+            for name, value in attributes.items():
+                setattr(game, name, value)
+        self.game = game
+
+    @classmethod
+    def for_game_type(cls, game_type: str, **kwargs) -> "HeadlessSession":
+        """
+        Start a session for a registered game type.
+
+        Args:
+            game_type: Game type, e.g. "racing_game"
+            **kwargs: Passed on to HeadlessSession()
+
+        Returns:
+            The new session
+        """
+        from .registry import get_game_class
+
+        game_class = get_game_class(game_type)
+        if game_class is None:
+            raise ValueError(f"Unknown game type: {game_type}")
+        return cls(game_class, **kwargs)
+
+    @contextmanager
+    def active(self) -> Iterator["HeadlessSession"]:
+        """Make this session's UI the one games draw into on this thread"""
+        previous = getattr(_current, "ui", None)
+        _current.ui = self.ui
+        try:
+            yield self
+        finally:
+            _current.ui = previous
+
+    @property
+    def state(self):
+        """The game's state object for this session"""
+        with self.active():
+            return self.game.state
+
+    def render(self) -> List[Output]:
+        """
+        Run the game once, like a Streamlit script run.
+
+        Returns:
+            The elements drawn
+        """
+        with self.active():
+            self.ui.start_run()
+            self.game.render()
+        self.renders += 1
+        return self.ui.outputs
+
+    def set_value(self, label_or_key: str, value: Any) -> "HeadlessSession":
+        """
+        Set a widget's value for the next run; see HeadlessUI.set_value.
+
+        Returns:
+            The session, so calls can be chained
+        """
+        self.ui.set_value(label_or_key, value)
+        return self
+
+    def click(self, label_or_key: str) -> List[Output]:
+        """
+        Click a button and run the game.
+
+        Args:
+            label_or_key: Button key, or its label
+
+        Returns:
+            The elements drawn
+
+        Raises:
+            RuntimeError: If the session has reached max_interactions
+        """
+        self.interactions += 1
+        if self.interactions > self.max_interactions:
+            raise RuntimeError(f"Session did not finish within {self.max_interactions} interactions")
+        self.ui.click(label_or_key)
+        return self.render()
@@ -1,8 +1,10 @@
 import streamlit as st
 from typing import Dict, Any, List
 import random
-import os
 from .base_game import BaseGame
+from .state import IndusValleyState
+from .state_machine import Transition
+from .question_bank import get_bank
 
 class IndusValleyAdventureGame(BaseGame):
     """
@@ -11,29 +13,37 @@ class IndusValleyAdventureGame(BaseGame):
     adventures.
     """
     
+    state_class = IndusValleyState
+    
+    # Question bank for the knowledge test
+    quiz_bank = "indus_valley_quiz"
+    
+    phases = {
+        "intro": "_render_intro",
+        "map": "_render_map",
+        "harappa": "_render_harappa",
+        "mohenjo_daro": "_render_mohenjo_daro",
+        "quiz": "_render_quiz",
+        "completion": "_render_completion",
+    }
+    
+    transitions = (
+        Transition("intro", "begin", "map"),
+        Transition("map", "visit_harappa", "harappa"),
+        Transition("map", "visit_mohenjo_daro", "mohenjo_daro"),
+        Transition("harappa", "return_to_map", "map"),
+        Transition("mohenjo_daro", "return_to_map", "map"),
+        Transition("mohenjo_daro", "take_test", "quiz", guard="_quiz_unlocked"),
+        Transition("quiz", "complete", "completion", guard="_quiz_finished", reward="_quiz_bonus"),
+        Transition("completion", "restart", "intro", reset=True),
+    )
+    
     def __init__(self, game_info: Dict[str, Any]):
         """Initialize the Indus Valley Adventure Game"""
         super().__init__(game_info)
         
-        # Game-specific state
-        if "game_stage" not in st.session_state:
-            st.session_state.game_stage = "intro"
-            
-        if "knowledge_points" not in st.session_state:
-            st.session_state.knowledge_points = 0
-            
-        if "artifacts_collected" not in st.session_state:
-            st.session_state.artifacts_collected = []
-            
-        if "guide_answers" not in st.session_state:
-            st.session_state.guide_answers = {}
-        
-        # Ensure OpenAI API key is set
-        if not os.getenv("OPENAI_API_KEY"):
-            st.error("OpenAI API key not found. Please set it in the .env file.")
-            return
-            
-        # Create the AI guide using LangChain
+        # Create the AI guide using LangChain (the app checks for an API key
+        # before starting games that need one)
         try:
             self.guide_chain = self.create_llm_chain(
                 """You are an archaeological expert named Dr. Sharma, guiding students through the ancient 
@@ -50,31 +60,44 @@ class IndusValleyAdventureGame(BaseGame):
             st.error(f"Error initializing language model: {e}")
             self.guide_chain = None
     
-    def render(self):
-        """Render the game UI"""
-        # Display header and sidebar info
-        st.sidebar.markdown(f"### Explorer Stats")
-        st.sidebar.markdown(f"Knowledge Points: {st.session_state.knowledge_points}")
-        st.sidebar.markdown(f"Artifacts: {len(st.session_state.artifacts_collected)}/6")
-        
-        # Add Ask Dr. Sharma to sidebar on all screens except intro (where it's in the main content)
-        if st.session_state.game_stage != "intro":
-            with st.sidebar.expander("💬 Ask Dr. Sharma a question"):
-                self._render_ask_dr_sharma()
-        
-        # Game stages
-        if st.session_state.game_stage == "intro":
-            self._render_intro()
-        elif st.session_state.game_stage == "map":
-            self._render_map()
-        elif st.session_state.game_stage == "harappa":
-            self._render_harappa()
-        elif st.session_state.game_stage == "mohenjo_daro":
-            self._render_mohenjo_daro()
-        elif st.session_state.game_stage == "quiz":
-            self._render_quiz()
-        elif st.session_state.game_stage == "completion":
-            self._render_completion()
+    def render_stats(self, state: IndusValleyState):
+        """Display explorer stats and, outside the intro, the guide"""
+        st.markdown(f"### Explorer Stats")
+        st.markdown(f"Knowledge Points: {state.knowledge_points}")
+        st.markdown(f"Artifacts: {state.artifact_count}/6")
+        
+        # Add Ask Dr. Sharma on all screens except intro (where it's in the main content)
+        if state.phase != "intro":
+            with st.expander("💬 Ask Dr. Sharma a question"):
+                self._render_ask_dr_sharma("stats")
+    
+    def _quiz_unlocked(self, state: IndusValleyState) -> bool:
+        """The knowledge test opens after exploring both cities extensively"""
+        return state.explored_count >= 3 and state.artifact_count >= 2
+    
+    def _quiz_finished(self, state: IndusValleyState) -> bool:
+        """Whether every knowledge test question has been answered"""
+        return state.quiz_question_ids is not None and state.current_quiz_question >= len(state.quiz_question_ids)
+    
+    def _quiz_bonus(self, state: IndusValleyState) -> int:
+        """Bonus points for good performance on the knowledge test"""
+        return 15 if state.quiz_score >= 4 else 0
+    
+    def _render_ask_dr_sharma(self, key_prefix: str):
+        """
+        Let the student ask Dr. Sharma a question.
+        
+        Args:
+            key_prefix: Prefix for the widget keys, so the guide can appear in
+                several places on one page
+        """
+        user_question = st.text_input("Your question:", key=f"{key_prefix}_guide_question")
+        if st.button("Ask", key=f"{key_prefix}_guide_ask") and user_question:
+            if self.guide_chain is None:
+                st.error("Dr. Sharma isn't available right now. Please try again later.")
+                return
+            guide_answer = self.guide_chain.invoke({"question": user_question})["answer"]
+            st.markdown(f"**Dr. Sharma:** {guide_answer}")
     
     def _render_intro(self):
         """Introduction to the game"""
@@ -101,14 +124,10 @@ class IndusValleyAdventureGame(BaseGame):
         
         # Ask Dr. Sharma section
         with st.expander("Ask Dr. Sharma a question"):
-            user_question = st.text_input("Your question:")
-            if st.button("Ask") and user_question:
-                guide_answer = self.guide_chain.invoke({"question": user_question})["answer"]
-                st.markdown(f"**Dr. Sharma:** {guide_answer}")
+            self._render_ask_dr_sharma("intro")
         
         if st.button("Begin Your Adventure"):
-            st.session_state.game_stage = "map"
-            st.experimental_rerun()
+            self.fire("begin")
     
     def _render_map(self):
         """Map view where player can select locations to visit"""
@@ -127,25 +146,25 @@ class IndusValleyAdventureGame(BaseGame):
             st.markdown("### Harappa")
             st.markdown("One of the largest settlements of the Indus Valley Civilization")
             if st.button("Visit Harappa"):
-                st.session_state.game_stage = "harappa"
-                st.experimental_rerun()
+                self.fire("visit_harappa")
         
         with col2:
             st.markdown("### Mohenjo Daro")
             st.markdown("The 'Mound of the Dead' - a remarkably well-preserved ancient city")
             if st.button("Visit Mohenjo Daro"):
-                st.session_state.game_stage = "mohenjo_daro"
-                st.experimental_rerun()
+                self.fire("visit_mohenjo_daro")
+        
+        # Generated reading on the lesson's themes
+        self.render_lesson_sections()
         
         # Ask Dr. Sharma section
         with st.expander("Ask Dr. Sharma a question"):
-            user_question = st.text_input("Your question:")
-            if st.button("Ask") and user_question:
-                guide_answer = self.guide_chain.invoke({"question": user_question})["answer"]
-                st.markdown(f"**Dr. Sharma:** {guide_answer}")
+            self._render_ask_dr_sharma("map")
     
     def _render_harappa(self):
         """Harappa exploration"""
+        state = self.state
+        
         st.markdown("## Exploring Harappa")
         st.markdown("""
         Welcome to Harappa, one of the most important cities of the Indus Valley Civilization.
@@ -168,9 +187,9 @@ class IndusValleyAdventureGame(BaseGame):
             The citadel area was built on an elevated platform for protection against floods and enemies.
             """)
             
-            if "harappa_layout_explored" not in st.session_state:
-                st.session_state.knowledge_points += 5
-                st.session_state.harappa_layout_explored = True
+            if state.explore("harappa_layout"):
+                state.knowledge_points += 5
+                self.log_event("explore", question="harappa_layout")
         
         with tabs[1]:
             st.markdown("""
@@ -183,9 +202,9 @@ class IndusValleyAdventureGame(BaseGame):
             planning and coordination.
             """)
             
-            if "harappa_construction_explored" not in st.session_state:
-                st.session_state.knowledge_points += 5
-                st.session_state.harappa_construction_explored = True
+            if state.explore("harappa_construction"):
+                state.knowledge_points += 5
+                self.log_event("explore", question="harappa_construction")
         
         with tabs[2]:
             st.markdown("""
@@ -194,7 +213,7 @@ class IndusValleyAdventureGame(BaseGame):
             Explore the area to find important artifacts!
             """)
             
-            if "harappa_seal" not in st.session_state.artifacts_collected:
+            if not state.has_artifact("harappa_seal"):
                 if st.button("Search for Artifacts"):
                     st.markdown("""
                     **You found a Harappan Seal!**
@@ -203,8 +222,9 @@ class IndusValleyAdventureGame(BaseGame):
                     from the undeciphered Indus script. These seals were likely used in trade 
                     to mark goods.
                     """)
-                    st.session_state.artifacts_collected.append("harappa_seal")
-                    st.session_state.knowledge_points += 10
+                    state.collect_artifact("harappa_seal")
+                    state.knowledge_points += 10
+                    self.log_event("artifact", question="harappa_seal")
             else:
                 st.markdown("""
                 **Harappan Seal**
@@ -217,11 +237,12 @@ class IndusValleyAdventureGame(BaseGame):
         # Navigation buttons
         st.markdown("### Navigation")
         if st.button("Return to Map"):
-            st.session_state.game_stage = "map"
-            st.experimental_rerun()
+            self.fire("return_to_map")
     
     def _render_mohenjo_daro(self):
         """Mohenjo Daro exploration"""
+        state = self.state
+        
         st.markdown("## Exploring Mohenjo Daro")
         st.markdown("""
         Welcome to Mohenjo Daro, the "Mound of the Dead." This remarkably well-preserved city 
@@ -245,9 +266,9 @@ class IndusValleyAdventureGame(BaseGame):
             of cleanliness in Indus culture.
             """)
             
-            if "great_bath_explored" not in st.session_state:
-                st.session_state.knowledge_points += 5
-                st.session_state.great_bath_explored = True
+            if state.explore("great_bath"):
+                state.knowledge_points += 5
+                self.log_event("explore", question="great_bath")
         
         with tabs[1]:
             st.markdown("""
@@ -261,9 +282,9 @@ class IndusValleyAdventureGame(BaseGame):
             This level of sanitation wasn't seen again in South Asia until the modern era!
             """)
             
-            if "sanitation_explored" not in st.session_state:
-                st.session_state.knowledge_points += 5
-                st.session_state.sanitation_explored = True
+            if state.explore("sanitation"):
+                state.knowledge_points += 5
+                self.log_event("explore", question="sanitation")
         
         with tabs[2]:
             st.markdown("""
@@ -276,9 +297,9 @@ class IndusValleyAdventureGame(BaseGame):
             of the Indus people.
             """)
             
-            if "granary_explored" not in st.session_state:
-                st.session_state.knowledge_points += 5
-                st.session_state.granary_explored = True
+            if state.explore("granary"):
+                state.knowledge_points += 5
+                self.log_event("explore", question="granary")
         
         with tabs[3]:
             st.markdown("""
@@ -287,7 +308,7 @@ class IndusValleyAdventureGame(BaseGame):
             Explore the area to find important artifacts!
             """)
             
-            if "bronze_statuette" not in st.session_state.artifacts_collected:
+            if not state.has_artifact("bronze_statuette"):
                 if st.button("Search Area 1"):
                     st.markdown("""
                     **You found the Dancing Girl Bronze Statuette!**
@@ -296,10 +317,11 @@ class IndusValleyAdventureGame(BaseGame):
                     artifacts from the civilization. Its creation shows the advanced metallurgical 
                     skills of the Indus people.
                     """)
-                    st.session_state.artifacts_collected.append("bronze_statuette")
-                    st.session_state.knowledge_points += 10
+                    state.collect_artifact("bronze_statuette")
+                    state.knowledge_points += 10
+                    self.log_event("artifact", question="bronze_statuette")
             
-            if "priest_king" not in st.session_state.artifacts_collected:
+            if not state.has_artifact("priest_king"):
                 if st.button("Search Area 2"):
                     st.markdown("""
                     **You found the Priest King Sculpture!**
@@ -308,120 +330,112 @@ class IndusValleyAdventureGame(BaseGame):
                     with trefoil patterns. It might represent a priest or ruler, though we 
                     don't know for certain who it portrays.
                     """)
-                    st.session_state.artifacts_collected.append("priest_king")
-                    st.session_state.knowledge_points += 10
+                    state.collect_artifact("priest_king")
+                    state.knowledge_points += 10
+                    self.log_event("artifact", question="priest_king")
         
         # Navigation buttons
         st.markdown("### Navigation")
         if st.button("Return to Map"):
-            st.session_state.game_stage = "map"
-            st.experimental_rerun()
+            self.fire("return_to_map")
         
         # After exploring both cities extensively, unlock the quiz
-        explored_areas = 0
-        for key in st.session_state.keys():
-            if key.endswith("_explored"):
-                explored_areas += 1
-        
-        if explored_areas >= 3 and len(st.session_state.artifacts_collected) >= 2:
+        if self._quiz_unlocked(state):
             st.markdown("### Knowledge Test Available!")
             if st.button("Take Knowledge Test"):
-                st.session_state.game_stage = "quiz"
-                st.experimental_rerun()
+                self.fire("take_test")
     
     def _render_quiz(self):
         """Knowledge quiz about Indus Valley"""
+        state = self.state
+        
         st.markdown("## Indus Valley Knowledge Test")
         st.markdown("""
         Now that you've explored the ancient cities of the Indus Valley, 
         let's test your knowledge about this remarkable civilization!
         """)
         
-        if "quiz_questions" not in st.session_state:
-            st.session_state.quiz_questions = [
-                {
-                    "question": "What material were most buildings in Harappa made from?",
-                    "options": ["Stone blocks", "Wooden planks", "Standardized baked bricks", "Unbaked clay"],
-                    "correct": "Standardized baked bricks"
-                },
-                {
-                    "question": "What is the Great Bath in Mohenjo Daro thought to have been used for?",
-                    "options": ["Swimming competitions", "Religious purification rituals", "Fish farming", "Drinking water storage"],
-                    "correct": "Religious purification rituals"
-                },
-                {
-                    "question": "Which feature of Indus Valley cities demonstrates their advanced engineering?",
-                    "options": ["Electricity", "Covered drainage systems", "Elevators", "Concrete highways"],
-                    "correct": "Covered drainage systems"
-                },
-                {
-                    "question": "What was the importance of the Indus River to the civilization?",
-                    "options": ["It provided hydroelectric power", "It was used for transportation and agriculture", "It was their only source of drinking water", "It was considered a deity"],
-                    "correct": "It was used for transportation and agriculture"
-                },
-                {
-                    "question": "What do the seals from the Indus Valley Civilization feature?",
-                    "options": ["Photos of kings", "Animal images and undeciphered script", "Maps of cities", "Religious hymns"],
-                    "correct": "Animal images and undeciphered script"
-                }
-            ]
-            st.session_state.current_quiz_question = 0
-            st.session_state.quiz_score = 0
+        bank = get_bank(self.quiz_bank)
+        
+        if state.quiz_question_ids is None:
+            state.quiz_question_ids = list(bank.ids)
+            state.quiz_answers = []
+            state.current_quiz_question = 0
+            state.quiz_score = 0
         
         # Display the current question
-        if st.session_state.current_quiz_question < len(st.session_state.quiz_questions):
-            question = st.session_state.quiz_questions[st.session_state.current_quiz_question]
-            st.markdown(f"### Question {st.session_state.current_quiz_question + 1}/{len(st.session_state.quiz_questions)}")
-            st.markdown(question["question"])
+        if state.current_quiz_question < len(state.quiz_question_ids):
+            question = bank[state.quiz_question_ids[state.current_quiz_question]]
+            st.markdown(f"### Question {state.current_quiz_question + 1}/{len(state.quiz_question_ids)}")
+            st.markdown(question.question)
             
-            answer = st.radio("Select your answer:", question["options"], index=None)
+            answer_key = f"indus_quiz_{question.id}"
+            st.radio("Select your answer:", question.options, index=None, key=answer_key)
             
-            if st.button("Submit Answer"):
-                if answer == question["correct"]:
-                    self.display_feedback("Correct! Well done!", True)
-                    st.session_state.quiz_score += 1
-                    st.session_state.knowledge_points += 5
-                else:
-                    self.display_feedback(f"Not quite. The correct answer is: {question['correct']}", False)
-                
-                st.session_state.current_quiz_question += 1
-                st.experimental_rerun()
+            st.button("Submit Answer", on_click=self._submit_quiz_answer, args=(question.id, answer_key))
         else:
             # Quiz complete
             st.markdown(f"### Quiz Complete!")
-            st.markdown(f"You scored {st.session_state.quiz_score}/{len(st.session_state.quiz_questions)} on the Indus Valley Knowledge Test!")
+            st.markdown(f"You scored {state.quiz_score}/{len(state.quiz_question_ids)} on the Indus Valley Knowledge Test!")
             
-            # Award bonus points for good performance
-            if st.session_state.quiz_score >= 4:
-                st.session_state.knowledge_points += 15
+            # Bonus points for good performance are awarded when moving on
+            if self._quiz_bonus(state):
                 st.markdown("**Outstanding knowledge!** You've earned 15 bonus Knowledge Points!")
             
             if st.button("Complete Your Journey"):
-                st.session_state.game_stage = "completion"
-                st.experimental_rerun()
+                self.fire("complete")
+    
+    def _submit_quiz_answer(self, question_id: str, answer_key: str):
+        """
+        Submit Answer callback for the knowledge test.
+        
+        Args:
+            question_id: ID of the question the answer is for
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.quiz_question_ids[state.current_quiz_question:state.current_quiz_question + 1] != [question_id]:
+            # Already answered, e.g. a double click
+            return
+        
+        question = get_bank(self.quiz_bank)[question_id]
+        answer_index = question.option_index(st.session_state.get(answer_key))
+        state.quiz_answers.append(answer_index)
+        self.log_event("answer", question=question_id, answer=answer_index,
+                       correct=answer_index == question.correct, attempt=1)
+        if answer_index == question.correct:
+            self.notify("Correct! Well done!", True)
+            state.quiz_score += 1
+            state.knowledge_points += 5
+        else:
+            self.notify(f"Not quite. The correct answer is: {question.correct_option}", False)
+        
+        state.current_quiz_question += 1
     
     def _render_completion(self):
         """Completion screen with achievements"""
+        state = self.state
+        
         st.markdown("## 🎉 Journey Complete: Indus Valley Adventure")
         st.markdown(f"""
         Congratulations, archaeologist! You've successfully explored the ancient Indus Valley Civilization 
         and discovered its remarkable achievements.
         
-        **Final Knowledge Points: {st.session_state.knowledge_points}**
+        **Final Knowledge Points: {state.knowledge_points}**
         
-        **Artifacts Collected: {len(st.session_state.artifacts_collected)}/6**
+        **Artifacts Collected: {state.artifact_count}/6**
         """)
         
         # Display artifacts collected
         st.markdown("### Your Artifact Collection:")
         
-        if "harappa_seal" in st.session_state.artifacts_collected:
+        if state.has_artifact("harappa_seal"):
             st.markdown("- **Harappan Seal**: Used in trade and featuring the mysterious Indus script")
         
-        if "bronze_statuette" in st.session_state.artifacts_collected:
+        if state.has_artifact("bronze_statuette"):
             st.markdown("- **Dancing Girl Bronze Statuette**: Shows advanced metallurgical skills")
         
-        if "priest_king" in st.session_state.artifacts_collected:
+        if state.has_artifact("priest_king"):
             st.markdown("- **Priest King Sculpture**: Possibly depicting a ruler or important figure")
         
         # Display knowledge gained
@@ -432,19 +446,4 @@ class IndusValleyAdventureGame(BaseGame):
         # Option to play again
         if st.button("Start New Expedition"):
             # Reset game state
-            for key in ["game_stage", "knowledge_points", "artifacts_collected", 
-                      "quiz_questions", "current_quiz_question", "quiz_score"]:
-                if key in st.session_state:
-                    del st.session_state[key]
-            
-            # Clear exploration flags
-            for key in list(st.session_state.keys()):
-                if key.endswith("_explored"):
-                    del st.session_state[key]
-            
-            # Initialize new game
-            st.session_state.game_stage = "intro"
-            st.session_state.knowledge_points = 0
-            st.session_state.artifacts_collected = []
-            
-            st.experimental_rerun()
+            self.fire("restart")
@@ -0,0 +1,327 @@
+import random
+import threading
+import time
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
+
+# Seconds between leaderboard updates; score changes in between are batched
+LEADERBOARD_REFRESH = 5.0
+
+# st.session_state key holding the student's class code
+CLASS_KEY = "class_id"
+
+# Board for students who didn't give a class code
+ALL_STUDENTS = ""
+
+_MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ("key", "next", "span")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        # Number of level-0 steps the link at each level jumps over
+        self.span = [0] * level
+
+
+class RankedSet:
+    """
+    Sorted set with O(log n) insert, remove and rank, and O(log n + k) slices.
+
+    An indexable skip list, as used by Redis sorted sets: every link
+    records how many elements it skips, so an element's position is the sum
+    of the links followed to reach it.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: Seed for the random node levels, for reproducible layouts
+        """
+        self._head = _Node(None, _MAX_LEVEL)
+        self._level = 1
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < _MAX_LEVEL and self._random.random() < 0.25:
+            level += 1
+        return level
+
+    def add(self, key):
+        """
+        Insert a key. Keys must be unique and comparable with each other.
+
+        Args:
+            key: Key to insert
+        """
+        update = [self._head] * _MAX_LEVEL
+        rank = [0] * _MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            rank[i] = rank[i + 1] if i + 1 < self._level else 0
+            while node.next[i] is not None and node.next[i].key < key:
+                rank[i] += node.span[i]
+                node = node.next[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self._level:
+            for i in range(self._level, level):
+                self._head.span[i] = self._size
+            self._level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            new.next[i] = update[i].next[i]
+            update[i].next[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = rank[0] - rank[i] + 1
+        for i in range(level, self._level):
+            update[i].span[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        """
+        Remove a key.
+
+        Args:
+            key: Key to remove
+
+        Raises:
+            KeyError: If the key isn't in the set
+        """
+        update = [self._head] * _MAX_LEVEL
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+
+        node = node.next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(self._level):
+            if update[i].next[i] is node:
+                update[i].span[i] += node.span[i] - 1
+                update[i].next[i] = node.next[i]
+            else:
+                update[i].span[i] -= 1
+        while self._level > 1 and self._head.next[self._level - 1] is None:
+            self._level -= 1
+        self._size -= 1
+
+    def count_below(self, key) -> int:
+        """
+        Count the keys that sort before a key, whether or not it is in the set.
+
+        Args:
+            key: Key to compare with
+
+        Returns:
+            Number of keys less than `key`
+        """
+        count = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and node.next[i].key < key:
+                count += node.span[i]
+                node = node.next[i]
+        return count
+
+    def slice(self, start: int, stop: int) -> Iterator:
+        """
+        Iterate over the keys at positions start to stop - 1.
+
+        Args:
+            start: Position of the first key, from 0
+            stop: Position after the last key
+
+        Yields:
+            Keys in order
+        """
+        if start >= self._size or stop <= start:
+            return
+        # Follow links while they end at or before position `start`
+        traversed = 0
+        node = self._head
+        for i in reversed(range(self._level)):
+            while node.next[i] is not None and traversed + node.span[i] <= start + 1:
+                traversed += node.span[i]
+                node = node.next[i]
+        for _ in range(min(stop, self._size) - start):
+            yield node.key
+            node = node.next[0]
+
+
+class Standing(NamedTuple):
+    """A student's place on a board. Students with the same score share a rank."""
+    rank: int
+    student_id: str
+    score: int
+
+
+class Board:
+    """Best scores of one game for one class, ordered from highest to lowest"""
+
+    def __init__(self):
+        self.scores: Dict[str, int] = {}
+        self._ranked = RankedSet()
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def set_score(self, student_id: str, score: int):
+        """
+        Set a student's score if it beats their best, adding them if they are new.
+
+        A lower score, e.g. after playing again from 0, leaves their best on the board.
+
+        Args:
+            student_id: Student
+            score: Their current score
+        """
+        old = self.scores.get(student_id)
+        if old is not None and score <= old:
+            return
+        if old is not None:
+            self._ranked.remove((-old, student_id))
+        self._ranked.add((-score, student_id))
+        self.scores[student_id] = score
+
+    def rank(self, student_id: str) -> Optional[int]:
+        """
+        Get a student's rank, 1 for the top score.
+
+        Args:
+            student_id: Student
+
+        Returns:
+            One more than the number of students with a higher score, or
+            None if the student has no score on this board
+        """
+        score = self.scores.get(student_id)
+        if score is None:
+            return None
+        # "" sorts before every student ID, so this counts strictly higher scores
+        return self._ranked.count_below((-score, "")) + 1
+
+    def top(self, k: int) -> List[Standing]:
+        """
+        Get the k best students.
+
+        Args:
+            k: Number of students
+
+        Returns:
+            Standings from the top score down
+        """
+        standings = []
+        for negative_score, student_id in self._ranked.slice(0, k):
+            if standings and standings[-1].score == -negative_score:
+                rank = standings[-1].rank
+            else:
+                rank = len(standings) + 1
+            standings.append(Standing(rank, student_id, -negative_score))
+        return standings
+
+
+class Leaderboard:
+    """
+    Live boards for every game and class, fed by score events.
+
+    Each board keeps every student's best score. record() only notes
+    the best score per student since the last batch; the notes are
+    applied to the boards in one batch at most every `refresh` seconds,
+    when someone next reads a board. Viewers redraw on the same cadence
+    (see the app's leaderboard fragment), so a score change never makes
+    another student's page rerun.
+    """
+
+    def __init__(self, refresh: float = LEADERBOARD_REFRESH):
+        """
+        Args:
+            refresh: Seconds between batches
+        """
+        self.refresh = refresh
+        self._boards: Dict[Tuple[str, str], Board] = {}
+        self._pending: Dict[Tuple[str, str, str], int] = {}
+        self._applied_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, game_type: str, class_id: str, student_id: str, score: int):
+        """
+        Note a student's current score for the next batch.
+
+        Args:
+            game_type: Game the score is for
+            class_id: Student's class code, or ALL_STUDENTS
+            student_id: Student
+            score: Their current score
+        """
+        key = (game_type, class_id, student_id)
+        with self._lock:
+            self._pending[key] = max(score, self._pending.get(key, score))
+
+    def apply(self, force: bool = False) -> int:
+        """
+        Apply the recorded scores to the boards, if a batch is due.
+
+        Args:
+            force: Apply now even if the last batch was under `refresh` seconds ago
+
+        Returns:
+            Number of scores applied
+        """
+        now = time.monotonic()
+        if not force and now - self._applied_at < self.refresh:
+            return 0
+        with self._lock:
+            self._applied_at = now
+            pending, self._pending = self._pending, {}
+            for (game_type, class_id, student_id), score in pending.items():
+                board = self._boards.get((game_type, class_id))
+                if board is None:
+                    board = self._boards[(game_type, class_id)] = Board()
+                board.set_score(student_id, score)
+        return len(pending)
+
+    def standings(self, game_type: str, class_id: str, student_id: Optional[str] = None,
+                  k: int = 10) -> Dict[str, Any]:
+        """
+        Get a board's top students and one student's rank.
+
+        Args:
+            game_type: Game
+            class_id: Class code, or ALL_STUDENTS
+            student_id: Student to look up, if any
+            k: Number of top students
+
+        Returns:
+            Dict with "top" (list of Standing), "rank" (the student's rank or
+            None), "score" (their best score or None) and "students" (board size)
+        """
+        self.apply()
+        with self._lock:
+            board = self._boards.get((game_type, class_id))
+            if board is None:
+                return {"top": [], "rank": None, "score": None, "students": 0}
+            return {
+                "top": board.top(k),
+                "rank": board.rank(student_id) if student_id else None,
+                "score": board.scores.get(student_id) if student_id else None,
+                "students": len(board),
+            }
+
+
+_leaderboard = Leaderboard()
+
+
+def get_leaderboard() -> Leaderboard:
+    """Get the process-wide leaderboard"""
+    return _leaderboard
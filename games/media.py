@@ -0,0 +1,54 @@
+import streamlit as st
+from typing import Optional
+
+from . import tracing
+
+# Seconds a downloaded image is kept before it is fetched again
+IMAGE_TTL = 24 * 60 * 60
+
+
+@st.cache_data(ttl=IMAGE_TTL, max_entries=256, show_spinner=False)
+def fetch_image(url: str) -> bytes:
+    """
+    Download an image, once per process rather than on every rerun.
+
+    Args:
+        url: Image URL
+
+    Returns:
+        The raw image bytes
+
+    Raises:
+        requests.RequestException: If the download fails; failures are not cached
+    """
+    import requests
+
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    return response.content
+
+
+def display_image(url: str, width: Optional[int] = None) -> bool:
+    """
+    Display an image from a URL with optional width.
+
+    The bytes are passed to st.image as-is, so animated GIFs keep animating.
+
+    Args:
+        url: Image URL
+        width: Optional display width in pixels
+
+    Returns:
+        True if the image was displayed
+    """
+    with tracing.span("display_image", "image", {"url": url}):
+        try:
+            image = fetch_image(url)
+            if width:
+                st.image(image, width=width)
+            else:
+                st.image(image)
+            return True
+        except Exception as e:
+            st.error(f"Could not load image: {e}")
+            return False
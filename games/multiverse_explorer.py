@@ -1,7 +1,17 @@
 import streamlit as st
 from typing import Dict, Any, List
+import logging
 import random
 from .base_game import BaseGame
+from .state import MultiverseExplorerState
+from .state_machine import Transition
+from .question_bank import Question, get_bank
+from .statement_pool import get_statement_pool
+from .report_screen import ScreenResult, get_report_screen
+from .evaluation_cache import evaluation_key, get_evaluation_cache, prompt_version
+from .draft_feedback import DraftFeedback
+
+logger = logging.getLogger(__name__)
 
 class MultiverseExplorerGame(BaseGame):
     """
@@ -10,20 +20,73 @@ class MultiverseExplorerGame(BaseGame):
     fact vs. fiction.
     """
     
+    state_class = MultiverseExplorerState
+    
+    # Question banks for the fact/fiction challenge and the theory check
+    fact_fiction_bank = "multiverse_fact_fiction"
+    theory_bank = "multiverse_theory"
+    theory_question_id = "mt-1"
+    
+    # Statements per fact/fiction round, half of them facts
+    statements_per_round = 6
+    
+    # The NEWS report task, as shown to students and as sent to the evaluator
+    report_task = """
+        You are a journalist who has just witnessed something extraordinary: 
+        you saw someone walk straight through the wall between platforms 9 and 10 at King's Cross Station!
+        
+        Write a NEWS report about what you witnessed. Remember to include:
+        
+        1. A catchy headline
+        2. What you observed
+        3. Your scientific explanation (choose either wormhole or alternate universe theory)
+        4. Quotes from "witnesses" or "experts"
+        5. A conclusion about what this might mean for science
+        """
+    report_instruction = ("Write a NEWS report about witnessing someone walk through a wall, "
+                          "using either wormhole or alternate universe theory as an explanation.")
+    
+    # Seconds between LLM tips on a session's draft
+    draft_review_seconds = 30
+    
+    # Seconds between redraws of the editor's tip while a review runs
+    draft_poll_interval = 1.0
+    
+    # Keywords of each theory; a report must use at least one to be evaluated
+    report_concepts = {
+        "Wormhole Theory": (
+            "wormhole", "wormholes", "spacetime", "space-time", "tunnel", "shortcut", "einstein-rosen bridge",
+            "portal", "bent space", "folded space",
+        ),
+        "Alternate Universe Theory": (
+            "alternate universe", "alternate universes", "parallel universe", "parallel universes",
+            "parallel world", "another universe", "other universe", "multiverse", "another dimension",
+            "dimensions", "alternate reality",
+        ),
+    }
+    
+    phases = {
+        "intro": "_render_intro",
+        "fact_fiction": "_render_fact_fiction",
+        "theory_learning": "_render_theory_learning",
+        "creative_writing": "_render_creative_writing",
+        "completion": "_render_completion",
+    }
+    
+    transitions = (
+        Transition("intro", "start", "fact_fiction"),
+        Transition("fact_fiction", "continue", "theory_learning", guard="_fact_fiction_finished"),
+        Transition("theory_learning", "continue", "creative_writing", guard="_theory_answered"),
+        Transition("creative_writing", "finish", "completion", guard="_report_submitted", reward="_report_reward"),
+        Transition("completion", "restart", "intro", reset=True),
+    )
+    
     def __init__(self, game_info: Dict[str, Any]):
         """Initialize the Multiverse Explorer Game"""
         super().__init__(game_info)
         
-        # Game-specific state
-        if "game_phase" not in st.session_state:
-            st.session_state.game_phase = "intro"
-            
-        if "creative_score" not in st.session_state:
-            st.session_state.creative_score = 0
-            
         # LLM chain for evaluating creative writing
-        self.evaluator_chain = self.create_llm_chain(
-            """You are evaluating a student's creative writing about alternate universes or wormholes.
+        evaluator_template = """You are evaluating a student's creative writing about alternate universes or wormholes.
             
             The student was asked to: {instruction}
             
@@ -38,23 +101,113 @@ class MultiverseExplorerGame(BaseGame):
             Give a score out of 10 and brief feedback (2-3 sentences). Format your response as:
             Score: [number]
             Feedback: [your feedback]
+            """
+        self.evaluator_chain = self.create_llm_chain(evaluator_template, "evaluation")
+        # Cached evaluations are only used with the prompt they were made with
+        self.evaluator_version = prompt_version(evaluator_template)
+        
+        # LLM chain giving a quick tip on a draft report
+        self.draft_review_chain = self.create_llm_chain(
+            """You are a friendly newspaper editor helping a grade 4 student with a NEWS report.
+            
+            The student was asked to: {instruction}
+            
+            Their draft so far:
+            {draft}
+            
+            Give ONE short, encouraging tip (1-2 sentences) on what to improve or add next.
+            Do not give a score and do not rewrite the report.
             """,
-            "evaluation"
+            "review"
         )
+        
+        # LLM chain writing new fact/fiction statements for the statement pool
+        self.statement_chain = self.create_llm_chain(
+            """You are writing a Fact or Fiction game for grade 4 students learning about
+            alternate universes, wormholes and space.
+            
+            Write {count} new statements: about half of them true scientific facts, and half
+            made-up fiction (magic, talking animals, impossible journeys). Each statement is one
+            sentence of under 25 words that a 9-year-old can read, and must not use the words
+            fact, fiction, true, false, real or fake.
+            
+            Put each statement on its own line, starting with FACT | or FICTION |, for example:
+            FACT | Light from the Sun takes about eight minutes to reach Earth.
+            FICTION | A cat opened a door to another universe with its tail.
+            """,
+            "statements"
+        )
+        
+        # Shared by every session, so copies of another student's report are caught
+        self.report_screen = get_report_screen("multiverse_news", self.report_task, self.report_concepts)
+    
+    def _generate_statements(self, count: int) -> str:
+        """Ask the LLM for about `count` fact/fiction statements, for the statement pool"""
+        return self.statement_chain.invoke({"count": count})["statements"]
+    
+    def statement(self, statement_id: str) -> Question:
+        """
+        Look up a fact/fiction statement of a round.
+        
+        Args:
+            statement_id: ID from the question bank or the statement pool
+            
+        Returns:
+            The statement
+        """
+        bank = get_bank(self.fact_fiction_bank)
+        if statement_id in bank:
+            return bank[statement_id]
+        pool = get_statement_pool()
+        statement = pool.get(statement_id) if pool is not None else None
+        if statement is None:
+            raise KeyError(statement_id)
+        return statement
+    
+    def _new_round(self) -> List[str]:
+        """
+        Pick the statements of a fact/fiction round.
+        
+        Generated statements are drawn from the pool; if it is running
+        low, the question bank makes up the difference.
+        
+        Returns:
+            Statement IDs in the order they are asked
+        """
+        bank = get_bank(self.fact_fiction_bank)
+        pool = get_statement_pool()
+        drawn = []
+        if pool is not None:
+            # Keep the shared pool topped up in the background, from the first round played
+            pool.start(self._generate_statements, [statement.question for statement in bank])
+            drawn = pool.draw(self.statements_per_round)
+        
+        # Facts and fiction still needed to even up the round
+        needed = [self.statements_per_round // 2, self.statements_per_round - self.statements_per_round // 2]
+        for statement in drawn:
+            needed[statement.correct] -= 1
+        ids = [statement.id for statement in drawn]
+        for correct, count in enumerate(needed):
+            candidates = [statement.id for statement in bank if statement.correct == correct]
+            ids += random.sample(candidates, min(max(count, 0), len(candidates)))
+        random.shuffle(ids)
+        return ids
+    
+    def _fact_fiction_finished(self, state: MultiverseExplorerState) -> bool:
+        """Whether every fact/fiction statement has been answered"""
+        return state.fact_fiction_ids is not None and state.fact_fiction_index >= len(state.fact_fiction_ids)
+    
+    def _theory_answered(self, state: MultiverseExplorerState) -> bool:
+        """Whether the theory check has been answered"""
+        return state.theory_answered
     
-    def render(self):
-        """Render the game UI"""
-        # Game phases
-        if st.session_state.game_phase == "intro":
-            self._render_intro()
-        elif st.session_state.game_phase == "fact_fiction":
-            self._render_fact_fiction()
-        elif st.session_state.game_phase == "theory_learning":
-            self._render_theory_learning()
-        elif st.session_state.game_phase == "creative_writing":
-            self._render_creative_writing()
-        elif st.session_state.game_phase == "completion":
-            self._render_completion()
+    def _report_submitted(self, state: MultiverseExplorerState) -> bool:
+        """Whether a NEWS report has been submitted and evaluated"""
+        return bool(state.final_report)
+    
+    def _report_reward(self, state: MultiverseExplorerState) -> int:
+        """Points for the last evaluated report, awarded once when finishing"""
+        return state.report_score
     
     def _render_intro(self):
         """Render the game introduction"""
@@ -65,58 +218,71 @@ class MultiverseExplorerGame(BaseGame):
         Are you ready to begin your journey across dimensions?""")
         
         if st.button("Start Adventure"):
-            st.session_state.game_phase = "fact_fiction"
-            st.experimental_rerun()
+            self.fire("start")
     
     def _render_fact_fiction(self):
         """Fact vs. Fiction challenge"""
+        state = self.state
+        
         st.markdown("## Fact or Fiction?")
         st.markdown("Can you tell which of these statements are fact and which are fiction?")
         
-        # Statements for the challenge
-        if "fact_fiction_statements" not in st.session_state:
-            st.session_state.fact_fiction_statements = [
-                {"statement": "A dragon roared and flew off into the sunset.", "is_fact": False},
-                {"statement": "A dog is working as a head chef in a 5-star restaurant.", "is_fact": False},
-                {"statement": "Galaxies are moving away from each other as the universe expands.", "is_fact": True},
-                {"statement": "Scientists have theorized that wormholes could connect different points in spacetime.", "is_fact": True},
-                {"statement": "An old woman clicked her heels and teleported to another realm.", "is_fact": False},
-                {"statement": "Some theories suggest there could be parallel universes we cannot directly observe.", "is_fact": True}
-            ]
-            st.session_state.fact_fiction_index = 0
-            st.session_state.fact_fiction_score = 0
+        if state.fact_fiction_ids is None:
+            state.fact_fiction_ids = self._new_round()
+            state.fact_fiction_answers = []
+            state.fact_fiction_index = 0
+            state.fact_fiction_score = 0
         
         # Show current statement
-        if st.session_state.fact_fiction_index < len(st.session_state.fact_fiction_statements):
-            current = st.session_state.fact_fiction_statements[st.session_state.fact_fiction_index]
+        if state.fact_fiction_index < len(state.fact_fiction_ids):
+            current = self.statement(state.fact_fiction_ids[state.fact_fiction_index])
             
-            st.markdown(f"### Statement {st.session_state.fact_fiction_index + 1}/{len(st.session_state.fact_fiction_statements)}")
-            st.markdown(f"**\"{current['statement']}\"**")
+            st.markdown(f"### Statement {state.fact_fiction_index + 1}/{len(state.fact_fiction_ids)}")
+            st.markdown(f"**\"{current.question}\"**")
             
             # User selection
-            user_choice = st.radio("This statement is:", ["Fact", "Fiction"], index=None)
+            answer_key = f"fact_fiction_{current.id}"
+            st.radio("This statement is:", current.options, index=None, key=answer_key)
             
-            if st.button("Submit Answer"):
-                if (user_choice == "Fact" and current["is_fact"]) or (user_choice == "Fiction" and not current["is_fact"]):
-                    self.display_feedback("Correct! 🎉", True)
-                    st.session_state.fact_fiction_score += 1
-                else:
-                    correct = "Fact" if current["is_fact"] else "Fiction"
-                    self.display_feedback(f"Incorrect. This statement is actually {correct}.", False)
-                
-                st.session_state.fact_fiction_index += 1
-                st.experimental_rerun()
+            st.button("Submit Answer", on_click=self._submit_fact_fiction_answer, args=(current.id, answer_key))
         else:
             # End of quiz
             st.markdown(f"### Quiz Complete!")
-            st.markdown(f"You scored {st.session_state.fact_fiction_score}/{len(st.session_state.fact_fiction_statements)} on the Fact vs. Fiction challenge!")
+            st.markdown(f"You scored {state.fact_fiction_score}/{len(state.fact_fiction_ids)} on the Fact vs. Fiction challenge!")
             
             if st.button("Continue to Theories"):
-                st.session_state.game_phase = "theory_learning"
-                st.experimental_rerun()
+                self.fire("continue")
+    
+    def _submit_fact_fiction_answer(self, statement_id: str, answer_key: str):
+        """
+        Submit Answer callback for the fact vs. fiction challenge.
+        
+        Args:
+            statement_id: ID of the statement the answer is for
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.fact_fiction_ids[state.fact_fiction_index:state.fact_fiction_index + 1] != [statement_id]:
+            # Already answered, e.g. a double click
+            return
+        
+        statement = self.statement(statement_id)
+        answer_index = statement.option_index(st.session_state.get(answer_key))
+        state.fact_fiction_answers.append(answer_index)
+        self.log_event("answer", question=statement_id, answer=answer_index,
+                       correct=answer_index == statement.correct, attempt=1)
+        if answer_index == statement.correct:
+            self.notify("Correct! 🎉", True)
+            state.fact_fiction_score += 1
+        else:
+            self.notify(f"Incorrect. This statement is actually {statement.correct_option}.", False)
+        
+        state.fact_fiction_index += 1
     
     def _render_theory_learning(self):
         """Learning about wormholes and alternate universes"""
+        state = self.state
+        
         st.markdown("## Enter the Wizarding World")
         st.markdown("""
         Imagine you're at King's Cross Station in London, standing between platforms 9 and 10. 
@@ -147,93 +313,214 @@ class MultiverseExplorerGame(BaseGame):
         # Quiz to check understanding
         st.markdown("### Quick Check")
         
-        if "theory_question" not in st.session_state:
-            st.session_state.theory_question = {
-                "question": "Which theory suggests a shortcut through spacetime?",
-                "options": ["Alternate Universe", "Wormhole", "Time Dilation", "Quantum Entanglement"],
-                "correct": "Wormhole"
-            }
+        theory_question = get_bank(self.theory_bank)[self.theory_question_id]
         
-        st.markdown(f"**{st.session_state.theory_question['question']}**")
-        answer = st.radio("Select your answer:", st.session_state.theory_question["options"], index=None)
+        st.markdown(f"**{theory_question.question}**")
+        answer = st.radio("Select your answer:", theory_question.options, index=None)
         
-        if st.button("Check Answer"):
-            if answer == st.session_state.theory_question["correct"]:
+        if st.button("Check Answer") and not state.theory_answered:
+            state.theory_answered = True
+            answer_index = theory_question.option_index(answer)
+            self.log_event("answer", question=self.theory_question_id, answer=answer_index,
+                           correct=answer_index == theory_question.correct, attempt=1)
+            if answer_index == theory_question.correct:
                 self.display_feedback("That's correct! A wormhole is a theoretical passage through spacetime that could create shortcuts for long journeys across the universe.", True)
-                st.session_state.creative_score += 5
+                state.creative_score += 5
             else:
-                self.display_feedback(f"Not quite. The correct answer is {st.session_state.theory_question['correct']}.", False)
-            
-            # Show continue button
+                self.display_feedback(f"Not quite. The correct answer is {theory_question.correct_option}.", False)
+        
+        # Show continue button once the question has been answered
+        if state.theory_answered:
             if st.button("Continue to Creative Writing"):
-                st.session_state.game_phase = "creative_writing"
-                st.experimental_rerun()
+                self.fire("continue")
         
     def _render_creative_writing(self):
         """Creative writing challenge - news report"""
-        st.markdown("## NEWS Report Challenge")
-        st.markdown("""
-        You are a journalist who has just witnessed something extraordinary: 
-        you saw someone walk straight through the wall between platforms 9 and 10 at King's Cross Station!
-        
-        Write a NEWS report about what you witnessed. Remember to include:
+        state = self.state
         
-        1. A catchy headline
-        2. What you observed
-        3. Your scientific explanation (choose either wormhole or alternate universe theory)
-        4. Quotes from "witnesses" or "experts"
-        5. A conclusion about what this might mean for science
-        """)
+        st.markdown("## NEWS Report Challenge")
+        st.markdown(self.report_task)
         
-        # User writing area
-        user_report = st.text_area("Write your NEWS report here:", height=300)
+        # User writing area; the draft reaches the app when the text area
+        # loses focus or Ctrl+Enter is pressed, not as the student types
+        report_key = f"{self.state_key}_report"
+        theory_key = f"{self.state_key}_theory"
+        user_report = st.text_area("Write your NEWS report here:", height=300, key=report_key)
         
         # Theory selection
         selected_theory = st.radio(
             "Which scientific theory are you using to explain the phenomenon?",
-            ["Wormhole Theory", "Alternate Universe Theory"]
+            ["Wormhole Theory", "Alternate Universe Theory"],
+            key=theory_key
         )
         
-        if st.button("Submit Report") and user_report:
-            # Use LLM to evaluate the report
-            evaluation = self.evaluator_chain.invoke({
-                "instruction": "Write a NEWS report about witnessing someone walk through a wall, using either wormhole or alternate universe theory as an explanation.",
-                "student_text": user_report
-            })["evaluation"]
-            
-            # Extract score and feedback
-            score_line = evaluation.split("\n")[0].strip()
-            feedback = "\n".join(evaluation.split("\n")[1:]).strip()
-            
-            try:
-                # Extract numeric score
-                score = int(score_line.replace("Score:", "").strip())
-                st.session_state.creative_score += score
-            except:
-                # If parsing fails, give a default score
-                score = 5
-                st.session_state.creative_score += score
-            
+        self._render_draft_feedback(user_report, selected_theory)
+        
+        st.button("Submit Report", on_click=self._submit_report, args=(report_key, theory_key))
+        
+        if state.final_report:
             # Display the feedback
             st.markdown("### Your Report Evaluation")
-            st.markdown(f"**Score: {score}/10**")
-            st.markdown(f"**Feedback:**\n{feedback}")
-            
-            # Store the report
-            st.session_state.final_report = user_report
-            st.session_state.selected_theory = selected_theory
+            st.markdown(f"**Score: {state.report_score}/10**")
+            st.markdown(f"**Feedback:**\n{state.report_feedback}")
             
             # Continue button
             if st.button("See Final Results"):
-                st.session_state.game_phase = "completion"
-                st.experimental_rerun()
+                self.fire("finish")
+    
+    def _render_draft_feedback(self, draft: str, selected_theory: str):
+        """
+        Live checklist of the draft against the rubric, with an editor's tip
+        from the LLM at most every draft_review_seconds.
+        
+        The checks run whenever the draft changes, on the sentences that
+        changed; the session's DraftFeedback is kept in session state.
+        
+        Args:
+            draft: The report text as it is now
+            selected_theory: The theory the student chose
+        """
+        if not draft.strip():
+            return
+        feedback = self._draft_feedback()
+        check = feedback.check(draft)
+        rubric = check.rubric
+        
+        st.markdown("#### ✍️ Draft Checklist")
+        min_words = self.report_screen.min_words
+        items = [
+            (rubric.words >= min_words, f"{rubric.words} words (at least {min_words})"),
+            (rubric.headline, "A catchy headline"),
+            (selected_theory in check.concepts, f"An explanation using {selected_theory}"),
+            (rubric.quote, "A quote from a witness or expert"),
+            (rubric.conclusion, "A conclusion about what this means for science"),
+        ]
+        st.markdown("\n".join(f"- {'✅' if done else '⬜'} {label}" for done, label in items))
+        
+        if feedback.review_due(draft, check):
+            # The LLM is only asked on a background thread, so the page never waits for it
+            feedback.start_review(draft, self._review_draft)
+            self.log_event("draft_review", answer=rubric.words)
+        # Shows the tip once it arrives, without holding up the script
+        st.fragment(self._render_editor_tip,
+                    run_every=self.draft_poll_interval if feedback.reviewing else None)()
+    
+    def _draft_feedback(self) -> DraftFeedback:
+        """The session's DraftFeedback, made on first use"""
+        key = f"{self.state_key}_draft"
+        if key not in st.session_state:
+            st.session_state[key] = DraftFeedback(self.report_concepts, self.draft_review_seconds,
+                                                  min_words=self.report_screen.min_words)
+        return st.session_state[key]
+    
+    def _review_draft(self, draft: str) -> str:
+        """The LLM's tip on a draft; called on the review thread"""
+        return self.draft_review_chain.invoke({
+            "instruction": self.report_instruction,
+            "draft": draft
+        })["review"].strip()
+    
+    def _render_editor_tip(self):
+        """The editor's tip on the draft, polled as a fragment while a review runs"""
+        feedback = st.session_state.get(f"{self.state_key}_draft")
+        if feedback is None:
+            return
+        if feedback.review:
+            st.info(f"💬 **Editor's tip:** {feedback.review}")
+        elif feedback.reviewing:
+            st.caption("💬 The editor is reading your draft...")
+    
+    def _submit_report(self, report_key: str, theory_key: str):
+        """
+        Submit Report callback: screen the report locally and have the LLM
+        evaluate it if it passes.
+        
+        Reports not worth evaluating get instant feedback and can be revised
+        and submitted again. The submitted draft isn't reviewed on the run
+        that follows, so a submit makes at most one LLM call.
+        
+        Args:
+            report_key: Session state key of the report text area
+            theory_key: Session state key of the theory radio
+        """
+        user_report = st.session_state.get(report_key) or ""
+        if not user_report or self.state.phase != "creative_writing":
+            return
+        self._draft_feedback().submitted = user_report
+        
+        screen = self.report_screen.screen(user_report, owner=self.player_id)
+        self.log_event("report_screen", question=screen.reason or "passed",
+                       answer=screen.rubric.words, correct=screen.passed)
+        if not screen.passed:
+            self.notify(screen.feedback, False)
+        else:
+            self._evaluate_report(user_report, st.session_state.get(theory_key), screen)
+    
+    def on_reset(self):
+        """Clear the draft, its feedback and the theory choice for a new adventure"""
+        for suffix in ("_draft", "_report", "_theory"):
+            st.session_state.pop(f"{self.state_key}{suffix}", None)
+    
+    def _evaluate_report(self, user_report: str, selected_theory: str, screen: ScreenResult):
+        """
+        Have the LLM evaluate a report that passed the screen, and store it.
+        
+        Args:
+            user_report: The report text
+            selected_theory: The theory the student chose
+            screen: The report's ScreenResult, for rubric hints
+        """
+        state = self.state
+        # Reports evaluated before, e.g. submitted again, come from the cache
+        cache = get_evaluation_cache()
+        cache_key = evaluation_key(user_report, self.report_instruction, self.evaluator_version)
+        evaluation = cache.get(cache_key) if cache is not None else None
+        cached = evaluation is not None
+        if not cached:
+            # Use LLM to evaluate the report
+            evaluation = self.evaluator_chain.invoke({
+                "instruction": self.report_instruction,
+                "student_text": user_report
+            })["evaluation"]
+        
+        # Extract score and feedback
+        score_line = evaluation.split("\n")[0].strip()
+        feedback = "\n".join(evaluation.split("\n")[1:]).strip()
+        
+        try:
+            # Extract numeric score
+            score = int(score_line.replace("Score:", "").strip())
+        except:
+            # If parsing fails, give a default score
+            score = 5
+        else:
+            # Only well-formed evaluations are kept
+            if cache is not None and not cached:
+                cache.put(cache_key, self.evaluator_version, evaluation)
+        
+        # Add what the rubric found missing
+        hints = list(screen.hints)
+        if selected_theory not in screen.concepts:
+            hints.append(f"Explain what happened using {selected_theory}.")
+        if hints:
+            feedback += "\n\n**To make it even better:**\n" + "\n".join(f"- {hint}" for hint in hints)
+        
+        # Store the report; its score is added when moving on, so
+        # resubmitting doesn't count twice
+        state.final_report = user_report
+        state.selected_theory = selected_theory
+        state.report_score = score
+        state.report_feedback = feedback
+        self.log_event("report", question=selected_theory, answer=score)
     
     def _render_completion(self):
         """Completion screen with achievements and summary"""
+        state = self.state
+        
         st.markdown("## 🎉 Multiverse Explorer: Mission Complete!")
         
         # Display final score
-        st.markdown(f"### Your Interdimensional Explorer Score: {st.session_state.creative_score}")
+        st.markdown(f"### Your Interdimensional Explorer Score: {state.creative_score}")
         
         # Display achievements
         st.markdown("### Achievements Unlocked:")
@@ -247,20 +534,11 @@ class MultiverseExplorerGame(BaseGame):
             st.markdown(f"- {outcome}")
         
         # Display the user's final report
-        if hasattr(st.session_state, 'final_report') and st.session_state.final_report:
+        if state.final_report:
             st.markdown("### Your NEWS Report")
-            st.markdown(st.session_state.final_report)
+            st.markdown(state.final_report)
         
         # Option to play again
         if st.button("Start New Adventure"):
             # Reset game state
-            st.session_state.game_phase = "intro"
-            st.session_state.creative_score = 0
-            
-            # Clear specific game state
-            for key in ["fact_fiction_statements", "fact_fiction_index", "fact_fiction_score", 
-                       "theory_question", "final_report", "selected_theory"]:
-                if key in st.session_state:
-                    del st.session_state[key]
-            
-            st.experimental_rerun()
+            self.fire("restart")
@@ -1,268 +1,325 @@
 import streamlit as st
-from typing import Dict, Any, List
-import random
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 from .base_game import BaseGame
+from .state import OrdinalRaceState
+from .state_machine import Transition
+from .puzzles import GRADES, RACERS, TRAFFIC_BANK, Challenge, get_challenge, get_puzzle_pool, ordinal
+
+@lru_cache(maxsize=4096)
+def _race_rows(seed: int, grade: int) -> Tuple[Dict[str, str], ...]:
+    """Rows of the level 1 results table, built once per challenge"""
+    race = get_challenge(seed, grade).race
+    rows = []
+    for car, time, place, photo in zip(race.order, race.times, race.places, race.photo_finish):
+        if race.places.count(place) > 1:
+            finish = "Dead heat"
+        elif photo:
+            finish = "📸 Photo finish"
+        else:
+            finish = ""
+        rows.append({"Place": ordinal(place), "Car": RACERS[car], "Time": f"{time:.2f} s", "Finish": finish})
+    return tuple(rows)
+
+
+@lru_cache(maxsize=4096)
+def _garage_rows(seed: int, grade: int) -> Tuple[Dict[str, Any], ...]:
+    """Rows of the level 4 garage table, built once per challenge"""
+    spots = get_challenge(seed, grade).parking.spots
+    return tuple({"Spot": number, "Car": car} for number, car in enumerate(spots, start=1))
+
 
 class OrdinalRaceGame(BaseGame):
     """
-    A racing game to teach ordinal numbers (1st through 10th)
-    through interactive challenges and race simulations.
+    A racing game to teach ordinal numbers (1st through 10th, and on to
+    20th at higher grades) through interactive challenges and race simulations.
+    
+    Every play-through gets a new challenge from the shared puzzle pool;
+    playing again moves on to the next grade.
     """
     
-    def __init__(self, game_info: Dict[str, Any]):
-        """Initialize the Ordinal Race Game"""
-        super().__init__(game_info)
-        
-        # Game-specific state
-        if "race_positions" not in st.session_state:
-            st.session_state.race_positions = []
-            
-        if "current_level" not in st.session_state:
-            st.session_state.current_level = 1
-            
-        if "score" not in st.session_state:
-            st.session_state.score = 0
-            
-        # Game levels
-        self.levels = [
-            "Identify the Position",
-            "Complete the Race",
-            "Traffic Rules Quiz",
-            "Parking Challenge"
-        ]
-        
-        # Create car racers
-        self.racers = ["Red Car", "Blue Car", "Green Car", "Yellow Car", 
-                      "Orange Car", "Purple Car", "White Car", "Black Car", 
-                      "Silver Car", "Gold Car"]
-        
-        # Ordinal numbers
-        self.ordinals = ["1st", "2nd", "3rd", "4th", "5th", 
-                        "6th", "7th", "8th", "9th", "10th"]
+    state_class = OrdinalRaceState
+    
+    # Static game data, shared by every session
+    levels = (
+        "Identify the Position",
+        "Complete the Race",
+        "Traffic Rules Quiz",
+        "Parking Challenge"
+    )
+    
+    racers = RACERS
+    
+    ordinals = tuple(ordinal(place) for place in range(1, len(RACERS) + 1))
     
-    def render(self):
-        """Render the game UI"""
-        # Game description
+    # Question bank for the hand-written traffic rules questions
+    quiz_bank = TRAFFIC_BANK
+    
+    # One phase per level, in the same order as `levels`
+    phases = {
+        "level_one": "_render_level_one",
+        "level_two": "_render_level_two",
+        "level_three": "_render_level_three",
+        "level_four": "_render_level_four",
+        "completion": "_render_completion",
+    }
+    
+    transitions = (
+        Transition("level_one", "answer_correct", "level_two", reward="_position_reward"),
+        Transition("level_two", "finish_race", "level_three", guard="_race_ordered", reward=15),
+        Transition("level_three", "continue", "level_four", guard="_quiz_finished", reward="_quiz_reward"),
+        Transition("level_four", "park_correct", "completion", reward=20),
+        Transition("completion", "play_again", "level_one", reset=True),
+    )
+    
+    def render_header(self):
+        """Game description shown above every level"""
         st.write("Welcome to Race Track Ordinals! In this game, you'll learn about ordinal numbers through exciting racing challenges.")
+    
+    def render_phase_header(self, phase: str):
+        """Display the current level"""
+        level = list(self.phases).index(phase) + 1
+        if level <= len(self.levels):
+            st.subheader(f"Level {level}: {self.levels[level-1]}")
+    
+    @property
+    def challenge(self) -> Challenge:
+        """
+        The puzzles of this play-through, drawn from the pool on first use.
         
-        # Display current level
-        st.subheader(f"Level {st.session_state.current_level}: {self.levels[st.session_state.current_level-1]}")
-        
-        # Display score
-        st.sidebar.metric("Score", st.session_state.score)
-        
-        # Render the appropriate level
-        if st.session_state.current_level == 1:
-            self._render_level_one()
-        elif st.session_state.current_level == 2:
-            self._render_level_two()
-        elif st.session_state.current_level == 3:
-            self._render_level_three()
-        elif st.session_state.current_level == 4:
-            self._render_level_four()
-        else:
-            self._render_completion()
+        Returns:
+            The shared Challenge for the state's seed and grade
+        """
+        state = self.state
+        if state.seed is None:
+            state.grade = min(state.grade, len(GRADES))
+            state.seed = get_puzzle_pool().draw(state.grade).seed
+        return get_challenge(state.seed, state.grade)
+    
+    def render_stats(self, state: OrdinalRaceState):
+        """Display score"""
+        st.metric("Score", state.score)
+    
+    def _position_reward(self, state: OrdinalRaceState) -> int:
+        """Level 1 points, based on the number of attempts"""
+        return max(10 - state.attempts + 1, 1)
+    
+    def _race_ordered(self, state: OrdinalRaceState) -> bool:
+        """Whether the level 2 cars have been placed in the order the clues give"""
+        return state.ordered_cars == list(self.challenge.ordering.order)
+    
+    def _quiz_finished(self, state: OrdinalRaceState) -> bool:
+        """Whether every traffic quiz question has been answered"""
+        return state.quiz_question_ids is not None and state.current_question >= len(state.quiz_question_ids)
+    
+    def _quiz_reward(self, state: OrdinalRaceState) -> int:
+        """Traffic quiz points, awarded once when moving on"""
+        return state.quiz_score * 5
     
     def _render_level_one(self):
-        """Level 1: Identify the position of a specific car"""
-        
-        if not st.session_state.race_positions:
-            # Generate random positions
-            positions = list(range(10))
-            random.shuffle(positions)
-            st.session_state.race_positions = [self.racers[i] for i in positions]
-            st.session_state.target_car = random.choice(st.session_state.race_positions)
-            st.session_state.attempts = 0
+        """Level 1: Answer a question about the race results"""
+        state = self.state
+        race = self.challenge.race
+        question = race.question
         
-        # Display the race positions
-        st.markdown("### Race Positions")
-        for idx, car in enumerate(st.session_state.race_positions):
-            st.write(f"{self.ordinals[idx]}: {car}")
+        # Display the race results as one table
+        st.markdown("### Race Results")
+        st.dataframe(_race_rows(state.seed, state.grade), hide_index=True, width="stretch")
         
         # Ask the question
-        st.markdown(f"### Question: What position did the {st.session_state.target_car} finish in?")
+        st.markdown(f"### Question: {question.question}")
         
         # Get user input
-        user_answer = st.radio("Select the correct position:", self.ordinals, index=None)
+        answer_key = f"ordinal_race_{question.id}"
+        st.radio("Select the correct answer:", question.options, index=None, key=answer_key)
         
-        if st.button("Submit Answer"):
-            st.session_state.attempts += 1
-            correct_position = self.ordinals[st.session_state.race_positions.index(st.session_state.target_car)]
-            
-            if user_answer == correct_position:
-                self.display_feedback(f"Correct! The {st.session_state.target_car} finished in {correct_position} place!", True)
-                st.session_state.score += max(10 - st.session_state.attempts + 1, 1)  # Score based on attempts
-                st.session_state.current_level += 1
-                st.session_state.race_positions = []  # Reset for next level
-                st.experimental_rerun()
-            else:
-                self.display_feedback(f"That's not correct. Try again!", False)
+        st.button("Submit Answer", on_click=self._submit_race_answer, args=(answer_key,))
+    
+    def _submit_race_answer(self, answer_key: str):
+        """
+        Submit Answer callback for the level 1 race question.
+        
+        Args:
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.phase != "level_one":
+            # Already answered, e.g. a double click
+            return
+        
+        question = self.challenge.race.question
+        user_answer = st.session_state.get(answer_key)
+        state.attempts += 1
+        answer_index = question.option_index(user_answer)
+        self.log_event("answer", question=question.id, answer=user_answer,
+                       correct=answer_index == question.correct, attempt=state.attempts)
+        
+        if answer_index == question.correct:
+            # Score based on attempts
+            self.fire("answer_correct", (f"Correct! The answer is {question.correct_option}!", True))
+        else:
+            self.notify("That's not correct. Try again!", False)
     
     def _render_level_two(self):
-        """Level 2: Complete the race by arranging cars in the correct order"""
+        """Level 2: Complete the race by arranging cars in the order the clues give"""
+        state = self.state
+        ordering = self.challenge.ordering
+        cars = len(ordering.order)
         
-        if "ordered_cars" not in st.session_state:
-            available_cars = self.racers.copy()
-            random.shuffle(available_cars)
-            st.session_state.ordered_cars = []
-            st.session_state.available_cars = available_cars[:6]  # Use 6 cars for simplicity
+        if state.ordered_cars is None:
+            state.ordered_cars = []
+            state.available_cars = sorted(ordering.order)
         
         st.markdown("### Complete the Race")
-        st.write("Arrange the cars in the correct order from 1st to 6th place:")
+        st.write("Here is what the race officials saw:")
+        for clue in ordering.clues:
+            st.markdown(f"- {clue}")
+        st.write(f"Arrange the cars in the correct order from 1st to {self.ordinals[cars - 1]} place:")
         
         # Display current arrangement
         st.markdown("### Current Race Order:")
-        for idx, car in enumerate(st.session_state.ordered_cars):
-            st.write(f"{self.ordinals[idx]}: {car}")
+        for idx, car in enumerate(state.ordered_cars):
+            st.write(f"{self.ordinals[idx]}: {self.racers[car]}")
         
         # Select cars to position
-        if len(st.session_state.ordered_cars) < 6:
-            selected = st.selectbox("Select a car to add to the race:", 
-                                  ["Select a car..."] + st.session_state.available_cars)
+        if len(state.ordered_cars) < cars:
+            st.selectbox("Select a car to add to the race:", 
+                         ["Select a car..."] + [self.racers[car] for car in state.available_cars],
+                         key="ordinal_car_choice")
             
-            if st.button("Add Car") and selected != "Select a car...":
-                if selected in st.session_state.available_cars:
-                    st.session_state.ordered_cars.append(selected)
-                    st.session_state.available_cars.remove(selected)
-                    st.experimental_rerun()
-        
-        # Check if complete
-        if len(st.session_state.ordered_cars) == 6:
-            if st.button("Finish Race"):
-                # The challenge is just to complete the ordering, so give points for completion
-                self.display_feedback("You've successfully ordered all the cars!", True)
-                st.session_state.score += 15
-                st.session_state.current_level += 1
-                
-                # Reset for next level
-                if "ordered_cars" in st.session_state:
-                    del st.session_state.ordered_cars
-                if "available_cars" in st.session_state:
-                    del st.session_state.available_cars
-                
-                st.experimental_rerun()
+            st.button("Add Car", on_click=self._add_car)
+        else:
+            st.button("Finish Race", on_click=self._finish_race)
     
     def _render_level_three(self):
         """Level 3: Traffic rules quiz related to ordinal numbers"""
+        state = self.state
         
-        if "quiz_questions" not in st.session_state:
+        challenge = self.challenge
+        
+        if state.quiz_question_ids is None:
             # Questions related to traffic rules and ordinal numbers
-            st.session_state.quiz_questions = [
-                {
-                    "question": "Which traffic light should you stop at?",
-                    "options": ["1st red light", "2nd yellow light", "Any red light", "Only at stop signs"],
-                    "correct": "Any red light"
-                },
-                {
-                    "question": "In a line of cars at a stop sign, which car goes first?",
-                    "options": ["1st car", "2nd car", "Last car", "Whoever honks first"],
-                    "correct": "1st car"
-                },
-                {
-                    "question": "At a 4-way intersection, if two cars arrive at the same time, which has the right of way?",
-                    "options": ["1st car to arrive", "Car on the right", "Bigger car", "Neither car"],
-                    "correct": "Car on the right"
-                }
-            ]
-            st.session_state.current_question = 0
-            st.session_state.quiz_score = 0
+            state.quiz_question_ids = [question.id for question in challenge.quiz]
+            state.quiz_answers = []
+            state.current_question = 0
+            state.quiz_score = 0
         
         # Display the current question
-        if st.session_state.current_question < len(st.session_state.quiz_questions):
-            question = st.session_state.quiz_questions[st.session_state.current_question]
-            st.markdown(f"### Question: {question['question']}")
+        if state.current_question < len(state.quiz_question_ids):
+            question = challenge.question(state.quiz_question_ids[state.current_question])
+            st.markdown(f"### Question: {question.question}")
             
-            answer = st.radio("Select your answer:", question["options"], index=None)
+            answer_key = f"ordinal_quiz_{question.id}"
+            st.radio("Select your answer:", question.options, index=None, key=answer_key)
             
-            if st.button("Submit Answer"):
-                if answer == question["correct"]:
-                    self.display_feedback("Correct answer!", True)
-                    st.session_state.quiz_score += 1
-                else:
-                    self.display_feedback(f"Incorrect. The correct answer is: {question['correct']}", False)
-                
-                st.session_state.current_question += 1
-                st.experimental_rerun()
+            st.button("Submit Answer", on_click=self._submit_quiz_answer, args=(question.id, answer_key))
         else:
-            # Quiz completed
-            st.session_state.score += st.session_state.quiz_score * 5
+            # Quiz completed; the points are awarded when moving on
             st.markdown(f"### Quiz Complete!")
-            st.write(f"You got {st.session_state.quiz_score} out of {len(st.session_state.quiz_questions)} questions correct!")
+            st.write(f"You got {state.quiz_score} out of {len(state.quiz_question_ids)} questions correct!")
             
             if st.button("Continue to Next Level"):
-                st.session_state.current_level += 1
-                
-                # Reset quiz state
-                if "quiz_questions" in st.session_state:
-                    del st.session_state.quiz_questions
-                if "current_question" in st.session_state:
-                    del st.session_state.current_question
-                if "quiz_score" in st.session_state:
-                    del st.session_state.quiz_score
-                
-                st.experimental_rerun()
+                self.fire("continue")
+    
+    def _add_car(self):
+        """Add Car callback: move the chosen car from the available cars to the race order"""
+        state = self.state
+        selected = st.session_state.get("ordinal_car_choice")
+        if selected in self.racers:
+            car = self.racers.index(selected)
+            if car in state.available_cars:
+                state.ordered_cars.append(car)
+                state.available_cars.remove(car)
+                self.log_event("place_car", question=f"position_{len(state.ordered_cars)}", answer=selected)
+        # The chosen car is no longer an option
+        st.session_state["ordinal_car_choice"] = "Select a car..."
+    
+    def _finish_race(self):
+        """Finish Race callback: move on if the order is right, otherwise start the order over"""
+        state = self.state
+        if self.fire("finish_race", ("You've put all the cars in the right order!", True)):
+            return
+        self.log_event("answer", question="race_order", answer=" > ".join(self.racers[car] for car in state.ordered_cars),
+                       correct=False)
+        self.notify("That order doesn't match the clues. Read them again and start over!", False)
+        state.ordered_cars = []
+        state.available_cars = sorted(self.challenge.ordering.order)
+    
+    def _submit_quiz_answer(self, question_id: str, answer_key: str):
+        """
+        Submit Answer callback for the level 3 quiz.
+        
+        Args:
+            question_id: ID of the question the answer is for
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.quiz_question_ids[state.current_question:state.current_question + 1] != [question_id]:
+            # Already answered, e.g. a double click
+            return
+        
+        question = self.challenge.question(question_id)
+        answer_index = question.option_index(st.session_state.get(answer_key))
+        state.quiz_answers.append(answer_index)
+        self.log_event("answer", question=question_id, answer=answer_index,
+                       correct=answer_index == question.correct, attempt=1)
+        if answer_index == question.correct:
+            self.notify("Correct answer!", True)
+            state.quiz_score += 1
+        else:
+            self.notify(f"Incorrect. The correct answer is: {question.correct_option}", False)
+        
+        state.current_question += 1
     
     def _render_level_four(self):
         """Level 4: Parking challenge using ordinal numbers"""
-        
-        if "parking_spots" not in st.session_state:
-            # Create parking scenario
-            st.session_state.parking_spots = ["Empty" for _ in range(10)]
-            
-            # Fill some spots randomly
-            filled_indices = random.sample(range(10), 5)
-            for idx in filled_indices:
-                car_color = random.choice(["Red", "Blue", "Green", "Yellow", "Purple"])
-                st.session_state.parking_spots[idx] = f"{car_color} Car"
-            
-            # Set up the challenge
-            st.session_state.target_spot = None
-            for i in range(10):
-                if st.session_state.parking_spots[i] == "Empty":
-                    st.session_state.target_spot = i
-                    break
+        state = self.state
+        parking = self.challenge.parking
+        spots = len(parking.spots)
         
         st.markdown("### Parking Challenge")
         st.write("Park your car in the correct parking spot based on the instructions.")
         
-        # Display parking garage
+        # Display parking garage as one table
         st.markdown("### Current Parking Garage:")
-        cols = st.columns(5)
-        for i in range(10):
-            col_idx = i % 5
-            with cols[col_idx]:
-                st.write(f"Spot {i+1}: {st.session_state.parking_spots[i]}")
+        st.dataframe(_garage_rows(state.seed, state.grade), hide_index=True, width="stretch")
         
-        if st.session_state.target_spot is not None:
-            target_ordinal = self.ordinals[st.session_state.target_spot]
-            st.markdown(f"### Instructions: Park your car in the {target_ordinal} parking spot.")
-            
-            # User selects a spot
-            user_spot = st.number_input("Select a parking spot number (1-10):", 
-                                      min_value=1, max_value=10, value=1)
-            
-            if st.button("Park Car"):
-                if st.session_state.parking_spots[user_spot-1] != "Empty":
-                    self.display_feedback("That spot is already taken! Try another spot.", False)
-                elif user_spot - 1 == st.session_state.target_spot:
-                    self.display_feedback(f"Perfect! You correctly parked in the {target_ordinal} spot!", True)
-                    st.session_state.score += 20
-                    st.session_state.current_level += 1
-                    
-                    # Reset for completion
-                    if "parking_spots" in st.session_state:
-                        del st.session_state.parking_spots
-                    if "target_spot" in st.session_state:
-                        del st.session_state.target_spot
-                    
-                    st.experimental_rerun()
-                else:
-                    self.display_feedback(f"That's not the {target_ordinal} spot. Try again!", False)
+        st.markdown(f"### Instructions: {parking.instruction}")
+        
+        # User selects a spot
+        spot_key = f"ordinal_parking_{state.seed}_{state.grade}"
+        st.number_input(f"Select a parking spot number (1-{spots}):",
+                        min_value=1, max_value=spots, value=1, key=spot_key)
+        
+        st.button("Park Car", on_click=self._park_car, args=(spot_key,))
+    
+    def _park_car(self, spot_key: str):
+        """
+        Park Car callback: move on if the chosen spot is the target.
+        
+        Args:
+            spot_key: Session state key of the spot number input
+        """
+        state = self.state
+        if state.phase != "level_four":
+            # Already parked, e.g. a double click
+            return
+        
+        parking = self.challenge.parking
+        user_spot = st.session_state.get(spot_key, 1)
+        self.log_event("answer", question="parking_spot", answer=user_spot,
+                       correct=user_spot - 1 == parking.target)
+        if parking.spots[user_spot-1] != "Empty":
+            self.notify("That spot is already taken! Try another spot.", False)
+        elif user_spot - 1 == parking.target:
+            self.fire("park_correct", (f"Perfect! You parked in spot {user_spot}!", True))
+        else:
+            self.notify("That's not the right spot. Read the instructions again!", False)
     
     def _render_completion(self):
         """Display completion screen with summary and rewards"""
         st.markdown("## 🎉 Congratulations! You've completed Race Track Ordinals!")
-        st.write(f"Your final score is: {st.session_state.score}")
+        st.write(f"Your final score is: {self.state.score}")
         
         # Display certificate with learned skills
         st.markdown("### Your Race Track Ordinals Certificate")
@@ -271,15 +328,8 @@ class OrdinalRaceGame(BaseGame):
             st.markdown(f"- {outcome}")
         
         # Option to play again
+        if self.state.grade < len(GRADES):
+            st.write("Play again for a harder race with more cars!")
         if st.button("Play Again"):
             # Reset game state
-            st.session_state.current_level = 1
-            st.session_state.score = 0
-            st.session_state.race_positions = []
-            
-            # Clear any level-specific state
-            for key in list(st.session_state.keys()):
-                if key not in ["current_level", "score", "race_positions"]:
-                    del st.session_state[key]
-            
-            st.experimental_rerun()
+            self.fire("play_again")
@@ -0,0 +1,265 @@
+import random
+import time
+from typing import Callable, Dict
+
+from .headless import HeadlessSession
+from .puzzles import Challenge, get_challenge
+from .question_bank import get_bank
+
+
+def _pick(rng: random.Random, correct, options, accuracy: float):
+    """The correct option with probability `accuracy`, otherwise any option"""
+    return correct if rng.random() < accuracy else rng.choice(list(options))
+
+
+def _wait_for_phase_change(session: HeadlessSession, phase: str, interval: float = 0.01, timeout: float = 60.0):
+    """Redraw the page, as a polling fragment would, until the game leaves `phase`"""
+    deadline = time.monotonic() + timeout
+    while session.state.phase == phase:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Game stayed in the {phase} phase for {timeout} seconds")
+        time.sleep(interval)
+        session.render()
+
+
+def _challenge(session: HeadlessSession) -> Challenge:
+    """The racing game challenge the session is playing"""
+    state = session.state
+    return get_challenge(state.seed, state.grade)
+
+
+def play_ordinal_race(session: HeadlessSession, rng: random.Random, accuracy: float = 0.8):
+    """
+    Play Race Track Ordinals from the first level to the completion screen.
+
+    Args:
+        session: Session for OrdinalRaceGame
+        rng: Random source for the student's choices
+        accuracy: Chance of picking the right answer at each question
+    """
+    game = session.game
+    session.render()
+
+    # Level 1: answer the race question until right
+    while session.state.phase == "level_one":
+        question = _challenge(session).race.question
+        session.set_value("Select the correct answer:", _pick(rng, question.correct_option, question.options, accuracy))
+        session.click("Submit Answer")
+
+    # Level 2: place the cars in the order the clues give, starting over when wrong
+    while session.state.phase == "level_two":
+        state = session.state
+        correct = _challenge(session).ordering.order[len(state.ordered_cars)]
+        # Once a car is misplaced the right one may already be used up
+        if correct in state.available_cars and rng.random() < accuracy:
+            car = correct
+        else:
+            car = rng.choice(state.available_cars)
+        session.set_value("ordinal_car_choice", game.racers[car])
+        session.click("Add Car")
+        if not session.state.available_cars:
+            session.click("Finish Race")
+
+    # Level 3: traffic quiz
+    while session.state.current_question < len(session.state.quiz_question_ids):
+        state = session.state
+        question = _challenge(session).question(state.quiz_question_ids[state.current_question])
+        session.set_value(f"ordinal_quiz_{question.id}", _pick(rng, question.correct_option, question.options, accuracy))
+        session.click("Submit Answer")
+    session.click("Continue to Next Level")
+
+    # Level 4: park in the target spot until right
+    while session.state.phase == "level_four":
+        parking = _challenge(session).parking
+        spot = parking.target if rng.random() < accuracy else rng.randrange(len(parking.spots))
+        session.set_value(f"Select a parking spot number (1-{len(parking.spots)}):", spot + 1)
+        session.click("Park Car")
+
+
+def play_indus_valley(session: HeadlessSession, rng: random.Random, accuracy: float = 0.8):
+    """
+    Play the Indus Valley Adventure: explore both cities, ask the guide, take the test.
+
+    Args:
+        session: Session for IndusValleyAdventureGame
+        rng: Random source for the student's choices
+        accuracy: Chance of picking the right answer at each question
+    """
+    game = session.game
+    session.render()
+    session.click("Begin Your Adventure")
+
+    session.click("Visit Harappa")
+    session.click("Search for Artifacts")
+    session.click("Return to Map")
+
+    session.set_value("stats_guide_question", "Why did the cities have covered drains?")
+    session.click("stats_guide_ask")
+
+    session.click("Visit Mohenjo Daro")
+    session.click("Search Area 1")
+    session.click("Search Area 2")
+    session.click("Take Knowledge Test")
+
+    bank = get_bank(game.quiz_bank)
+    while session.state.current_quiz_question < len(session.state.quiz_question_ids):
+        state = session.state
+        question = bank[state.quiz_question_ids[state.current_quiz_question]]
+        session.set_value(f"indus_quiz_{question.id}", _pick(rng, question.correct_option, question.options, accuracy))
+        session.click("Submit Answer")
+    session.click("Complete Your Journey")
+
+
+def _news_report(rng: random.Random, theory: str) -> str:
+    """A short NEWS report in words and details of the student's own, so reports of different sessions aren't copies"""
+    witness = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}"
+    details = {
+        "witness": witness,
+        "first": witness.split()[0],
+        "expert": rng.choice(_LAST_NAMES),
+        "time": f"{rng.randrange(6, 23)}:{rng.randrange(60):02d}",
+        "job": rng.choice(_JOBS),
+        "town": rng.choice(_TOWNS),
+        "traveller": rng.choice(_TRAVELLERS),
+        "field": rng.choice(_FIELDS),
+        "theory": theory.lower(),
+    }
+    return rng.choice(_HEADLINES) + "\n" + " ".join(
+        rng.choice(sentences).format(**details) for sentences in _REPORT_SENTENCES
+    )
+
+
+_HEADLINES = ("PLATFORM 9 3/4 MYSTERY!", "Boy Vanishes Into Station Wall", "Wall Walker Stuns Commuters",
+              "KING'S CROSS PUZZLE!", "Through the Wall and Gone")
+_FIRST_NAMES = ("Asha", "Ben", "Chloe", "Dev", "Ella", "Farid", "Grace", "Hugo", "Isla", "Jamal")
+_LAST_NAMES = ("Patel", "Smith", "Okafor", "Nguyen", "Murphy", "Kowalski", "Garcia", "Ahmed", "Brown", "Silva")
+_JOBS = ("baker", "nurse", "teacher", "pilot", "plumber", "student", "painter", "chef")
+_TOWNS = ("Leeds", "York", "Bristol", "Cardiff", "Dundee", "Bath", "Derby", "Exeter")
+_TRAVELLERS = ("boy with an owl", "girl with a trolley", "man in a cloak", "woman with a trunk",
+               "boy with a broom", "girl with a cat")
+_FIELDS = ("physics", "space travel", "train timetables", "astronomy", "science")
+
+# A report's sentences in order: what was seen, the explanation, a quote and the conclusion
+_REPORT_SENTENCES = (
+    (
+        "At {time} today {witness}, a {job} from {town}, saw a {traveller} walk straight through the wall at King's Cross.",
+        "{witness} was waiting for the {time} train to {town} when a {traveller} stepped into the wall between "
+        "platforms 9 and 10 and vanished.",
+        "Commuters on platform 9 at {time} watched a {traveller} disappear into solid brick, {witness} from {town} told us.",
+        "A {traveller} ran at the barrier of King's Cross station at {time} and never hit it, says {job} {witness}.",
+    ),
+    (
+        "Experts say {theory} could explain it.",
+        "Professor {expert} thinks {theory} is the best explanation for what happened.",
+        "Could {theory} be the answer? Many scientists believe so.",
+    ),
+    (
+        "\"It was like the wall wasn't there,\" said {first}.",
+        "\"I blinked and they were gone,\" {first} told reporters.",
+        "\"The bricks rippled like water,\" {first} explained.",
+    ),
+    (
+        "Scientists will keep investigating what this means for {field}.",
+        "If it is true, the future of {field} may change forever.",
+        "Researchers hope this discovery will help us understand {field}.",
+    ),
+)
+
+
+def play_multiverse_explorer(session: HeadlessSession, rng: random.Random, accuracy: float = 0.8):
+    """
+    Play Multiverse Explorer: fact or fiction, the theory check and a NEWS report.
+
+    Args:
+        session: Session for MultiverseExplorerGame
+        rng: Random source for the student's choices
+        accuracy: Chance of picking the right answer at each question
+    """
+    game = session.game
+    session.render()
+    session.click("Start Adventure")
+
+    while session.state.fact_fiction_index < len(session.state.fact_fiction_ids):
+        state = session.state
+        statement = game.statement(state.fact_fiction_ids[state.fact_fiction_index])
+        session.set_value(f"fact_fiction_{statement.id}", _pick(rng, statement.correct_option, statement.options, accuracy))
+        session.click("Submit Answer")
+    session.click("Continue to Theories")
+
+    question = get_bank(game.theory_bank)[game.theory_question_id]
+    session.set_value("Select your answer:", _pick(rng, question.correct_option, question.options, accuracy))
+    session.click("Check Answer")
+    session.click("Continue to Creative Writing")
+
+    theory = rng.choice(["Wormhole Theory", "Alternate Universe Theory"])
+    session.set_value("Which scientific theory are you using to explain the phenomenon?", theory)
+    # Write the report again if the screen sends it back, e.g. as too like another student's
+    while not session.state.final_report:
+        session.set_value("Write your NEWS report here:", _news_report(rng, theory))
+        session.click("Submit Report")
+    session.click("See Final Results")
+
+
+def play_dna_detective(session: HeadlessSession, rng: random.Random, accuracy: float = 0.8):
+    """
+    Play DNA Detective: the DNA facts check, evidence collection and the lab.
+
+    Args:
+        session: Session for DNADetectiveGame
+        rng: Random source for the student's choices
+        accuracy: Chance of picking the right answer at each question
+    """
+    game = session.game
+    session.render()
+    session.set_value("Enter your detective name:", rng.choice(["Sherlock", "Nancy", "Hercule", "Ada"]))
+    session.click("Begin Investigation")
+
+    bank = get_bank(game.dna_quiz_bank)
+    while session.state.current_dna_question < len(session.state.dna_question_ids):
+        state = session.state
+        question = bank[state.dna_question_ids[state.current_dna_question]]
+        session.set_value(f"dna_quiz_{question.id}", _pick(rng, question.correct_option, question.options, accuracy))
+        session.click("Check Answer")
+
+    session.set_value("Your question about DNA or forensics:", "Can twins have the same DNA?")
+    session.click("Ask Expert")
+    session.click("👉 Go to Crime Scene")
+
+    spots = list(range(len(game.evidence_spots)))
+    rng.shuffle(spots)
+    for spot in spots[:rng.randint(game.required_evidence, len(spots))]:
+        session.click(f"spot_{spot}")
+    session.click("🔬 Analyze Evidence in the Lab")
+    _wait_for_phase_change(session, "lab")
+
+
+def play_quiz_game(session: HeadlessSession, rng: random.Random, accuracy: float = 0.8):
+    """
+    Play a lesson quiz through every round to the final results.
+
+    Args:
+        session: Session for QuizGame, built with the game info of a lesson
+            that has questions
+        rng: Random source for the student's choices
+        accuracy: Chance of picking the right answer at each question
+    """
+    bank = session.game.content.bank
+    session.render()
+    session.click("🚀 Start Quiz")
+    while session.state.phase != "completion":
+        if session.state.phase == "review":
+            session.click("👉 Next Round" if session.game._more_rounds(session.state) else "🏁 See Final Results")
+            continue
+        state = session.state
+        question = bank[state.question_ids[state.current_question]]
+        session.set_value(f"quiz_{question.id}", _pick(rng, question.correct_option, question.options, accuracy))
+        session.click("Submit Answer")
+
+
+# Scripted student for each game type
+PLAY_SCRIPTS: Dict[str, Callable[[HeadlessSession, random.Random], None]] = {
+    "racing_game": play_ordinal_race,
+    "exploration_game": play_indus_valley,
+    "creative_writing": play_multiverse_explorer,
+    "detective_game": play_dna_detective,
+}
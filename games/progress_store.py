@@ -0,0 +1,252 @@
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# SQLite file holding every student's progress; set to an empty string to
+# turn persistence off
+PROGRESS_DB_ENV = "LP_PROGRESS_DB"
+DEFAULT_PROGRESS_DB = "progress.db"
+
+# st.session_state key holding the signed-in student's ID
+STUDENT_KEY = "student_id"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS progress (
+    student_id TEXT NOT NULL,
+    state_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (student_id, state_key)
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO progress (student_id, state_key, data, updated_at) VALUES (?, ?, ?, ?)
+ON CONFLICT (student_id, state_key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at
+"""
+
+
+class ProgressStore:
+    """
+    Game states by student, saved to SQLite by a background writer.
+
+    save() only queues the state and returns; a writer thread commits
+    everything queued since its last flush in one transaction every
+    flush_interval seconds. Repeated saves of the same game before a flush
+    collapse into one row write, and saves that don't change anything are
+    dropped. load() sees queued saves, so a student who comes back before
+    the next flush still gets their latest state.
+
+    Only the last `max_latest` games saved or loaded are remembered to
+    drop unchanged saves, so memory doesn't grow with every student who
+    ever played; the others are read back from the database on load.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, max_latest: int = 10000):
+        """
+        Open (or create) a progress database and start its writer.
+
+        Args:
+            path: SQLite file, or ":memory:" for a throwaway store
+            flush_interval: Seconds between flushes of queued saves
+            max_latest: Most games to remember the last saved state of
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_latest = max_latest
+
+        # An in-memory database exists once per connection, so share one
+        if path == ":memory:":
+            self._writer = self._reader = self._connect(path)
+        else:
+            self._writer = self._connect(path)
+            self._reader = self._connect(path)
+        self._writer.execute(_SCHEMA)
+        self._reader_lock = threading.Lock()
+        self._writer_lock = self._reader_lock if self._reader is self._writer else threading.Lock()
+
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        # (student ID, state key) -> JSON waiting to be written
+        self._pending: Dict[Tuple[str, str], str] = {}
+        # The batch the writer is committing
+        self._writing: Dict[Tuple[str, str], str] = {}
+        # (student ID, state key) -> JSON last saved or loaded, least recently used first
+        self._latest: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._queued = self._committed = 0
+        self._closed = False
+        self._wake = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def save(self, student_id: str, state_key: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue a game state to be written. Never touches the disk.
+
+        Args:
+            student_id: Student the state belongs to
+            state_key: Game state key, see BaseGame.state_key
+            data: GameState.to_dict() output
+
+        Returns:
+            True if the state changed since it was last saved
+        """
+        payload = json.dumps(data, separators=(",", ":"))
+        key = (student_id, state_key)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Progress store is closed")
+            if self._latest.get(key) == payload:
+                self._latest.move_to_end(key)
+                return False
+            self._pending[key] = payload
+            self._remember(key, payload)
+            self._queued += 1
+        return True
+
+    def _remember(self, key: Tuple[str, str], payload: str):
+        """Note a game's latest state, forgetting the least recently used beyond max_latest. Call with _lock held."""
+        self._latest[key] = payload
+        self._latest.move_to_end(key)
+        if len(self._latest) > self.max_latest:
+            self._latest.popitem(last=False)
+
+    def load(self, student_id: str, state_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a student's latest saved state for a game.
+
+        Args:
+            student_id: Student the state belongs to
+            state_key: Game state key, see BaseGame.state_key
+
+        Returns:
+            The saved GameState.to_dict() output, or None if there is none
+        """
+        key = (student_id, state_key)
+        with self._lock:
+            # Saves not yet committed are newer than the database, even once forgotten
+            payload = self._pending.get(key) or self._writing.get(key) or self._latest.get(key)
+            if key in self._latest:
+                self._latest.move_to_end(key)
+        if payload is None:
+            with self._reader_lock:
+                row = self._reader.execute(
+                    "SELECT data FROM progress WHERE student_id = ? AND state_key = ?", key
+                ).fetchone()
+            if row is None:
+                return None
+            payload = row[0]
+            with self._lock:
+                if key not in self._latest:
+                    self._remember(key, payload)
+        return json.loads(payload)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything queued so far and wait until it is committed.
+
+        Args:
+            timeout: Seconds to wait at most, or None to wait as long as it takes
+
+        Returns:
+            True if everything queued before the call was committed in time
+        """
+        with self._lock:
+            target = self._queued
+            if self._committed >= target:
+                return True
+        self._wake.set()
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._committed >= target, timeout)
+
+    def close(self):
+        """Flush queued saves and stop the writer. Safe to call twice."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join()
+        self._writer.close()
+        if self._reader is not self._writer:
+            self._reader.close()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._writing = batch
+                queued = self._queued
+                closing = self._closed
+            written = not batch or self._write(batch)
+            with self._flushed:
+                if written:
+                    self._committed = queued
+                else:
+                    # Keep the failed rows for the next flush unless saved again since
+                    for key, payload in batch.items():
+                        self._pending.setdefault(key, payload)
+                self._writing = {}
+                self._flushed.notify_all()
+            if closing:
+                return
+
+    def _write(self, batch: Dict[Tuple[str, str], str]) -> bool:
+        now = time.time()
+        rows = [(student_id, state_key, payload, now) for (student_id, state_key), payload in batch.items()]
+        try:
+            with self._writer_lock:
+                self._writer.execute("BEGIN")
+                try:
+                    self._writer.executemany(_UPSERT, rows)
+                    self._writer.execute("COMMIT")
+                except BaseException:
+                    self._writer.execute("ROLLBACK")
+                    raise
+            return True
+        except sqlite3.Error:
+            logger.exception("Could not save progress for %d games", len(rows))
+            return False
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> Optional[ProgressStore]:
+    """
+    Get the process-wide progress store, opening it on first use.
+
+    Returns:
+        The store, or None if persistence is turned off with LP_PROGRESS_DB=""
+    """
+    global _store
+    if _store is None:
+        path = os.getenv(PROGRESS_DB_ENV, DEFAULT_PROGRESS_DB)
+        if not path:
+            return None
+        with _store_lock:
+            if _store is None:
+                _store = ProgressStore(path)
+    return _store
@@ -0,0 +1,377 @@
+import os
+import random
+import threading
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .question_bank import Question, get_bank
+from .race_sim import simulate_race
+
+# Every car a race can have; puzzles refer to cars by index into this
+RACERS = ("Red Car", "Blue Car", "Green Car", "Yellow Car",
+          "Orange Car", "Purple Car", "White Car", "Black Car",
+          "Silver Car", "Gold Car", "Pink Car", "Brown Car",
+          "Teal Car", "Navy Car", "Maroon Car", "Lime Car",
+          "Cyan Car", "Bronze Car", "Indigo Car", "Copper Car")
+
+# Hand-written traffic questions mixed into every quiz
+TRAFFIC_BANK = "ordinal_traffic"
+
+# Environment variable with a seed for the shared pool, for reproducible runs
+PUZZLE_SEED_ENV = "LP_PUZZLE_SEED"
+
+
+def ordinal(number: int) -> str:
+    """
+    Write a number as an ordinal.
+
+    Args:
+        number: Number from 1
+
+    Returns:
+        E.g. "1st", "12th", "22nd"
+    """
+    if 10 <= number % 100 <= 20:
+        suffix = "th"
+    else:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+
+class Grade(NamedTuple):
+    """How hard the puzzles of a grade are"""
+    cars: int                       # Cars in the level one race
+    race_kinds: Tuple[str, ...]     # Level one question kinds
+    ordering: int                   # Cars to put in order in level two
+    relative_clues: float           # Share of "right after" clues in level two
+    traffic: int                    # Hand-written traffic questions in level three
+    generated: int                  # Generated ordinal questions in level three
+    spots: int                      # Spots in the level four garage
+    filled: int                     # Spots already taken
+    parking_kinds: Tuple[str, ...]  # Level four instruction kinds
+
+
+# Grade 1 is the original game: ten cars, six to order and ten parking spots
+GRADES = (
+    Grade(cars=10, race_kinds=("position",), ordering=6, relative_clues=0.0,
+          traffic=3, generated=0, spots=10, filled=5, parking_kinds=("nth",)),
+    Grade(cars=15, race_kinds=("position", "car_at"), ordering=7, relative_clues=0.4,
+          traffic=2, generated=2, spots=15, filled=7, parking_kinds=("nth", "nth_empty")),
+    Grade(cars=20, race_kinds=("position", "car_at", "after", "between"), ordering=8, relative_clues=0.7,
+          traffic=1, generated=3, spots=20, filled=10, parking_kinds=("nth_empty", "after_car", "from_end")),
+)
+
+
+class RacePuzzle(NamedTuple):
+    """Level one: a simulated race's result and a question about it"""
+    order: Tuple[int, ...]          # Racer indexes from first to last
+    times: Tuple[float, ...]        # Finishing times in seconds, in order
+    places: Tuple[int, ...]         # Places, in order; cars in a dead heat share one
+    photo_finish: Tuple[bool, ...]  # Whether each car's place came down to a photo finish
+    question: Question
+
+
+class OrderingPuzzle(NamedTuple):
+    """Level two: clues that pin down the order of some cars"""
+    order: Tuple[int, ...]  # The answer, first to last
+    clues: Tuple[str, ...]
+
+
+class ParkingPuzzle(NamedTuple):
+    """Level four: a garage and where to park"""
+    spots: Tuple[str, ...]  # Car in each spot, or "Empty"
+    target: int             # Index of the right spot
+    instruction: str
+
+
+class Challenge(NamedTuple):
+    """All four levels of one play-through, made from `seed`"""
+    seed: int
+    grade: int
+    race: RacePuzzle
+    ordering: OrderingPuzzle
+    quiz: Tuple[Question, ...]
+    parking: ParkingPuzzle
+
+    def question(self, question_id: str) -> Question:
+        """
+        Get a level three question by ID.
+
+        Args:
+            question_id: ID of one of the quiz questions
+
+        Returns:
+            The question
+
+        Raises:
+            KeyError: If the quiz has no such question
+        """
+        for question in self.quiz:
+            if question.id == question_id:
+                return question
+        raise KeyError(question_id)
+
+
+def _choice_question(rng: random.Random, question_id: str, text: str, correct: str,
+                     distractors: List[str], options: int = 4) -> Question:
+    """A multiple-choice question with the answer among shuffled distractors"""
+    choices = [correct] + [option for option in dict.fromkeys(distractors) if option != correct][:options - 1]
+    rng.shuffle(choices)
+    return Question(question_id, text, tuple(choices), choices.index(correct))
+
+
+def _race(rng: random.Random, grade: Grade) -> RacePuzzle:
+    lanes = rng.sample(range(len(RACERS)), grade.cars)
+    result = simulate_race(rng.getrandbits(64), grade.cars)
+    order = [lanes[lane] for lane in result.order]
+    places = result.places
+    names = [RACERS[car] for car in order]
+    # Questions naming a place or the car right after another one need a
+    # car that isn't in a dead heat
+    alone = [i for i in range(grade.cars) if places.count(places[i]) == 1]
+    kind = rng.choice(grade.race_kinds)
+    if kind == "after" and not any(i + 1 in alone for i in alone):
+        kind = "position"
+    if kind in ("car_at", "between") and len(alone) < 2:
+        kind = "position"
+    place = rng.randrange(grade.cars)
+    # Distractors are the places and cars next to the answer, the easiest to mix up
+    near = sorted(range(grade.cars), key=lambda other: (abs(other - place), rng.random()))[1:]
+
+    if kind == "position" and grade.cars <= 10:
+        # Short races list every place, in order
+        question = Question("race_position", f"What position did the {names[place]} finish in?",
+                            tuple(ordinal(other + 1) for other in range(grade.cars)), places[place] - 1)
+    elif kind == "position":
+        question = _choice_question(
+            rng, "race_position", f"What position did the {names[place]} finish in?",
+            ordinal(places[place]), [ordinal(places[other]) for other in near])
+    elif kind == "car_at":
+        place = rng.choice(alone)
+        near = sorted((other for other in range(grade.cars) if other != place),
+                      key=lambda other: (abs(other - place), rng.random()))
+        question = _choice_question(
+            rng, "race_car_at", f"Which car finished {ordinal(places[place])}?",
+            names[place], [names[other] for other in near])
+    elif kind == "after":
+        place = rng.choice([i for i in alone if i + 1 in alone])
+        question = _choice_question(
+            rng, "race_after", f"Which car finished right after the {names[place]}?",
+            names[place + 1], [names[other] for other in (place - 1, place + 2, place + 3) if 0 <= other < grade.cars])
+    else:
+        first, second = sorted(rng.sample(alone, 2))
+        between = second - first - 1
+        question = _choice_question(
+            rng, "race_between", f"How many cars finished between the {names[first]} and the {names[second]}?",
+            str(between), [str(between + delta) for delta in (1, -1, 2, 3) if between + delta >= 0])
+    return RacePuzzle(tuple(order), result.times, places, result.photo_finish, question)
+
+
+def _ordering(rng: random.Random, grade: Grade) -> OrderingPuzzle:
+    order = rng.sample(range(len(RACERS)), grade.ordering)
+    clues = []
+    for place, car in enumerate(order):
+        # Every car gets one clue and the winner's is always absolute, so
+        # the chain of "right after" clues has a unique answer
+        if place and rng.random() < grade.relative_clues:
+            clues.append(f"The {RACERS[car]} finished right after the {RACERS[order[place - 1]]}.")
+        else:
+            clues.append(f"The {RACERS[car]} finished {ordinal(place + 1)}.")
+    rng.shuffle(clues)
+    return OrderingPuzzle(tuple(order), tuple(clues))
+
+
+def _generated_questions(rng: random.Random, grade: Grade) -> List[Question]:
+    line = rng.randint(5, grade.cars)
+    place = rng.randint(2, line - 1)
+    car = rng.choice(RACERS)
+    templates = [
+        lambda: _choice_question(
+            rng, "ordinal_ahead",
+            f"{line} cars are waiting at a red light. The {car} is {ordinal(place)} in line. "
+            "How many cars are in front of it?",
+            str(place - 1), [str(place), str(place - 2), str(place + 1), str(line - place)]),
+        lambda: _choice_question(
+            rng, "ordinal_behind",
+            f"{line} cars are waiting at a red light. The {car} is {ordinal(place)} in line. "
+            "How many cars are behind it?",
+            str(line - place), [str(line - place + 1), str(line - place - 1), str(place - 1), str(line)]),
+        lambda: _choice_question(
+            rng, "ordinal_last",
+            f"{line} cars are lined up at a stop sign. In which place is the last car?",
+            ordinal(line), [ordinal(line - 1), ordinal(line + 1), "1st"]),
+        lambda: _choice_question(
+            rng, "ordinal_next",
+            f"The {ordinal(place)} car in line has just driven through the green light. Which car goes next?",
+            f"The {ordinal(place + 1)} car", [f"The {ordinal(place - 1)} car", f"The {ordinal(place + 2)} car",
+                                               "The 1st car"]),
+    ]
+    return [template() for template in rng.sample(templates, grade.generated)]
+
+
+def _parking(rng: random.Random, grade: Grade) -> ParkingPuzzle:
+    spots = ["Empty"] * grade.spots
+    for spot, car in zip(rng.sample(range(grade.spots), grade.filled), rng.sample(RACERS, grade.filled)):
+        spots[spot] = car
+    empty = [spot for spot in range(grade.spots) if spots[spot] == "Empty"]
+    kind = rng.choice(grade.parking_kinds)
+    # Empty spots right after a parked car, for "after_car"
+    after_car = [spot for spot in empty if spot and spots[spot - 1] != "Empty"]
+
+    if kind == "nth_empty":
+        nth = rng.randrange(len(empty))
+        target = empty[nth]
+        instruction = f"Park your car in the {ordinal(nth + 1)} empty parking spot."
+    elif kind == "after_car" and after_car:
+        target = rng.choice(after_car)
+        instruction = f"Park your car in the spot right after the {spots[target - 1]}."
+    elif kind == "from_end":
+        target = rng.choice(empty)
+        instruction = f"Park your car in the {ordinal(grade.spots - target)} parking spot from the end."
+    else:
+        target = rng.choice(empty)
+        instruction = f"Park your car in the {ordinal(target + 1)} parking spot."
+    return ParkingPuzzle(tuple(spots), target, instruction)
+
+
+def generate_challenge(seed: int, grade: int = 1) -> Challenge:
+    """
+    Make all four levels of a play-through.
+
+    The same seed and grade always give the same challenge, so a session
+    only needs to keep those two numbers to be replayed or moved.
+
+    Args:
+        seed: Any integer
+        grade: Difficulty from 1 to len(GRADES); higher grades are clamped
+
+    Returns:
+        A new Challenge
+    """
+    grade = max(1, min(grade, len(GRADES)))
+    spec = GRADES[grade - 1]
+    # One generator per level, so changing one level's puzzles leaves the others alone
+    race = _race(random.Random(f"race:{grade}:{seed}"), spec)
+    ordering = _ordering(random.Random(f"ordering:{grade}:{seed}"), spec)
+
+    rng = random.Random(f"quiz:{grade}:{seed}")
+    traffic = list(get_bank(TRAFFIC_BANK))
+    quiz = rng.sample(traffic, spec.traffic) if spec.traffic < len(traffic) else traffic
+    quiz = quiz + _generated_questions(rng, spec)
+
+    parking = _parking(random.Random(f"parking:{grade}:{seed}"), spec)
+    return Challenge(seed, grade, race, ordering, tuple(quiz), parking)
+
+
+@lru_cache(maxsize=8192)
+def get_challenge(seed: int, grade: int = 1) -> Challenge:
+    """
+    Get a challenge, generating it only if it isn't cached.
+
+    Args:
+        seed: Challenge seed
+        grade: Difficulty
+
+    Returns:
+        The shared, read-only Challenge
+    """
+    return generate_challenge(seed, grade)
+
+
+class PuzzlePool:
+    """
+    Challenges made ahead of time, handed out one per play-through.
+
+    Each grade has a stack of challenges and draw() pops one. When a draw
+    leaves fewer than `refill_below` behind, a background thread generates
+    another `batch_size`, so play-throughs don't wait for generation
+    unless the stack runs dry. Seeds come from the pool's own random
+    generator, so a pool made with a seed hands out the same challenges
+    every time (in the same order, as long as draws don't outrun refills).
+    """
+
+    def __init__(self, batch_size: int = 256, refill_below: int = 64, seed: Optional[int] = None):
+        """
+        Args:
+            batch_size: Challenges generated per refill
+            refill_below: Stack size under which a background refill starts
+            seed: Seed for the challenge seeds, or None for a random one
+        """
+        self.batch_size = batch_size
+        self.refill_below = refill_below
+        self._seeds = random.Random(seed)
+        self._stacks: Dict[int, List[Challenge]] = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+
+    def fill(self, grade: int, count: Optional[int] = None):
+        """
+        Generate challenges for a grade now.
+
+        Args:
+            grade: Difficulty
+            count: Challenges to add; defaults to batch_size
+        """
+        with self._lock:
+            seeds = [self._seeds.getrandbits(32) for _ in range(count or self.batch_size)]
+        # Generated through the cache, so sessions that later look their
+        # challenge up by seed find it there
+        batch = [get_challenge(seed, grade) for seed in seeds]
+        with self._lock:
+            # Older challenges stay on top, so they are handed out first
+            self._stacks[grade] = batch[::-1] + self._stacks.get(grade, [])
+
+    def draw(self, grade: int = 1) -> Challenge:
+        """
+        Take a challenge for a new play-through.
+
+        Args:
+            grade: Difficulty
+
+        Returns:
+            A challenge no other draw from this pool has returned
+        """
+        while True:
+            with self._lock:
+                stack = self._stacks.get(grade)
+                if stack:
+                    challenge = stack.pop()
+                    refill = len(stack) < self.refill_below and grade not in self._refilling
+                    if refill:
+                        self._refilling.add(grade)
+                    break
+            self.fill(grade)
+        if refill:
+            threading.Thread(target=self._refill, args=(grade,), name="puzzle-pool-refill", daemon=True).start()
+        return challenge
+
+    def available(self, grade: int = 1) -> int:
+        """Number of challenges ready for a grade"""
+        return len(self._stacks.get(grade, ()))
+
+    def _refill(self, grade: int):
+        try:
+            self.fill(grade)
+        finally:
+            with self._lock:
+                self._refilling.discard(grade)
+
+
+_pool: Optional[PuzzlePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_puzzle_pool() -> PuzzlePool:
+    """
+    Get the process-wide puzzle pool, creating it on first use.
+
+    Returns:
+        The pool, seeded from LP_PUZZLE_SEED if it is set
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                seed = os.getenv(PUZZLE_SEED_ENV)
+                _pool = PuzzlePool(seed=int(seed) if seed else None)
+    return _pool
@@ -0,0 +1,169 @@
+import json
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+# Directory holding the question bank files (content/questions/<bank>.json)
+CONTENT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "content")
+
+
+class Question(NamedTuple):
+    """A multiple-choice question. The answer is stored as an index into options."""
+    id: str
+    question: str
+    options: Tuple[str, ...]
+    correct: int
+
+    @property
+    def correct_option(self) -> str:
+        """The text of the correct option"""
+        return self.options[self.correct]
+
+    def option_index(self, option: Optional[str]) -> int:
+        """
+        Get the index of an option, e.g. the value returned by st.radio.
+
+        Args:
+            option: Option text, or None if nothing was selected
+
+        Returns:
+            Index into options, or -1 if the option is not one of them
+        """
+        try:
+            return self.options.index(option)
+        except ValueError:
+            return -1
+
+
+class AnswerKey:
+    """
+    The answers of a bank's questions, indexed when the bank is loaded so
+    grading an answer is a dictionary lookup by question ID and option text.
+    """
+
+    __slots__ = ("_correct", "_answers")
+
+    def __init__(self, questions: Iterable[Question]):
+        """
+        Index the answers.
+
+        Args:
+            questions: The bank's questions
+        """
+        self._correct: Dict[str, int] = {}
+        # (question ID, option text) -> (option index, whether it is correct)
+        self._answers: Dict[Tuple[str, str], Tuple[int, bool]] = {}
+        for question in questions:
+            self._correct[question.id] = question.correct
+            for index, option in enumerate(question.options):
+                self._answers.setdefault((question.id, option), (index, index == question.correct))
+
+    def grade(self, question_id: str, option: Optional[str]) -> Tuple[int, bool]:
+        """
+        Grade an answer, e.g. the value returned by st.radio.
+
+        Args:
+            question_id: ID of a question in the bank
+            option: Option text, or None if nothing was selected
+
+        Returns:
+            The option's index (-1 if it is not one of the options) and
+            whether it is the correct one
+        """
+        return self._answers.get((question_id, option), (-1, False))
+
+    def count_correct(self, question_ids: Iterable[str], answers: Iterable[int]) -> int:
+        """
+        Count the correct answers among answers given as option indexes.
+
+        Args:
+            question_ids: IDs of the questions answered
+            answers: Index of the option given for each question
+
+        Returns:
+            Number of answers that are the correct option
+        """
+        correct = self._correct
+        return sum(correct[question_id] == answer for question_id, answer in zip(question_ids, answers))
+
+
+class QuestionBank:
+    """
+    A read-only set of questions loaded from a content file.
+
+    Banks are shared by every session in the process (see get_bank), so
+    sessions only keep question IDs and the indexes of the answers given;
+    answers are graded with the bank's answer_key.
+    """
+
+    __slots__ = ("name", "description", "answer_key", "_questions")
+
+    def __init__(self, name: str, description: str, questions: Tuple[Question, ...]):
+        """
+        Initialize the bank.
+
+        Args:
+            name: Bank name, as used in get_bank()
+            description: Human-readable description of the bank
+            questions: Questions in their default order
+        """
+        self.name = name
+        self.description = description
+        self._questions = MappingProxyType({question.id: question for question in questions})
+        self.answer_key = AnswerKey(questions)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuestionBank":
+        """
+        Build a bank from the JSON structure used by the content files.
+
+        Args:
+            data: Dict with "bank", optional "description" and a "questions" list
+
+        Returns:
+            A new QuestionBank
+        """
+        questions = tuple(
+            Question(
+                id=item["id"],
+                question=item["question"],
+                options=tuple(item["options"]),
+                correct=int(item["correct"]),
+            )
+            for item in data["questions"]
+        )
+        return cls(data["bank"], data.get("description", ""), questions)
+
+    @property
+    def ids(self) -> Tuple[str, ...]:
+        """Question IDs in the bank's default order"""
+        return tuple(self._questions)
+
+    def __getitem__(self, question_id: str) -> Question:
+        return self._questions[question_id]
+
+    def __contains__(self, question_id: str) -> bool:
+        return question_id in self._questions
+
+    def __iter__(self) -> Iterator[Question]:
+        return iter(self._questions.values())
+
+    def __len__(self) -> int:
+        return len(self._questions)
+
+
+@lru_cache(maxsize=None)
+def get_bank(name: str) -> QuestionBank:
+    """
+    Get a question bank by name, loading it from disk on first use.
+
+    Args:
+        name: Bank name; loaded from content/questions/<name>.json
+
+    Returns:
+        The shared QuestionBank
+    """
+    path = os.path.join(CONTENT_DIR, "questions", f"{name}.json")
+    with open(path, "r", encoding="utf-8") as file:
+        return QuestionBank.from_dict(json.load(file))
@@ -0,0 +1,309 @@
+import random
+import time
+import streamlit as st
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional
+from .base_game import BaseGame
+from .content_pack import get_pack
+from .question_bank import QuestionBank, get_bank
+from .state import QuizGameState
+from .state_machine import Transition
+
+
+class QuizContent(NamedTuple):
+    """The questions a quiz is played with, and explanations of their answers"""
+    bank: QuestionBank
+    explanations: Mapping[str, str]
+
+
+def lesson_content(game_info: Dict[str, Any]) -> Optional[QuizContent]:
+    """
+    Find the questions for a lesson.
+    
+    A lesson can name a question bank file ("question_bank" in idea.json);
+    otherwise its generated content pack is used (see games.content_build).
+    Both are loaded once per process and shared by every session.
+    
+    Args:
+        game_info: Game metadata from LessonPlanProcessor.extract_game_info
+    
+    Returns:
+        The lesson's questions, or None if it has neither a bank nor a pack
+        with questions in it
+    """
+    bank_name = game_info.get("question_bank")
+    bank = get_bank(bank_name) if bank_name else None
+    if bank is not None and len(bank):
+        return QuizContent(bank, {})
+    lesson_code = game_info.get("lesson_code")
+    pack = get_pack(lesson_code) if lesson_code else None
+    if pack is not None and len(pack.bank):
+        return QuizContent(pack.bank, pack.explanations)
+    return None
+
+
+class QuizGame(BaseGame):
+    """
+    A timed quiz showdown for any lesson, played from the lesson's question
+    bank or content pack, so new lessons need no code of their own.
+    
+    Questions are played in rounds against the clock; answers are graded
+    with the bank's answer key and faster answers earn bonus points.
+    """
+    
+    state_class = QuizGameState
+    
+    # Rounds per quiz, questions per round and seconds per round
+    rounds = 3
+    round_size = 5
+    round_seconds = 60
+    
+    # Points per right answer, plus one per `bonus_seconds` left on the clock
+    points_per_answer = 10
+    bonus_seconds = 10
+    
+    # Seconds between redraws of the round timer
+    timer_interval = 1.0
+    
+    phases = {
+        "intro": "_render_intro",
+        "round": "_render_round",
+        "review": "_render_review",
+        "completion": "_render_completion",
+    }
+    
+    transitions = (
+        Transition("intro", "start", "round"),
+        Transition("round", "round_over", "review", guard="_round_finished"),
+        Transition("review", "next_round", "round", guard="_more_rounds"),
+        Transition("review", "finish", "completion"),
+        Transition("completion", "play_again", "intro", reset=True),
+    )
+    
+    def __init__(self, game_info: Dict[str, Any]):
+        """Initialize the quiz for a lesson"""
+        super().__init__(game_info)
+        self.lesson_title = game_info.get("title", "")
+        self.content = lesson_content(game_info)
+    
+    @property
+    def state_key(self) -> str:
+        """Every lesson's quiz is the same game type, so states are kept per lesson"""
+        return f"{self.game_type}_{self.lesson_code}_state" if self.lesson_code else super().state_key
+    
+    @property
+    def leaderboard_key(self) -> str:
+        """Each lesson's quiz has a leaderboard of its own, as one student's best can't stand for every lesson"""
+        return f"{self.game_type}_{self.lesson_code}" if self.lesson_code else super().leaderboard_key
+    
+    def _round_questions(self, state: QuizGameState) -> List[str]:
+        """IDs of the current round's questions"""
+        start = state.round * self.round_size
+        return state.question_ids[start:start + self.round_size]
+    
+    def _round_end(self, state: QuizGameState) -> int:
+        """Index of the first question after the current round"""
+        return min((state.round + 1) * self.round_size, len(state.question_ids))
+    
+    def _seconds_left(self, state: QuizGameState) -> float:
+        """Seconds left on the round's clock"""
+        return max(0.0, state.round_started + self.round_seconds - time.time())
+    
+    def _round_finished(self, state: QuizGameState) -> bool:
+        """Whether every question of the round has an answer"""
+        return state.current_question >= self._round_end(state)
+    
+    def _more_rounds(self, state: QuizGameState) -> bool:
+        """Whether there are questions left for another round"""
+        return self._round_end(state) < len(state.question_ids)
+    
+    def render_stats(self, state: QuizGameState):
+        """Display quiz stats"""
+        if state.question_ids is None:
+            return
+        st.markdown(f"### Quiz Stats")
+        st.markdown(f"Score: {state.score} | Correct: {state.correct_count}/{state.current_question} "
+                    f"| Streak: {state.streak} 🔥")
+    
+    def _render_intro(self):
+        """Quiz rules and the Start button"""
+        state = self.state
+        
+        st.markdown(f"## ❓ {self.lesson_title or self.title} Quiz Showdown")
+        
+        if self.content is None:
+            st.info(
+                "There are no questions for this lesson yet. Build its content pack with "
+                f"`python -m games.content_build --lesson {self.lesson_code or '<lesson code>'}`."
+            )
+            return
+        
+        bank = self.content.bank
+        rounds = min(self.rounds, -(-len(bank) // self.round_size))
+        st.markdown(f"""
+        Test what you know about **{self.lesson_title or self.title}**!
+        
+        - {rounds} round{"s" if rounds > 1 else ""} of up to {self.round_size} questions
+        - {self.round_seconds} seconds per round: answer as many as you can before time runs out
+        - {self.points_per_answer} points per right answer, plus a bonus point for every
+          {self.bonus_seconds} seconds left on the clock
+        """)
+        
+        if st.button("🚀 Start Quiz", type="primary"):
+            question_ids = list(bank.ids)
+            random.shuffle(question_ids)
+            state.question_ids = question_ids[:rounds * self.round_size]
+            self.fire("start")
+    
+    def _render_round(self):
+        """The current question of a timed round"""
+        state = self.state
+        # The clock starts when a round's first question is shown
+        round_number = state.current_question // self.round_size
+        if state.round_started is None or state.round != round_number:
+            state.round = round_number
+            state.round_started = time.time()
+        if not self._round_finished(state) and self._seconds_left(state) <= 0:
+            unanswered = self._time_up(state)
+            self.fire("round_over", (f"⏰ Time's up! {unanswered} question(s) left unanswered.", None))
+        
+        bank = self.content.bank
+        round_questions = self._round_questions(state)
+        number = state.current_question - state.round * self.round_size
+        
+        st.markdown(f"## Round {state.round + 1}")
+        # Counts down without holding up the script
+        st.fragment(self._render_timer, run_every=self.timer_interval)()
+        st.caption(f"Question {number + 1} of {len(round_questions)}")
+        
+        question = bank[round_questions[number]]
+        st.markdown(f"**{question.question}**")
+        answer_key = f"quiz_{question.id}"
+        st.radio("Select your answer:", question.options, index=None, key=answer_key)
+        st.button("Submit Answer", on_click=self._submit_answer, args=(question.id, answer_key))
+    
+    def _render_timer(self):
+        """Time left in the round, redrawn as a fragment"""
+        state = self.state
+        seconds_left = self._seconds_left(state)
+        if seconds_left <= 0 and not self._rendering:
+            # The fragment reran on its own; run the game again to end the round
+            st.rerun(scope="app")
+        st.progress(seconds_left / self.round_seconds, text=f"⏱️ {seconds_left:.0f} seconds left")
+    
+    def _time_up(self, state: QuizGameState) -> int:
+        """
+        End a round that ran out of time, marking its unanswered questions.
+        
+        Args:
+            state: This session's state object
+        
+        Returns:
+            Number of questions left unanswered
+        """
+        end = self._round_end(state)
+        unanswered = end - state.current_question
+        for question_id in state.question_ids[state.current_question:end]:
+            self.log_event("timeout", question=question_id, answer=-1, correct=False)
+        state.answers.extend([-1] * unanswered)
+        state.current_question = end
+        state.streak = 0
+        return unanswered
+    
+    def _submit_answer(self, question_id: str, answer_key: str):
+        """
+        Submit Answer callback: grade the answer and move to the next question,
+        or to the round's results after the last one.
+        
+        Args:
+            question_id: ID of the question the answer is for
+            answer_key: Session state key of the answer radio
+        """
+        state = self.state
+        if state.question_ids[state.current_question:state.current_question + 1] != [question_id]:
+            # Already answered, e.g. a double click
+            return
+        seconds_left = self._seconds_left(state)
+        if seconds_left <= 0:
+            # Too late; the round ends on this run
+            return
+        
+        answer_index, correct = self.content.bank.answer_key.grade(question_id, st.session_state.get(answer_key))
+        state.answers.append(answer_index)
+        state.current_question += 1
+        self.log_event("answer", question=question_id, answer=answer_index, correct=correct, attempt=1)
+        if correct:
+            points = self.points_per_answer + int(seconds_left // self.bonus_seconds)
+            state.score += points
+            state.correct_count += 1
+            state.streak += 1
+            state.best_streak = max(state.best_streak, state.streak)
+            notice = (f"Correct! +{points} points", True)
+        else:
+            state.streak = 0
+            notice = (f"Not quite. The answer is: {self.content.bank[question_id].correct_option}", False)
+        
+        # The last answer of a round goes on to the round's results
+        if not self.fire("round_over", notice):
+            self.notify(*notice)
+    
+    def _render_review(self):
+        """The answers of the round just played, with explanations"""
+        state = self.state
+        bank = self.content.bank
+        round_questions = self._round_questions(state)
+        start = state.round * self.round_size
+        answers = state.answers[start:start + len(round_questions)]
+        right = bank.answer_key.count_correct(round_questions, answers)
+        
+        st.markdown(f"## Round {state.round + 1} Results")
+        st.markdown(f"You got **{right} of {len(round_questions)}** right.")
+        st.progress(right / len(round_questions))
+        
+        for question_id, answer in zip(round_questions, answers):
+            question = bank[question_id]
+            with st.expander(f"{'✅' if answer == question.correct else '❌'} {question.question}"):
+                given = question.options[answer] if answer >= 0 else "No answer"
+                st.markdown(f"**Your answer:** {given}")
+                st.markdown(f"**Correct answer:** {question.correct_option}")
+                explanation = self.content.explanations.get(question_id)
+                if explanation:
+                    st.markdown(explanation)
+        
+        if self._more_rounds(state):
+            if st.button("👉 Next Round", type="primary"):
+                self.fire("next_round")
+        elif st.button("🏁 See Final Results", type="primary"):
+            self.fire("finish")
+    
+    def _render_completion(self):
+        """Final score"""
+        state = self.state
+        total = len(state.question_ids or ())
+        
+        st.markdown("## 🏆 Quiz Complete!")
+        st.success(f"You answered {state.correct_count} of {total} questions correctly and scored "
+                   f"**{state.score} points**.")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Score", state.score)
+        with col2:
+            st.metric("Correct", f"{state.correct_count}/{total}")
+        with col3:
+            st.metric("Best streak", state.best_streak)
+        
+        share = state.correct_count / total if total else 0.0
+        if share >= 0.9:
+            st.markdown("**Rank Achieved:** 🏆 Quiz Champion")
+        elif share >= 0.6:
+            st.markdown("**Rank Achieved:** ⭐ Quiz Star")
+        else:
+            st.markdown("**Rank Achieved:** 📚 Keep Practicing")
+        
+        if self.learning_outcomes:
+            st.markdown("### What You Learned:")
+            for outcome in self.learning_outcomes:
+                st.markdown(f"- {outcome}")
+        
+        if st.button("🔄 Play Again"):
+            self.fire("play_again")
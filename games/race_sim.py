@@ -0,0 +1,116 @@
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+# Track length in metres
+TRACK_LENGTH = 1000.0
+
+# Seconds between simulated positions
+TIME_STEP = 0.25
+
+# Resolution of the finish-line timer, in seconds; cars closer than this dead-heat
+TIMING = 0.01
+
+# Cars finishing less than this many seconds apart were decided by a photo finish
+PHOTO_FINISH = 0.02
+
+
+class RaceResult(NamedTuple):
+    """Outcome of one race. Cars are numbered 0 to cars - 1 by lane."""
+    order: Tuple[int, ...]          # Lanes from first to last
+    times: Tuple[float, ...]        # Finishing time of each, in order
+    places: Tuple[int, ...]         # Place of each, in order; a dead heat shares one place
+    photo_finish: Tuple[bool, ...]  # Whether each finished within PHOTO_FINISH of a neighbour
+
+
+def simulate_trajectories(rng: np.random.Generator, races: int, cars: int,
+                          length: float = TRACK_LENGTH, step: float = TIME_STEP) -> np.ndarray:
+    """
+    Drive `races` races of `cars` cars and record where every car is at every step.
+
+    Each car has its own pace, and its speed drifts up and down around it
+    (a random walk, so a car that starts fast can fade), all drawn as one
+    array of speed changes per race, car and step.
+
+    Args:
+        rng: NumPy random generator
+        races: Races to simulate at once
+        cars: Cars per race
+        length: Track length in metres
+        step: Seconds between positions
+
+    Returns:
+        Array of shape (races, cars, steps) of metres travelled after each
+        step, with enough steps for every car to cross the line
+    """
+    pace = rng.normal(50.0, 1.5, (races, cars, 1))
+    # Slowest a car can go is half its pace, so this many steps always reach the line
+    steps = int(np.ceil(length / (0.5 * pace.min()) / step)) + 1
+    drift = np.cumsum(rng.normal(0.0, 0.4, (races, cars, steps)), axis=-1)
+    speed = np.maximum(pace + drift, 0.5 * pace)
+    return np.cumsum(speed * step, axis=-1)
+
+
+def finishing_times(positions: np.ndarray, length: float = TRACK_LENGTH, step: float = TIME_STEP) -> np.ndarray:
+    """
+    Work out when each car crossed the line, between the two steps either side of it.
+
+    Args:
+        positions: Output of simulate_trajectories()
+        length: Track length in metres
+        step: Seconds between positions
+
+    Returns:
+        Array of shape positions.shape[:-1] of finishing times in seconds
+    """
+    # First step at or past the line; position k is the one after k + 1 steps
+    after = np.argmax(positions >= length, axis=-1)[..., None]
+    at = np.take_along_axis(positions, after, axis=-1)[..., 0]
+    before = np.where(after[..., 0] > 0, np.take_along_axis(positions, np.maximum(after - 1, 0), axis=-1)[..., 0], 0.0)
+    fraction = (length - before) / (at - before)
+    return (after[..., 0] + fraction) * step
+
+
+def rank(times: np.ndarray, timing: float = TIMING) -> RaceResult:
+    """
+    Turn one race's finishing times into a result, as the finish-line timer sees it.
+
+    Args:
+        times: Finishing time of each car, by lane
+        timing: Timer resolution in seconds
+
+    Returns:
+        The race result
+    """
+    # Time in whole timer ticks, so equal readings compare equal
+    ticks = np.round(times / timing).astype(np.int64)
+    order = np.argsort(ticks, kind="stable")
+    ticks = ticks[order]
+    # Competition ranking: a car's place is one more than the cars strictly ahead of it
+    places = np.searchsorted(ticks, ticks, side="left") + 1
+    gaps = np.diff(ticks) * timing
+    close = (gaps < PHOTO_FINISH - timing / 2)
+    photo = np.zeros(len(ticks), dtype=bool)
+    photo[1:] |= close
+    photo[:-1] |= close
+    return RaceResult(
+        tuple(order.tolist()),
+        tuple(np.round(ticks * timing, 6).tolist()),
+        tuple(places.tolist()),
+        tuple(photo.tolist()),
+    )
+
+
+def simulate_race(seed: int, cars: int) -> RaceResult:
+    """
+    Simulate one race.
+
+    Args:
+        seed: Seed for the race; the same seed always gives the same result
+        cars: Cars in the race
+
+    Returns:
+        The race result
+    """
+    rng = np.random.default_rng(seed)
+    return rank(finishing_times(simulate_trajectories(rng, 1, cars))[0])
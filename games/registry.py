@@ -0,0 +1,168 @@
+import importlib
+import logging
+from importlib import metadata
+from typing import Dict, Any, MutableMapping, Optional, Type
+
+logger = logging.getLogger(__name__)
+
+# Entry-point group that installed packages can use to contribute extra games
+ENTRY_POINT_GROUP = "lp_gamification.games"
+
+# Built-in games, described entry-point style ("module:Class") so that a game
+# module - and LangChain, PIL, etc. behind it - is only imported when that
+# game is actually started.
+GAME_REGISTRY: Dict[str, Dict[str, Any]] = {
+    "racing_game": {
+        "entry_point": "games.ordinal_race:OrdinalRaceGame",
+        "requires_llm": False,
+    },
+    "creative_writing": {
+        "entry_point": "games.multiverse_explorer:MultiverseExplorerGame",
+        "requires_llm": True,
+    },
+    "exploration_game": {
+        "entry_point": "games.indus_valley:IndusValleyAdventureGame",
+        "requires_llm": True,
+    },
+    "detective_game": {
+        "entry_point": "games.dna_detective:DNADetectiveGame",
+        "requires_llm": True,
+    },
+    "quiz_game": {
+        "entry_point": "games.quiz_game:QuizGame",
+        "requires_llm": False,
+    },
+}
+
+_loaded_classes: Dict[str, Type] = {}
+_entry_points_scanned = False
+
+
+def register_game(game_type: str, entry_point: str, requires_llm: bool = False):
+    """
+    Register (or replace) a game type.
+
+    Args:
+        game_type: Game type as produced by LessonPlanProcessor, e.g. "racing_game"
+        entry_point: Import path of the game class in "module:Class" form
+        requires_llm: Whether the game creates LLM chains when it starts
+    """
+    GAME_REGISTRY[game_type] = {
+        "entry_point": entry_point,
+        "requires_llm": requires_llm,
+    }
+    _loaded_classes.pop(game_type, None)
+
+
+def _scan_entry_points():
+    """
+    Register games advertised by installed packages under ENTRY_POINT_GROUP.
+
+    Scanning installed distributions is comparatively slow, so this only
+    happens once, and only when a game type is not found in the built-in table.
+    """
+    global _entry_points_scanned
+    if _entry_points_scanned:
+        return
+    _entry_points_scanned = True
+
+    try:
+        discovered = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except Exception:
+        logger.exception("Error scanning game entry points")
+        return
+
+    for entry_point in discovered:
+        if entry_point.name not in GAME_REGISTRY:
+            # Entry points carry no extra metadata, so assume the safe default
+            register_game(entry_point.name, entry_point.value, requires_llm=True)
+
+
+def get_game_spec(game_type: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the registry entry for a game type.
+
+    Args:
+        game_type: Type of the game
+
+    Returns:
+        Dict with "entry_point" and "requires_llm", or None if unknown
+    """
+    if game_type not in GAME_REGISTRY:
+        _scan_entry_points()
+    return GAME_REGISTRY.get(game_type)
+
+
+def requires_llm(game_type: str) -> bool:
+    """
+    Check whether a game type needs an LLM (and therefore an API key).
+
+    Args:
+        game_type: Type of the game
+
+    Returns:
+        True if the game creates LLM chains
+    """
+    spec = get_game_spec(game_type)
+    return bool(spec and spec["requires_llm"])
+
+
+def get_game_class(game_type: str) -> Optional[Type]:
+    """
+    Import and return the game class for a game type.
+
+    The game module is imported on first use and the class is cached, so
+    later lookups are a dictionary access.
+
+    Args:
+        game_type: Type of the game
+
+    Returns:
+        The BaseGame subclass for the game type, or None if unknown
+    """
+    if game_type in _loaded_classes:
+        return _loaded_classes[game_type]
+
+    spec = get_game_spec(game_type)
+    if spec is None:
+        return None
+
+    module_name, _, class_name = spec["entry_point"].partition(":")
+    module = importlib.import_module(module_name)
+    game_class = getattr(module, class_name)
+    _loaded_classes[game_type] = game_class
+    return game_class
+
+
+def get_game_instance(game_info: Dict[str, Any], catalog_version: str,
+                      cache: MutableMapping[tuple, Any]):
+    """
+    Get the game instance for a session, building it only on first use.
+    
+    Instances are keyed by game name and catalog version, so a session keeps
+    reusing its game across reruns until the lesson catalog changes.
+    
+    Args:
+        game_info: Game metadata from LessonPlanProcessor.extract_game_info
+        catalog_version: LessonPlanProcessor.catalog_version of the catalog
+        cache: Per-session mapping holding the instances
+        
+    Returns:
+        The game instance, or None if the game type is unknown
+    """
+    key = (game_info["name"], catalog_version)
+    game = cache.get(key)
+    if game is not None:
+        return game
+    
+    game_class = get_game_class(game_info["type"])
+    if game_class is None:
+        return None
+    
+    # Drop instances of this game built from an older catalog
+    for stale_key in [k for k in cache if k[0] == key[0]]:
+        del cache[stale_key]
+    
+    game = game_class(game_info)
+    cache[key] = game
+    return game
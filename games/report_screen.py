@@ -0,0 +1,457 @@
+"""
+Local pre-screening of students' written reports before they go to the
+LLM evaluator.
+
+A report is checked against a length and structure rubric (headline,
+quotes, conclusion), for the concepts it is meant to use, and for
+near-duplicates of earlier submissions, found by MinHash. Reports that
+are too short, repeat themselves, copy the task, miss the topic or copy
+another student's report get instant feedback without an LLM call; the
+rest are passed on, with hints for the rubric items they miss.
+"""
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, Any, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+# MinHash signature size, and the LSH bands it is split into to find
+# candidate duplicates (16 bands of 4 rows find pairs from about 0.5 similar)
+NUM_PERM = 64
+BANDS = 16
+
+# Words per shingle of the MinHash
+SHINGLE_WORDS = 5
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_QUOTE = re.compile(r"[\"“”]([^\"“”]{8,})[\"“”]")
+_ATTRIBUTION = re.compile(r"\b(said|says|explained|explains|told|according to|claimed|added)\b", re.IGNORECASE)
+
+# Words that mark a closing sentence as a conclusion
+CONCLUSION_WORDS = frozenset({
+    "science", "scientists", "scientific", "future", "mean", "means", "meaning", "conclusion",
+    "investigate", "investigating", "investigation", "research", "discover", "discovery",
+    "prove", "proof", "theory", "change", "understand", "world",
+})
+
+# Rejection reasons, with the feedback shown for each
+REJECTIONS = {
+    "too_short": "Your report is only {words} words long. A NEWS report needs at least {min_words} "
+                 "words: describe what you saw, explain it and quote a witness.",
+    "too_long": "Your report is {words} words long. Please keep it under {max_words} words.",
+    "repetitive": "Your report repeats the same words over and over. Write it in your own sentences.",
+    "copied_task": "Your report is mostly the task description. Write about what you witnessed instead.",
+    "off_topic": "Your report doesn't seem to be about what happened at the station. "
+                 "Explain it with {concepts}.",
+    "duplicate": "Your report is almost the same as one another student submitted. Write your own report!",
+}
+
+# Hints added to the evaluation of reports that miss a rubric item
+HINTS = {
+    "headline": "Start with a catchy headline on its own line.",
+    "quote": "Add a quote from a \"witness\" or an \"expert\".",
+    "conclusion": "End with what this might mean for science.",
+}
+
+
+def words(text: str) -> List[str]:
+    """
+    Split text into lowercase words.
+
+    Args:
+        text: Any text
+
+    Returns:
+        The words, in order
+    """
+    return _WORD.findall(text.lower())
+
+
+def sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, at spaces after ".", "!" or "?".
+
+    Args:
+        text: Any text
+
+    Returns:
+        The non-empty sentences, in order
+    """
+    return [sentence for sentence in _SENTENCE_END.split(text) if sentence]
+
+
+def has_quote(text: str) -> bool:
+    """
+    Check whether text quotes someone: 8 or more characters in quotation
+    marks, or a "said"-style attribution.
+
+    Args:
+        text: Any text
+
+    Returns:
+        True if it has a quote
+    """
+    return bool(_QUOTE.search(text) or _ATTRIBUTION.search(text))
+
+
+def is_conclusion(sentence: str) -> bool:
+    """
+    Check whether a closing sentence talks about science or the future.
+
+    Args:
+        sentence: The last sentence of a text
+
+    Returns:
+        True if it uses one of CONCLUSION_WORDS
+    """
+    return not CONCLUSION_WORDS.isdisjoint(words(sentence))
+
+
+def is_headline_line(line: str) -> bool:
+    """Whether the first line of a text of several lines is a headline: at most 15 words, no full stop"""
+    return 1 <= len(words(line)) <= 15 and not line.endswith(".")
+
+
+def is_headline_sentence(sentence: str) -> bool:
+    """Whether the first sentence of a one-line text is a headline: at most 15 words, in capitals or exclaimed"""
+    return 1 <= len(words(sentence)) <= 15 and (sentence.isupper() or sentence.endswith("!"))
+
+
+class Rubric(NamedTuple):
+    """Which structural parts a report has"""
+    words: int
+    headline: bool
+    quote: bool
+    conclusion: bool
+
+    def missing(self) -> List[str]:
+        """Names of the parts the report is missing, as in HINTS"""
+        return [name for name in HINTS if not getattr(self, name)]
+
+
+def check_rubric(text: str, word_count: Optional[int] = None) -> Rubric:
+    """
+    Check a report's length and structure.
+
+    A headline is a short first line followed by more text, or a short
+    first sentence in capitals or ending in "!". A quote is 8 or more
+    characters in quotation marks, or a "said"-style attribution. A
+    conclusion is a closing sentence, after at least two others, that
+    talks about science or the future.
+
+    Args:
+        text: Report text
+        word_count: Number of words, if already counted
+
+    Returns:
+        The report's Rubric
+    """
+    lines = [line.strip() for line in text.strip().splitlines() if line.strip()]
+    text_sentences = sentences(" ".join(lines))
+    headline = False
+    if len(lines) > 1:
+        headline = is_headline_line(lines[0])
+    elif text_sentences:
+        headline = is_headline_sentence(text_sentences[0])
+    return Rubric(
+        words=word_count if word_count is not None else len(words(text)),
+        headline=headline,
+        quote=has_quote(text),
+        conclusion=len(text_sentences) >= 3 and is_conclusion(text_sentences[-1]),
+    )
+
+
+def concept_coverage(text_words: Iterable[str], concepts: Mapping[str, Sequence[str]]) -> Dict[str, List[str]]:
+    """
+    Find which concepts a report mentions.
+
+    Args:
+        text_words: The report's words, as from words()
+        concepts: Keywords of each concept; a keyword of several words
+            matches those words in a row
+
+    Returns:
+        The keywords found, by concept, for the concepts with any
+    """
+    joined = " " + " ".join(text_words) + " "
+    found = {}
+    for concept, keywords in concepts.items():
+        matched = [keyword for keyword in keywords if f" {keyword} " in joined]
+        if matched:
+            found[concept] = matched
+    return found
+
+
+def minhash(text_words: Sequence[str]) -> np.ndarray:
+    """
+    Get the MinHash signature of a text's word shingles.
+
+    Two texts' signatures agree in about the share of positions that is
+    the Jaccard similarity of their sets of SHINGLE_WORDS-word shingles.
+
+    Args:
+        text_words: The text's words, as from words()
+
+    Returns:
+        NUM_PERM unsigned 64-bit minimums
+    """
+    size = min(SHINGLE_WORDS, len(text_words)) or 1
+    shingles = {" ".join(text_words[i:i + size]) for i in range(max(1, len(text_words) - size + 1))}
+    hashes = np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64,
+                         count=len(shingles))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """
+    Estimate the Jaccard similarity of two texts from their signatures.
+
+    Args:
+        first: MinHash signature of one text
+        second: MinHash signature of the other
+
+    Returns:
+        Share of matching positions, 0 to 1
+    """
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class NearDuplicateIndex:
+    """
+    Signatures of earlier submissions, one per owner, with LSH buckets so
+    a query only compares against likely duplicates.
+
+    Holds at most `capacity` owners; the least recently added are dropped.
+    Thread-safe.
+    """
+
+    def __init__(self, capacity: int = 10000, bands: int = BANDS):
+        """
+        Initialize an empty index.
+
+        Args:
+            capacity: Most submissions to keep
+            bands: LSH bands the signatures are split into
+        """
+        self.capacity = capacity
+        self.bands = bands
+        self._rows = NUM_PERM // bands
+        self._signatures: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._buckets: Dict[Tuple[int, bytes], set] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self._rows
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+
+    def query(self, signature: np.ndarray, threshold: float, exclude: Optional[str] = None
+              ) -> Optional[Tuple[str, float]]:
+        """
+        Find the most similar earlier submission, if it is similar enough.
+
+        Args:
+            signature: MinHash signature of the new submission
+            threshold: Least estimated similarity to count as a duplicate
+            exclude: Owner whose own submission doesn't count, e.g. the
+                student revising their report. Submissions like that
+                owner's don't count either: they were copied from it.
+
+        Returns:
+            (owner, similarity) of the closest duplicate, or None
+        """
+        with self._lock:
+            candidates = set()
+            for key in self._keys(signature):
+                candidates.update(self._buckets.get(key, ()))
+            candidates.discard(exclude)
+            own = self._signatures.get(exclude) if exclude is not None else None
+            best = None
+            for owner in candidates:
+                score = similarity(signature, self._signatures[owner])
+                if own is not None and similarity(own, self._signatures[owner]) >= threshold:
+                    continue
+                if score >= threshold and (best is None or score > best[1]):
+                    best = (owner, score)
+            return best
+
+    def add(self, owner: str, signature: np.ndarray):
+        """
+        Keep a submission, replacing the owner's earlier one.
+
+        Args:
+            owner: Who submitted it, e.g. a session ID
+            signature: Its MinHash signature
+        """
+        with self._lock:
+            self._discard(owner)
+            self._signatures[owner] = signature
+            for key in self._keys(signature):
+                self._buckets.setdefault(key, set()).add(owner)
+            while len(self._signatures) > self.capacity:
+                self._discard(next(iter(self._signatures)))
+
+    def _discard(self, owner: str):
+        signature = self._signatures.pop(owner, None)
+        if signature is None:
+            return
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(owner)
+                if not bucket:
+                    del self._buckets[key]
+
+
+class ScreenResult(NamedTuple):
+    """Outcome of screening a report"""
+    passed: bool
+    # Rejection reason from REJECTIONS, or None if the report passed
+    reason: Optional[str]
+    # Instant feedback for a rejected report
+    feedback: str
+    # Rubric hints for a report that passed, from HINTS
+    hints: List[str]
+    rubric: Rubric
+    # Keywords found, by concept
+    concepts: Dict[str, List[str]]
+
+
+class ReportScreen:
+    """
+    Screens reports for one writing task before LLM evaluation.
+
+    Keeps a NearDuplicateIndex of the reports that passed, and counts how
+    many reports it screened and why it rejected them.
+    """
+
+    def __init__(self, task: str, concepts: Mapping[str, Sequence[str]], min_words: int = 30,
+                 max_words: int = 1000, min_unique: float = 0.35, task_similarity: float = 0.5,
+                 duplicate_similarity: float = 0.7, capacity: int = 10000):
+        """
+        Initialize the screen.
+
+        Args:
+            task: The task text students are shown, to catch copies of it
+            concepts: Keywords of each concept a report should use; a
+                report must mention at least one
+            min_words: Fewest words of a report worth evaluating
+            max_words: Most words of a report sent to the evaluator
+            min_unique: Least share of distinct words
+            task_similarity: Similarity to the task from which a report counts as a copy of it
+            duplicate_similarity: Similarity to another student's report from
+                which a report counts as a copy of it
+            capacity: Most earlier reports kept for duplicate checks
+        """
+        self.concepts = {concept: tuple(" ".join(words(keyword)) for keyword in keywords)
+                         for concept, keywords in concepts.items()}
+        self.min_words = min_words
+        self.max_words = max_words
+        self.min_unique = min_unique
+        self.task_similarity = task_similarity
+        self.duplicate_similarity = duplicate_similarity
+        self.index = NearDuplicateIndex(capacity)
+        self._task_signature = minhash(words(task))
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def screen(self, text: str, owner: Optional[str] = None) -> ScreenResult:
+        """
+        Screen a report, keeping it for later duplicate checks if it passes.
+
+        Args:
+            text: Report text
+            owner: Who submitted it, so a student revising their own report
+                isn't flagged as copying it
+
+        Returns:
+            The ScreenResult
+        """
+        text_words = words(text)
+        rubric = check_rubric(text, len(text_words))
+        concepts = concept_coverage(text_words, self.concepts)
+        signature = minhash(text_words)
+
+        reason = None
+        if rubric.words < self.min_words:
+            reason = "too_short"
+        elif rubric.words > self.max_words:
+            reason = "too_long"
+        elif len(set(text_words)) < self.min_unique * rubric.words:
+            reason = "repetitive"
+        elif similarity(signature, self._task_signature) >= self.task_similarity:
+            reason = "copied_task"
+        elif not concepts:
+            reason = "off_topic"
+        elif self.index.query(signature, self.duplicate_similarity, exclude=owner) is not None:
+            reason = "duplicate"
+
+        with self._lock:
+            self._counts["screened"] += 1
+            self._counts[reason or "passed"] += 1
+        if reason is not None:
+            feedback = REJECTIONS[reason].format(
+                words=rubric.words, min_words=self.min_words, max_words=self.max_words,
+                concepts=" or ".join(self.concepts),
+            )
+            return ScreenResult(False, reason, feedback, [], rubric, concepts)
+
+        if owner is not None:
+            self.index.add(owner, signature)
+        return ScreenResult(True, None, "", [HINTS[name] for name in rubric.missing()], rubric, concepts)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the screen's counts.
+
+        Returns:
+            Dict of reports screened and passed to the evaluator, rejections
+            by reason, and the hit rate: the share answered without the LLM
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        screened = counts.pop("screened", 0)
+        passed = counts.pop("passed", 0)
+        return {
+            "screened": screened,
+            "passed": passed,
+            "rejected": counts,
+            "hit_rate": round((screened - passed) / screened, 3) if screened else 0.0,
+        }
+
+
+_screens: Dict[str, ReportScreen] = {}
+_screens_lock = threading.Lock()
+
+
+def get_report_screen(name: str, task: str, concepts: Mapping[str, Sequence[str]], **settings) -> ReportScreen:
+    """
+    Get a process-wide report screen, creating it on first use, so every
+    session's reports are checked against each other.
+
+    Args:
+        name: Name of the writing task
+        task: The task text, as for ReportScreen
+        concepts: Keywords of each concept, as for ReportScreen
+        **settings: Other ReportScreen arguments
+
+    Returns:
+        The shared ReportScreen for `name`
+    """
+    screen = _screens.get(name)
+    if screen is None:
+        with _screens_lock:
+            screen = _screens.get(name)
+            if screen is None:
+                screen = _screens[name] = ReportScreen(task, concepts, **settings)
+    return screen
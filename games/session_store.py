@@ -0,0 +1,198 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+
+# Where live game states are shared between app workers: unset or empty
+# keeps them in each worker's st.session_state only, "memory" shares them
+# within one process, and a redis:// URL shares them between processes
+SESSION_STORE_ENV = "LP_SESSION_STORE"
+
+# Seconds an untouched session is kept in a networked store
+SESSION_TTL = 24 * 60 * 60
+
+# st.session_state key mapping each session key to the (version, packed
+# state) this session last read or wrote
+SYNCED_KEY = "_session_store_synced"
+
+
+class VersionConflict(Exception):
+    """Raised by SessionStore.put when the value changed since it was read"""
+
+
+class SessionStore(ABC):
+    """
+    Versioned key-value storage for live game states.
+
+    Every value has a version that goes up by one on each write. A write
+    names the version it was based on and fails with VersionConflict if
+    another worker wrote in between (optimistic concurrency), so a worker
+    never overwrites a newer state it hasn't seen.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        """
+        Read a value and its version.
+
+        Args:
+            key: Session key
+
+        Returns:
+            Tuple of the value (None if there is none) and its version (0 if none)
+        """
+
+    @abstractmethod
+    def put(self, key: str, value: bytes, version: int) -> int:
+        """
+        Write a value if it is still at the version it was read at.
+
+        Args:
+            key: Session key
+            value: New value
+            version: Version the new value is based on, 0 for a new key
+
+        Returns:
+            The new version
+
+        Raises:
+            VersionConflict: If the stored version isn't `version`
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove a value, if there is one.
+
+        Args:
+            key: Session key
+        """
+
+
+class MemorySessionStore(SessionStore):
+    """Session store in a dict, shared by the sessions of one process"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        return self._values.get(key, (None, 0))
+
+    def put(self, key: str, value: bytes, version: int) -> int:
+        with self._lock:
+            current = self._values.get(key, (None, 0))[1]
+            if current != version:
+                raise VersionConflict(f"{key} is at version {current}, not {version}")
+            self._values[key] = (value, version + 1)
+        return version + 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._values.pop(key, None)
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store in Redis (or anything speaking its protocol), shared by
+    every worker connected to it.
+
+    Each session is a hash holding the version ("v") and the value ("d").
+    Writes check the version inside WATCH/MULTI/EXEC, so they need no
+    server-side scripting. Sessions expire after `ttl` seconds untouched.
+    """
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL, prefix: str = "lp:session:"):
+        """
+        Connect to a Redis server.
+
+        Args:
+            url: Server URL, e.g. redis://localhost:6379/0
+            ttl: Seconds an untouched session is kept
+            prefix: Prefix of every key this store writes
+        """
+        import redis
+
+        self._redis = redis
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Tuple[Optional[bytes], int]:
+        version, value = self._client.hmget(self.prefix + key, "v", "d")
+        return value, int(version or 0)
+
+    def put(self, key: str, value: bytes, version: int) -> int:
+        name = self.prefix + key
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(name)
+                current = int(pipe.hget(name, "v") or 0)
+                if current != version:
+                    raise VersionConflict(f"{key} is at version {current}, not {version}")
+                pipe.multi()
+                pipe.hset(name, mapping={"v": version + 1, "d": value})
+                pipe.expire(name, self.ttl)
+                pipe.execute()
+            except self._redis.WatchError:
+                raise VersionConflict(f"{key} was written while being updated") from None
+        return version + 1
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+
+def create_session_store(spec: str) -> Optional[SessionStore]:
+    """
+    Build a session store from a LP_SESSION_STORE value.
+
+    Args:
+        spec: "", "memory" or a redis:// / rediss:// / unix:// URL
+
+    Returns:
+        The store, or None for ""
+
+    Raises:
+        ValueError: If the value isn't recognised
+    """
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemorySessionStore()
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore(spec)
+    raise ValueError(f"Unknown {SESSION_STORE_ENV}: {spec!r}")
+
+
+_store: Optional[SessionStore] = None
+_configured = False
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """
+    Get the process-wide session store configured by LP_SESSION_STORE.
+
+    Returns:
+        The store, or None if game states stay in st.session_state only
+    """
+    global _store, _configured
+    if not _configured:
+        with _store_lock:
+            if not _configured:
+                _store = create_session_store(os.getenv(SESSION_STORE_ENV, ""))
+                _configured = True
+    return _store
+
+
+def set_session_store(store: Optional[SessionStore]):
+    """
+    Use a session store instead of the one configured by LP_SESSION_STORE.
+
+    Args:
+        store: The store, or None to keep game states in st.session_state only
+    """
+    global _store, _configured
+    with _store_lock:
+        _store = store
+        _configured = True
@@ -0,0 +1,368 @@
+import json
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class GameState:
+    """
+    Base class for the per-session state of a game.
+
+    Each game keeps all of its session state in one object stored under a
+    single st.session_state key, so resetting a game is one assignment and
+    the whole state serializes with to_dict()/from_dict().
+
+    Subclasses declare their fields in __slots__ and give them defaults in
+    __init__; every game has a "phase" field driven by its PhaseMachine.
+    Sets of named things (explored areas, artifacts, evidence) are stored as
+    integer bitsets with a running count next to them. Quiz questions live
+    in shared question banks (see games.question_bank); a state only keeps
+    the IDs of its questions and the indexes of the answers given.
+    """
+
+    __slots__ = ()
+
+    # Name of the slot holding the game's points
+    score_slot = "score"
+
+    @classmethod
+    def fields(cls) -> Tuple[str, ...]:
+        """
+        Get the names of all state fields, including inherited ones.
+
+        Returns:
+            Tuple of slot names
+        """
+        names = []
+        for klass in reversed(cls.__mro__):
+            names.extend(klass.__dict__.get("__slots__", ()))
+        return tuple(names)
+
+    def reset(self):
+        """Reset every field to its default, in place"""
+        self.__init__()
+
+    @property
+    def score(self) -> int:
+        """The game's points, whatever the game calls them"""
+        return getattr(self, self.score_slot)
+
+    @score.setter
+    def score(self, value: int):
+        setattr(self, self.score_slot, value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Serialize the state to a JSON-compatible dictionary.
+
+        Returns:
+            Dict mapping field names to values
+        """
+        return {name: getattr(self, name) for name in self.fields()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GameState":
+        """
+        Rebuild a state object from to_dict() output.
+
+        Unknown keys are ignored and missing ones keep their defaults, so
+        states saved by an older version of a game still load.
+
+        Args:
+            data: Dictionary produced by to_dict()
+
+        Returns:
+            A new state object
+        """
+        state = cls()
+        fields = cls.fields()
+        for name, value in data.items():
+            if name in fields:
+                setattr(state, name, value)
+        return state
+
+    @classmethod
+    def schema(cls) -> int:
+        """
+        Get a checksum of the field names, stored with packed states.
+
+        Returns:
+            CRC-32 of the comma-separated field names
+        """
+        return zlib.crc32(",".join(cls.fields()).encode())
+
+    def pack(self) -> bytes:
+        """
+        Serialize the state compactly, for session stores.
+
+        Values are written in field order without their names, after the
+        class's schema() checksum.
+
+        Returns:
+            JSON array bytes
+        """
+        values = [self.schema()]
+        values.extend(getattr(self, name) for name in self.fields())
+        return json.dumps(values, separators=(",", ":")).encode()
+
+    @classmethod
+    def unpack(cls, data: bytes) -> Optional["GameState"]:
+        """
+        Rebuild a state object from pack() output.
+
+        Packed states carry no field names, so one packed by a version of
+        the game with different fields can't be read; use to_dict() for
+        anything that must survive changes to the game.
+
+        Args:
+            data: Bytes produced by pack()
+
+        Returns:
+            A new state object, or None if the fields have changed since packing
+        """
+        values = json.loads(data)
+        fields = cls.fields()
+        if values[0] != cls.schema() or len(values) != len(fields) + 1:
+            return None
+        state = cls.__new__(cls)
+        for name, value in zip(fields, values[1:]):
+            setattr(state, name, value)
+        return state
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def has_bit(mask: int, index: int) -> bool:
+    """
+    Check whether a bit is set in a bitset.
+
+    Args:
+        mask: The bitset
+        index: Bit position
+
+    Returns:
+        True if the bit is set
+    """
+    return bool(mask >> index & 1)
+
+
+class OrdinalRaceState(GameState):
+    """
+    Session state for OrdinalRaceGame. Cars are stored as racer indexes.
+
+    The race, ordering clues, quiz and garage all come from the challenge
+    made from `seed` and `grade` (see games.puzzles), so only the
+    student's progress through them is kept here.
+    """
+
+    __slots__ = (
+        "phase", "score",
+        # Challenge the levels are made from
+        "seed", "grade",
+        # Level 1
+        "attempts",
+        # Level 2
+        "ordered_cars", "available_cars",
+        # Level 3
+        "quiz_question_ids", "quiz_answers", "current_question", "quiz_score",
+    )
+
+    def __init__(self):
+        self.phase = "level_one"
+        self.score = 0
+        self.seed: Optional[int] = None
+        self.grade = 1
+        self.attempts = 0
+        self.ordered_cars: Optional[List[int]] = None
+        self.available_cars: List[int] = []
+        self.quiz_question_ids: Optional[List[str]] = None
+        self.quiz_answers: List[int] = []
+        self.current_question = 0
+        self.quiz_score = 0
+
+    def reset(self):
+        """Reset for a new challenge, one grade harder than this one"""
+        grade = self.grade
+        self.__init__()
+        self.grade = grade + 1
+
+
+class IndusValleyState(GameState):
+    """Session state for IndusValleyAdventureGame"""
+
+    __slots__ = (
+        "phase", "knowledge_points",
+        "explored", "explored_count",
+        "artifacts", "artifact_count",
+        "quiz_question_ids", "quiz_answers", "current_quiz_question", "quiz_score",
+    )
+
+    score_slot = "knowledge_points"
+
+    # Bit positions in the explored/artifacts bitsets
+    AREAS = ("harappa_layout", "harappa_construction", "great_bath", "sanitation", "granary")
+    ARTIFACTS = ("harappa_seal", "bronze_statuette", "priest_king")
+
+    def __init__(self):
+        self.phase = "intro"
+        self.knowledge_points = 0
+        self.explored = 0
+        self.explored_count = 0
+        self.artifacts = 0
+        self.artifact_count = 0
+        self.quiz_question_ids: Optional[List[str]] = None
+        self.quiz_answers: List[int] = []
+        self.current_quiz_question = 0
+        self.quiz_score = 0
+
+    def explore(self, area: str) -> bool:
+        """
+        Mark an area as explored.
+
+        Args:
+            area: Name from AREAS
+
+        Returns:
+            True if the area had not been explored before
+        """
+        bit = 1 << self.AREAS.index(area)
+        if self.explored & bit:
+            return False
+        self.explored |= bit
+        self.explored_count += 1
+        return True
+
+    def has_artifact(self, artifact: str) -> bool:
+        """Check whether an artifact from ARTIFACTS has been collected"""
+        return has_bit(self.artifacts, self.ARTIFACTS.index(artifact))
+
+    def collect_artifact(self, artifact: str) -> bool:
+        """
+        Add an artifact to the collection.
+
+        Args:
+            artifact: Name from ARTIFACTS
+
+        Returns:
+            True if the artifact had not been collected before
+        """
+        bit = 1 << self.ARTIFACTS.index(artifact)
+        if self.artifacts & bit:
+            return False
+        self.artifacts |= bit
+        self.artifact_count += 1
+        return True
+
+
+class MultiverseExplorerState(GameState):
+    """Session state for MultiverseExplorerGame"""
+
+    __slots__ = (
+        "phase", "creative_score",
+        "fact_fiction_ids", "fact_fiction_answers", "fact_fiction_index", "fact_fiction_score",
+        "theory_answered",
+        "final_report", "selected_theory", "report_score", "report_feedback",
+    )
+
+    score_slot = "creative_score"
+
+    def __init__(self):
+        self.phase = "intro"
+        self.creative_score = 0
+        self.fact_fiction_ids: Optional[List[str]] = None
+        self.fact_fiction_answers: List[int] = []
+        self.fact_fiction_index = 0
+        self.fact_fiction_score = 0
+        self.theory_answered = False
+        self.final_report = ""
+        self.selected_theory = ""
+        self.report_score = 0
+        self.report_feedback = ""
+
+
+class DNADetectiveState(GameState):
+    """
+    Session state for DNADetectiveGame. Evidence is stored as spot indexes.
+
+    The suspects' DNA and the samples left at each spot come from the case
+    made from `case_seed` (see games.forensics); the lab's results are kept
+    as SampleReport field lists.
+    """
+
+    __slots__ = (
+        "phase", "investigator_points", "detective_name",
+        "evidence", "evidence_order",
+        "dna_question_ids", "dna_answers", "current_dna_question", "dna_score",
+        "case_seed", "lab_reports",
+    )
+
+    score_slot = "investigator_points"
+
+    def __init__(self):
+        self.phase = "intro"
+        self.investigator_points = 0
+        self.detective_name = "Detective"
+        self.evidence = 0
+        # Collection order, for numbering the samples
+        self.evidence_order: List[int] = []
+        self.dna_question_ids: Optional[List[str]] = None
+        self.dna_answers: List[int] = []
+        self.current_dna_question = 0
+        self.dna_score = 0
+        self.case_seed: Optional[int] = None
+        self.lab_reports: Optional[List[list]] = None
+
+    @property
+    def evidence_count(self) -> int:
+        """Number of evidence spots collected"""
+        return len(self.evidence_order)
+
+    def has_evidence(self, spot: int) -> bool:
+        """Check whether evidence has been collected from a spot"""
+        return has_bit(self.evidence, spot)
+
+    def collect_evidence(self, spot: int) -> bool:
+        """
+        Record evidence collected from a spot.
+
+        Args:
+            spot: Index of the evidence spot
+
+        Returns:
+            True if the spot had not been searched before
+        """
+        bit = 1 << spot
+        if self.evidence & bit:
+            return False
+        self.evidence |= bit
+        self.evidence_order.append(spot)
+        return True
+
+
+class QuizGameState(GameState):
+    """
+    Session state for QuizGame.
+
+    The questions of every round are picked when the quiz starts; round
+    `round` covers the next QuizGame.round_size of them, and its timer
+    runs from `round_started` (Unix time). Unanswered questions of a round
+    that ran out of time are recorded with answer -1.
+    """
+
+    __slots__ = (
+        "phase", "score",
+        "question_ids", "answers", "current_question", "correct_count",
+        "round", "round_started", "streak", "best_streak",
+    )
+
+    def __init__(self):
+        self.phase = "intro"
+        self.score = 0
+        self.question_ids: Optional[List[str]] = None
+        self.answers: List[int] = []
+        self.current_question = 0
+        self.correct_count = 0
+        self.round = 0
+        self.round_started: Optional[float] = None
+        self.streak = 0
+        self.best_streak = 0
@@ -0,0 +1,108 @@
+from collections import defaultdict
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+
+class Transition(NamedTuple):
+    """
+    A declared move from one phase to another.
+
+    Guards and computed rewards are named by string and looked up on the
+    context object passed to PhaseMachine.fire (normally the game), so a
+    game's whole flow can be declared as a table of plain data.
+    """
+    source: str
+    event: str
+    target: str
+    # Name of a context method taking the state and returning bool
+    guard: Optional[str] = None
+    # Points to add to state.score, or the name of a context method taking
+    # the state and returning the points
+    reward: Union[int, str] = 0
+    # Reset the state to its defaults before entering the target phase
+    reset: bool = False
+
+
+class PhaseMachine:
+    """
+    Applies declared transitions to a game state.
+
+    The machine has no Streamlit dependency: it only reads and writes
+    state.phase and state.score, so it can be driven and benchmarked
+    headless with any GameState.
+    """
+
+    def __init__(self, phases: Mapping[str, str], transitions: Sequence[Transition], initial: str):
+        """
+        Initialize and validate the machine.
+
+        Args:
+            phases: Mapping of phase name to the name of its render method
+            transitions: Allowed transitions; for the same source and event,
+                the first one whose guard passes wins
+            initial: Phase a new state starts in
+
+        Raises:
+            ValueError: If a transition or the initial phase names an unknown phase
+        """
+        unknown = {initial} - set(phases)
+        for transition in transitions:
+            unknown.update({transition.source, transition.target} - set(phases))
+        if unknown:
+            raise ValueError(f"Unknown phases in state machine: {sorted(unknown)}")
+
+        self.phases = dict(phases)
+        self.initial = initial
+        self._table: Dict[Tuple[str, str], List[Transition]] = defaultdict(list)
+        for transition in transitions:
+            self._table[(transition.source, transition.event)].append(transition)
+
+    def render_method(self, phase: str) -> str:
+        """
+        Get the name of the render method for a phase.
+
+        Args:
+            phase: Phase name
+
+        Returns:
+            Method name, e.g. "_render_intro"
+        """
+        return self.phases[phase]
+
+    def events(self, phase: str) -> Tuple[str, ...]:
+        """
+        Get the events that have a transition out of a phase.
+
+        Args:
+            phase: Phase name
+
+        Returns:
+            Tuple of event names
+        """
+        return tuple(event for source, event in self._table if source == phase)
+
+    def fire(self, state: Any, event: str, context: Any = None) -> Optional[Transition]:
+        """
+        Apply the transition for an event to a state.
+
+        Args:
+            state: GameState with phase and score attributes
+            event: Event name
+            context: Object the guard and reward method names are looked up on
+
+        Returns:
+            The transition applied, or None if no transition matched
+        """
+        for transition in self._table.get((state.phase, event), ()):
+            if transition.guard and not getattr(context, transition.guard)(state):
+                continue
+
+            reward = transition.reward
+            if isinstance(reward, str):
+                reward = getattr(context, reward)(state)
+
+            if transition.reset:
+                state.reset()
+            state.score += reward
+            state.phase = transition.target
+            return transition
+        return None
@@ -0,0 +1,319 @@
+import atexit
+import hashlib
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .question_bank import Question
+from .text import normalize
+
+logger = logging.getLogger(__name__)
+
+# SQLite file keeping the generated statements across restarts, e.g.
+# statement_pool.db. The pool spends LLM calls in the background, so it is
+# off unless this is set, and rounds only use the question bank
+STATEMENT_POOL_ENV = "LP_STATEMENT_POOL"
+
+# Answer options of every statement, as in the fact/fiction question bank
+OPTIONS = ("Fact", "Fiction")
+
+# Words that would give the answer away
+_GIVEAWAYS = frozenset({"fact", "facts", "fiction", "true", "false", "real", "fake", "made-up"})
+
+# A reply line: "FACT | statement" or "FICTION | statement"
+_LINE = re.compile(r"^\W*(FACT|FICTION)\s*[|:\-]\s*(.+?)\s*$", re.IGNORECASE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    drawn INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+
+def statement_id(text: str) -> str:
+    """
+    Get the ID of a generated statement, made from its normalized text.
+
+    Args:
+        text: Statement text
+
+    Returns:
+        "gen-" and 12 hex digits; equal for duplicate statements
+    """
+    return "gen-" + hashlib.sha1(normalize(text).encode()).hexdigest()[:12]
+
+
+def parse_statements(reply: str) -> List[Question]:
+    """
+    Read statements from an LLM reply, keeping only usable ones.
+
+    A statement is kept if its line is labelled FACT or FICTION, it is
+    one sentence of 4 to 30 words ending in a full stop or exclamation
+    mark, and it doesn't use a word that gives the answer away.
+
+    Args:
+        reply: Reply text, one "FACT | ..." or "FICTION | ..." per line
+
+    Returns:
+        The statements, as two-option questions
+    """
+    statements = []
+    for line in reply.splitlines():
+        match = _LINE.match(line)
+        if match is None:
+            continue
+        label, text = match.group(1).lower(), match.group(2).strip("\"' ")
+        words = normalize(text).split()
+        if not 4 <= len(words) <= 30 or text[-1] not in ".!" or re.search(r"[.!?]\s", text):
+            continue
+        if _GIVEAWAYS.intersection(words):
+            continue
+        statements.append(Question(statement_id(text), text, OPTIONS, 0 if label == "fact" else 1))
+    return statements
+
+
+class StatementPool:
+    """
+    Fact/fiction statements generated ahead of time, ready to be drawn.
+
+    A producer thread asks the LLM for statements in batches whenever
+    fewer than `refill_below` are left undrawn, until there are `target`.
+    Statements are validated (see parse_statements) and deduplicated by
+    normalized text against every statement the pool has ever had, then
+    written to SQLite, so the pool survives restarts. draw() only pops
+    from memory; statements drawn stay known to get(), which is how
+    sessions look up the statements of their round.
+    """
+
+    def __init__(self, path: str, target: int = 200, refill_below: int = 50, batch_size: int = 10,
+                 max_stale_batches: int = 3, retry_interval: float = 60.0):
+        """
+        Open (or create) a pool. Nothing is generated until start().
+
+        Args:
+            path: SQLite file, or ":memory:" for a throwaway pool
+            target: Undrawn statements to fill up to
+            refill_below: Refill when fewer than this many are undrawn
+            batch_size: Statements asked for per LLM call
+            max_stale_batches: Calls in a row that may fail or add nothing
+                new before the producer waits retry_interval seconds
+            retry_interval: Seconds to wait after that before trying again
+        """
+        self.path = path
+        self.target = target
+        self.refill_below = refill_below
+        self.batch_size = batch_size
+        self.max_stale_batches = max_stale_batches
+        self.retry_interval = retry_interval
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        # Every statement the pool has had, by ID; undrawn ones by answer
+        self._statements: Dict[str, Question] = {}
+        self._undrawn = (deque(), deque())
+        # IDs drawn since the producer last wrote them down
+        self._drawn: List[str] = []
+        for id, text, correct, drawn in self._connection.execute(
+                "SELECT id, text, correct, drawn FROM statements ORDER BY created_at"):
+            statement = self._statements[id] = Question(id, text, OPTIONS, correct)
+            if not drawn:
+                self._undrawn[correct].append(statement)
+
+        self._generate: Optional[Callable[[int], str]] = None
+        self._exclude: frozenset = frozenset()
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._closed = False
+        self.generated = self.rejected = 0
+
+    @property
+    def available(self) -> int:
+        """Number of undrawn statements"""
+        return len(self._undrawn[0]) + len(self._undrawn[1])
+
+    def start(self, generate: Callable[[int], str], exclude: Iterable[str] = ()):
+        """
+        Start the producer, if it isn't running yet.
+
+        Args:
+            generate: Function asking the LLM for about `count` statements,
+                returning its reply (see parse_statements for the format)
+            exclude: Texts of other statements generated ones must not
+                duplicate, e.g. the question bank's
+        """
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+            self._generate = generate
+            self._exclude = frozenset(statement_id(text) for text in exclude)
+            self._thread = threading.Thread(target=self._run, name="statement-pool", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def draw(self, count: int, rng: Optional[random.Random] = None) -> List[Question]:
+        """
+        Take statements for a round, about half facts and half fiction.
+
+        Never waits for the LLM: if the pool is short, fewer are returned.
+
+        Args:
+            count: Statements wanted
+            rng: Random source deciding which answer gets the odd one
+
+        Returns:
+            Up to `count` statements, never drawn before
+        """
+        facts = count // 2 + ((rng or random).random() < 0.5 if count % 2 else 0)
+        with self._lock:
+            drawn = [self._undrawn[0].popleft() for _ in range(min(facts, len(self._undrawn[0])))]
+            drawn += [self._undrawn[1].popleft() for _ in range(min(count - facts, len(self._undrawn[1])))]
+            self._drawn.extend(statement.id for statement in drawn)
+            low = self.available < self.refill_below
+        if low or drawn:
+            self._wake.set()
+        return drawn
+
+    def get(self, statement_id: str) -> Optional[Question]:
+        """
+        Look up a statement, drawn or not.
+
+        Args:
+            statement_id: ID from statement_id()
+
+        Returns:
+            The statement, or None if this pool never had it
+        """
+        statement = self._statements.get(statement_id)
+        if statement is None:
+            # Made by another process sharing the file since this one started
+            with self._db_lock:
+                row = self._connection.execute(
+                    "SELECT text, correct FROM statements WHERE id = ?", (statement_id,)
+                ).fetchone()
+            if row is not None:
+                statement = self._statements.setdefault(statement_id, Question(statement_id, row[0], OPTIONS, row[1]))
+        return statement
+
+    def add(self, statements: Iterable[Question]) -> int:
+        """
+        Add statements that aren't duplicates of any the pool has had, or
+        of the statements excluded in start().
+
+        Args:
+            statements: Validated statements
+
+        Returns:
+            Number of statements added
+        """
+        fresh = {}
+        with self._lock:
+            for statement in statements:
+                if statement.id not in self._statements and statement.id not in self._exclude:
+                    fresh.setdefault(statement.id, statement)
+        if not fresh:
+            return 0
+
+        now = time.time()
+        with self._db_lock:
+            self._connection.execute("BEGIN")
+            try:
+                added = [
+                    statement for statement in fresh.values()
+                    if self._connection.execute(
+                        "INSERT OR IGNORE INTO statements (id, text, correct, created_at) VALUES (?, ?, ?, ?)",
+                        (statement.id, statement.question, statement.correct, now),
+                    ).rowcount
+                ]
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+        with self._lock:
+            for statement in added:
+                self._statements[statement.id] = statement
+                self._undrawn[statement.correct].append(statement)
+        return len(added)
+
+    def close(self):
+        """Stop the producer and write down the draws. Safe to call twice."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._write_draws()
+        self._connection.close()
+        atexit.unregister(self.close)
+
+    def _write_draws(self):
+        with self._lock:
+            drawn, self._drawn = self._drawn, []
+        if drawn:
+            with self._db_lock:
+                self._connection.executemany("UPDATE statements SET drawn = 1 WHERE id = ?", [(id,) for id in drawn])
+
+    def _run(self):
+        gave_up = False
+        while not self._closed:
+            self._write_draws()
+            if self.available < self.refill_below:
+                gave_up = not self._refill()
+            # After giving up, try again later even if nothing is drawn
+            self._wake.wait(self.retry_interval if gave_up else None)
+            self._wake.clear()
+
+    def _refill(self) -> bool:
+        """Generate batches until the pool reaches its target; False if the LLM stopped adding any"""
+        stale = 0
+        while self.available < self.target and not self._closed:
+            try:
+                statements = parse_statements(self._generate(self.batch_size))
+                added = self.add(statements)
+            except Exception:
+                logger.exception("Could not generate fact/fiction statements")
+                statements, added = [], 0
+            self.generated += len(statements)
+            self.rejected += len(statements) - added
+            stale = 0 if added else stale + 1
+            if stale >= self.max_stale_batches:
+                return False
+        return True
+
+
+_pool: Optional[StatementPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_statement_pool() -> Optional[StatementPool]:
+    """
+    Get the process-wide statement pool, opening it on first use.
+
+    Returns:
+        The pool, or None if LP_STATEMENT_POOL isn't set
+    """
+    global _pool
+    if _pool is None:
+        path = os.getenv(STATEMENT_POOL_ENV)
+        if not path:
+            return None
+        with _pool_lock:
+            if _pool is None:
+                _pool = StatementPool(path)
+    return _pool
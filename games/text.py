@@ -0,0 +1,15 @@
+import re
+
+
+def normalize(text: str) -> str:
+    """
+    Reduce text to lowercase words, so rewordings in case, spacing or
+    punctuation count as the same text.
+
+    Args:
+        text: Any text, e.g. a statement or a question
+
+    Returns:
+        The words of the text joined by single spaces
+    """
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
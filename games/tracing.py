@@ -0,0 +1,235 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+import streamlit as st
+
+# Set to a file path to append every run's spans to it, in the Chrome trace
+# event format (loads in chrome://tracing, Perfetto and speedscope)
+TRACE_FILE_ENV = "LP_TRACE_FILE"
+# Set to 1 to show the span breakdown under every page
+TRACE_OVERLAY_ENV = "LP_TRACE_OVERLAY"
+# Query parameter turning the overlay on for one browser tab (?trace=1)
+OVERLAY_QUERY_PARAM = "trace"
+
+
+class _RunState(threading.local):
+    """Spans of the run in progress on this thread; None when not tracing"""
+    # Class defaults, so reading them on a fresh thread doesn't raise
+    spans: Optional[List["Span"]] = None
+    depth = 0
+
+
+_local = _RunState()
+_file_lock = threading.Lock()
+
+_trace_file: Optional[str] = os.getenv(TRACE_FILE_ENV) or None
+_overlay: bool = os.getenv(TRACE_OVERLAY_ENV, "") not in ("", "0")
+
+
+def configure(trace_file: Optional[str] = None, overlay: bool = False):
+    """
+    Turn tracing on or off, overriding the environment variables.
+
+    Args:
+        trace_file: File to append spans to, or None for no file
+        overlay: Show the span breakdown under every page
+    """
+    global _trace_file, _overlay
+    _trace_file = trace_file
+    _overlay = overlay
+
+
+class Span:
+    """A named, timed section of a run. Nested spans have a greater depth."""
+
+    __slots__ = ("name", "category", "args", "start", "end", "depth", "_spans")
+
+    def __init__(self, spans: List["Span"], name: str, category: str, args: Optional[Dict[str, Any]]):
+        self._spans = spans
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = self.end = 0
+        self.depth = 0
+
+    def __enter__(self) -> "Span":
+        self.depth = _local.depth
+        _local.depth += 1
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.end = time.perf_counter_ns()
+        _local.depth -= 1
+        self._spans.append(self)
+        return False
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end - self.start) / 1e6
+
+    def to_event(self, pid: int, tid: int) -> Dict[str, Any]:
+        """The span as a Chrome trace "complete" event"""
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (self.end - self.start) / 1000,
+            "pid": pid,
+            "tid": tid,
+        }
+        if self.args:
+            event["args"] = self.args
+        return event
+
+
+class _NullSpan:
+    """What span() returns when no run is being traced"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, category: str = "app", args: Optional[Dict[str, Any]] = None):
+    """
+    Time a section of the current run.
+
+    When the run isn't being traced this returns a shared no-op context
+    manager, so an untraced span costs one thread-local lookup.
+
+    Args:
+        name: Span name
+        category: Span category, e.g. "game", "phase", "image", "llm"
+        args: Optional details shown with the span in trace viewers
+
+    Returns:
+        A context manager
+    """
+    spans = _local.spans
+    if spans is None:
+        return _NULL_SPAN
+    return Span(spans, name, category, args)
+
+
+def _overlay_requested() -> bool:
+    if _overlay:
+        return True
+    try:
+        return st.query_params.get(OVERLAY_QUERY_PARAM) == "1"
+    except Exception:
+        return False
+
+
+@contextmanager
+def trace_run(name: str) -> Iterator[Optional[List[Span]]]:
+    """
+    Trace one script run (the whole app, or a fragment rerun).
+
+    Spans opened during the run are appended to the trace file, and the
+    overlay is drawn where the run ends. Inside a traced run this is just
+    a nested span, so a fragment is a root when it reruns on its own and a
+    child of the app when the whole app runs.
+
+    Args:
+        name: Name of the root span
+
+    Yields:
+        The list the run's spans are collected in, or None when not tracing
+    """
+    if _local.spans is not None:
+        with span(name, "run"):
+            yield None
+        return
+
+    overlay = _overlay_requested()
+    if _trace_file is None and not overlay:
+        yield None
+        return
+
+    spans: List[Span] = []
+    _local.spans = spans
+    _local.depth = 0
+    try:
+        with Span(spans, name, "run", None):
+            yield spans
+    finally:
+        _local.spans = None
+        if _trace_file is not None:
+            write_spans(_trace_file, spans)
+
+    if overlay:
+        render_overlay(spans)
+
+
+def write_spans(path: str, spans: List[Span]):
+    """
+    Append spans to a trace file in the Chrome trace event (JSON array) format.
+
+    The closing bracket of the array is optional in that format, so events
+    can be appended run after run without rewriting the file.
+
+    Args:
+        path: Trace file
+        spans: Spans to append
+    """
+    pid, tid = os.getpid(), threading.get_ident()
+    lines = "".join(json.dumps(item.to_event(pid, tid)) + ",\n" for item in spans)
+    with _file_lock:
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, "a", encoding="utf-8") as file:
+            if new:
+                file.write("[\n")
+            file.write(lines)
+
+
+def render_overlay(spans: List[Span]):
+    """
+    Show the span breakdown of a run in a collapsed expander.
+
+    Args:
+        spans: Spans of the run, the root span last
+    """
+    if not spans:
+        return
+    root = spans[-1]
+    rows = [
+        {
+            "span": " " * item.depth + item.name,
+            "category": item.category,
+            "ms": round(item.duration_ms, 2),
+            "% of run": round(100 * item.duration_ms / root.duration_ms, 1) if root.duration_ms else 0.0,
+        }
+        for item in sorted(spans, key=lambda item: item.start)
+    ]
+    with st.expander(f"⏱ Trace: {root.name} took {root.duration_ms:.1f} ms"):
+        st.dataframe(rows, hide_index=True, width="stretch")
+
+
+class TracedChain:
+    """Wraps an LLM chain so every invoke() is timed as an "llm" span"""
+
+    def __init__(self, chain, name: str):
+        """
+        Args:
+            chain: Object with an invoke(inputs) method
+            name: Span name for its calls
+        """
+        self.chain = chain
+        self.name = name
+
+    def invoke(self, inputs: Dict[str, Any], *args, **kwargs):
+        with span(self.name, "llm"):
+            return self.chain.invoke(inputs, *args, **kwargs)
@@ -1,5 +1,6 @@
 import json
 import base64
+import hashlib
 import os
 from typing import Dict, List, Any, Optional
 
@@ -17,6 +18,7 @@ class LessonPlanProcessor:
             json_path: Path to the lesson plan JSON file
         """
         self.json_path = json_path
+        self.catalog_version = ""
         self.lesson_data = self._load_json()
         
     def _load_json(self) -> Dict[str, Any]:
@@ -27,8 +29,11 @@ class LessonPlanProcessor:
             Dict containing the lesson plan data
         """
         try:
-            with open(self.json_path, 'r') as file:
-                data = json.load(file)
+            with open(self.json_path, 'rb') as file:
+                raw = file.read()
+                # Fingerprint the catalog so cached games can tell when it changes
+                self.catalog_version = hashlib.sha1(raw).hexdigest()[:12]
+                data = json.loads(raw)
                 # Return the lesson_gamification array from the JSON
                 return data.get("lesson_gamification", [])
         except Exception as e:
@@ -144,6 +149,7 @@ class LessonPlanProcessor:
                 "learning_outcomes": learning_outcomes,
                 "content_structure": games,
                 "type": game_type,
+                "question_bank": lesson.get("question_bank"),
                 "name": self._generate_game_name(title, game_type),
                 "description": self._generate_game_description(learning_outcomes, game_type, title),
                 "image_url": self.get_placeholder_image_url(game_type)
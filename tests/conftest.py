@@ -0,0 +1,5 @@
+import os
+
+# Keep tests off the SQLite files, Redis and event log a running app would use
+for _name in ("LP_PROGRESS_DB", "LP_STATEMENT_POOL", "LP_EVALUATION_CACHE", "LP_SESSION_STORE", "LP_EVENT_LOG_DIR"):
+    os.environ[_name] = ""
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from games import content_pack
+from games.content_pack import PACK_FORMAT, get_pack
+from games.headless import HeadlessSession, default_game_info
+from games.indus_valley import IndusValleyAdventureGame
+from games.quiz_game import QuizGame
+
+LESSON = "TEST_PACK_1"
+
+
+def _write_pack(path, questions, sections=()):
+    pack = {
+        "format": PACK_FORMAT, "version": "test", "lesson_code": LESSON, "title": "Test Lesson",
+        "themes": ["Cities"], "built_at": 0.0,
+        "bank": {"bank": f"pack_{LESSON}", "questions": [
+            {"id": f"q{number}", "question": f"Question {number}?", "options": ["A", "B", "C", "D"], "correct": 0}
+            for number in range(questions)
+        ]},
+        "explanations": {},
+        "sections": [{"theme": "Cities", "title": title, "text": text} for title, text in sections],
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(pack, file)
+
+
+@pytest.fixture
+def pack_file(tmp_path, monkeypatch):
+    path = str(tmp_path / f"{LESSON}.json")
+    monkeypatch.setattr(content_pack, "pack_path", lambda lesson_code: path)
+    monkeypatch.setattr(content_pack, "_packs", {})
+    return path
+
+
+def test_missing_pack_is_picked_up_once_built(pack_file):
+    assert get_pack(LESSON) is None
+    _write_pack(pack_file, 3)
+    pack = get_pack(LESSON)
+    assert pack is not None and len(pack.bank) == 3
+    assert get_pack(LESSON) is pack
+
+
+def test_rebuilt_pack_is_reloaded(pack_file):
+    _write_pack(pack_file, 3)
+    first = get_pack(LESSON)
+    _write_pack(pack_file, 5)
+    os.utime(pack_file, ns=(0, os.stat(pack_file).st_mtime_ns + 1_000_000))
+    assert len(get_pack(LESSON).bank) == 5
+    assert get_pack(LESSON) is not first
+
+
+def test_exploration_game_shows_pack_sections(pack_file):
+    _write_pack(pack_file, 1, [("Streets in a grid", "Harappa's streets crossed at right angles.")])
+    session = HeadlessSession(IndusValleyAdventureGame, {**default_game_info(IndusValleyAdventureGame),
+                                                         "lesson_code": LESSON})
+    session.render()
+    session.click("Begin Your Adventure")
+    texts = session.ui.texts()
+    assert "### 📖 Learn More" in texts
+    assert "Harappa's streets crossed at right angles." in texts
+
+
+def test_malformed_pack_is_ignored(pack_file, monkeypatch):
+    with open(pack_file, "w", encoding="utf-8") as file:
+        json.dump({"format": PACK_FORMAT, "title": "Test Lesson"}, file)
+    reads = []
+    monkeypatch.setattr(content_pack, "read_pack", lambda path: reads.append(path) or {"format": PACK_FORMAT})
+    assert get_pack(LESSON) is None
+    assert get_pack(LESSON) is None
+    # Not read again until the file changes
+    assert len(reads) == 1
+
+
+def test_quiz_with_malformed_pack_has_no_questions(pack_file):
+    with open(pack_file, "w", encoding="utf-8") as file:
+        json.dump({"format": PACK_FORMAT, "lesson_code": LESSON, "bank": {"questions": "none"}}, file)
+    session = HeadlessSession(QuizGame, {**default_game_info(QuizGame), "lesson_code": LESSON})
+    session.render()
+    assert any("no questions for this lesson yet" in text for text in session.ui.texts())
@@ -0,0 +1,30 @@
+from games import forensics
+from games.dna_detective import DNADetectiveGame
+from games.forensics import LAB_SECONDS_ENV
+from games.headless import HeadlessSession
+
+
+class _FinishedJob:
+    def __init__(self, finished_at):
+        self.finished_at = finished_at
+
+
+def test_lab_seconds_read_when_game_is_created(monkeypatch):
+    monkeypatch.setenv(LAB_SECONDS_ENV, "0.125")
+    assert HeadlessSession(DNADetectiveGame).game.analysis_delay == 0.125
+    monkeypatch.setenv(LAB_SECONDS_ENV, "0")
+    assert HeadlessSession(DNADetectiveGame).game.analysis_delay == 0.0
+
+
+def test_expired_jobs_are_dropped(monkeypatch):
+    jobs = {"running": _FinishedJob(None), "fresh": _FinishedJob(990.0), "old": _FinishedJob(100.0)}
+    monkeypatch.setattr(forensics, "_jobs", dict(jobs))
+    monkeypatch.setattr(forensics, "_jobs_swept_at", 0.0)
+    forensics._drop_expired_jobs(1000.0, ttl=600.0)
+    assert set(forensics._jobs) == {"running", "fresh"}
+    # Sweeps are spaced out, so an immediate second sweep does nothing
+    forensics._jobs["old"] = jobs["old"]
+    forensics._drop_expired_jobs(1001.0, ttl=600.0)
+    assert "old" in forensics._jobs
+    forensics._drop_expired_jobs(1100.0, ttl=600.0)
+    assert "old" not in forensics._jobs
@@ -0,0 +1,113 @@
+import random
+
+import pytest
+from streamlit.errors import DuplicateWidgetID
+
+from games import evaluation_cache
+from games.headless import HeadlessSession, HeadlessUI, OFFLINE_REPLIES
+from games.multiverse_explorer import MultiverseExplorerGame
+from games.play_scripts import PLAY_SCRIPTS, play_multiverse_explorer, play_quiz_game
+from games.quiz_game import QuizGame
+
+
+def _quiz_info(**info):
+    return {"name": "DNA Quiz Challenge", "title": "DNA", "description": "", "learning_outcomes": [],
+            "content_structure": [], "type": "quiz_game", **info}
+
+
+@pytest.mark.parametrize("game_type", sorted(PLAY_SCRIPTS))
+def test_scripted_playthrough(game_type):
+    session = HeadlessSession.for_game_type(game_type, analysis_delay=0)
+    PLAY_SCRIPTS[game_type](session, random.Random(0))
+    assert session.state.phase == "completion"
+    assert session.renders > 1
+    assert session.ui.texts()
+
+
+def test_quiz_playthrough():
+    session = HeadlessSession(QuizGame, _quiz_info(question_bank="dna_basics"))
+    play_quiz_game(session, random.Random(0))
+    state = session.state
+    assert state.phase == "completion"
+    assert len(state.answers) == len(state.question_ids) > 0
+    assert any("Quiz Complete" in text for text in session.ui.texts())
+
+
+def test_perfect_student_gets_every_point():
+    session = HeadlessSession.for_game_type("racing_game")
+    PLAY_SCRIPTS["racing_game"](session, random.Random(1), accuracy=1.0)
+    assert session.state.attempts == 1
+    assert session.state.quiz_score == len(session.state.quiz_question_ids)
+
+
+def test_llm_calls_use_offline_replies():
+    session = HeadlessSession.for_game_type("creative_writing")
+    PLAY_SCRIPTS["creative_writing"](session, random.Random(2))
+    assert session.chains["evaluation"].calls >= 1
+    assert session.state.report_score == 7
+    assert OFFLINE_REPLIES["evaluation"].split("\n")[1] in session.state.report_feedback
+
+
+def test_replies_can_be_overridden():
+    session = HeadlessSession.for_game_type("creative_writing", replies={"evaluation": "Score: 2\nToo short."})
+    PLAY_SCRIPTS["creative_writing"](session, random.Random(3))
+    assert session.state.report_score == 2
+
+
+def test_click_runs_callback_before_render():
+    ui = HeadlessUI()
+    calls = []
+    ui.start_run()
+    ui.button("Go", on_click=calls.append, args=("clicked",))
+    ui.click("Go")
+    ui.start_run()
+    assert calls == ["clicked"]
+    assert ui.button("Go")
+    ui.start_run()
+    assert not ui.button("Go")
+
+
+def test_duplicate_widgets_raise():
+    ui = HeadlessUI()
+    ui.start_run()
+    ui.button("Go")
+    with pytest.raises(DuplicateWidgetID):
+        ui.button("Go")
+
+
+def test_set_value_checks_options():
+    ui = HeadlessUI()
+    ui.start_run()
+    assert ui.radio("Pick", ["a", "b"], key="pick") == "a"
+    ui.set_value("pick", "b")
+    ui.start_run()
+    assert ui.radio("Pick", ["a", "b"], key="pick") == "b"
+    with pytest.raises(ValueError):
+        ui.set_value("pick", "c")
+
+
+def test_find_unknown_widget_raises():
+    ui = HeadlessUI()
+    ui.start_run()
+    with pytest.raises(LookupError):
+        ui.find("Nothing here")
+
+
+def test_unfinished_script_is_stopped():
+    session = HeadlessSession.for_game_type("racing_game", max_interactions=2)
+    session.render()
+    with pytest.raises(RuntimeError):
+        for _ in range(3):
+            session.click("Submit Answer")
+
+
+def test_headless_run_never_writes_the_evaluation_cache(tmp_path, monkeypatch):
+    # As the benchmarks run: from a working directory, with the cache at its default
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(evaluation_cache.EVALUATION_CACHE_ENV)
+    monkeypatch.setattr(evaluation_cache, "_cache", None)
+    session = HeadlessSession(MultiverseExplorerGame)
+    play_multiverse_explorer(session, random.Random(7))
+    assert session.state.final_report
+    assert evaluation_cache.get_evaluation_cache() is None
+    assert not (tmp_path / evaluation_cache.DEFAULT_EVALUATION_CACHE).exists()
@@ -0,0 +1,65 @@
+import bisect
+import random
+
+import pytest
+
+from games.leaderboard import Board, Leaderboard, RankedSet
+
+
+def test_ranked_set_matches_sorted():
+    rng = random.Random(0)
+    ranked, expected = RankedSet(seed=1), []
+    for _ in range(3000):
+        if expected and rng.random() < 0.4:
+            key = expected.pop(rng.randrange(len(expected)))
+            ranked.remove(key)
+        else:
+            key = (rng.randrange(100), rng.random())
+            ranked.add(key)
+            bisect.insort(expected, key)
+        assert len(ranked) == len(expected)
+    assert list(ranked.slice(0, len(ranked))) == expected
+    for start, stop in ((0, 10), (5, 50), (len(expected) - 3, len(expected) + 5), (40, 40)):
+        assert list(ranked.slice(start, stop)) == expected[start:stop]
+    for probe in ((0, 0.0), (50, 0.5), (99, 1.0)):
+        assert ranked.count_below(probe) == bisect.bisect_left(expected, probe)
+
+
+def test_remove_missing_key_raises():
+    ranked = RankedSet()
+    ranked.add(1)
+    with pytest.raises(KeyError):
+        ranked.remove(2)
+
+
+def test_board_ranks_and_ties():
+    board = Board()
+    for student_id, score in (("ann", 30), ("bob", 50), ("cat", 30), ("dan", 10)):
+        board.set_score(student_id, score)
+    assert [(s.rank, s.student_id, s.score) for s in board.top(10)] == [
+        (1, "bob", 50), (2, "ann", 30), (2, "cat", 30), (4, "dan", 10)]
+    assert board.rank("cat") == 2
+    assert board.rank("nobody") is None
+
+
+def test_board_keeps_best_score():
+    board = Board()
+    board.set_score("ann", 40)
+    board.set_score("bob", 20)
+    # Playing again starts from 0
+    board.set_score("ann", 0)
+    board.set_score("ann", 15)
+    assert board.scores["ann"] == 40
+    assert board.rank("ann") == 1
+    board.set_score("ann", 45)
+    assert board.top(1)[0].score == 45
+    assert len(board) == 2
+
+
+def test_leaderboard_batches_keep_best_score():
+    leaderboard = Leaderboard(refresh=3600)
+    leaderboard.record("quiz_game", "", "ann", 60)
+    leaderboard.record("quiz_game", "", "ann", 0)
+    assert leaderboard.apply(force=True) == 1
+    standings = leaderboard.standings("quiz_game", "", "ann")
+    assert (standings["rank"], standings["score"], standings["students"]) == (1, 60, 1)
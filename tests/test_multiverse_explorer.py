@@ -0,0 +1,104 @@
+import random
+import threading
+import time
+
+from games.headless import HeadlessSession
+from games.multiverse_explorer import MultiverseExplorerGame
+from games.play_scripts import _news_report
+from games.progress_store import STUDENT_KEY
+from games.question_bank import get_bank
+
+
+def _session(student_id=None) -> HeadlessSession:
+    """A session at the NEWS report, with the Wormhole Theory chosen"""
+    session = HeadlessSession(MultiverseExplorerGame)
+    if student_id:
+        session.ui.session_state[STUDENT_KEY] = student_id
+    game = session.game
+    session.render()
+    session.click("Start Adventure")
+    while session.state.fact_fiction_index < len(session.state.fact_fiction_ids):
+        state = session.state
+        statement = game.statement(state.fact_fiction_ids[state.fact_fiction_index])
+        session.set_value(f"fact_fiction_{statement.id}", statement.correct_option)
+        session.click("Submit Answer")
+    session.click("Continue to Theories")
+    question = get_bank(game.theory_bank)[game.theory_question_id]
+    session.set_value("Select your answer:", question.correct_option)
+    session.click("Check Answer")
+    session.click("Continue to Creative Writing")
+    session.set_value("Which scientific theory are you using to explain the phenomenon?", "Wormhole Theory")
+    return session
+
+
+def _submit(session: HeadlessSession, report: str):
+    session.set_value("Write your NEWS report here:", report)
+    session.click("Submit Report")
+
+
+def test_student_can_resubmit_after_refresh():
+    report = _news_report(random.Random(101), "Wormhole Theory")
+    first = _session("student-refresh")
+    _submit(first, report)
+    assert first.state.final_report
+
+    # A refresh starts a new browser session for the same student
+    refreshed = _session("student-refresh")
+    _submit(refreshed, report + " Everyone is talking about it.")
+    assert refreshed.state.final_report
+
+
+def test_copied_report_is_rejected():
+    report = _news_report(random.Random(202), "Wormhole Theory")
+    author = _session("student-author")
+    _submit(author, report)
+    assert author.state.final_report
+
+    copier = _session()
+    _submit(copier, report)
+    assert not copier.state.final_report
+    assert any("almost the same" in text for text in copier.ui.texts())
+
+
+def test_submit_does_not_review_the_draft():
+    session = _session()
+    _submit(session, _news_report(random.Random(303), "Wormhole Theory"))
+    assert session.state.final_report
+    assert session.chains["evaluation"].calls == 1
+    assert session.chains["review"].calls == 0
+
+
+def test_draft_is_reviewed_in_the_background():
+    release = threading.Event()
+
+    def review(inputs):
+        release.wait(5)
+        return "Add a quote from a scientist."
+
+    session = _session()
+    session.chains["review"].reply = review
+    session.set_value("Write your NEWS report here:", _news_report(random.Random(404), "Wormhole Theory"))
+    # The page is drawn while the LLM is still answering
+    session.render()
+    feedback = session.ui.session_state[f"{session.game.state_key}_draft"]
+    assert feedback.reviewing
+    assert any("reading your draft" in text for text in session.ui.texts())
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while feedback.reviewing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    session.render()
+    assert any("Add a quote from a scientist." in text for text in session.ui.texts())
+    assert session.chains["review"].calls == 1
+
+
+def test_restart_clears_the_draft():
+    session = _session()
+    _submit(session, _news_report(random.Random(505), "Wormhole Theory"))
+    session.click("See Final Results")
+    key = f"{session.game.state_key}_draft"
+    assert key in session.ui.session_state
+    session.click("Start New Adventure")
+    assert session.state.phase == "intro"
+    assert key not in session.ui.session_state
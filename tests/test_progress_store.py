@@ -0,0 +1,47 @@
+import pytest
+
+from games.progress_store import ProgressStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    # Flushes only when asked, so tests see queued saves
+    store = ProgressStore(str(tmp_path / "progress.db"), flush_interval=60, max_latest=3)
+    yield store
+    store.close()
+
+
+def test_unchanged_save_is_dropped(store):
+    assert store.save("ada", "quiz", {"score": 1})
+    assert not store.save("ada", "quiz", {"score": 1})
+    assert store.save("ada", "quiz", {"score": 2})
+
+
+def test_remembers_only_the_latest_games(store):
+    for student in range(10):
+        store.save(f"student-{student}", "quiz", {"score": student})
+    assert len(store._latest) == 3
+    assert store.flush(5)
+    for student in range(10):
+        assert store.load(f"student-{student}", "quiz") == {"score": student}
+    assert len(store._latest) == 3
+
+
+def test_forgotten_save_loads_before_it_is_written(store):
+    store.save("ada", "quiz", {"score": 5})
+    for student in range(5):
+        store.save(f"student-{student}", "quiz", {"score": student})
+    assert ("ada", "quiz") not in store._latest
+    assert store.load("ada", "quiz") == {"score": 5}
+
+
+def test_state_survives_reopening(tmp_path):
+    path = str(tmp_path / "progress.db")
+    first = ProgressStore(path)
+    first.save("ada", "quiz", {"score": 9})
+    first.close()
+    second = ProgressStore(path)
+    try:
+        assert second.load("ada", "quiz") == {"score": 9}
+    finally:
+        second.close()
@@ -0,0 +1,63 @@
+import random
+
+import pytest
+
+from games import base_game, quiz_game
+from games.headless import HeadlessSession
+from games.leaderboard import ALL_STUDENTS, Leaderboard
+from games.play_scripts import play_quiz_game
+from games.progress_store import STUDENT_KEY, ProgressStore
+from games.question_bank import QuestionBank
+from games.quiz_game import QuizGame, lesson_content
+
+
+def _quiz_info(**info):
+    return {"name": "Empty Quiz Challenge", "title": "Empty", "description": "", "learning_outcomes": [],
+            "content_structure": [], "type": "quiz_game", **info}
+
+
+@pytest.fixture
+def empty_bank(monkeypatch):
+    monkeypatch.setattr(quiz_game, "get_bank", lambda name: QuestionBank(name, "", ()))
+
+
+def test_empty_named_bank_counts_as_no_questions(empty_bank):
+    assert lesson_content(_quiz_info(question_bank="empty")) is None
+
+
+def test_empty_bank_shows_no_questions_message(empty_bank):
+    session = HeadlessSession(QuizGame, _quiz_info(question_bank="empty", lesson_code="EMPTY_1"))
+    session.render()
+    assert any("no questions for this lesson yet" in text for text in session.ui.texts())
+    with pytest.raises(LookupError):
+        session.ui.find("🚀 Start Quiz")
+
+
+def test_completion_without_questions(empty_bank):
+    session = HeadlessSession(QuizGame, _quiz_info(question_bank="empty"))
+    session.state.phase = "completion"
+    session.state.question_ids = []
+    session.render()
+    assert any("Keep Practicing" in text for text in session.ui.texts())
+
+
+def test_finished_quiz_is_saved_on_its_lessons_leaderboard(monkeypatch):
+    board = Leaderboard()
+    store = ProgressStore(":memory:")
+    monkeypatch.setattr(base_game, "get_leaderboard", lambda: board)
+    monkeypatch.setattr(base_game, "get_progress_store", lambda: store)
+    scores = {}
+    for lesson_code, accuracy in (("DNA_1", 1.0), ("DNA_2", 0.0)):
+        session = HeadlessSession(QuizGame, _quiz_info(question_bank="dna_basics", lesson_code=lesson_code))
+        session.ui.session_state[STUDENT_KEY] = "ada"
+        play_quiz_game(session, random.Random(0), accuracy)
+        assert session.state.phase == "completion"
+        scores[lesson_code] = session.state.score
+        assert store.load("ada", session.game.state_key)["phase"] == "completion"
+    store.close()
+
+    board.apply(force=True)
+    # A lower score in another lesson's quiz isn't hidden behind the first one
+    assert scores["DNA_1"] > scores["DNA_2"]
+    for lesson_code, score in scores.items():
+        assert board.standings(f"quiz_game_{lesson_code}", ALL_STUDENTS, "ada")["score"] == score
@@ -0,0 +1,98 @@
+import pytest
+
+from games.state import GameState
+from games.state_machine import PhaseMachine, Transition
+
+
+class _State(GameState):
+    __slots__ = ("phase", "score", "answers")
+
+    def __init__(self):
+        self.phase = "intro"
+        self.score = 0
+        self.answers = []
+
+
+class _Game:
+    """Context the machine looks guards and rewards up on"""
+
+    def __init__(self):
+        self.reward_calls = 0
+
+    def answered(self, state: _State) -> bool:
+        return bool(state.answers)
+
+    def quiz_points(self, state: _State) -> int:
+        self.reward_calls += 1
+        return 5 * len(state.answers)
+
+
+PHASES = {"intro": "_render_intro", "quiz": "_render_quiz", "done": "_render_done"}
+TRANSITIONS = (
+    Transition("intro", "start", "quiz", reward=1),
+    Transition("quiz", "finish", "done", guard="answered", reward="quiz_points"),
+    Transition("quiz", "skip", "done"),
+    Transition("done", "restart", "intro", reset=True),
+)
+
+
+@pytest.fixture
+def machine():
+    return PhaseMachine(PHASES, TRANSITIONS, "intro")
+
+
+def test_unknown_phases_are_rejected():
+    with pytest.raises(ValueError, match="missing"):
+        PhaseMachine(PHASES, (Transition("intro", "start", "missing"),), "intro")
+    with pytest.raises(ValueError, match="nowhere"):
+        PhaseMachine(PHASES, TRANSITIONS, "nowhere")
+
+
+def test_events_and_render_method(machine):
+    assert machine.events("quiz") == ("finish", "skip")
+    assert machine.events("intro") == ("start",)
+    assert machine.render_method("done") == "_render_done"
+
+
+def test_fire_moves_phase_and_adds_reward(machine):
+    state = _State()
+    transition = machine.fire(state, "start", _Game())
+    assert transition == TRANSITIONS[0]
+    assert (state.phase, state.score) == ("quiz", 1)
+
+
+def test_guard_blocks_transition(machine):
+    state, game = _State(), _Game()
+    machine.fire(state, "start", game)
+    assert machine.fire(state, "finish", game) is None
+    assert (state.phase, state.score) == ("quiz", 1)
+    assert game.reward_calls == 0
+
+
+def test_reward_is_applied_once(machine):
+    state, game = _State(), _Game()
+    machine.fire(state, "start", game)
+    state.answers = [0, 1]
+    assert machine.fire(state, "finish", game) is TRANSITIONS[1]
+    assert (state.phase, state.score) == ("done", 11)
+    # Firing again from the new phase matches nothing and adds nothing
+    assert machine.fire(state, "finish", game) is None
+    assert state.score == 11
+    assert game.reward_calls == 1
+
+
+def test_unknown_event_leaves_state_alone(machine):
+    state = _State()
+    assert machine.fire(state, "no_such_event", _Game()) is None
+    assert (state.phase, state.score) == ("intro", 0)
+
+
+def test_reset_transition_clears_state(machine):
+    state, game = _State(), _Game()
+    machine.fire(state, "start", game)
+    state.answers = [2]
+    machine.fire(state, "finish", game)
+    assert machine.fire(state, "restart", game).reset
+    assert state.phase == "intro"
+    assert state.score == 0
+    assert state.answers == []